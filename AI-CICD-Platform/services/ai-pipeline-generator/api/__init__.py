@@ -6,6 +6,7 @@ from fastapi import APIRouter
 
 from .optimization_api import router as optimization_router
 from .dependency_api import router as dependency_router
+from .generation_api import router as generation_router
 
 # Create a main router
 router = APIRouter()
@@ -13,3 +14,4 @@ router = APIRouter()
 # Include all sub-routers
 router.include_router(optimization_router)
 router.include_router(dependency_router)
+router.include_router(generation_router)
@@ -3,6 +3,7 @@ Dependency API for the AI Pipeline Generator service.
 This module provides API endpoints for dependency analysis.
 """
 
+import asyncio
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from typing import Dict, List, Any, Optional
@@ -13,6 +14,7 @@ from ..services.package_analyzer import PackageAnalyzerService
 from ..services.graph_visualizer import GraphVisualizerService
 from ..services.impact_analyzer import ImpactAnalyzerService
 from ..services.build_optimizer import BuildOptimizerService
+from ..services.graph_store import DependencyGraphStore
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +32,7 @@ package_analyzer = PackageAnalyzerService()
 graph_visualizer = GraphVisualizerService()
 impact_analyzer = ImpactAnalyzerService()
 build_optimizer = BuildOptimizerService()
+graph_store = DependencyGraphStore(dependency_analyzer=dependency_analyzer)
 
 @router.post("/analyze")
 async def analyze_dependencies(
@@ -120,7 +123,7 @@ async def analyze_package_dependencies(
     """
     try:
         # Analyze package dependencies
-        package_dependencies = package_analyzer.analyze_project_dependencies(project_path)
+        package_dependencies = await package_analyzer.analyze_project_dependencies_async(project_path)
         
         # Return result
         return {
@@ -138,14 +141,16 @@ async def visualize_dependencies(
     include_node_types: Optional[List[str]] = Body(None, description="List of node types to include"),
     include_edge_types: Optional[List[str]] = Body(None, description="List of edge types to include"),
     group_by: Optional[str] = Body(None, description="Attribute to group nodes by"),
-    max_nodes: int = Body(100, description="Maximum number of nodes to include")
+    max_nodes: int = Body(100, description="Maximum number of nodes to include"),
+    cluster_by: Optional[str] = Body(None, description="Aggregate nodes into clusters by directory, package, scc or type"),
+    expand: Optional[List[str]] = Body(None, description="IDs of clusters to drill down into")
 ) -> Dict[str, Any]:
     """
     Visualize dependencies in a project.
     """
     try:
-        # Analyze dependencies
-        dependency_graph = dependency_analyzer.analyze_project(project_path)
+        # Get the project's warm dependency graph, so cached layouts are reused
+        dependency_graph = await asyncio.to_thread(graph_store.get_graph, project_path)
         
         # Visualize graph
         visualization_data = graph_visualizer.visualize_graph(
@@ -155,15 +160,55 @@ async def visualize_dependencies(
             include_node_types=include_node_types,
             include_edge_types=include_edge_types,
             group_by=group_by,
-            max_nodes=max_nodes
+            max_nodes=max_nodes,
+            cluster_by=cluster_by,
+            expand=expand
         )
         
         # Return result
         return visualization_data
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error visualizing dependencies: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/visualize/tile")
+async def visualize_dependencies_tile(
+    project_path: str = Body(..., description="Path to the project directory"),
+    zoom: int = Body(0, description="Zoom level, 0 for the whole graph in one tile"),
+    x: int = Body(0, description="Tile column"),
+    y: int = Body(0, description="Tile row"),
+    cluster_by: str = Body("directory", description="Cluster nodes by directory, package, scc or type"),
+    layout: str = Body("layered", description="Layout algorithm to use"),
+    include_node_types: Optional[List[str]] = Body(None, description="List of node types to include"),
+    include_edge_types: Optional[List[str]] = Body(None, description="List of edge types to include")
+) -> Dict[str, Any]:
+    """
+    Get one tile of a level-of-detail view of a project's dependencies.
+    """
+    try:
+        # Get the project's warm dependency graph, so cached layouts are reused
+        dependency_graph = await asyncio.to_thread(graph_store.get_graph, project_path)
+        
+        # Get tile, off the event loop as the first tile of a level lays it out
+        return await asyncio.to_thread(
+            graph_visualizer.get_tile,
+            dependency_graph,
+            zoom,
+            x,
+            y,
+            cluster_by=cluster_by,
+            layout=layout,
+            include_node_types=include_node_types,
+            include_edge_types=include_edge_types
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error visualizing dependencies tile: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/impact")
 async def analyze_impact(
     project_path: str = Body(..., description="Path to the project directory"),
@@ -173,8 +218,8 @@ async def analyze_impact(
     Analyze the impact of changes to files.
     """
     try:
-        # Analyze dependencies
-        dependency_graph = dependency_analyzer.analyze_project(project_path)
+        # Get the warm dependency graph of the project's checkout
+        dependency_graph = await asyncio.to_thread(graph_store.get_graph, project_path)
         
         # Analyze impact
         impact_analysis = impact_analyzer.analyze_impact(
@@ -192,19 +237,21 @@ async def analyze_impact(
 @router.post("/build-order")
 async def optimize_build_order(
     project_path: str = Body(..., description="Path to the project directory"),
-    changed_files: Optional[List[str]] = Body(None, description="List of files that have been changed")
+    changed_files: Optional[List[str]] = Body(None, description="List of files that have been changed"),
+    durations: Optional[Dict[str, float]] = Body(None, description="Map of node ID to job duration in seconds")
 ) -> Dict[str, Any]:
     """
     Optimize the build order based on dependencies.
     """
     try:
-        # Analyze dependencies
-        dependency_graph = dependency_analyzer.analyze_project(project_path)
+        # Get the warm dependency graph of the project's checkout
+        dependency_graph = await asyncio.to_thread(graph_store.get_graph, project_path)
         
         # Optimize build order
         build_order = build_optimizer.optimize_build_order(
             dependency_graph,
-            changed_files
+            changed_files,
+            durations
         )
         
         # Return result
@@ -213,10 +260,33 @@ async def optimize_build_order(
         logger.error(f"Error optimizing build order: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/graph/delta")
+async def update_dependency_graph(
+    project_path: str = Body(..., description="Path to the project directory"),
+    changed_files: List[str] = Body(..., description="List of files that have been added, modified or deleted")
+) -> Dict[str, Any]:
+    """
+    Update the stored dependency graph of a project for changed files.
+    """
+    try:
+        # Patch the stored graph
+        dependency_graph = await asyncio.to_thread(graph_store.apply_delta, project_path, changed_files)
+        
+        # Return result
+        return {
+            "nodes": len(dependency_graph.get_all_nodes()),
+            "edges": len(dependency_graph.get_all_edges())
+        }
+    except Exception as e:
+        logger.error(f"Error updating dependency graph: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/parallel-execution")
 async def optimize_parallel_execution(
     project_path: str = Body(..., description="Path to the project directory"),
-    max_parallel_jobs: int = Body(4, description="Maximum number of parallel jobs to run")
+    max_parallel_jobs: int = Body(4, description="Maximum number of parallel jobs to run"),
+    durations: Optional[Dict[str, float]] = Body(None, description="Map of node ID to job duration in seconds"),
+    runners: Optional[List[Dict[str, float]]] = Body(None, description="Resource capacities of each runner")
 ) -> Dict[str, Any]:
     """
     Optimize parallel execution of build jobs.
@@ -228,11 +298,15 @@ async def optimize_parallel_execution(
         # Optimize parallel execution
         parallel_execution = build_optimizer.optimize_parallel_execution(
             dependency_graph,
-            max_parallel_jobs
+            max_parallel_jobs,
+            durations,
+            runners
         )
         
         # Return result
         return parallel_execution
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error optimizing parallel execution: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,123 @@
+"""
+API endpoints for pipeline generation.
+This module provides API endpoints for generating CI/CD pipelines, including a streaming variant.
+"""
+
+import json
+from typing import Dict, Any, Optional, List, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+router = APIRouter(prefix="/generate", tags=["generation"])
+
+# Models
+class GenerationRequest(BaseModel):
+    """Pipeline generation request model."""
+    
+    description: str = Field(..., description="Natural language description of the desired pipeline")
+    platform: str = Field("github-actions", description="The CI/CD platform")
+    template_vars: Optional[Dict[str, Any]] = Field(None, description="Additional variables for pipeline customization")
+    template_name: Optional[str] = Field(None, description="Name of a predefined template to use")
+    optimize: bool = Field(False, description="Whether to optimize the generated pipeline")
+    optimizations: Optional[List[str]] = Field(None, description="Specific optimizations to apply")
+
+# Shared service, so all requests use the same generation cache
+generator_service = None
+
+# Dependencies
+def get_pipeline_generator_service():
+    """Get pipeline generator service."""
+    global generator_service
+    if generator_service is None:
+        # Created on first use, as it needs the OpenAI client
+        from services.pipeline_generator import PipelineGeneratorService
+        generator_service = PipelineGeneratorService()
+    return generator_service
+
+def format_sse(event: str, data: Any) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Endpoints
+@router.post("")
+async def generate_pipeline(
+    request: GenerationRequest,
+    generator: Any = Depends(get_pipeline_generator_service)
+):
+    """
+    Generate a pipeline configuration.
+    
+    This endpoint generates a pipeline configuration from a description or a predefined template.
+    """
+    try:
+        return await generator.generate_pipeline(
+            request.description,
+            request.platform,
+            request.template_vars,
+            request.template_name,
+            request.optimize,
+            request.optimizations
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating pipeline: {str(e)}")
+
+@router.post("/stream")
+async def stream_pipeline(
+    request: GenerationRequest,
+    generator: Any = Depends(get_pipeline_generator_service)
+):
+    """
+    Generate a pipeline configuration, streaming the output as server-sent events.
+    
+    This endpoint sends "token" events as the model generates, "section" events as
+    documents and jobs are validated, and ends with a "complete" or "error" event.
+    Generation stops as soon as the output is invalid or the client disconnects.
+    """
+    if request.platform not in generator.settings.SUPPORTED_PLATFORMS:
+        raise HTTPException(status_code=400, detail=f"Unsupported platform: {request.platform}")
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            if request.template_name:
+                # Templates are applied at once, so there is nothing to stream
+                result = await generator.generate_pipeline(
+                    request.description,
+                    request.platform,
+                    request.template_vars,
+                    request.template_name,
+                    request.optimize,
+                    request.optimizations
+                )
+                yield format_sse("complete", result)
+                return
+
+            async for event in generator.stream_pipeline(
+                request.description,
+                request.platform,
+                request.template_vars,
+                request.optimize,
+                request.optimizations
+            ):
+                yield format_sse(event["event"], event["data"])
+        except Exception as e:
+            yield format_sse("error", {"message": f"Error generating pipeline: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache/metrics")
+async def get_cache_metrics(
+    generator: Any = Depends(get_pipeline_generator_service)
+):
+    """
+    Get generation cache metrics.
+    
+    This endpoint returns the hit, miss and eviction counts of the generation cache and the tokens it saved.
+    """
+    return generator.get_cache_metrics()
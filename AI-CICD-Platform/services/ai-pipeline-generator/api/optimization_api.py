@@ -3,8 +3,12 @@ API endpoints for pipeline optimization services.
 This module provides API endpoints for optimizing CI/CD pipelines.
 """
 
-from typing import Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+import json
+import asyncio
+from typing import Dict, Any, Optional, List, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from services.pipeline_optimizer import PipelineOptimizerService
@@ -12,7 +16,9 @@ from services.performance_profiler import PerformanceProfilerService
 from services.parallel_execution_optimizer import ParallelExecutionOptimizerService
 from services.resource_optimizer import ResourceOptimizerService
 from services.cache_optimizer import CacheOptimizerService
+from services.batch_optimizer import BatchOptimizerService, load_pipelines_from_archive, MAX_ARCHIVE_SIZE
 from models.optimization_metrics import OptimizationMetricsRepository
+from models.job_durations import JobDurationStore
 
 router = APIRouter(prefix="/optimization", tags=["optimization"])
 
@@ -33,6 +39,13 @@ class OptimizationResponse(BaseModel):
     optimized_config: Dict[str, Any] = Field(..., description="The optimized pipeline configuration")
     optimization_details: Dict[str, Any] = Field(..., description="Optimization details")
 
+class BatchRequest(BaseModel):
+    """Batch optimization request model."""
+    
+    pipelines: List[PipelineConfig] = Field(..., description="The pipelines to process")
+    mode: str = Field("optimize", description="\"optimize\" or \"analyze\"")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Maximum number of pipelines processed at a time")
+
 class AnalysisResponse(BaseModel):
     """Analysis response model."""
     
@@ -40,30 +53,46 @@ class AnalysisResponse(BaseModel):
     platform: str = Field(..., description="The CI/CD platform")
     analysis_results: Dict[str, Any] = Field(..., description="Analysis results")
 
+# Shared stores, so their logs are loaded once rather than on every request
+# and one instance appends to and compacts each file
+metrics_repository = OptimizationMetricsRepository()
+duration_store = JobDurationStore()
+
+# Shared batch service, so requests share one process pool
+batch_optimizer_service = None
+
 # Dependencies
 def get_pipeline_optimizer_service():
     """Get pipeline optimizer service."""
-    return PipelineOptimizerService()
+    return PipelineOptimizerService(metrics_repository, duration_store)
 
 def get_performance_profiler_service():
     """Get performance profiler service."""
-    return PerformanceProfilerService()
+    return PerformanceProfilerService(metrics_repository, duration_store)
 
 def get_parallel_execution_optimizer_service():
     """Get parallel execution optimizer service."""
-    return ParallelExecutionOptimizerService()
+    return ParallelExecutionOptimizerService(metrics_repository)
 
 def get_resource_optimizer_service():
     """Get resource optimizer service."""
-    return ResourceOptimizerService()
+    return ResourceOptimizerService(metrics_repository)
 
 def get_cache_optimizer_service():
     """Get cache optimizer service."""
-    return CacheOptimizerService()
+    return CacheOptimizerService(metrics_repository)
+
+def get_batch_optimizer_service():
+    """Get batch optimizer service."""
+    global batch_optimizer_service
+    if batch_optimizer_service is None:
+        # Created on first use, so the worker processes only start when needed
+        batch_optimizer_service = BatchOptimizerService(metrics_repository, duration_store)
+    return batch_optimizer_service
 
 def get_optimization_metrics_repository():
     """Get optimization metrics repository."""
-    return OptimizationMetricsRepository()
+    return metrics_repository
 
 # Endpoints
 @router.post("/optimize", response_model=OptimizationResponse)
@@ -241,10 +270,79 @@ async def optimize_caching_strategies(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error optimizing caching strategies: {str(e)}")
 
+async def stream_ndjson(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Format events as newline-delimited JSON."""
+    async for event in events:
+        yield json.dumps(jsonable_encoder(event), default=str) + "\n"
+
+@router.post("/batch")
+async def optimize_batch(
+    batch_request: BatchRequest,
+    batch_service: BatchOptimizerService = Depends(get_batch_optimizer_service)
+):
+    """
+    Optimize or analyze many pipelines.
+    
+    This endpoint processes the pipelines in worker processes and streams a
+    newline-delimited JSON event per finished pipeline, in completion order,
+    with progress counts, followed by a summary. A failing pipeline is
+    reported in its event and does not stop the batch.
+    """
+    if batch_request.mode not in ("optimize", "analyze"):
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {batch_request.mode}")
+    
+    pipelines = [pipeline.dict() for pipeline in batch_request.pipelines]
+    return StreamingResponse(
+        stream_ndjson(batch_service.process_batch(pipelines, batch_request.mode, batch_request.max_concurrency)),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/batch/archive")
+async def optimize_archive(
+    request: Request,
+    platform: Optional[str] = Query(None, description="Platform of all pipelines; detected from the file paths if omitted"),
+    mode: str = Query("optimize", description="\"optimize\" or \"analyze\""),
+    batch_service: BatchOptimizerService = Depends(get_batch_optimizer_service)
+):
+    """
+    Optimize or analyze the pipeline files in a tar archive.
+    
+    This endpoint reads the pipelines from a tar archive sent as the request
+    body, of at most MAX_ARCHIVE_SIZE bytes, and streams results like the
+    batch endpoint. Files that cannot be parsed are reported as failed
+    pipelines.
+    """
+    if mode not in ("optimize", "analyze"):
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
+    
+    too_large = HTTPException(status_code=413, detail=f"Archive is larger than {MAX_ARCHIVE_SIZE} bytes")
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_ARCHIVE_SIZE:
+        raise too_large
+    
+    data = bytearray()
+    async for chunk in request.stream():
+        data.extend(chunk)
+        if len(data) > MAX_ARCHIVE_SIZE:
+            raise too_large
+    
+    try:
+        # Decompressing and parsing the archive would block the event loop
+        pipelines = await asyncio.to_thread(load_pipelines_from_archive, bytes(data), platform)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        stream_ndjson(batch_service.process_batch(pipelines, mode)),
+        media_type="application/x-ndjson"
+    )
+
 @router.get("/metrics/{pipeline_id}")
 async def get_optimization_metrics(
     pipeline_id: str,
     optimization_type: Optional[str] = Query(None, description="Filter by optimization type"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of results to return"),
     metrics_repository: OptimizationMetricsRepository = Depends(get_optimization_metrics_repository)
 ):
     """
@@ -255,12 +353,16 @@ async def get_optimization_metrics(
     try:
         results = metrics_repository.list_optimization_results(
             pipeline_id=pipeline_id,
-            optimization_type=optimization_type
+            optimization_type=optimization_type,
+            offset=offset,
+            limit=limit
         )
         
         return {
             "pipeline_id": pipeline_id,
             "optimization_type": optimization_type,
+            "total": metrics_repository.count_optimization_results(pipeline_id, optimization_type),
+            "offset": offset,
             "results": [result.to_dict() for result in results]
         }
     except Exception as e:
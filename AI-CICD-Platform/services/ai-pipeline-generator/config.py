@@ -4,7 +4,13 @@ Configuration settings for the AI Pipeline Generator service.
 
 import os
 from typing import Dict, Any, Optional, List
-from pydantic import BaseSettings, Field
+from pydantic import Field
+
+try:
+    from pydantic_settings import BaseSettings
+except ImportError:
+    # pydantic 1.x ships BaseSettings itself
+    from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     """Settings for the AI Pipeline Generator service."""
@@ -24,6 +30,12 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = Field(default="postgres", env="DB_PASSWORD")
     DB_NAME: str = Field(default="pipeline_generator", env="DB_NAME")
     
+    # OpenAI settings
+    OPENAI_API_KEY: str = Field(default="", env="OPENAI_API_KEY")
+    OPENAI_MODEL: str = Field(default="gpt-4", env="OPENAI_MODEL")
+    OPENAI_TEMPERATURE: float = Field(default=0.2, env="OPENAI_TEMPERATURE")
+    OPENAI_MAX_TOKENS: int = Field(default=2000, env="OPENAI_MAX_TOKENS")
+    
     # Optimization settings
     OPTIMIZATION_METRICS_STORAGE_PATH: str = Field(
         default="data/optimization_metrics.json",
@@ -94,3 +106,20 @@ class Settings(BaseSettings):
 
 # Create settings instance
 settings = Settings()
+
+def get_settings() -> Settings:
+    """Get the service settings."""
+    return settings
+
+# Prompts for AI pipeline generation
+PIPELINE_SYSTEM_PROMPT = """You are an expert DevOps engineer who writes CI/CD pipeline configurations.
+Reply with a single complete configuration for the requested platform in one fenced code block.
+Use the platform's current syntax, pin action and image versions, cache dependencies,
+run independent jobs in parallel and never hard-code secrets."""
+
+PIPELINE_USER_PROMPT = """Create a {platform} pipeline configuration for the following requirements:
+
+{description}
+
+Use these variables where they apply:
+{template_vars}"""
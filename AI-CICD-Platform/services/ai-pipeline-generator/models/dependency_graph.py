@@ -4,9 +4,17 @@ This module provides the data structures for representing dependency graphs.
 """
 
 import json
-from typing import Dict, List, Set, Any, Optional, Tuple, Union
+import sys
+from array import array
+from collections import deque
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Set, Any, Optional, Tuple, Union, Iterator, Iterable
 from enum import Enum, auto
 
+import msgpack
+
+from .reachability import ReachabilityIndex
+
 class NodeType(str, Enum):
     """
     Enum for node types.
@@ -133,21 +141,304 @@ class DependencyMetadata:
             attributes=data.get("attributes", {})
         )
 
+class MetadataColumns:
+    """
+    Columnar storage for metadata dictionaries.
+    
+    Well-known keys are stored one list per key, with a per-row bitmask of
+    which keys were present; any other keys go to a per-row overflow dict.
+    Rows are rebuilt into dictionaries on access.
+    """
+    
+    __slots__ = ("keys", "key_set", "columns", "present", "extra")
+    
+    def __init__(self, keys: Tuple[str, ...]):
+        """
+        Initialize metadata columns.
+        
+        Args:
+            keys: Well-known keys stored in their own columns (at most 8)
+        """
+        self.keys = keys
+        self.key_set = frozenset(keys)
+        self.columns: List[List[Any]] = [[] for _ in keys]
+        self.present = bytearray()
+        self.extra: List[Optional[Dict[str, Any]]] = []
+    
+    def append(self, metadata: Dict[str, Any]) -> int:
+        """
+        Append a row.
+        
+        Args:
+            metadata: Metadata dictionary
+            
+        Returns:
+            Row index
+        """
+        mask = 0
+        for bit, (key, column) in enumerate(zip(self.keys, self.columns)):
+            if key in metadata:
+                mask |= 1 << bit
+                column.append(metadata[key])
+            else:
+                column.append(None)
+        self.present.append(mask)
+        self.extra.append(self._extra(metadata))
+        
+        return len(self.present) - 1
+    
+    def set(self, row: int, metadata: Dict[str, Any]) -> None:
+        """
+        Replace a row.
+        
+        Args:
+            row: Row index
+            metadata: Metadata dictionary
+        """
+        mask = 0
+        for bit, (key, column) in enumerate(zip(self.keys, self.columns)):
+            if key in metadata:
+                mask |= 1 << bit
+                column[row] = metadata[key]
+            else:
+                column[row] = None
+        self.present[row] = mask
+        self.extra[row] = self._extra(metadata)
+    
+    def _extra(self, metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if metadata.keys() <= self.key_set:
+            return None
+        return {key: value for key, value in metadata.items() if key not in self.key_set}
+    
+    def get(self, row: int) -> Dict[str, Any]:
+        """
+        Rebuild a row as a dictionary.
+        
+        Args:
+            row: Row index
+            
+        Returns:
+            Metadata dictionary
+        """
+        mask = self.present[row]
+        metadata = {}
+        for bit, (key, column) in enumerate(zip(self.keys, self.columns)):
+            if mask & (1 << bit):
+                metadata[key] = column[row]
+        
+        extra = self.extra[row]
+        if extra:
+            metadata.update(extra)
+        
+        return metadata
+    
+    def clear(self, row: int) -> None:
+        """
+        Release the values of a row.
+        
+        Args:
+            row: Row index
+        """
+        for column in self.columns:
+            column[row] = None
+        self.present[row] = 0
+        self.extra[row] = None
+    
+    def compact(self, rows: List[int]) -> 'MetadataColumns':
+        """
+        Copy the given rows into new columns.
+        
+        Args:
+            rows: Row indices to keep, in order
+            
+        Returns:
+            New MetadataColumns instance
+        """
+        compacted = MetadataColumns(self.keys)
+        compacted.columns = [[column[row] for row in rows] for column in self.columns]
+        compacted.present = bytearray(self.present[row] for row in rows)
+        compacted.extra = [self.extra[row] for row in rows]
+        return compacted
+
+class NodeIdView(Sequence):
+    """
+    Read-only sequence of node IDs backed by a slice of an adjacency array.
+    
+    Views are snapshots: the graph builds new arrays when it changes, so a
+    view keeps returning the neighbours it was created with.
+    """
+    
+    __slots__ = ("_ids", "_indices")
+    
+    def __init__(self, ids: List[str], indices: Union[memoryview, Sequence]):
+        """
+        Initialize the view.
+        
+        Args:
+            ids: Node IDs by node index
+            indices: Node indices in the view
+        """
+        self._ids = ids
+        self._indices = indices
+    
+    def __len__(self) -> int:
+        return len(self._indices)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return NodeIdView(self._ids, self._indices[index])
+        return self._ids[self._indices[index]]
+    
+    def __iter__(self) -> Iterator[str]:
+        return map(self._ids.__getitem__, self._indices)
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (NodeIdView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return f"NodeIdView({list(self)!r})"
+
+EMPTY_VIEW = NodeIdView([], ())
+
+class NodeMapping(Mapping):
+    """
+    Dict-compatible read-only view of the nodes of a graph.
+    
+    Maps node IDs to metadata dictionaries built from the metadata columns.
+    """
+    
+    __slots__ = ("_graph",)
+    
+    def __init__(self, graph: 'DependencyGraph'):
+        self._graph = graph
+    
+    def __getitem__(self, node_id: str) -> Dict[str, Any]:
+        node = self._graph.get_node(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        return node
+    
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._graph._index
+    
+    def __iter__(self) -> Iterator[str]:
+        return self._graph.iter_nodes()
+    
+    def __len__(self) -> int:
+        return len(self._graph._index)
+    
+    def __repr__(self) -> str:
+        return f"NodeMapping({dict(self)!r})"
+
+class AdjacencyMapping(Mapping):
+    """
+    Dict-compatible read-only view of adjacency.
+    
+    Forward adjacency maps each node ID to a mapping of target node ID to
+    edge metadata (the shape of the former ``edges`` dict); reverse
+    adjacency maps each node ID to a view of its dependents.
+    """
+    
+    __slots__ = ("_graph", "_reverse")
+    
+    def __init__(self, graph: 'DependencyGraph', reverse: bool = False):
+        self._graph = graph
+        self._reverse = reverse
+    
+    def __getitem__(self, node_id: str):
+        if node_id not in self._graph._index:
+            raise KeyError(node_id)
+        if self._reverse:
+            return self._graph.get_dependents(node_id)
+        return {
+            target_id: self._graph.get_edge(node_id, target_id)
+            for target_id in self._graph.get_dependencies(node_id)
+        }
+    
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._graph._index
+    
+    def __iter__(self) -> Iterator[str]:
+        return self._graph.iter_nodes()
+    
+    def __len__(self) -> int:
+        return len(self._graph._index)
+
 class DependencyGraph:
     """
     Dependency graph for representing dependencies between nodes.
+    
+    Node IDs are interned to integer indices. Node and edge metadata are
+    stored in columns, and forward and reverse adjacency are kept as
+    compressed sparse row (CSR) arrays that are rebuilt lazily, in one
+    O(V + E) pass, after the graph changes. ``nodes``, ``edges`` and
+    ``reverse_edges`` are dict-compatible views over that storage.
     """
     
+    NODE_KEYS = ("type", "language", "path", "attributes")
+    EDGE_KEYS = ("type", "is_direct", "attributes")
+    
     def __init__(self):
         """Initialize dependency graph."""
-        # Map of node ID to node metadata
-        self.nodes: Dict[str, Dict[str, Any]] = {}
+        # Node ID of each node index; removed nodes keep their slot
+        self._ids: List[str] = []
+        
+        # Map of live node ID to node index
+        self._index: Dict[str, int] = {}
+        
+        # 1 for live node indices, 0 for removed ones
+        self._alive = bytearray()
+        
+        # Node metadata, one row per node index
+        self._node_metadata = MetadataColumns(self.NODE_KEYS)
         
-        # Map of source node ID to map of target node ID to edge metadata
-        self.edges: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Edge list: one row per edge, including removed edges until compaction
+        self._edge_sources = array("i")
+        self._edge_targets = array("i")
+        self._edge_alive = bytearray()
+        self._edge_metadata = MetadataColumns(self.EDGE_KEYS)
         
-        # Map of target node ID to set of source node IDs
-        self.reverse_edges: Dict[str, Set[str]] = {}
+        # Map of (source index << 32 | target index) to edge row
+        self._edge_rows: Dict[int, int] = {}
+        
+        # CSR adjacency, rebuilt on demand after changes:
+        # (forward offsets, forward targets, reverse offsets, reverse sources)
+        self._csr: Optional[Tuple[array, memoryview, array, memoryview]] = None
+        
+        # Reachability indexes over the current CSR: (forward, reverse)
+        self._reachability: List[Optional[ReachabilityIndex]] = [None, None]
+        self._reachability_csr = None
+        
+        # Incremented on every change, so derived data can be cached per version
+        self._version = 0
+    
+    @staticmethod
+    def _edge_key(source: int, target: int) -> int:
+        return (source << 32) | target
+    
+    @property
+    def version(self) -> int:
+        """Number of changes made to the nodes, edges or their metadata."""
+        return self._version
+    
+    @property
+    def nodes(self) -> NodeMapping:
+        """Map of node ID to node metadata."""
+        return NodeMapping(self)
+    
+    @property
+    def edges(self) -> AdjacencyMapping:
+        """Map of source node ID to map of target node ID to edge metadata."""
+        return AdjacencyMapping(self)
+    
+    @property
+    def reverse_edges(self) -> AdjacencyMapping:
+        """Map of target node ID to the source node IDs that depend on it."""
+        return AdjacencyMapping(self, reverse=True)
     
     def add_node(self, node_id: str, metadata: Union[NodeMetadata, Dict[str, Any]]) -> None:
         """
@@ -161,16 +452,20 @@ class DependencyGraph:
         if isinstance(metadata, NodeMetadata):
             metadata = metadata.to_dict()
         
-        # Add node
-        self.nodes[node_id] = metadata
+        self._version += 1
         
-        # Initialize edges
-        if node_id not in self.edges:
-            self.edges[node_id] = {}
+        # Update an existing node in place
+        index = self._index.get(node_id)
+        if index is not None:
+            self._node_metadata.set(index, metadata)
+            return
         
-        # Initialize reverse edges
-        if node_id not in self.reverse_edges:
-            self.reverse_edges[node_id] = set()
+        # Intern the node ID
+        self._index[node_id] = len(self._ids)
+        self._ids.append(node_id)
+        self._alive.append(1)
+        self._node_metadata.append(metadata)
+        self._csr = None
     
     def add_edge(self, source_id: str, target_id: str, metadata: Union[DependencyMetadata, Dict[str, Any]]) -> None:
         """
@@ -182,52 +477,52 @@ class DependencyGraph:
             metadata: Metadata for the edge
         """
         # Add nodes if they don't exist
-        if source_id not in self.nodes:
+        if source_id not in self._index:
             self.add_node(source_id, NodeMetadata())
         
-        if target_id not in self.nodes:
+        if target_id not in self._index:
             self.add_node(target_id, NodeMetadata())
         
         # Convert metadata to dictionary if needed
         if isinstance(metadata, DependencyMetadata):
             metadata = metadata.to_dict()
         
-        # Add edge
-        self.edges[source_id][target_id] = metadata
+        source = self._index[source_id]
+        target = self._index[target_id]
+        key = self._edge_key(source, target)
+        self._version += 1
+        
+        # Replace the metadata of an existing edge
+        row = self._edge_rows.get(key)
+        if row is not None:
+            self._edge_metadata.set(row, metadata)
+            return
         
-        # Add reverse edge
-        self.reverse_edges[target_id].add(source_id)
+        # Add edge
+        self._edge_rows[key] = len(self._edge_alive)
+        self._edge_sources.append(source)
+        self._edge_targets.append(target)
+        self._edge_alive.append(1)
+        self._edge_metadata.append(metadata)
+        self._csr = None
     
     def remove_node(self, node_id: str) -> None:
         """
         Remove a node from the graph.
         
+        Edges of the node are dropped the next time adjacency is rebuilt.
+        
         Args:
             node_id: ID of the node to remove
         """
-        # Remove node
-        if node_id in self.nodes:
-            del self.nodes[node_id]
+        index = self._index.pop(node_id, None)
+        if index is None:
+            return
         
-        # Remove outgoing edges
-        if node_id in self.edges:
-            # Remove reverse edges
-            for target_id in self.edges[node_id]:
-                if target_id in self.reverse_edges:
-                    self.reverse_edges[target_id].discard(node_id)
-            
-            # Remove edges
-            del self.edges[node_id]
-        
-        # Remove incoming edges
-        if node_id in self.reverse_edges:
-            # Remove edges
-            for source_id in self.reverse_edges[node_id]:
-                if source_id in self.edges and node_id in self.edges[source_id]:
-                    del self.edges[source_id][node_id]
-            
-            # Remove reverse edges
-            del self.reverse_edges[node_id]
+        self._alive[index] = 0
+        self._node_metadata.clear(index)
+        self._csr = None
+        self._version += 1
     
     def remove_edge(self, source_id: str, target_id: str) -> None:
         """
@@ -237,13 +532,19 @@ class DependencyGraph:
             source_id: ID of the source node
             target_id: ID of the target node
         """
-        # Remove edge
-        if source_id in self.edges and target_id in self.edges[source_id]:
-            del self.edges[source_id][target_id]
+        source = self._index.get(source_id)
+        target = self._index.get(target_id)
+        if source is None or target is None:
+            return
+        
+        row = self._edge_rows.pop(self._edge_key(source, target), None)
+        if row is None:
+            return
         
-        # Remove reverse edge
-        if target_id in self.reverse_edges:
-            self.reverse_edges[target_id].discard(source_id)
+        self._edge_alive[row] = 0
+        self._edge_metadata.clear(row)
+        self._csr = None
+        self._version += 1
     
     def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -255,7 +556,11 @@ class DependencyGraph:
         Returns:
             Node metadata, or None if not found
         """
-        return self.nodes.get(node_id)
+        index = self._index.get(node_id)
+        if index is None:
+            return None
+        
+        return self._node_metadata.get(index)
     
     def get_edge(self, source_id: str, target_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -268,12 +573,18 @@ class DependencyGraph:
         Returns:
             Edge metadata, or None if not found
         """
-        if source_id in self.edges and target_id in self.edges[source_id]:
-            return self.edges[source_id][target_id]
+        source = self._index.get(source_id)
+        target = self._index.get(target_id)
+        if source is None or target is None:
+            return None
+        
+        row = self._edge_rows.get(self._edge_key(source, target))
+        if row is None:
+            return None
         
-        return None
+        return self._edge_metadata.get(row)
     
-    def get_dependencies(self, node_id: str) -> List[str]:
+    def get_dependencies(self, node_id: str) -> NodeIdView:
         """
         Get dependencies of a node.
         
@@ -281,14 +592,16 @@ class DependencyGraph:
             node_id: ID of the node
             
         Returns:
-            List of node IDs that the given node depends on
+            View of node IDs that the given node depends on
         """
-        if node_id in self.edges:
-            return list(self.edges[node_id].keys())
+        index = self._index.get(node_id)
+        if index is None:
+            return EMPTY_VIEW
         
-        return []
+        offsets, targets, _, _ = self._adjacency()
+        return NodeIdView(self._ids, targets[offsets[index]:offsets[index + 1]])
     
-    def get_dependents(self, node_id: str) -> List[str]:
+    def get_dependents(self, node_id: str) -> NodeIdView:
         """
         Get dependents of a node.
         
@@ -296,22 +609,116 @@ class DependencyGraph:
             node_id: ID of the node
             
         Returns:
-            List of node IDs that depend on the given node
+            View of node IDs that depend on the given node
+        """
+        index = self._index.get(node_id)
+        if index is None:
+            return EMPTY_VIEW
+        
+        _, _, offsets, sources = self._adjacency()
+        return NodeIdView(self._ids, sources[offsets[index]:offsets[index + 1]])
+    
+    def get_all_dependencies(self, node_ids: Union[str, Iterable[str]]) -> Set[str]:
+        """
+        Get the direct and indirect dependencies of one or more nodes.
+        
+        Args:
+            node_ids: ID of a node, or IDs of several nodes to query at once
+            
+        Returns:
+            Set of node IDs that any of the given nodes depends on. A given
+            node is only included if it depends on itself through a cycle.
         """
-        if node_id in self.reverse_edges:
-            return list(self.reverse_edges[node_id])
+        return self._reachable(node_ids, reverse=False)
+    
+    def get_all_dependents(self, node_ids: Union[str, Iterable[str]]) -> Set[str]:
+        """
+        Get the direct and indirect dependents of one or more nodes.
+        
+        Args:
+            node_ids: ID of a node, or IDs of several nodes to query at once
+            
+        Returns:
+            Set of node IDs that depend on any of the given nodes. A given
+            node is only included if it depends on itself through a cycle.
+        """
+        return self._reachable(node_ids, reverse=True)
+    
+    def _reachable(self, node_ids: Union[str, Iterable[str]], reverse: bool) -> Set[str]:
+        """
+        Answer a transitive query with the reachability index of one direction.
+        
+        Args:
+            node_ids: ID of a node, or IDs of several nodes
+            reverse: Whether to follow edges from dependencies to dependents
+            
+        Returns:
+            Set of reachable node IDs
+        """
+        if isinstance(node_ids, str):
+            node_ids = [node_ids]
+        indices = [self._index[node_id] for node_id in node_ids if node_id in self._index]
+        if not indices:
+            return set()
+        
+        return self._reachability_index(reverse).reachable(indices)
+    
+    def _reachability_index(self, reverse: bool) -> ReachabilityIndex:
+        """
+        Get the reachability index of one direction, rebuilding it if the graph changed.
+        
+        Args:
+            reverse: Whether to follow edges from dependencies to dependents
+            
+        Returns:
+            Reachability index
+        """
+        csr = self._adjacency()
+        if self._reachability_csr is not csr:
+            self._reachability = [None, None]
+            self._reachability_csr = csr
         
-        return []
+        index = self._reachability[reverse]
+        if index is None:
+            offsets, targets = csr[2:] if reverse else csr[:2]
+            index = ReachabilityIndex(self._ids, self._alive, offsets, targets)
+            self._reachability[reverse] = index
+        return index
     
-    def get_all_nodes(self) -> Dict[str, Dict[str, Any]]:
+    def get_all_nodes(self) -> NodeMapping:
         """
         Get all nodes in the graph.
         
         Returns:
-            Dictionary mapping node IDs to node metadata
+            Dict-compatible mapping of node IDs to node metadata
         """
         return self.nodes
     
+    def iter_nodes(self) -> Iterator[str]:
+        """
+        Iterate over node IDs in insertion order.
+        
+        Returns:
+            Iterator of node IDs
+        """
+        ids = self._ids
+        return (ids[index] for index, alive in enumerate(self._alive) if alive)
+    
+    def iter_edges(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Iterate over edges in insertion order.
+        
+        Returns:
+            Iterator of tuples (source_id, target_id, metadata)
+        """
+        ids = self._ids
+        alive = self._alive
+        for row, edge_alive in enumerate(self._edge_alive):
+            source = self._edge_sources[row]
+            target = self._edge_targets[row]
+            if edge_alive and alive[source] and alive[target]:
+                yield ids[source], ids[target], self._edge_metadata.get(row)
+    
     def get_all_edges(self) -> List[Tuple[str, str, Dict[str, Any]]]:
         """
         Get all edges in the graph.
@@ -319,111 +726,203 @@ class DependencyGraph:
         Returns:
             List of tuples (source_id, target_id, metadata)
         """
-        edges = []
+        return list(self.iter_edges())
+    
+    def _adjacency(self) -> Tuple[array, memoryview, array, memoryview]:
+        """
+        Get the CSR adjacency arrays, rebuilding them if the graph changed.
         
-        for source_id, targets in self.edges.items():
-            for target_id, metadata in targets.items():
-                edges.append((source_id, target_id, metadata))
+        Returns:
+            Tuple (forward offsets, forward targets, reverse offsets, reverse sources)
+        """
+        if self._csr is None:
+            self._build_adjacency()
+        return self._csr
+    
+    def _build_adjacency(self) -> None:
+        """
+        Build forward and reverse CSR arrays with a counting sort of the edge
+        list, which keeps each node's neighbours in edge insertion order.
+        """
+        alive = self._alive
+        sources = self._edge_sources
+        targets = self._edge_targets
+        edge_alive = self._edge_alive
+        
+        # Drop edges that were removed or lost an endpoint
+        live_rows = [
+            row for row in range(len(edge_alive))
+            if edge_alive[row] and alive[sources[row]] and alive[targets[row]]
+        ]
+        if len(edge_alive) - len(live_rows) > len(live_rows):
+            self._compact_edges(live_rows)
+            live_rows = range(len(self._edge_alive))
+            sources = self._edge_sources
+            targets = self._edge_targets
+        
+        node_count = len(self._ids)
+        forward_offsets = array("l", bytes(array("l").itemsize * (node_count + 1)))
+        reverse_offsets = array("l", forward_offsets)
+        for row in live_rows:
+            forward_offsets[sources[row] + 1] += 1
+            reverse_offsets[targets[row] + 1] += 1
+        for index in range(node_count):
+            forward_offsets[index + 1] += forward_offsets[index]
+            reverse_offsets[index + 1] += reverse_offsets[index]
+        
+        forward_targets = array("i", bytes(array("i").itemsize * len(live_rows)))
+        reverse_sources = array("i", forward_targets)
+        forward_next = array("l", forward_offsets)
+        reverse_next = array("l", reverse_offsets)
+        for row in live_rows:
+            source = sources[row]
+            target = targets[row]
+            forward_targets[forward_next[source]] = target
+            forward_next[source] += 1
+            reverse_sources[reverse_next[target]] = source
+            reverse_next[target] += 1
         
-        return edges
+        self._csr = (
+            forward_offsets,
+            memoryview(forward_targets),
+            reverse_offsets,
+            memoryview(reverse_sources)
+        )
+    
+    def _compact_edges(self, live_rows: List[int]) -> None:
+        """
+        Drop removed edges from the edge list.
+        
+        Args:
+            live_rows: Rows of the edges to keep, in order
+        """
+        self._edge_sources = array("i", (self._edge_sources[row] for row in live_rows))
+        self._edge_targets = array("i", (self._edge_targets[row] for row in live_rows))
+        self._edge_alive = bytearray(b"\x01") * len(live_rows)
+        self._edge_metadata = self._edge_metadata.compact(live_rows)
+        self._edge_rows = {
+            self._edge_key(source, target): row
+            for row, (source, target) in enumerate(zip(self._edge_sources, self._edge_targets))
+        }
     
     def find_cycles(self) -> List[List[str]]:
         """
         Find cycles in the graph.
         
+        At most one cycle is reported per depth-first search root.
+        
         Returns:
             List of cycles, where each cycle is a list of node IDs
         """
         # Initialize result
         cycles = []
         
-        # Initialize visited set
-        visited = set()
+        offsets, targets, _, _ = self._adjacency()
         
-        # Initialize recursion stack
-        rec_stack = set()
+        # 0: not visited, 1: on the current path, 2: done
+        state = bytearray(len(self._ids))
         
-        # DFS function
-        def dfs(node_id, path):
-            # Mark node as visited
-            visited.add(node_id)
-            
-            # Add to recursion stack
-            rec_stack.add(node_id)
+        # Iterative DFS so deep graphs do not hit the recursion limit
+        for root in range(len(self._ids)):
+            if not self._alive[root] or state[root]:
+                continue
             
-            # Add to path
-            path.append(node_id)
+            path = [root]
+            positions = [offsets[root]]
+            state[root] = 1
             
-            # Visit dependencies
-            for dep_id in self.get_dependencies(node_id):
-                # If not visited, visit
-                if dep_id not in visited:
-                    if dfs(dep_id, path):
-                        return True
+            while path:
+                node = path[-1]
+                position = positions[-1]
                 
-                # If in recursion stack, we found a cycle
-                elif dep_id in rec_stack:
-                    # Find start of cycle
-                    start_idx = path.index(dep_id)
-                    
-                    # Extract cycle
-                    cycle = path[start_idx:]
-                    
-                    # Add to result
-                    cycles.append(cycle)
+                if position == offsets[node + 1]:
+                    # All dependencies visited
+                    state[node] = 2
+                    path.pop()
+                    positions.pop()
+                    continue
+                
+                positions[-1] = position + 1
+                dep = targets[position]
+                
+                if state[dep] == 0:
+                    # If not visited, visit
+                    state[dep] = 1
+                    path.append(dep)
+                    positions.append(offsets[dep])
+                elif state[dep] == 1:
+                    # If on the current path, we found a cycle
+                    cycle = path[path.index(dep):]
+                    cycles.append([self._ids[index] for index in cycle])
                     
-                    return True
-            
-            # Remove from recursion stack
-            rec_stack.remove(node_id)
-            
-            # Remove from path
-            path.pop()
-            
-            return False
-        
-        # Visit all nodes
-        for node_id in self.nodes:
-            if node_id not in visited:
-                dfs(node_id, [])
+                    # Abandon this search
+                    for index in path:
+                        state[index] = 2
+                    break
         
         return cycles
     
-    def find_critical_path(self) -> List[str]:
+    def strongly_connected_components(self) -> List[List[str]]:
+        """
+        Find the strongly connected components of the graph.
+        
+        The components are those of the reachability index, which is cached
+        until the graph changes.
+        
+        Returns:
+            List of components, each a list of node IDs; a component comes
+            before the components that depend on it
+        """
+        ids = self._ids
+        return [[ids[index] for index in members] for members in self._reachability_index(False).members]
+    
+    def find_critical_path(self, durations: Optional[Dict[str, float]] = None) -> List[str]:
         """
         Find the critical path in the graph.
         
+        Args:
+            durations: Optional map of node ID to duration; nodes without one,
+                or all nodes if omitted, count as 1
+            
         Returns:
             List of node IDs in the critical path
         """
-        # Initialize result
-        result = []
+        if not self._index:
+            return []
         
-        # Calculate longest path for each node
-        longest_path = {node_id: 0 for node_id in self.nodes}
-        predecessor = {node_id: None for node_id in self.nodes}
+        offsets, targets, _, _ = self._adjacency()
         
-        # Perform topological sort
-        topo_order = self._topological_sort()
+        # Duration of each node index
+        weights = array("d", [1.0]) * len(self._ids)
+        if durations:
+            for node_id, duration in durations.items():
+                index = self._index.get(node_id)
+                if index is not None:
+                    weights[index] = duration
         
-        # Calculate longest path
-        for node_id in topo_order:
-            # Get dependencies
-            dependencies = self.get_dependencies(node_id)
-            
-            # Update longest path
-            for dep_id in dependencies:
-                if longest_path[dep_id] < longest_path[node_id] + 1:
-                    longest_path[dep_id] = longest_path[node_id] + 1
-                    predecessor[dep_id] = node_id
+        # Calculate the longest weighted path ending at each node
+        longest_path = array("d", weights)
+        predecessor = array("l", [-1]) * len(self._ids)
         
-        # Find node with longest path
-        end_node = max(longest_path.items(), key=lambda x: x[1])[0]
+        # Calculate longest path in topological order
+        for node in self._topological_order():
+            for position in range(offsets[node], offsets[node + 1]):
+                dep = targets[position]
+                if longest_path[dep] < longest_path[node] + weights[dep]:
+                    longest_path[dep] = longest_path[node] + weights[dep]
+                    predecessor[dep] = node
+        
+        # Find the first node with the longest path
+        end_node = max(
+            (index for index in range(len(self._ids)) if self._alive[index]),
+            key=longest_path.__getitem__
+        )
         
         # Build critical path
+        result = []
         current = end_node
-        while current is not None:
-            result.append(current)
+        while current != -1:
+            result.append(self._ids[current])
             current = predecessor[current]
         
         # Reverse path
@@ -431,50 +930,55 @@ class DependencyGraph:
         
         return result
     
-    def _topological_sort(self) -> List[str]:
+    def _topological_order(self) -> List[int]:
         """
-        Perform topological sort on the graph.
+        Order node indices so that every node comes before its dependencies
+        (Kahn's algorithm). Nodes on cycles are appended at the end.
         
         Returns:
-            List of node IDs in topological order
+            List of node indices
         """
-        # Initialize result
-        result = []
+        offsets, targets, _, _ = self._adjacency()
+        alive = self._alive
+        node_count = len(self._ids)
         
-        # Calculate in-degree for each node
-        in_degree = {node_id: 0 for node_id in self.nodes}
-        for node_id in self.nodes:
-            for dep_id in self.get_dependencies(node_id):
-                in_degree[dep_id] += 1
+        # Count how many nodes depend on each node
+        in_degree = array("l", bytes(array("l").itemsize * node_count))
+        for target in targets:
+            in_degree[target] += 1
         
-        # Initialize queue with nodes that have no dependencies
-        queue = [node_id for node_id, degree in in_degree.items() if degree == 0]
+        # Start with the nodes nothing depends on
+        queue = deque(index for index in range(node_count) if alive[index] and in_degree[index] == 0)
+        result = []
         
-        # Process queue
         while queue:
-            # Get next node
-            node_id = queue.pop(0)
-            
-            # Add to result
-            result.append(node_id)
+            node = queue.popleft()
+            result.append(node)
             
-            # Update in-degree of dependents
-            for dep_id in self.get_dependents(node_id):
-                in_degree[dep_id] -= 1
-                
-                # If in-degree is 0, add to queue
-                if in_degree[dep_id] == 0:
-                    queue.append(dep_id)
+            for position in range(offsets[node], offsets[node + 1]):
+                dep = targets[position]
+                in_degree[dep] -= 1
+                if in_degree[dep] == 0:
+                    queue.append(dep)
         
-        # Check for cycles
-        if len(result) != len(self.nodes):
-            # If there are cycles, add remaining nodes
-            for node_id in self.nodes:
-                if node_id not in result:
-                    result.append(node_id)
+        # If there are cycles, add remaining nodes
+        if len(result) != len(self._index):
+            placed = bytearray(node_count)
+            for node in result:
+                placed[node] = 1
+            result.extend(index for index in range(node_count) if alive[index] and not placed[index])
         
         return result
     
+    def _topological_sort(self) -> List[str]:
+        """
+        Perform topological sort on the graph.
+        
+        Returns:
+            List of node IDs in topological order
+        """
+        return [self._ids[index] for index in self._topological_order()]
+    
     def merge(self, other: 'DependencyGraph') -> None:
         """
         Merge another dependency graph into this one.
@@ -487,7 +991,7 @@ class DependencyGraph:
             self.add_node(node_id, metadata)
         
         # Merge edges
-        for source_id, target_id, metadata in other.get_all_edges():
+        for source_id, target_id, metadata in other.iter_edges():
             self.add_edge(source_id, target_id, metadata)
     
     def to_json(self) -> str:
@@ -498,12 +1002,12 @@ class DependencyGraph:
             JSON string representation
         """
         data = {
-            "nodes": self.nodes,
+            "nodes": dict(self.nodes),
             "edges": []
         }
         
         # Add edges
-        for source_id, target_id, metadata in self.get_all_edges():
+        for source_id, target_id, metadata in self.iter_edges():
             data["edges"].append({
                 "source": source_id,
                 "target": target_id,
@@ -512,6 +1016,95 @@ class DependencyGraph:
         
         return json.dumps(data)
     
+    def to_msgpack(self) -> bytes:
+        """
+        Convert to a compact binary representation.
+        
+        Node IDs, metadata columns and the edge list are stored as they are
+        held in memory, with removed nodes and edges dropped and edge
+        endpoints as packed integer arrays.
+        
+        Returns:
+            msgpack-encoded bytes
+        """
+        # Renumber live nodes densely
+        live_nodes = [index for index, alive in enumerate(self._alive) if alive]
+        new_index = array("i", [-1]) * len(self._ids)
+        for position, index in enumerate(live_nodes):
+            new_index[index] = position
+        
+        alive = self._alive
+        live_edges = [
+            row for row, edge_alive in enumerate(self._edge_alive)
+            if edge_alive and alive[self._edge_sources[row]] and alive[self._edge_targets[row]]
+        ]
+        
+        nodes = self._node_metadata.compact(live_nodes)
+        edges = self._edge_metadata.compact(live_edges)
+        
+        data = {
+            "version": 1,
+            "byteorder": sys.byteorder,
+            "ids": [self._ids[index] for index in live_nodes],
+            "nodes": {
+                "columns": nodes.columns,
+                "present": bytes(nodes.present),
+                "extra": nodes.extra
+            },
+            "edges": {
+                "sources": array("i", (new_index[self._edge_sources[row]] for row in live_edges)).tobytes(),
+                "targets": array("i", (new_index[self._edge_targets[row]] for row in live_edges)).tobytes(),
+                "columns": edges.columns,
+                "present": bytes(edges.present),
+                "extra": edges.extra
+            }
+        }
+        
+        return msgpack.packb(data, use_bin_type=True)
+    
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> 'DependencyGraph':
+        """
+        Create from the binary representation written by to_msgpack.
+        
+        Args:
+            data: msgpack-encoded bytes
+            
+        Returns:
+            DependencyGraph instance
+        """
+        data = msgpack.unpackb(data, raw=False)
+        if data.get("version") != 1:
+            raise ValueError(f"Unsupported dependency graph format version: {data.get('version')}")
+        
+        graph = cls()
+        
+        # Nodes
+        graph._ids = data["ids"]
+        graph._index = {node_id: index for index, node_id in enumerate(graph._ids)}
+        graph._alive = bytearray(b"\x01") * len(graph._ids)
+        graph._node_metadata.columns = data["nodes"]["columns"]
+        graph._node_metadata.present = bytearray(data["nodes"]["present"])
+        graph._node_metadata.extra = data["nodes"]["extra"]
+        
+        # Edges
+        edges = data["edges"]
+        graph._edge_sources.frombytes(edges["sources"])
+        graph._edge_targets.frombytes(edges["targets"])
+        if data.get("byteorder", sys.byteorder) != sys.byteorder:
+            graph._edge_sources.byteswap()
+            graph._edge_targets.byteswap()
+        graph._edge_alive = bytearray(b"\x01") * len(graph._edge_sources)
+        graph._edge_metadata.columns = edges["columns"]
+        graph._edge_metadata.present = bytearray(edges["present"])
+        graph._edge_metadata.extra = edges["extra"]
+        graph._edge_rows = {
+            cls._edge_key(source, target): row
+            for row, (source, target) in enumerate(zip(graph._edge_sources, graph._edge_targets))
+        }
+        
+        return graph
+    
     @classmethod
     def from_json(cls, json_str: str) -> 'DependencyGraph':
         """
@@ -0,0 +1,87 @@
+"""
+File storage helpers for the persistent stores.
+This module provides atomic file replacement and line-delimited JSON append logs.
+"""
+
+from typing import Any, IO, Iterable, Iterator
+from contextlib import contextmanager
+import json
+import os
+import tempfile
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", encoding: str = "utf-8") -> Iterator[IO]:
+    """
+    Open a temporary file that replaces the file at path once written.
+
+    Readers never see a partial file: the temporary file is created next to
+    the target, synced and renamed over it when the block exits, and removed
+    if the block raises.
+
+    Args:
+        path: Path of the file to replace
+        mode: File mode, "w" or "wb"
+        encoding: Text encoding, ignored in binary mode
+
+    Yields:
+        The open temporary file
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def append_lines(path: str, lines: Iterable[str]) -> None:
+    """
+    Append lines to a line-delimited log with a single write.
+
+    Args:
+        path: Path of the log
+        lines: Lines to append, without line endings
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(line + "\n" for line in lines))
+
+def read_records(path: str) -> Iterator[Any]:
+    """
+    Stream the JSON records of a line-delimited log.
+
+    A crash mid-append can leave a partial last line. It is skipped and, once
+    the log has been read, truncated away so that the next append starts on
+    a fresh line instead of being joined to it. Complete lines that are not
+    valid JSON are skipped.
+
+    Args:
+        path: Path of the log
+
+    Yields:
+        The decoded records, in log order
+
+    Raises:
+        FileNotFoundError: If the log does not exist
+    """
+    end = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            yield record
+
+    if os.path.getsize(path) > end:
+        with open(path, "r+b") as f:
+            f.truncate(end)
@@ -0,0 +1,554 @@
+"""
+Job duration models for CI/CD pipelines.
+This module provides a time-series store of historical job and step durations.
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple, Union
+from array import array
+from bisect import bisect_left, bisect_right
+import datetime
+import json
+import logging
+
+from .file_storage import atomic_write, append_lines, read_records
+
+logger = logging.getLogger(__name__)
+
+# Cache hit flags as stored in a series
+CACHE_MISS = 0
+CACHE_HIT = 1
+CACHE_UNKNOWN = 2
+
+def parse_timestamp(value: Union[str, int, float, None]) -> Optional[float]:
+    """
+    Parse a timestamp from a CI run record.
+
+    Args:
+        value: ISO 8601 string or seconds since the epoch
+
+    Returns:
+        Seconds since the epoch, or None if the value is missing
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+def record_duration(record: Dict[str, Any]) -> Optional[float]:
+    """
+    Get the duration of a job or step record.
+
+    Args:
+        record: Record with a "duration" in seconds, or "started_at" and "completed_at"
+
+    Returns:
+        Duration in seconds, or None if the record has none
+    """
+    if record.get("duration") is not None:
+        return float(record["duration"])
+    if record.get("started_at") is not None and record.get("completed_at") is not None:
+        return parse_timestamp(record["completed_at"]) - parse_timestamp(record["started_at"])
+    return None
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Calculate a percentile by linear interpolation.
+
+    Args:
+        sorted_values: Values in ascending order
+        q: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or 0.0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+class DurationSeries:
+    """Samples of one job or step on one runner type, ordered by start time."""
+
+    __slots__ = ("timestamps", "durations", "queue_times", "cache_hits")
+
+    def __init__(self):
+        """Initialize the duration series."""
+        self.timestamps = array("d")
+        self.durations = array("d")
+        self.queue_times = array("d")
+        self.cache_hits = bytearray()
+
+    def add(self, timestamp: float, duration: float, queue_time: float, cache_hit: int) -> None:
+        """Add a sample, keeping the series ordered by timestamp."""
+        if not self.timestamps or timestamp >= self.timestamps[-1]:
+            self.timestamps.append(timestamp)
+            self.durations.append(duration)
+            self.queue_times.append(queue_time)
+            self.cache_hits.append(cache_hit)
+            return
+
+        # Runs ingested out of order are rare; insert in place
+        position = bisect_right(self.timestamps, timestamp)
+        self.timestamps.insert(position, timestamp)
+        self.durations.insert(position, duration)
+        self.queue_times.insert(position, queue_time)
+        self.cache_hits.insert(position, cache_hit)
+
+    def contains(self, timestamp: float, duration: float) -> bool:
+        """Check whether the series has a sample with this start time and duration."""
+        position = bisect_left(self.timestamps, timestamp)
+        while position < len(self.timestamps) and self.timestamps[position] == timestamp:
+            if self.durations[position] == duration:
+                return True
+            position += 1
+        return False
+
+    def trim(self, max_samples: int) -> None:
+        """Drop the oldest samples beyond a maximum."""
+        excess = len(self.timestamps) - max_samples
+        if excess > 0:
+            del self.timestamps[:excess]
+            del self.durations[:excess]
+            del self.queue_times[:excess]
+            del self.cache_hits[:excess]
+
+    def window(self, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        """Get the index range of samples with start <= timestamp <= end."""
+        lower = 0 if start is None else bisect_left(self.timestamps, start)
+        upper = len(self.timestamps) if end is None else bisect_right(self.timestamps, end)
+        return lower, upper
+
+class JobDurationStore:
+    """
+    Time-series store of per-job and per-step durations, queue times and cache hits.
+
+    Samples are kept in columnar arrays per (pipeline, job, step, runner
+    type) series, ordered by time, so windowed queries are two binary
+    searches. Percentile summaries over whole series are computed once and
+    reused until the pipeline receives new samples. Samples are appended to a
+    line-delimited JSON file, which is compacted once it holds mostly samples
+    dropped by retention.
+    """
+
+    def __init__(self, storage_path: Optional[str] = None, max_samples_per_series: int = 1000):
+        """
+        Initialize the job duration store.
+
+        Args:
+            storage_path: Path to the samples file, or None for the default
+            max_samples_per_series: Number of most recent samples kept per series
+        """
+        self.storage_path = storage_path or "data/job_durations.jsonl"
+        self.max_samples_per_series = max_samples_per_series
+
+        # (pipeline ID, job ID, step ID or "", runner type or "") -> series
+        self._series: Dict[Tuple[str, str, str, str], DurationSeries] = {}
+
+        # Pipeline ID -> keys of its series
+        self._pipeline_series: Dict[str, List[Tuple[str, str, str, str]]] = {}
+
+        # Pipeline ID -> {query key: statistics} for queries without a time window
+        self._statistics: Dict[str, Dict[Tuple, Dict[str, Any]]] = {}
+
+        self._stored_samples = 0
+
+        # Number of samples that could not be loaded; compaction would drop them
+        self._load_errors = 0
+
+        self._load()
+
+    def ingest_runs(self, runs: Iterable[Dict[str, Any]]) -> int:
+        """
+        Ingest CI run records in bulk.
+
+        A run record looks like {"pipeline_id", "started_at", "jobs": [{"id",
+        "runner_type", "started_at", "duration", "queue_time", "cache_hit",
+        "steps": [{"name", "duration", "cache_hit"}]}]}. Durations may instead
+        be given as "started_at" and "completed_at", and queue times as
+        "queued_at" and "started_at".
+
+        Samples already in the store, with the same start time and duration,
+        are skipped, so a run that is analyzed again is only recorded once.
+
+        Args:
+            runs: CI run records
+
+        Returns:
+            Number of samples ingested
+        """
+        samples = []
+        for run in runs:
+            samples.extend(self._samples_from_run(run))
+
+        return self._add_new(samples)
+
+    def add_sample(self, pipeline_id: str, job_id: str, duration: float,
+                   timestamp: Union[str, float, None] = None,
+                   step_id: Optional[str] = None,
+                   runner_type: Optional[str] = None,
+                   queue_time: float = 0.0,
+                   cache_hit: Optional[bool] = None) -> None:
+        """
+        Add a single sample.
+
+        Args:
+            pipeline_id: The pipeline ID
+            job_id: The job ID
+            duration: Duration in seconds
+            timestamp: Start time as ISO 8601 or seconds since the epoch; now if omitted
+            step_id: Optional step ID for step samples
+            runner_type: Optional runner type the job ran on
+            queue_time: Time spent queued in seconds
+            cache_hit: Whether the job's cache was restored, if known
+        """
+        timestamp = parse_timestamp(timestamp)
+        if timestamp is None:
+            timestamp = datetime.datetime.now(datetime.timezone.utc).timestamp()
+
+        sample = (
+            pipeline_id, job_id, step_id or "", runner_type or "",
+            timestamp, float(duration), float(queue_time), self._cache_flag(cache_hit)
+        )
+        self._add(*sample)
+        self._append([sample])
+
+    def add_samples(self, samples: Iterable[Tuple]) -> int:
+        """
+        Add sample tuples, such as those collected by another store.
+
+        Samples already in the store are skipped, as in ingest_runs.
+
+        Args:
+            samples: Tuples of (pipeline ID, job ID, step ID or "", runner type or "",
+                timestamp, duration, queue time, cache hit flag)
+
+        Returns:
+            Number of samples added
+        """
+        return self._add_new(tuple(sample) for sample in samples)
+
+    def query(self, pipeline_id: str, job_id: Optional[str] = None,
+              step_id: Optional[str] = None, runner_type: Optional[str] = None,
+              start: Union[str, float, None] = None,
+              end: Union[str, float, None] = None) -> List[Dict[str, Any]]:
+        """
+        Get samples in a time window.
+
+        Args:
+            pipeline_id: The pipeline ID
+            job_id: Optional job ID; all jobs if omitted
+            step_id: Optional step ID; job samples if omitted, all steps if "*"
+            runner_type: Optional runner type; all runner types if omitted
+            start: Optional start of the window, inclusive
+            end: Optional end of the window, inclusive
+
+        Returns:
+            List of samples ordered by time
+        """
+        start, end = parse_timestamp(start), parse_timestamp(end)
+
+        samples = []
+        for key, series in self._matching_series(pipeline_id, job_id, step_id, runner_type):
+            lower, upper = series.window(start, end)
+            for index in range(lower, upper):
+                flag = series.cache_hits[index]
+                samples.append({
+                    "pipeline_id": key[0],
+                    "job_id": key[1],
+                    "step_id": key[2] or None,
+                    "runner_type": key[3] or None,
+                    "timestamp": series.timestamps[index],
+                    "duration": series.durations[index],
+                    "queue_time": series.queue_times[index],
+                    "cache_hit": None if flag == CACHE_UNKNOWN else flag == CACHE_HIT
+                })
+
+        samples.sort(key=lambda sample: sample["timestamp"])
+        return samples
+
+    def get_statistics(self, pipeline_id: str, job_id: Optional[str] = None,
+                       step_id: Optional[str] = None, runner_type: Optional[str] = None,
+                       start: Union[str, float, None] = None,
+                       end: Union[str, float, None] = None) -> Dict[str, Any]:
+        """
+        Get duration, queue time and cache statistics.
+
+        Args:
+            pipeline_id: The pipeline ID
+            job_id: Optional job ID; all jobs if omitted
+            step_id: Optional step ID; job samples if omitted, all steps if "*"
+            runner_type: Optional runner type; all runner types if omitted
+            start: Optional start of the window, inclusive
+            end: Optional end of the window, inclusive
+
+        Returns:
+            Dictionary with count, mean, p50, p95 and max durations, p50 and p95
+            queue times and the cache hit rate
+        """
+        start, end = parse_timestamp(start), parse_timestamp(end)
+
+        # Whole-series statistics stay valid until the pipeline gets new samples
+        query_key = (job_id, step_id, runner_type)
+        cached = start is None and end is None
+        if cached:
+            statistics = self._statistics.get(pipeline_id, {}).get(query_key)
+            if statistics is not None:
+                return dict(statistics)
+
+        durations = []
+        queue_times = []
+        hits = 0
+        known = 0
+        for _, series in self._matching_series(pipeline_id, job_id, step_id, runner_type):
+            lower, upper = series.window(start, end)
+            durations.extend(series.durations[lower:upper])
+            queue_times.extend(series.queue_times[lower:upper])
+            flags = series.cache_hits[lower:upper]
+            hits += flags.count(CACHE_HIT)
+            known += len(flags) - flags.count(CACHE_UNKNOWN)
+
+        durations.sort()
+        queue_times.sort()
+        statistics = {
+            "count": len(durations),
+            "mean": sum(durations) / len(durations) if durations else 0.0,
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "max": durations[-1] if durations else 0.0,
+            "queue_p50": percentile(queue_times, 50),
+            "queue_p95": percentile(queue_times, 95),
+            "cache_hit_rate": hits / known if known else None
+        }
+
+        if cached:
+            self._statistics.setdefault(pipeline_id, {})[query_key] = statistics
+            statistics = dict(statistics)
+
+        return statistics
+
+    def get_job_durations(self, pipeline_id: str, q: float = 50,
+                          runner_type: Optional[str] = None) -> Dict[str, float]:
+        """
+        Get a duration percentile of each job of a pipeline, e.g. as costs for the build scheduler.
+
+        Args:
+            pipeline_id: The pipeline ID
+            q: Percentile between 0 and 100
+            runner_type: Optional runner type; all runner types if omitted
+
+        Returns:
+            Map of job ID to duration in seconds
+        """
+        job_ids = sorted({key[1] for key in self._pipeline_series.get(pipeline_id, []) if not key[2]})
+
+        if q in (50, 95):
+            return {
+                job_id: self.get_statistics(pipeline_id, job_id, runner_type=runner_type)[f"p{int(q)}"]
+                for job_id in job_ids
+            }
+
+        result = {}
+        for job_id in job_ids:
+            durations = []
+            for _, series in self._matching_series(pipeline_id, job_id, None, runner_type):
+                durations.extend(series.durations)
+            durations.sort()
+            result[job_id] = percentile(durations, q)
+        return result
+
+    def pipeline_samples(self, pipeline_id: str) -> List[Tuple]:
+        """
+        Get the retained samples of a pipeline.
+
+        Args:
+            pipeline_id: The pipeline ID
+
+        Returns:
+            Sample tuples, as accepted by add_samples
+        """
+        return list(self._iter_samples(self._pipeline_series.get(pipeline_id, [])))
+
+    def compact(self) -> None:
+        """
+        Rewrite the samples file with only the samples still retained.
+
+        The file is left alone if samples could not be loaded, as rewriting it
+        from memory would lose them.
+        """
+        if self._load_errors:
+            return
+
+        try:
+            count = 0
+            with atomic_write(self.storage_path) as f:
+                for sample in self._iter_samples(self._series):
+                    f.write(json.dumps(list(sample)) + "\n")
+                    count += 1
+            self._stored_samples = count
+        except Exception as e:
+            # Log the error but don't fail
+            logger.error(f"Error compacting job durations: {e}")
+
+    def _samples_from_run(self, run: Dict[str, Any]) -> List[Tuple]:
+        """
+        Convert a CI run record to samples.
+
+        Args:
+            run: CI run record
+
+        Returns:
+            List of sample tuples
+        """
+        pipeline_id = str(run["pipeline_id"])
+        run_start = parse_timestamp(run.get("started_at"))
+
+        jobs = run.get("jobs", [])
+        if isinstance(jobs, dict):
+            jobs = [dict(job, id=job_id) for job_id, job in jobs.items()]
+
+        samples = []
+        for job in jobs:
+            job_id = str(job.get("id") or job.get("name"))
+            runner_type = job.get("runner_type") or job.get("runs_on") or ""
+            job_start = parse_timestamp(job.get("started_at"))
+            if job_start is None:
+                job_start = run_start or 0.0
+
+            duration = record_duration(job)
+            if duration is not None:
+                queue_time = job.get("queue_time")
+                if queue_time is None and job.get("queued_at") is not None:
+                    queue_time = job_start - parse_timestamp(job["queued_at"])
+                samples.append((
+                    pipeline_id, job_id, "", str(runner_type), job_start, duration,
+                    float(queue_time or 0.0), self._cache_flag(job.get("cache_hit"))
+                ))
+
+            step_start = job_start
+            for step in job.get("steps", []):
+                step_id = str(step.get("id") or step.get("name"))
+                step_duration = record_duration(step)
+                if step_duration is None:
+                    continue
+                timestamp = parse_timestamp(step.get("started_at"))
+                if timestamp is None:
+                    timestamp = step_start
+                samples.append((
+                    pipeline_id, job_id, step_id, str(runner_type), timestamp, step_duration,
+                    0.0, self._cache_flag(step.get("cache_hit"))
+                ))
+                step_start = timestamp + step_duration
+
+        return samples
+
+    def _iter_samples(self, keys: Iterable[Tuple[str, str, str, str]]) -> Iterator[Tuple]:
+        """Yield the samples of series as tuples."""
+        for key in keys:
+            series = self._series[key]
+            for index in range(len(series.timestamps)):
+                yield (
+                    *key,
+                    series.timestamps[index],
+                    series.durations[index],
+                    series.queue_times[index],
+                    series.cache_hits[index]
+                )
+
+    def _cache_flag(self, cache_hit: Optional[bool]) -> int:
+        """Convert a cache hit value to its stored flag."""
+        if cache_hit is None:
+            return CACHE_UNKNOWN
+        return CACHE_HIT if cache_hit else CACHE_MISS
+
+    def _matching_series(self, pipeline_id: str, job_id: Optional[str],
+                         step_id: Optional[str], runner_type: Optional[str]):
+        """Yield the keys and series matching a query."""
+        for key in self._pipeline_series.get(pipeline_id, []):
+            if job_id is not None and key[1] != job_id:
+                continue
+            if step_id is None:
+                if key[2]:
+                    continue
+            elif step_id == "*":
+                if not key[2]:
+                    continue
+            elif key[2] != step_id:
+                continue
+            if runner_type is not None and key[3] != runner_type:
+                continue
+            yield key, self._series[key]
+
+    def _add(self, pipeline_id: str, job_id: str, step_id: str, runner_type: str,
+             timestamp: float, duration: float, queue_time: float, cache_hit: int) -> None:
+        """Add a sample to its series without storing it."""
+        key = (pipeline_id, job_id, step_id, runner_type)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = DurationSeries()
+            self._pipeline_series.setdefault(pipeline_id, []).append(key)
+
+        series.add(timestamp, duration, queue_time, cache_hit)
+
+        # Trim in chunks so appends stay amortized constant time
+        if len(series.timestamps) > self.max_samples_per_series + self.max_samples_per_series // 4:
+            series.trim(self.max_samples_per_series)
+
+        self._statistics.pop(pipeline_id, None)
+
+    def _add_new(self, samples: Iterable[Tuple]) -> int:
+        """Add and store the samples that are not in the store yet."""
+        added = []
+        for sample in samples:
+            series = self._series.get(sample[:4])
+            if series is not None and series.contains(sample[4], sample[5]):
+                continue
+            self._add(*sample)
+            added.append(sample)
+        self._append(added)
+
+        return len(added)
+
+    def _append(self, samples: List[Tuple]) -> None:
+        """Append samples to the samples file, compacting it when mostly stale."""
+        if not samples:
+            return
+
+        try:
+            append_lines(self.storage_path, (json.dumps(list(sample)) for sample in samples))
+            self._stored_samples += len(samples)
+        except Exception as e:
+            # Log the error but don't fail
+            logger.error(f"Error saving job durations: {e}")
+            return
+
+        retained = sum(len(series.timestamps) for series in self._series.values())
+        if self._stored_samples > 2 * max(retained, self.max_samples_per_series):
+            self.compact()
+
+    def _load(self) -> None:
+        """Stream samples from the samples file."""
+        try:
+            for sample in read_records(self.storage_path):
+                self._stored_samples += 1
+                try:
+                    self._add(*sample)
+                except Exception as e:
+                    # Skip the sample but keep it in the file
+                    self._load_errors += 1
+                    logger.error(f"Error loading job duration sample {self._stored_samples}: {e}")
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self._load_errors += 1
+            logger.error(f"Error loading job durations: {e}")
+
+        for series in self._series.values():
+            series.trim(self.max_samples_per_series)
@@ -3,12 +3,15 @@ Optimization metrics models for CI/CD pipelines.
 This module provides models for storing and analyzing optimization metrics.
 """
 
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Iterable, Iterator
+from contextlib import contextmanager
 from enum import Enum
 import uuid
 import datetime
 import json
 
+from .file_storage import atomic_write, append_lines, read_records
+
 class MetricUnit(str, Enum):
     """Metric unit enumeration."""
     
@@ -55,6 +58,21 @@ class BaseMetric:
             "optimization_type": self.optimization_type,
             "timestamp": self.timestamp
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BaseMetric":
+        """Create a metric from a dictionary, using the subclass named by its metric type."""
+        metric_class = METRIC_CLASSES.get(data.get("metric_type"), BaseMetric)
+        metric = metric_class(
+            data["name"],
+            data["value"],
+            data["unit"],
+            data.get("description", ""),
+            data.get("job_id"),
+            data.get("optimization_type")
+        )
+        metric.timestamp = data.get("timestamp", metric.timestamp)
+        return metric
 
 class StructureMetric(BaseMetric):
     """Structure metric class."""
@@ -131,6 +149,15 @@ class CachingMetric(BaseMetric):
         result["metric_type"] = self.metric_type
         return result
 
+# Metric classes by metric type
+METRIC_CLASSES = {
+    "structure": StructureMetric,
+    "performance": PerformanceMetric,
+    "parallelization": ParallelizationMetric,
+    "resource": ResourceMetric,
+    "caching": CachingMetric
+}
+
 class OptimizationResult:
     """Optimization result class."""
     
@@ -161,14 +188,89 @@ class OptimizationResult:
             "details": self.details,
             "timestamp": self.timestamp
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OptimizationResult":
+        """Create an optimization result from a dictionary."""
+        optimization_type = data["optimization_type"]
+        if optimization_type in OptimizationType._value2member_map_:
+            optimization_type = OptimizationType(optimization_type)
+        
+        result = cls(
+            pipeline_id=data["pipeline_id"],
+            platform=data["platform"],
+            optimization_type=optimization_type,
+            metrics_before=[BaseMetric.from_dict(metric) for metric in data.get("metrics_before", [])],
+            metrics_after=[BaseMetric.from_dict(metric) for metric in data.get("metrics_after", [])],
+            improvement_percentage=data.get("improvement_percentage", 0),
+            details=data.get("details", {})
+        )
+        result.id = data["id"]
+        result.timestamp = data.get("timestamp", result.timestamp)
+        return result
 
 class OptimizationMetricsRepository:
-    """Repository for optimization metrics."""
+    """
+    Repository for optimization metrics.
+    
+    Results are stored in an append-only log with one JSON record per line:
+    saves append a "put" record and deletes append a "delete" record, so a
+    write costs the size of the record and a crash can at most lose the
+    line being written. The log is streamed into memory on startup and
+    indexed by ID, pipeline ID and optimization type. Once most of the log
+    is superseded records it is compacted into a fresh file.
+    """
+    
+    # Minimum number of superseded records before the log is compacted
+    COMPACTION_THRESHOLD = 1000
     
     def __init__(self, storage_path: Optional[str] = None):
         """Initialize the optimization metrics repository."""
-        self.storage_path = storage_path or "data/optimization_metrics.json"
-        self.results = []
+        self.storage_path = storage_path or "data/optimization_metrics.jsonl"
+        
+        # Results by ID, in the order they were first saved
+        self._results: Dict[str, OptimizationResult] = {}
+        
+        # Secondary indexes: key -> IDs of matching results, in save order
+        self._by_pipeline: Dict[str, Dict[str, None]] = {}
+        self._by_type: Dict[str, Dict[str, None]] = {}
+        
+        # Records waiting to be appended by the current batch
+        self._pending: Optional[List[str]] = None
+        
+        # Number of records in the log and how many of them are superseded
+        self._log_records = 0
+        self._stale_records = 0
+        
+        # Number of records that could not be loaded; compaction would drop them
+        self._load_errors = 0
+        
+        self._load()
+    
+    @property
+    def results(self) -> List[OptimizationResult]:
+        """All optimization results, in save order."""
+        return list(self._results.values())
+    
+    @contextmanager
+    def batch(self) -> Iterator["OptimizationMetricsRepository"]:
+        """
+        Group writes into a single append to the log.
+        
+        Saves and deletes made inside the block are visible immediately and
+        written together when the block exits.
+        """
+        if self._pending is not None:
+            # Already batching; the outer block writes
+            yield self
+            return
+        
+        self._pending = []
+        try:
+            yield self
+        finally:
+            records, self._pending = self._pending, None
+            self._write(records)
     
     def save_optimization_result(self, result: OptimizationResult) -> str:
         """
@@ -180,19 +282,28 @@ class OptimizationMetricsRepository:
         Returns:
             The ID of the saved result
         """
-        # Add the result to the in-memory list
-        self.results.append(result)
+        if result.id in self._results:
+            self._unindex(self._results[result.id])
+            self._stale_records += 1
+        self._index(result)
         
-        # Save the result to storage
-        try:
-            with open(self.storage_path, "w") as f:
-                json.dump([result.to_dict() for result in self.results], f, indent=2)
-        except Exception as e:
-            # Log the error but don't fail
-            print(f"Error saving optimization result: {e}")
+        self._write([json.dumps({"op": "put", "result": result.to_dict()})])
         
         return result.id
     
+    def save_optimization_results(self, results: Iterable[OptimizationResult]) -> List[str]:
+        """
+        Save several optimization results with a single write.
+        
+        Args:
+            results: The optimization results to save
+            
+        Returns:
+            The IDs of the saved results
+        """
+        with self.batch():
+            return [self.save_optimization_result(result) for result in results]
+    
     def get_optimization_result(self, result_id: str) -> Optional[OptimizationResult]:
         """
         Get an optimization result by ID.
@@ -203,33 +314,40 @@ class OptimizationMetricsRepository:
         Returns:
             The optimization result, or None if not found
         """
-        for result in self.results:
-            if result.id == result_id:
-                return result
-        
-        return None
+        return self._results.get(result_id)
     
     def list_optimization_results(self, pipeline_id: Optional[str] = None,
-                               optimization_type: Optional[OptimizationType] = None) -> List[OptimizationResult]:
+                               optimization_type: Optional[OptimizationType] = None,
+                               offset: int = 0,
+                               limit: Optional[int] = None) -> List[OptimizationResult]:
         """
         List optimization results.
         
         Args:
             pipeline_id: Optional pipeline ID to filter by
             optimization_type: Optional optimization type to filter by
+            offset: Number of matching results to skip
+            limit: Optional maximum number of results to return
             
         Returns:
-            List of optimization results
+            List of optimization results, in save order
         """
-        results = self.results
-        
-        if pipeline_id:
-            results = [result for result in results if result.pipeline_id == pipeline_id]
-        
-        if optimization_type:
-            results = [result for result in results if result.optimization_type == optimization_type]
+        end = None if limit is None else offset + limit
+        return [self._results[result_id] for result_id in self._matching_ids(pipeline_id, optimization_type)[offset:end]]
+    
+    def count_optimization_results(self, pipeline_id: Optional[str] = None,
+                                optimization_type: Optional[OptimizationType] = None) -> int:
+        """
+        Count optimization results.
         
-        return results
+        Args:
+            pipeline_id: Optional pipeline ID to filter by
+            optimization_type: Optional optimization type to filter by
+            
+        Returns:
+            Number of matching results
+        """
+        return len(self._matching_ids(pipeline_id, optimization_type))
     
     def delete_optimization_result(self, result_id: str) -> bool:
         """
@@ -241,19 +359,136 @@ class OptimizationMetricsRepository:
         Returns:
             True if the result was deleted, False otherwise
         """
-        for i, result in enumerate(self.results):
-            if result.id == result_id:
-                # Remove the result from the in-memory list
-                self.results.pop(i)
-                
-                # Save the updated list to storage
+        result = self._results.pop(result_id, None)
+        if result is None:
+            return False
+        
+        self._unindex(result)
+        
+        # Both the put and the delete record are superseded
+        self._stale_records += 2
+        self._write([json.dumps({"op": "delete", "id": result_id})])
+        
+        return True
+    
+    def compact(self) -> None:
+        """
+        Rewrite the log with one record per stored result.
+        
+        The log is left alone if records could not be loaded, as rewriting it
+        from memory would lose them.
+        """
+        if self._pending is not None:
+            # Written records would be lost; the batch compacts when it writes
+            return
+        
+        if self._load_errors:
+            return
+        
+        try:
+            with atomic_write(self.storage_path) as f:
+                for result in self._results.values():
+                    f.write(json.dumps({"op": "put", "result": result.to_dict()}) + "\n")
+        except Exception as e:
+            # Log the error but don't fail
+            print(f"Error compacting optimization results: {e}")
+            return
+        
+        self._log_records = len(self._results)
+        self._stale_records = 0
+    
+    def _matching_ids(self, pipeline_id: Optional[str],
+                      optimization_type: Optional[OptimizationType]) -> List[str]:
+        """Get the IDs of results matching the filters, in save order."""
+        if pipeline_id and optimization_type:
+            pipeline_ids = self._by_pipeline.get(pipeline_id, {})
+            type_ids = self._by_type.get(self._type_key(optimization_type), {})
+            
+            # Walk the smaller index, keeping save order
+            if len(type_ids) < len(pipeline_ids):
+                return [result_id for result_id in type_ids if result_id in pipeline_ids]
+            return [result_id for result_id in pipeline_ids if result_id in type_ids]
+        
+        if pipeline_id:
+            return list(self._by_pipeline.get(pipeline_id, {}))
+        
+        if optimization_type:
+            return list(self._by_type.get(self._type_key(optimization_type), {}))
+        
+        return list(self._results)
+    
+    def _type_key(self, optimization_type: Union[OptimizationType, str]) -> str:
+        """Get the index key of an optimization type."""
+        if isinstance(optimization_type, Enum):
+            return optimization_type.value
+        return str(optimization_type)
+    
+    def _index(self, result: OptimizationResult) -> None:
+        """Add a result to the in-memory indexes."""
+        self._results[result.id] = result
+        self._by_pipeline.setdefault(result.pipeline_id, {})[result.id] = None
+        self._by_type.setdefault(self._type_key(result.optimization_type), {})[result.id] = None
+    
+    def _unindex(self, result: OptimizationResult) -> None:
+        """Remove a result from the secondary indexes."""
+        for index, key in ((self._by_pipeline, result.pipeline_id),
+                           (self._by_type, self._type_key(result.optimization_type))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(result.id, None)
+                if not ids:
+                    del index[key]
+    
+    def _write(self, records: List[str]) -> None:
+        """Append records to the log, or queue them while batching."""
+        if not records:
+            return
+        
+        if self._pending is not None:
+            self._pending.extend(records)
+            return
+        
+        try:
+            append_lines(self.storage_path, records)
+            self._log_records += len(records)
+        except Exception as e:
+            # Log the error but don't fail
+            print(f"Error saving optimization result: {e}")
+            return
+        
+        if self._stale_records >= max(self.COMPACTION_THRESHOLD, self._log_records // 2):
+            self.compact()
+    
+    def _load(self) -> None:
+        """Stream the log into memory."""
+        try:
+            for record in read_records(self.storage_path):
+                self._log_records += 1
                 try:
-                    with open(self.storage_path, "w") as f:
-                        json.dump([result.to_dict() for result in self.results], f, indent=2)
+                    self._apply(record)
                 except Exception as e:
-                    # Log the error but don't fail
-                    print(f"Error saving optimization results: {e}")
-                
-                return True
+                    # Skip the record but keep it in the log
+                    self._load_errors += 1
+                    print(f"Error loading optimization result record {self._log_records}: {e}")
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            # Log the error but don't fail
+            self._load_errors += 1
+            print(f"Error loading optimization results: {e}")
+    
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """Apply a log record to the in-memory indexes."""
+        if record.get("op") == "delete":
+            result = self._results.pop(record["id"], None)
+            if result is not None:
+                self._unindex(result)
+                self._stale_records += 1
+            self._stale_records += 1
+            return
         
-        return False
+        result = OptimizationResult.from_dict(record["result"])
+        if result.id in self._results:
+            self._unindex(self._results[result.id])
+            self._stale_records += 1
+        self._index(result)
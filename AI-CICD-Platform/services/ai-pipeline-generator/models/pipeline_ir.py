@@ -0,0 +1,331 @@
+"""
+Pipeline intermediate representation for CI/CD pipelines.
+This module provides a platform-independent view of a pipeline configuration, built in a single walk.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple, Set
+from types import MappingProxyType
+
+class FrozenSlots:
+    """Base class for immutable objects with __slots__."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _init(self, **values: Any) -> None:
+        """Set the attributes of a new object."""
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+class StepIR(FrozenSlots):
+    """A step of a job."""
+
+    __slots__ = ("index", "name", "uses", "run", "config")
+
+    def __init__(self, index: int, name: Optional[str], uses: Optional[str],
+               run: Optional[str], config: Any):
+        """
+        Initialize the step.
+
+        Args:
+            index: Position of the step in its job
+            name: Display name of the step
+            uses: Action, orb command or step type the step runs, if any
+            run: Shell command the step runs, if any
+            config: The step configuration as written
+        """
+        self._init(index=index, name=name, uses=uses, run=run, config=config)
+
+class JobIR(FrozenSlots):
+    """A job, or a stage on platforms without jobs."""
+
+    __slots__ = ("id", "type", "config", "steps", "needs", "stage", "stage_index", "caches", "resources")
+
+    def __init__(self, id: str, type: str, config: Dict[str, Any], steps: Tuple[StepIR, ...],
+               needs: Tuple[str, ...], stage: Optional[str] = None, stage_index: Optional[int] = None,
+               caches: Tuple[Dict[str, Any], ...] = (), resources: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the job.
+
+        Args:
+            id: The job ID
+            type: "job" or "stage"
+            config: The job configuration as written
+            steps: The job's steps
+            needs: IDs of the jobs this job waits for
+            stage: Name of the job's stage, if any
+            stage_index: Position of the job's stage, if known
+            caches: Cache configurations the job uses
+            resources: Runner, image, timeout and similar resource settings
+        """
+        self._init(
+            id=id, type=type, config=config, steps=steps, needs=needs,
+            stage=stage, stage_index=stage_index, caches=caches,
+            resources=MappingProxyType(resources or {})
+        )
+
+class PipelineIR(FrozenSlots):
+    """
+    Intermediate representation of a pipeline configuration.
+
+    Built once per request and shared by all optimizer passes. The configuration
+    is referenced, not copied, and must not be modified while the IR is in use.
+    """
+
+    __slots__ = ("platform", "config", "jobs", "dependents", "jobs_by_stage", "_components")
+
+    def __init__(self, platform: str, config: Dict[str, Any], jobs: List[JobIR]):
+        """
+        Initialize the pipeline IR and its indexes.
+
+        Args:
+            platform: The CI/CD platform
+            config: The pipeline configuration
+            jobs: The pipeline's jobs, in configuration order
+        """
+        dependents: Dict[str, List[str]] = {job.id: [] for job in jobs}
+        jobs_by_stage: Dict[str, List[str]] = {}
+        for job in jobs:
+            for need in job.needs:
+                if need in dependents:
+                    dependents[need].append(job.id)
+            if job.stage is not None:
+                jobs_by_stage.setdefault(job.stage, []).append(job.id)
+
+        self._init(
+            platform=platform,
+            config=config,
+            jobs=MappingProxyType({job.id: job for job in jobs}),
+            dependents=MappingProxyType({job_id: tuple(ids) for job_id, ids in dependents.items()}),
+            jobs_by_stage=MappingProxyType({stage: tuple(ids) for stage, ids in jobs_by_stage.items()}),
+            _components=None
+        )
+
+    @classmethod
+    def from_config(cls, platform: str, pipeline_config: Dict[str, Any]) -> "PipelineIR":
+        """
+        Build the IR of a pipeline configuration.
+
+        Args:
+            platform: The CI/CD platform
+            pipeline_config: The pipeline configuration
+
+        Returns:
+            The pipeline IR
+        """
+        builder = {
+            "github-actions": _github_actions_jobs,
+            "gitlab-ci": _gitlab_ci_jobs,
+            "circle-ci": _circle_ci_jobs,
+            "jenkins": _jenkins_jobs
+        }.get(platform)
+
+        jobs = builder(pipeline_config) if builder and isinstance(pipeline_config, dict) else []
+        return cls(platform, pipeline_config, jobs)
+
+    @property
+    def components(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the jobs as component dictionaries.
+
+        Returns:
+            Dictionary of component IDs to component configurations, computed once
+        """
+        if self._components is None:
+            components = {}
+            for job in self.jobs.values():
+                component = {"id": job.id, "type": job.type, "config": job.config}
+                if self.platform == "gitlab-ci":
+                    component["stage"] = job.stage
+                    component["script"] = job.config.get("script", [])
+                else:
+                    component["steps"] = job.config.get("steps", [])
+                if self.platform == "jenkins":
+                    component["stage_index"] = job.stage_index
+                components[job.id] = component
+            object.__setattr__(self, "_components", components)
+        return self._components
+
+    def get_dependencies(self) -> Dict[str, Set[str]]:
+        """
+        Get the jobs each job waits for.
+
+        Returns:
+            Dictionary of job IDs to the IDs of the jobs they need
+        """
+        return {job_id: set(job.needs) for job_id, job in self.jobs.items()}
+
+def _as_list(value: Any) -> List[Any]:
+    """Wrap a single value in a list."""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def _github_actions_jobs(pipeline_config: Dict[str, Any]) -> List[JobIR]:
+    """Build the jobs of a GitHub Actions workflow."""
+    jobs = []
+    for job_id, job_config in (pipeline_config.get("jobs") or {}).items():
+        if not isinstance(job_config, dict):
+            continue
+
+        steps = []
+        caches = []
+        for i, step in enumerate(job_config.get("steps") or []):
+            if not isinstance(step, dict):
+                continue
+            uses = step.get("uses")
+            run = step.get("run")
+            steps.append(StepIR(i, step.get("name") or uses or run, uses, run, step))
+
+            with_config = step.get("with") or {}
+            if uses and uses.startswith("actions/cache"):
+                caches.append({"step_index": i, "type": "cache", "key": with_config.get("key"), "paths": _as_list(with_config.get("path"))})
+            elif uses and uses.startswith("actions/setup-") and with_config.get("cache"):
+                caches.append({"step_index": i, "type": "setup", "key": with_config.get("cache"), "paths": []})
+
+        strategy = job_config.get("strategy") or {}
+        resources = {
+            "runner": job_config.get("runs-on"),
+            "container": job_config.get("container"),
+            "services": list(job_config.get("services") or {}),
+            "timeout_minutes": job_config.get("timeout-minutes"),
+            "matrix": strategy.get("matrix") if isinstance(strategy, dict) else None
+        }
+
+        jobs.append(JobIR(
+            job_id, "job", job_config, tuple(steps),
+            tuple(str(need) for need in _as_list(job_config.get("needs"))),
+            caches=tuple(caches),
+            resources={name: value for name, value in resources.items() if value}
+        ))
+    return jobs
+
+def _gitlab_ci_jobs(pipeline_config: Dict[str, Any]) -> List[JobIR]:
+    """Build the jobs of a GitLab CI pipeline."""
+    stages = pipeline_config.get("stages") or []
+    jobs = []
+    for job_id, job_config in pipeline_config.items():
+        if not isinstance(job_config, dict) or "stage" not in job_config:
+            continue
+
+        steps = []
+        for section in ("before_script", "script", "after_script"):
+            for command in _as_list(job_config.get(section)):
+                steps.append(StepIR(len(steps), section, None, str(command), command))
+
+        needs = []
+        for need in _as_list(job_config.get("needs")):
+            if isinstance(need, dict):
+                need = need.get("job")
+            if need:
+                needs.append(str(need))
+
+        caches = [
+            {"step_index": None, "type": "cache", "key": cache.get("key"), "paths": _as_list(cache.get("paths"))}
+            for cache in _as_list(job_config.get("cache"))
+            if isinstance(cache, dict)
+        ]
+
+        resources = {
+            "image": job_config.get("image"),
+            "tags": job_config.get("tags"),
+            "services": job_config.get("services"),
+            "timeout": job_config.get("timeout"),
+            "resource_group": job_config.get("resource_group")
+        }
+
+        stage = job_config.get("stage")
+        jobs.append(JobIR(
+            job_id, "job", job_config, tuple(steps), tuple(needs),
+            stage=stage,
+            stage_index=stages.index(stage) if stage in stages else None,
+            caches=tuple(caches),
+            resources={name: value for name, value in resources.items() if value}
+        ))
+    return jobs
+
+def _circle_ci_jobs(pipeline_config: Dict[str, Any]) -> List[JobIR]:
+    """Build the jobs of a CircleCI config."""
+    # Requirements are declared where workflows use the jobs
+    requires: Dict[str, List[str]] = {}
+    for workflow in (pipeline_config.get("workflows") or {}).values():
+        if not isinstance(workflow, dict):
+            continue
+        for entry in workflow.get("jobs") or []:
+            if isinstance(entry, dict):
+                for job_id, job_options in entry.items():
+                    for need in _as_list((job_options or {}).get("requires")):
+                        if need not in requires.setdefault(job_id, []):
+                            requires[job_id].append(need)
+
+    jobs = []
+    for job_id, job_config in (pipeline_config.get("jobs") or {}).items():
+        if not isinstance(job_config, dict):
+            continue
+
+        steps = []
+        caches = []
+        for i, step in enumerate(job_config.get("steps") or []):
+            if isinstance(step, str):
+                steps.append(StepIR(i, step, step, None, step))
+                continue
+            if not isinstance(step, dict) or not step:
+                continue
+
+            step_type, options = next(iter(step.items()))
+            run = None
+            name = step_type
+            if step_type == "run":
+                run = options.get("command") if isinstance(options, dict) else options
+                name = options.get("name", run) if isinstance(options, dict) else run
+            steps.append(StepIR(i, name, step_type, run, step))
+
+            if step_type in ("restore_cache", "save_cache") and isinstance(options, dict):
+                caches.append({
+                    "step_index": i,
+                    "type": step_type,
+                    "key": options.get("key") or options.get("keys"),
+                    "paths": _as_list(options.get("paths"))
+                })
+
+        docker = job_config.get("docker") or []
+        resources = {
+            "resource_class": job_config.get("resource_class"),
+            "image": docker[0].get("image") if docker and isinstance(docker[0], dict) else None,
+            "machine": job_config.get("machine"),
+            "executor": job_config.get("executor"),
+            "parallelism": job_config.get("parallelism")
+        }
+
+        jobs.append(JobIR(
+            job_id, "job", job_config, tuple(steps), tuple(requires.get(job_id, [])),
+            caches=tuple(caches),
+            resources={name: value for name, value in resources.items() if value}
+        ))
+    return jobs
+
+def _jenkins_jobs(pipeline_config: Dict[str, Any]) -> List[JobIR]:
+    """Build the stages of a Jenkins pipeline, which run one after another."""
+    jobs = []
+    previous = None
+    for i, stage in enumerate(pipeline_config.get("stages") or []):
+        if not isinstance(stage, dict) or "name" not in stage:
+            continue
+
+        steps = tuple(
+            StepIR(j, step if isinstance(step, str) else None, None, step if isinstance(step, str) else None, step)
+            for j, step in enumerate(stage.get("steps") or [])
+        )
+        resources = {"agent": stage.get("agent")} if stage.get("agent") else {}
+
+        jobs.append(JobIR(
+            stage["name"], "stage", stage, steps, (previous,) if previous else (),
+            stage=stage["name"], stage_index=i, resources=resources
+        ))
+        previous = stage["name"]
+    return jobs
@@ -0,0 +1,174 @@
+"""
+Reachability index for dependency graphs.
+This module answers transitive dependency and dependent queries over a graph's CSR adjacency.
+"""
+
+from array import array
+from typing import Iterable, List, Sequence, Set
+
+class ReachabilityIndex:
+    """
+    Transitive closure queries over one direction of a dependency graph.
+
+    Strongly connected components are found once with an iterative version
+    of Tarjan's algorithm, collapsing cycles into single nodes of a DAG
+    (the condensation). A batch query walks the condensation once from all
+    start nodes, so every component is visited at most once per query no
+    matter how many start nodes reach it.
+    """
+
+    def __init__(self, ids: Sequence[str], alive: bytearray,
+                 offsets: Sequence[int], targets: Sequence[int]):
+        """
+        Initialize the reachability index.
+
+        Args:
+            ids: Node ID of each node index
+            alive: 1 for live node indices, 0 for removed ones
+            offsets: CSR offsets of the direction to follow
+            targets: CSR targets of the direction to follow
+        """
+        self._ids = ids
+        self._offsets = offsets
+        self._targets = targets
+
+        # Component of each node index, and the node indices in each component
+        self.component, self.members = self._strongly_connected_components(alive)
+
+        # Condensation as CSR arrays, and whether each component contains a cycle
+        component_count = len(self.members)
+        self._successor_offsets = array("l", [0]) * (component_count + 1)
+        self._successors = array("l")
+        self._cyclic = bytearray(component_count)
+        for comp, members in enumerate(self.members):
+            successors = set()
+            for node in members:
+                for position in range(offsets[node], offsets[node + 1]):
+                    successors.add(self.component[targets[position]])
+            if comp in successors:
+                successors.discard(comp)
+                self._cyclic[comp] = 1
+            elif len(members) > 1:
+                self._cyclic[comp] = 1
+            self._successors.extend(successors)
+            self._successor_offsets[comp + 1] = len(self._successors)
+
+    def _strongly_connected_components(self, alive: bytearray):
+        """
+        Find strongly connected components with an iterative Tarjan's algorithm.
+
+        Components are numbered in reverse topological order, so every
+        component only reaches components with lower numbers.
+
+        Args:
+            alive: 1 for live node indices, 0 for removed ones
+
+        Returns:
+            Tuple of the component of each node index (-1 for removed nodes)
+            and the list of node indices in each component
+        """
+        offsets = self._offsets
+        targets = self._targets
+        node_count = len(alive)
+
+        order = array("l", [-1]) * node_count
+        low = array("l", [0]) * node_count
+        component = array("l", [-1]) * node_count
+        on_stack = bytearray(node_count)
+        stack: List[int] = []
+        members: List[List[int]] = []
+        counter = 0
+
+        for root in range(node_count):
+            if not alive[root] or order[root] != -1:
+                continue
+
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [root]
+            positions = [offsets[root]]
+
+            while work:
+                node = work[-1]
+                position = positions[-1]
+
+                if position < offsets[node + 1]:
+                    positions[-1] = position + 1
+                    dep = targets[position]
+                    if order[dep] == -1:
+                        order[dep] = low[dep] = counter
+                        counter += 1
+                        stack.append(dep)
+                        on_stack[dep] = 1
+                        work.append(dep)
+                        positions.append(offsets[dep])
+                    elif on_stack[dep] and order[dep] < low[node]:
+                        low[node] = order[dep]
+                    continue
+
+                # All edges of the node visited
+                work.pop()
+                positions.pop()
+                if work and low[node] < low[work[-1]]:
+                    low[work[-1]] = low[node]
+
+                if low[node] == order[node]:
+                    comp = len(members)
+                    comp_members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component[member] = comp
+                        comp_members.append(member)
+                        if member == node:
+                            break
+                    members.append(comp_members)
+
+        return component, members
+
+    def reachable(self, node_indices: Iterable[int]) -> Set[str]:
+        """
+        Get the nodes reachable from any of the start nodes through at least one edge.
+
+        Args:
+            node_indices: Start node indices
+
+        Returns:
+            Set of node IDs
+        """
+        offsets = self._successor_offsets
+        successors = self._successors
+        visited = bytearray(len(self.members))
+        stack = []
+
+        for index in node_indices:
+            comp = self.component[index]
+
+            # A start node only reaches itself through a cycle
+            if self._cyclic[comp] and not visited[comp]:
+                visited[comp] = 1
+                stack.append(comp)
+
+            for position in range(offsets[comp], offsets[comp + 1]):
+                succ = successors[position]
+                if not visited[succ]:
+                    visited[succ] = 1
+                    stack.append(succ)
+
+        while stack:
+            comp = stack.pop()
+            for position in range(offsets[comp], offsets[comp + 1]):
+                succ = successors[position]
+                if not visited[succ]:
+                    visited[succ] = 1
+                    stack.append(succ)
+
+        ids = self._ids
+        members = self.members
+        return {
+            ids[index]
+            for comp, seen in enumerate(visited) if seen
+            for index in members[comp]
+        }
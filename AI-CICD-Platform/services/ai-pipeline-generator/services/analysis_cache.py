@@ -0,0 +1,188 @@
+"""
+On-disk cache of per-file code analysis results.
+This module lets repeated dependency analyses of a project only re-analyze files that changed.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+from ..models.file_storage import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Bump when the shape of cached analysis results changes
+CACHE_FORMAT_VERSION = 1
+
+def file_digest(file_path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file's content.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class AnalysisCache:
+    """
+    Cache of analysis results for the files of one project.
+
+    Entries are keyed by path relative to the project and remember the
+    file's mtime, size and content digest. A file whose mtime and size are
+    unchanged is a hit without being read; otherwise its content is hashed
+    and any cached result for the same content is reused, so touched or
+    renamed files are not re-analyzed.
+    """
+
+    def __init__(self, cache_dir: str, project_path: str):
+        """
+        Initialize the analysis cache.
+
+        Args:
+            cache_dir: Directory holding cache files
+            project_path: Path to the project directory
+        """
+        self.project_path = os.path.abspath(project_path)
+        project_key = hashlib.sha256(self.project_path.encode("utf-8")).hexdigest()[:16]
+        self.storage_path = os.path.join(cache_dir, f"{project_key}.json")
+
+        # Relative path -> {"mtime_ns", "size", "digest", "results": {options: result}}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+        # Content digest -> {options: result}, shared between entries with equal content
+        self._by_digest: Dict[str, Dict[str, Any]] = {}
+
+        self._seen = set()
+        self._dirty = False
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def options_key(analyze_imports: bool,
+                    analyze_function_calls: bool,
+                    analyze_class_hierarchy: bool) -> str:
+        """
+        Build the key of a set of analysis options.
+
+        Args:
+            analyze_imports: Whether imports are analyzed
+            analyze_function_calls: Whether function calls are analyzed
+            analyze_class_hierarchy: Whether class hierarchy is analyzed
+
+        Returns:
+            Options key
+        """
+        return "".join("1" if flag else "0" for flag in (
+            analyze_imports, analyze_function_calls, analyze_class_hierarchy
+        ))
+
+    def load(self) -> None:
+        """Load the cache file, starting empty if it is missing or unreadable."""
+        try:
+            with open(self.storage_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable analysis cache {self.storage_path}: {e}")
+            return
+
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return
+
+        self.entries = data.get("files", {})
+        for entry in self.entries.values():
+            self._by_digest.setdefault(entry["digest"], {}).update(entry["results"])
+
+    def get(self, rel_path: str, file_path: str,
+            options: str) -> Tuple[Optional[Dict[str, Any]], os.stat_result]:
+        """
+        Look up the cached result for a file.
+
+        Args:
+            rel_path: Path of the file relative to the project
+            file_path: Path to the file
+            options: Options key of the analysis
+
+        Returns:
+            Tuple of the cached result (None on a miss) and the file's stat
+        """
+        self._seen.add(rel_path)
+        stat = os.stat(file_path)
+        entry = self.entries.get(rel_path)
+
+        # Fast check: unchanged mtime and size means unchanged content
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            result = entry["results"].get(options)
+            if result is not None:
+                self.hits += 1
+                return result, stat
+
+        # Slow check: the content may still match, e.g. after a checkout touched the file
+        if entry or self._by_digest:
+            digest = file_digest(file_path)
+            results = self._by_digest.get(digest)
+            if results and options in results:
+                self.entries[rel_path] = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "digest": digest,
+                    "results": results
+                }
+                self._dirty = True
+                self.hits += 1
+                return results[options], stat
+
+        self.misses += 1
+        return None, stat
+
+    def put(self, rel_path: str, stat: os.stat_result, digest: str,
+            options: str, result: Dict[str, Any]) -> None:
+        """
+        Store the analysis result for a file.
+
+        Args:
+            rel_path: Path of the file relative to the project
+            stat: Stat of the file taken before it was analyzed
+            digest: Digest of the analyzed content
+            options: Options key of the analysis
+            result: Analysis result
+        """
+        results = self._by_digest.setdefault(digest, {})
+        results[options] = result
+        self.entries[rel_path] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": digest,
+            "results": results
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache file if it changed, dropping entries of deleted files."""
+        for rel_path in [path for path in self.entries if path not in self._seen]:
+            if not os.path.exists(os.path.join(self.project_path, rel_path)):
+                del self.entries[rel_path]
+                self._dirty = True
+
+        if not self._dirty:
+            return
+
+        try:
+            with atomic_write(self.storage_path) as f:
+                json.dump({"version": CACHE_FORMAT_VERSION, "files": self.entries}, f)
+        except OSError as e:
+            logger.warning(f"Error saving analysis cache {self.storage_path}: {e}")
+            return
+
+        self._dirty = False
@@ -0,0 +1,419 @@
+"""
+Batch optimization service for CI/CD pipelines.
+This module analyzes and optimizes many pipelines in a process pool and reports results as they finish.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Iterable, AsyncIterator, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+import io
+import os
+import time
+import asyncio
+import logging
+import tarfile
+import posixpath
+
+from services.yaml_loader import load_yaml
+from models.optimization_metrics import OptimizationMetricsRepository, OptimizationResult
+from models.job_durations import JobDurationStore
+
+logger = logging.getLogger(__name__)
+
+# Limits for pipelines read from an archive
+MAX_ARCHIVE_SIZE = 64 * 1024 * 1024
+MAX_ARCHIVE_MEMBERS = 5000
+MAX_PIPELINE_FILE_SIZE = 1024 * 1024
+
+class CollectingMetricsRepository(OptimizationMetricsRepository):
+    """
+    Repository that keeps results in memory only.
+
+    Worker processes save into it, and the parent process persists what they collected.
+    """
+
+    def __init__(self):
+        """Initialize the collecting repository."""
+        super().__init__(storage_path=os.devnull)
+
+    def drain(self) -> List[OptimizationResult]:
+        """
+        Remove and return the collected results.
+
+        Returns:
+            The results saved since the last drain
+        """
+        results = self.results
+        self._results.clear()
+        self._by_pipeline.clear()
+        self._by_type.clear()
+        return results
+
+    def _load(self) -> None:
+        """Start empty."""
+
+    def _write(self, records: List[str]) -> None:
+        """Keep records in memory only."""
+
+class CollectingDurationStore(JobDurationStore):
+    """
+    Duration store that keeps samples in memory only.
+
+    Worker processes record into it, and the parent process stores what they
+    collected. Before each pipeline, the parent's history of that pipeline is
+    seeded into it, so the optimizers see the same history as outside a batch.
+    """
+
+    def __init__(self):
+        """Initialize the collecting store."""
+        self._collected: List[Tuple] = []
+        super().__init__(storage_path=os.devnull)
+
+    def drain(self) -> List[Tuple]:
+        """
+        Remove and return the collected samples.
+
+        Samples stay in the series until the next pipeline is seeded.
+
+        Returns:
+            The samples added since the last drain
+        """
+        samples, self._collected = self._collected, []
+        return samples
+
+    def seed(self, samples: Iterable[Tuple]) -> None:
+        """
+        Replace the samples in the store with history from the parent process.
+
+        Seeded samples are not collected, so they are never handed back.
+
+        Args:
+            samples: Sample tuples, such as those returned by JobDurationStore.pipeline_samples
+        """
+        self._series.clear()
+        self._pipeline_series.clear()
+        self._statistics.clear()
+        for sample in samples:
+            self._add(*sample)
+
+    def _load(self) -> None:
+        """Start empty."""
+
+    def _append(self, samples: List[Tuple]) -> None:
+        """Collect samples instead of storing them."""
+        self._collected.extend(samples)
+
+# Optimizer of the current worker process, created once per process
+_worker_optimizer = None
+
+def _init_worker() -> None:
+    """Create the worker process's optimizer."""
+    global _worker_optimizer
+    from services.pipeline_optimizer import PipelineOptimizerService
+    _worker_optimizer = PipelineOptimizerService(CollectingMetricsRepository(), CollectingDurationStore())
+
+def process_pipeline(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Analyze or optimize one pipeline in a worker process.
+
+    Args:
+        item: Pipeline with pipeline_id, platform, config, and optional execution_data,
+            mode and history, the pipeline's samples in the parent's duration store
+
+    Returns:
+        Dictionary with the output, and the optimization results and duration samples to save
+    """
+    if _worker_optimizer is None:
+        _init_worker()
+
+    repository = _worker_optimizer.metrics_repository
+    repository.drain()
+    duration_store = _worker_optimizer.performance_profiler.duration_store
+    duration_store.drain()
+    duration_store.seed(item.get("history", []))
+
+    if item.get("mode") == "analyze":
+        output = {
+            "analysis": _worker_optimizer.analyze_pipeline(
+                item["pipeline_id"], item["platform"], item["config"], item.get("execution_data")
+            )
+        }
+    else:
+        optimized_config, optimization_details = _worker_optimizer.optimize_pipeline(
+            item["pipeline_id"], item["platform"], item["config"], item.get("execution_data")
+        )
+        output = {
+            "optimized_config": optimized_config,
+            "optimization_details": optimization_details
+        }
+
+    return {"output": output, "results": repository.drain(), "samples": duration_store.drain()}
+
+def _run_job(worker: Callable[[Dict[str, Any]], Dict[str, Any]], item: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a worker, turning its failure into an error outcome."""
+    start = time.perf_counter()
+    try:
+        outcome = worker(item)
+        outcome["status"] = "success"
+    except Exception as e:
+        outcome = {"status": "error", "error": f"{type(e).__name__}: {str(e)}"}
+    outcome["duration_seconds"] = time.perf_counter() - start
+    return outcome
+
+def detect_platform(path: str) -> Optional[str]:
+    """
+    Detect the CI/CD platform of a pipeline file from its path.
+
+    Args:
+        path: Path of the file in the repository
+
+    Returns:
+        The platform, or None if the path is not a known pipeline file
+    """
+    parts = path.split("/")
+    name = parts[-1]
+    if name.endswith((".yml", ".yaml")) and len(parts) >= 3 and parts[-3:-1] == [".github", "workflows"]:
+        return "github-actions"
+    if name == ".gitlab-ci.yml":
+        return "gitlab-ci"
+    if name == "config.yml" and len(parts) >= 2 and parts[-2] == ".circleci":
+        return "circle-ci"
+    return None
+
+def load_pipelines_from_archive(data: bytes, platform: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read pipeline configurations from a tar archive.
+
+    Files are read in memory, never extracted. With a platform, every YAML file
+    is a pipeline of that platform; otherwise the platform is detected from the
+    path and other files are skipped.
+
+    Args:
+        data: The tar archive, optionally gzip or bzip2 compressed
+        platform: Optional platform of all pipelines
+
+    Returns:
+        List of pipelines with pipeline_id and platform, and either config or, if the file could not be read, error
+
+    Raises:
+        ValueError: If the data is not a readable tar archive
+    """
+    pipelines = []
+    try:
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+            for i, member in enumerate(archive):
+                if i >= MAX_ARCHIVE_MEMBERS:
+                    raise ValueError(f"Archive has more than {MAX_ARCHIVE_MEMBERS} members")
+                if not member.isfile():
+                    continue
+
+                path = posixpath.normpath(member.name).lstrip("/")
+                if platform:
+                    member_platform = platform if path.endswith((".yml", ".yaml")) else None
+                else:
+                    member_platform = detect_platform(path)
+                if member_platform is None:
+                    continue
+
+                pipeline = {"pipeline_id": path, "platform": member_platform}
+                if member.size > MAX_PIPELINE_FILE_SIZE:
+                    pipeline["error"] = f"File is larger than {MAX_PIPELINE_FILE_SIZE} bytes"
+                else:
+                    try:
+                        config = load_yaml(archive.extractfile(member).read().decode("utf-8"))
+                        if not isinstance(config, dict):
+                            raise ValueError("Pipeline configuration is not a mapping")
+                        pipeline["config"] = config
+                    except Exception as e:
+                        pipeline["error"] = f"Invalid pipeline file: {str(e)}"
+                pipelines.append(pipeline)
+    except tarfile.TarError as e:
+        raise ValueError(f"Invalid archive: {str(e)}")
+
+    return pipelines
+
+class BatchOptimizerService:
+    """
+    Service for analyzing and optimizing many pipelines at once.
+
+    Pipelines run in a process pool, so the event loop stays free and the
+    optimizers use all cores. At most max_concurrency pipelines are queued in
+    the pool at a time, and each result is reported as soon as it finishes.
+    Results and job duration samples the optimizers record are saved by this
+    process, in one batch per finished pipeline. If the client goes away,
+    pipelines that have not started are dropped and those already running
+    are still saved once they finish.
+    """
+
+    def __init__(self, metrics_repository: Optional[OptimizationMetricsRepository] = None,
+                 duration_store: Optional[JobDurationStore] = None,
+                 max_workers: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 worker: Callable[[Dict[str, Any]], Dict[str, Any]] = process_pipeline):
+        """
+        Initialize the batch optimizer service.
+
+        Args:
+            metrics_repository: Repository to save optimization results to
+            duration_store: Store to save job duration samples to
+            max_workers: Number of worker processes, defaults to the number of CPUs
+            max_concurrency: Maximum number of pipelines submitted to the pool at a time,
+                defaults to twice the number of workers
+            worker: Function processing one pipeline in a worker process
+        """
+        self.metrics_repository = metrics_repository or OptimizationMetricsRepository()
+        self.duration_store = duration_store or JobDurationStore()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or 2 * self.max_workers
+        self.worker = worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def process_batch(self, pipelines: Iterable[Dict[str, Any]],
+                            mode: str = "optimize",
+                            max_concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze or optimize pipelines, yielding events as they finish.
+
+        Args:
+            pipelines: Pipelines with pipeline_id, platform and config, optionally execution_data;
+                pipelines with an error instead of a config are reported as failed
+            mode: "optimize" or "analyze"
+            max_concurrency: Optional limit for this batch, defaults to the service's limit
+
+        Yields:
+            A "start" event, a "result" event per pipeline in completion order with
+            progress counts, and a final "summary" event
+        """
+        if mode not in ("optimize", "analyze"):
+            raise ValueError(f"Unsupported mode: {mode}")
+
+        max_concurrency = max_concurrency or self.max_concurrency
+        pipelines = list(pipelines)
+        total = len(pipelines)
+        start = time.perf_counter()
+        completed = 0
+        failed = 0
+
+        yield {"type": "start", "total": total, "mode": mode}
+
+        loop = asyncio.get_running_loop()
+        queue = iter(enumerate(pipelines))
+        in_flight: Dict[asyncio.Future, Tuple[int, Dict[str, Any]]] = {}
+
+        # Pool futures of the pipelines submitted to the pool
+        jobs: Dict[asyncio.Future, Future] = {}
+
+        try:
+            while True:
+                # Keep the pool busy without queueing the whole batch at once
+                for index, pipeline in queue:
+                    if "error" in pipeline or "config" not in pipeline:
+                        future = loop.create_future()
+                        future.set_result({
+                            "status": "error",
+                            "error": pipeline.get("error", "Missing pipeline configuration"),
+                            "duration_seconds": 0.0
+                        })
+                    else:
+                        item = dict(
+                            pipeline,
+                            mode=mode,
+                            history=self.duration_store.pipeline_samples(pipeline.get("pipeline_id"))
+                        )
+                        job = self._get_executor().submit(_run_job, self.worker, item)
+                        future = asyncio.wrap_future(job, loop=loop)
+                        jobs[future] = job
+                    in_flight[future] = (index, pipeline)
+                    if len(in_flight) >= max_concurrency:
+                        break
+
+                if not in_flight:
+                    break
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index, pipeline = in_flight.pop(future)
+                    jobs.pop(future, None)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        # The worker process died
+                        outcome = {"status": "error", "error": f"{type(e).__name__}: {str(e)}", "duration_seconds": 0.0}
+                        self._reset_executor()
+
+                    self._save_outcome(outcome)
+
+                    completed += 1
+                    if outcome["status"] != "success":
+                        failed += 1
+
+                    event = {
+                        "type": "result",
+                        "index": index,
+                        "pipeline_id": pipeline.get("pipeline_id"),
+                        "platform": pipeline.get("platform"),
+                        "status": outcome["status"],
+                        "duration_seconds": outcome["duration_seconds"],
+                        "progress": {"completed": completed, "failed": failed, "total": total}
+                    }
+                    if outcome["status"] == "success":
+                        event.update(outcome.get("output", {}))
+                    else:
+                        event["error"] = outcome["error"]
+                    yield event
+        finally:
+            # The client went away; drop pipelines that have not started and
+            # save the results of those still running once they finish
+            running = 0
+            for future, job in jobs.items():
+                if job.cancel():
+                    continue
+                future.add_done_callback(self._save_abandoned)
+                running += 1
+            if in_flight:
+                logger.warning(
+                    f"Batch stopped with {len(in_flight)} pipelines unfinished; "
+                    f"{running} still running will be saved when they finish"
+                )
+
+        yield {
+            "type": "summary",
+            "total": total,
+            "succeeded": completed - failed,
+            "failed": failed,
+            "duration_seconds": time.perf_counter() - start
+        }
+
+    def _save_outcome(self, outcome: Dict[str, Any]) -> None:
+        """Save the optimization results and duration samples a worker recorded."""
+        results = outcome.pop("results", [])
+        if results:
+            self.metrics_repository.save_optimization_results(results)
+        samples = outcome.pop("samples", [])
+        if samples:
+            self.duration_store.add_samples(samples)
+
+    def _save_abandoned(self, future: asyncio.Future) -> None:
+        """Save the outcome of a pipeline that finished after its batch was stopped."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            self._save_outcome(future.result())
+        except Exception as e:
+            logger.error(f"Error saving batch results: {e}")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get the process pool, starting it on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _reset_executor(self) -> None:
+        """Replace a broken process pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -19,18 +19,23 @@ class BuildOptimizerService:
     Service for optimizing build order and parallel execution.
     """
     
+    # Duration of jobs without a known duration, in seconds
+    DEFAULT_JOB_DURATION = 1.0
+    
     def __init__(self):
         """Initialize the build optimizer service."""
         pass
     
     def optimize_build_order(self, dependency_graph: DependencyGraph,
-                            changed_files: Optional[List[str]] = None) -> Dict[str, Any]:
+                            changed_files: Optional[List[str]] = None,
+                            durations: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
         """
         Optimize the build order based on dependencies.
         
         Args:
             dependency_graph: Dependency graph of the project
             changed_files: Optional list of files that have been changed
+            durations: Optional map of node ID to job duration in seconds
             
         Returns:
             Dictionary containing build order optimization results
@@ -42,6 +47,7 @@ class BuildOptimizerService:
             "metrics": {
                 "total_nodes": 0,
                 "critical_path_length": 0,
+                "critical_path_duration": 0.0,
                 "max_depth": 0
             }
         }
@@ -67,7 +73,8 @@ class BuildOptimizerService:
         build_order = self._topological_sort(dependency_graph, filtered_nodes)
         
         # Find critical path
-        critical_path = self._find_critical_path(dependency_graph, filtered_nodes)
+        node_durations = self._get_node_durations(filtered_nodes, durations)
+        critical_path = self._find_critical_path(dependency_graph, filtered_nodes, node_durations)
         
         # Calculate max depth
         max_depth = self._calculate_max_depth(dependency_graph, filtered_nodes)
@@ -76,30 +83,51 @@ class BuildOptimizerService:
         result["build_order"] = build_order
         result["critical_path"] = critical_path
         result["metrics"]["critical_path_length"] = len(critical_path)
+        result["metrics"]["critical_path_duration"] = sum(node_durations[node_id] for node_id in critical_path)
         result["metrics"]["max_depth"] = max_depth
         
         return result
     
     def optimize_parallel_execution(self, dependency_graph: DependencyGraph,
-                                   max_parallel_jobs: int = 4) -> Dict[str, Any]:
+                                   max_parallel_jobs: int = 4,
+                                   durations: Optional[Dict[str, float]] = None,
+                                   runners: Optional[List[Dict[str, float]]] = None) -> Dict[str, Any]:
         """
         Optimize parallel execution of build jobs.
         
+        Jobs are list-scheduled: whenever a worker is free, the ready job with
+        the longest remaining path to the end of the build starts, so jobs of
+        different dependency levels run side by side and the critical path
+        is never left waiting behind shorter work.
+        
         Args:
             dependency_graph: Dependency graph of the project
             max_parallel_jobs: Maximum number of parallel jobs to run
+            durations: Optional map of node ID to job duration in seconds; nodes
+                without one use their "duration" attribute or DEFAULT_JOB_DURATION
+            runners: Optional resource capacities of each runner, such as
+                {"cpu": 4, "memory_gb": 8}; jobs declare their needs in a
+                "resources" attribute
             
         Returns:
             Dictionary containing parallel execution optimization results
+            
+        Raises:
+            ValueError: If some job needs more resources than any single runner has
         """
         # Initialize result
         result = {
             "parallel_groups": [],
             "execution_plan": [],
+            "schedule": [],
+            "critical_path": [],
             "metrics": {
                 "total_nodes": 0,
                 "total_groups": 0,
-                "estimated_time": 0
+                "estimated_time": 0,
+                "total_work": 0.0,
+                "critical_path_duration": 0.0,
+                "utilization": 0.0
             }
         }
         
@@ -112,17 +140,35 @@ class BuildOptimizerService:
         # Perform level-based parallelization
         parallel_groups = self._level_based_parallelization(dependency_graph, all_nodes)
         
-        # Create execution plan
-        execution_plan = self._create_execution_plan(parallel_groups, max_parallel_jobs)
+        # Schedule jobs by critical path priority
+        node_durations = self._get_node_durations(all_nodes, durations)
+        schedule = self._list_schedule(dependency_graph, all_nodes, node_durations, max_parallel_jobs, runners)
+        
+        # Group jobs that start together into execution steps
+        execution_plan = []
+        step_start = None
+        for entry in schedule:
+            if entry["start"] != step_start:
+                execution_plan.append([])
+                step_start = entry["start"]
+            execution_plan[-1].append(entry["node_id"])
         
         # Estimate execution time
-        estimated_time = self._estimate_execution_time(execution_plan)
+        makespan = max((entry["end"] for entry in schedule), default=0.0)
+        total_work = sum(node_durations.values())
+        critical_path = self._find_critical_path(dependency_graph, all_nodes, node_durations)
         
         # Update result
         result["parallel_groups"] = parallel_groups
         result["execution_plan"] = execution_plan
+        result["schedule"] = schedule
+        result["critical_path"] = critical_path
         result["metrics"]["total_groups"] = len(parallel_groups)
-        result["metrics"]["estimated_time"] = estimated_time
+        result["metrics"]["estimated_time"] = makespan
+        result["metrics"]["total_work"] = total_work
+        result["metrics"]["critical_path_duration"] = sum(node_durations[node_id] for node_id in critical_path)
+        if makespan > 0:
+            result["metrics"]["utilization"] = total_work / (makespan * max(1, max_parallel_jobs))
         
         return result
     
@@ -159,44 +205,12 @@ class BuildOptimizerService:
             if node_id:
                 directly_affected_nodes.add(node_id)
         
-        # Find all dependencies of affected nodes
-        for node_id in directly_affected_nodes:
-            # Add the node itself
-            affected_nodes.add(node_id)
-            
-            # Find all dependencies
-            dependencies = self._find_all_dependencies(dependency_graph, node_id)
-            affected_nodes.update(dependencies)
+        # Find all dependencies of affected nodes, including the nodes themselves
+        affected_nodes.update(directly_affected_nodes)
+        affected_nodes.update(dependency_graph.get_all_dependencies(directly_affected_nodes))
         
         return affected_nodes
     
-    def _find_all_dependencies(self, dependency_graph: DependencyGraph, node_id: str) -> Set[str]:
-        """
-        Find all nodes that a given node depends on.
-        
-        Args:
-            dependency_graph: Dependency graph
-            node_id: ID of the node
-            
-        Returns:
-            Set of node IDs that the given node depends on
-        """
-        # Initialize result
-        dependencies = set()
-        
-        # Find direct dependencies
-        direct_dependencies = dependency_graph.get_dependencies(node_id)
-        
-        # Add direct dependencies
-        dependencies.update(direct_dependencies)
-        
-        # Find indirect dependencies
-        for dependency_id in direct_dependencies:
-            indirect_dependencies = self._find_all_dependencies(dependency_graph, dependency_id)
-            dependencies.update(indirect_dependencies)
-        
-        return dependencies
-    
     def _topological_sort(self, dependency_graph: DependencyGraph, nodes: Dict[str, Any]) -> List[str]:
         """
         Perform topological sort on the dependency graph.
@@ -254,16 +268,55 @@ class BuildOptimizerService:
         
         return result
     
-    def _find_critical_path(self, dependency_graph: DependencyGraph, nodes: Dict[str, Any]) -> List[str]:
+    def _get_node_durations(self, nodes: Dict[str, Any],
+                            durations: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """
+        Get the job duration of each node.
+        
+        Args:
+            nodes: Dictionary of nodes
+            durations: Optional map of node ID to job duration in seconds
+            
+        Returns:
+            Map of node ID to job duration in seconds
+        """
+        durations = durations or {}
+        result = {}
+        for node_id, node_attrs in nodes.items():
+            duration = durations.get(node_id)
+            if duration is None:
+                duration = self._get_node_attribute(node_attrs, "duration")
+            result[node_id] = float(duration) if duration is not None else self.DEFAULT_JOB_DURATION
+        return result
+    
+    def _get_node_attribute(self, node_attrs: Dict[str, Any], name: str) -> Any:
+        """
+        Get an attribute of a node, whether stored at the top level or under "attributes".
+        
+        Args:
+            node_attrs: Node metadata
+            name: Name of the attribute
+            
+        Returns:
+            Attribute value, or None if the node does not have it
+        """
+        value = node_attrs.get(name)
+        if value is None:
+            value = (node_attrs.get("attributes") or {}).get(name)
+        return value
+    
+    def _find_critical_path(self, dependency_graph: DependencyGraph, nodes: Dict[str, Any],
+                           durations: Optional[Dict[str, float]] = None) -> List[str]:
         """
         Find the critical path in the dependency graph.
         
         Args:
             dependency_graph: Dependency graph
             nodes: Dictionary of nodes to analyze
+            durations: Optional map of node ID to job duration; nodes count as 1 if omitted
             
         Returns:
-            List of node IDs in the critical path
+            List of node IDs in the critical path, from the last job to build to the first
         """
         # Initialize result
         result = []
@@ -280,8 +333,12 @@ class BuildOptimizerService:
             # Add to graph
             graph[node_id] = filtered_dependencies
         
-        # Calculate longest path for each node
-        longest_path = {node_id: 0 for node_id in graph}
+        if not graph:
+            return result
+        
+        # Calculate the longest weighted path ending at each node
+        weight = {node_id: durations.get(node_id, 1.0) if durations else 1.0 for node_id in graph}
+        longest_path = dict(weight)
         predecessor = {node_id: None for node_id in graph}
         
         # Perform topological sort
@@ -294,8 +351,8 @@ class BuildOptimizerService:
             
             # Update longest path
             for dep_id in dependencies:
-                if longest_path[dep_id] < longest_path[node_id] + 1:
-                    longest_path[dep_id] = longest_path[node_id] + 1
+                if longest_path[dep_id] < longest_path[node_id] + weight[dep_id]:
+                    longest_path[dep_id] = longest_path[node_id] + weight[dep_id]
                     predecessor[dep_id] = node_id
         
         # Find node with longest path
@@ -429,45 +486,189 @@ class BuildOptimizerService:
         
         return result
     
-    def _create_execution_plan(self, parallel_groups: List[List[str]], max_parallel_jobs: int) -> List[List[str]]:
+    def _calculate_upward_ranks(self, graph: Dict[str, List[str]],
+                               reverse_graph: Dict[str, List[str]],
+                               durations: Dict[str, float]) -> Dict[str, float]:
         """
-        Create an execution plan from parallel groups.
+        Calculate the upward rank of each node: its duration plus the longest
+        chain of dependent jobs that cannot start before it finishes.
         
         Args:
-            parallel_groups: List of lists of node IDs, where each inner list represents a level
-            max_parallel_jobs: Maximum number of parallel jobs to run
+            graph: Map of node ID to the IDs of its dependencies
+            reverse_graph: Map of node ID to the IDs of its dependents
+            durations: Map of node ID to job duration
             
         Returns:
-            List of lists of node IDs, where each inner list represents a batch of jobs to run in parallel
+            Map of node ID to upward rank
         """
-        # Initialize result
-        result = []
+        ranks = {}
+        
+        # Visit nodes after all of their dependents (Kahn's algorithm)
+        remaining = {node_id: len(reverse_graph.get(node_id, [])) for node_id in graph}
+        queue = [node_id for node_id, count in remaining.items() if count == 0]
+        while queue:
+            node_id = queue.pop()
+            ranks[node_id] = durations[node_id] + max(
+                (ranks[dependent_id] for dependent_id in reverse_graph.get(node_id, [])),
+                default=0.0
+            )
+            for dep_id in graph[node_id]:
+                remaining[dep_id] -= 1
+                if remaining[dep_id] == 0:
+                    queue.append(dep_id)
+        
+        # Nodes on cycles only see the ranks that are known
+        for node_id in graph:
+            if node_id not in ranks:
+                ranks[node_id] = durations[node_id] + max(
+                    (ranks.get(dependent_id, 0.0) for dependent_id in reverse_graph.get(node_id, [])),
+                    default=0.0
+                )
         
-        # Process each level
-        for level in parallel_groups:
-            # Split level into batches
-            batches = []
-            for i in range(0, len(level), max_parallel_jobs):
-                batch = level[i:i + max_parallel_jobs]
-                batches.append(batch)
+        return ranks
+    
+    def _list_schedule(self, dependency_graph: DependencyGraph, nodes: Dict[str, Any],
+                       durations: Dict[str, float], max_parallel_jobs: int,
+                       runners: Optional[List[Dict[str, float]]] = None) -> List[Dict[str, Any]]:
+        """
+        Schedule jobs on workers, starting the ready job with the highest
+        upward rank whenever a worker and enough runner resources are free.
+        
+        Args:
+            dependency_graph: Dependency graph
+            nodes: Dictionary of nodes to schedule
+            durations: Map of node ID to job duration
+            max_parallel_jobs: Maximum number of parallel jobs to run
+            runners: Optional resource capacities of each runner
+            
+        Returns:
+            List of scheduled jobs ordered by start time, each with its node ID,
+            worker, runner, start, end and duration
             
-            # Add batches to result
-            result.extend(batches)
+        Raises:
+            ValueError: If some job needs more resources than any single runner has
+        """
+        # Create a copy of the graph
+        graph = {}
+        reverse_graph = {}
+        for node_id in nodes:
+            filtered_dependencies = [dep_id for dep_id in dependency_graph.get_dependencies(node_id) if dep_id in nodes]
+            graph[node_id] = filtered_dependencies
+            for dep_id in filtered_dependencies:
+                reverse_graph.setdefault(dep_id, []).append(node_id)
         
-        return result
+        ranks = self._calculate_upward_ranks(graph, reverse_graph, durations)
+        
+        # Tie-break equal ranks by graph order so plans are deterministic
+        order = {node_id: position for position, node_id in enumerate(graph)}
+        by_rank = sorted(graph, key=lambda node_id: (-ranks[node_id], order[node_id]))
+        
+        # Resource needs of each job; every job must fit on some runner as a whole
+        runners = [dict(runner) for runner in runners] if runners else [{}]
+        demands = {}
+        unschedulable = []
+        for node_id in graph:
+            demands[node_id] = dict(self._get_node_attribute(nodes[node_id], "resources") or {})
+            if self._find_runner(runners, demands[node_id]) is None:
+                unschedulable.append(node_id)
+        
+        if unschedulable:
+            details = ", ".join(f"{node_id} {demands[node_id]}" for node_id in unschedulable)
+            raise ValueError(f"Jobs need more resources than any single runner has: {details}")
+        
+        remaining = {node_id: len(dependencies) for node_id, dependencies in graph.items()}
+        ready = [(-ranks[node_id], order[node_id], node_id) for node_id, count in remaining.items() if count == 0]
+        heapq.heapify(ready)
+        
+        free_workers = list(range(max(1, max_parallel_jobs)))
+        running = []
+        schedule = []
+        scheduled = set()
+        time = 0.0
+        
+        while len(scheduled) < len(graph):
+            # Start ready jobs by priority; jobs that do not fit let lower ranked ones backfill
+            waiting = []
+            while ready and free_workers:
+                item = heapq.heappop(ready)
+                node_id = item[2]
+                runner = self._find_runner(runners, demands[node_id])
+                if runner is None:
+                    waiting.append(item)
+                    continue
+                
+                for resource, amount in demands[node_id].items():
+                    if resource in runners[runner]:
+                        runners[runner][resource] -= amount
+                
+                worker = heapq.heappop(free_workers)
+                end = time + durations[node_id]
+                schedule.append({
+                    "node_id": node_id,
+                    "worker": worker,
+                    "runner": runner,
+                    "start": time,
+                    "end": end,
+                    "duration": durations[node_id]
+                })
+                scheduled.add(node_id)
+                heapq.heappush(running, (end, order[node_id], node_id, worker, runner))
+            
+            for item in waiting:
+                heapq.heappush(ready, item)
+            
+            if not running:
+                if ready:
+                    # Every job fits an idle runner, so this cannot happen
+                    raise RuntimeError(f"Could not schedule jobs: {sorted(item[2] for item in ready)}")
+                
+                # Remaining jobs wait on each other in a cycle; release the highest ranked one
+                logger.warning("Dependency graph contains cycles")
+                node_id = next(node_id for node_id in by_rank if node_id not in scheduled and remaining[node_id] > 0)
+                remaining[node_id] = 0
+                heapq.heappush(ready, (-ranks[node_id], order[node_id], node_id))
+                continue
+            
+            # Advance to the next job completion and release everything finishing then
+            time = running[0][0]
+            while running and running[0][0] == time:
+                _, _, node_id, worker, runner = heapq.heappop(running)
+                heapq.heappush(free_workers, worker)
+                for resource, amount in demands[node_id].items():
+                    if resource in runners[runner]:
+                        runners[runner][resource] += amount
+                
+                for dependent_id in reverse_graph.get(node_id, []):
+                    if dependent_id in scheduled:
+                        continue
+                    remaining[dependent_id] -= 1
+                    if remaining[dependent_id] == 0:
+                        heapq.heappush(ready, (-ranks[dependent_id], order[dependent_id], dependent_id))
+        
+        schedule.sort(key=lambda entry: (entry["start"], entry["worker"]))
+        
+        return schedule
     
-    def _estimate_execution_time(self, execution_plan: List[List[str]]) -> int:
+    def _find_runner(self, runners: List[Dict[str, float]], demand: Dict[str, float]) -> Optional[int]:
         """
-        Estimate the execution time of an execution plan.
+        Find the runner with the least free resources that still fits a job.
         
         Args:
-            execution_plan: List of lists of node IDs, where each inner list represents a batch of jobs to run in parallel
+            runners: Free resources of each runner
+            demand: Resources the job needs
             
         Returns:
-            Estimated execution time in arbitrary units
+            Index of the runner, or None if no runner has enough free resources
         """
-        # Assume each batch takes 1 time unit
-        return len(execution_plan)
+        best = None
+        best_free = None
+        for index, free in enumerate(runners):
+            if all(free.get(resource, float("inf")) >= amount for resource, amount in demand.items()):
+                total_free = sum(free.values())
+                if best is None or total_free < best_free:
+                    best = index
+                    best_free = total_free
+        return best
     
     def identify_parallel_build_opportunities(self, dependency_graph: DependencyGraph) -> Dict[str, Any]:
         """
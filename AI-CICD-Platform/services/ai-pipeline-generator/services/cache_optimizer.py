@@ -6,6 +6,7 @@ This module provides tools to optimize caching strategies in pipeline jobs.
 from typing import Dict, List, Any, Optional, Tuple
 import copy
 import logging
+from models.pipeline_ir import PipelineIR
 from models.optimization_metrics import (
     OptimizationMetricsRepository,
     CachingMetric,
@@ -25,7 +26,8 @@ class CacheOptimizerService:
     
     def analyze_caching_strategies(self, pipeline_id: str, platform: str,
                                  pipeline_config: Dict[str, Any],
-                                 historical_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                                 historical_data: Optional[Dict[str, Any]] = None,
+                                 ir: Optional[PipelineIR] = None) -> Dict[str, Any]:
         """
         Analyze caching strategies in a pipeline configuration.
         
@@ -34,15 +36,17 @@ class CacheOptimizerService:
             platform: The CI/CD platform
             pipeline_config: The pipeline configuration
             historical_data: Optional historical execution data
+            ir: Optional IR of the pipeline configuration, built if not given
             
         Returns:
             Analysis results with caching strategy optimization opportunities
         """
-        # Extract components from the pipeline configuration
-        components = self._extract_components(platform, pipeline_config)
+        # Extract components from the pipeline IR
+        ir = ir or PipelineIR.from_config(platform, pipeline_config)
+        components = ir.components
         
         # Extract caching configurations
-        caching_configs = self._extract_caching_configs(platform, components)
+        caching_configs = self._extract_caching_configs(platform, ir)
         
         # Extract cacheable artifacts
         cacheable_artifacts = self._identify_cacheable_artifacts(platform, components)
@@ -131,15 +135,13 @@ class CacheOptimizerService:
         }
     
     # Implementation of private methods would go here
-    def _extract_components(self, platform: str, pipeline_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract components from pipeline config."""
-        # Implementation would go here
-        return {}
-    
-    def _extract_caching_configs(self, platform: str, components: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
-        """Extract caching configurations from components."""
-        # Implementation would go here
-        return {}
+    def _extract_caching_configs(self, platform: str, ir: PipelineIR) -> Dict[str, List[Dict[str, Any]]]:
+        """Extract caching configurations of the jobs that use caches."""
+        return {
+            job_id: [dict(cache) for cache in job.caches]
+            for job_id, job in ir.jobs.items()
+            if job.caches
+        }
     
     def _identify_cacheable_artifacts(self, platform: str, components: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
         """Identify cacheable artifacts in components."""
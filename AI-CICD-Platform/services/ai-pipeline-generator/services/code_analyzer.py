@@ -7,19 +7,58 @@ import os
 import logging
 import ast
 import re
-import glob
-from typing import Dict, List, Set, Any, Optional, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Set, Any, Optional, Tuple, Union, Iterable, Iterator
 from pathlib import Path
 
+from .analysis_cache import AnalysisCache, file_digest
+from .file_discovery import FileMatcher, walk_project_files
+
 logger = logging.getLogger(__name__)
 
+# Analyzer used by worker processes, created once per process
+_worker_analyzer = None
+
+def _analyze_file_batch(tasks: List[Tuple[str, str]],
+                        flags: Tuple[bool, bool, bool]) -> List[Tuple[str, str, Optional[str], Optional[Dict[str, Any]]]]:
+    """
+    Analyze a batch of files in a worker process.
+    
+    Args:
+        tasks: List of tuples of file path and language
+        flags: Whether to analyze imports, function calls and class hierarchy
+        
+    Returns:
+        List of tuples of file path, language, content digest and unresolved analysis result
+    """
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = CodeAnalyzerService(cache_dir=None)
+    
+    return _worker_analyzer._analyze_batch(tasks, flags)
+
 class CodeAnalyzerService:
     """
     Service for analyzing code dependencies.
     """
     
-    def __init__(self):
-        """Initialize the code analyzer service."""
+    # Files are sent to worker processes in batches of this size; fewer
+    # files than one batch are analyzed without starting workers
+    ANALYSIS_BATCH_SIZE = 32
+    
+    def __init__(self, cache_dir: Optional[str] = "data/code_analysis_cache",
+                 max_workers: Optional[int] = None):
+        """
+        Initialize the code analyzer service.
+        
+        Args:
+            cache_dir: Directory for the per-file analysis cache, or None to disable caching
+            max_workers: Maximum number of worker processes, defaults to the CPU count
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        
         # Map of language to file extensions
         self.language_to_extensions = {
             "python": [".py"],
@@ -43,6 +82,13 @@ class CodeAnalyzerService:
             "javascript": self._analyze_javascript_file,
             "typescript": self._analyze_typescript_file,
         }
+        
+        # Map of language to import resolvers
+        self.language_resolvers = {
+            "python": self._resolve_python_imports,
+            "javascript": self._resolve_javascript_imports,
+            "typescript": self._resolve_javascript_imports,
+        }
     
     def analyze_code_dependencies(self, project_path: str,
                                 languages: Optional[List[str]] = None,
@@ -70,13 +116,6 @@ class CodeAnalyzerService:
         """
         logger.info(f"Analyzing code dependencies: {project_path}")
         
-        # Initialize result
-        result = {
-            "imports": {},
-            "function_calls": {},
-            "class_hierarchy": {}
-        }
-        
         # Get file extensions to analyze
         extensions = self._get_extensions_for_languages(languages)
         
@@ -89,41 +128,157 @@ class CodeAnalyzerService:
             max_depth
         )
         
+        return self._analyze_paths(
+            project_path,
+            files,
+            analyze_imports,
+            analyze_function_calls,
+            analyze_class_hierarchy,
+            use_cache=True
+        )
+    
+    def analyze_files(self, project_path: str,
+                      file_paths: List[str],
+                      languages: Optional[List[str]] = None,
+                      analyze_imports: bool = True,
+                      analyze_function_calls: bool = True,
+                      analyze_class_hierarchy: bool = True) -> Dict[str, Any]:
+        """
+        Analyze code dependencies of some files of a project, such as the
+        files changed by a commit. The analysis cache is not used, since the
+        files are expected to have changed.
+        
+        Args:
+            project_path: Path to the project directory
+            file_paths: Paths of the files, relative to the project or absolute;
+                missing files and files in other languages are skipped
+            languages: List of languages to analyze
+            analyze_imports: Whether to analyze imports
+            analyze_function_calls: Whether to analyze function calls
+            analyze_class_hierarchy: Whether to analyze class hierarchy
+            
+        Returns:
+            Dictionary containing code dependencies of the files, in the same
+            form as analyze_code_dependencies
+        """
+        extensions = tuple(self._get_extensions_for_languages(languages))
+        files = [
+            os.path.join(project_path, file_path) for file_path in file_paths
+            if file_path.endswith(extensions) and os.path.isfile(os.path.join(project_path, file_path))
+        ]
+        
+        return self._analyze_paths(
+            project_path,
+            files,
+            analyze_imports,
+            analyze_function_calls,
+            analyze_class_hierarchy,
+            use_cache=False
+        )
+    
+    def _analyze_paths(self, project_path: str,
+                       paths: Iterable[str],
+                       analyze_imports: bool,
+                       analyze_function_calls: bool,
+                       analyze_class_hierarchy: bool,
+                       use_cache: bool) -> Dict[str, Any]:
+        """
+        Analyze files and merge their results.
+        
+        Args:
+            project_path: Path to the project directory
+            paths: Paths of the files to analyze
+            analyze_imports: Whether to analyze imports
+            analyze_function_calls: Whether to analyze function calls
+            analyze_class_hierarchy: Whether to analyze class hierarchy
+            use_cache: Whether to use the analysis cache
+            
+        Returns:
+            Dictionary containing code dependencies
+        """
+        # Initialize result
+        result = {
+            "imports": {},
+            "function_calls": {},
+            "class_hierarchy": {}
+        }
+        
+        # Load results of unchanged files from the cache
+        options = AnalysisCache.options_key(analyze_imports, analyze_function_calls, analyze_class_hierarchy)
+        cache = None
+        if self.cache_dir and use_cache:
+            cache = AnalysisCache(self.cache_dir, project_path)
+            cache.load()
+        
+        files = []
+        file_results = {}
+        pending = {}
+        
+        def find_uncached_files():
+            # Discovered files stream through the cache check into analysis
+            for file_path in paths:
+                files.append(file_path)
+                try:
+                    # Get relative path
+                    rel_path = os.path.relpath(file_path, project_path)
+                    
+                    # Get language
+                    language = self._get_language_from_file(file_path)
+                    
+                    if language and language in self.language_analyzers:
+                        cached, stat = cache.get(rel_path, file_path, options) if cache else (None, None)
+                        if cached is not None:
+                            file_results[file_path] = (rel_path, language, cached)
+                        else:
+                            pending[file_path] = (rel_path, stat)
+                            yield file_path, language
+                except Exception as e:
+                    logger.error(f"Error analyzing file {file_path}: {e}")
+        
+        # Analyze the remaining files, in parallel when there are enough of them
+        flags = (analyze_imports, analyze_function_calls, analyze_class_hierarchy)
+        for file_path, language, digest, file_result in self._analyze_files(find_uncached_files(), flags):
+            if file_result is None:
+                continue
+            
+            rel_path, stat = pending[file_path]
+            file_results[file_path] = (rel_path, language, file_result)
+            if cache and stat is not None:
+                cache.put(rel_path, stat, digest, options, file_result)
+        
         logger.info(f"Found {len(files)} files to analyze")
         
-        # Analyze each file
+        if cache:
+            cache.save()
+            logger.info(f"Code analysis cache: {cache.hits} hits, {cache.misses} files analyzed")
+        
+        # Merge per-file results in discovery order
+        module_cache = {}
         for file_path in files:
+            if file_path not in file_results:
+                continue
+            
+            rel_path, language, file_result = file_results[file_path]
             try:
-                # Get relative path
-                rel_path = os.path.relpath(file_path, project_path)
-                
-                # Get language
-                language = self._get_language_from_file(file_path)
-                
-                if language and language in self.language_analyzers:
-                    # Analyze file
-                    file_result = self.language_analyzers[language](
+                # Add to result
+                if analyze_imports and file_result.get("imports"):
+                    result["imports"][rel_path] = self.language_resolvers[language](
+                        file_result,
                         file_path,
-                        analyze_imports,
-                        analyze_function_calls,
-                        analyze_class_hierarchy
+                        module_cache
                     )
-                    
-                    # Add to result
-                    if analyze_imports and file_result.get("imports"):
-                        result["imports"][rel_path] = file_result["imports"]
-                    
-                    if analyze_function_calls and file_result.get("function_calls"):
-                        result["function_calls"][rel_path] = file_result["function_calls"]
-                    
-                    if analyze_class_hierarchy and file_result.get("classes"):
-                        # Add classes to class hierarchy
-                        for class_info in file_result["classes"]:
-                            class_name = class_info["name"]
-                            result["class_hierarchy"][class_name] = {
-                                "file": rel_path,
-                                "parents": class_info.get("parents", [])
-                            }
+                
+                if analyze_function_calls and file_result.get("function_calls"):
+                    result["function_calls"][rel_path] = file_result["function_calls"]
+                
+                if analyze_class_hierarchy and file_result.get("classes"):
+                    # Add classes to class hierarchy
+                    for class_info in file_result["classes"]:
+                        class_name = class_info["name"]
+                        result["class_hierarchy"][class_name] = {
+                            "file": rel_path,
+                            "parents": class_info.get("parents", [])
+                        }
             except Exception as e:
                 logger.error(f"Error analyzing file {file_path}: {e}")
         
@@ -133,6 +288,95 @@ class CodeAnalyzerService:
         
         return result
     
+    def _analyze_files(self, tasks: Iterable[Tuple[str, str]],
+                       flags: Tuple[bool, bool, bool]) -> Iterator[Tuple[str, str, Optional[str], Optional[Dict[str, Any]]]]:
+        """
+        Analyze files as they arrive, handing full batches to worker processes.
+        
+        Args:
+            tasks: Tuples of file path and language
+            flags: Whether to analyze imports, function calls and class hierarchy
+            
+        Yields:
+            Tuples of file path, language, content digest and unresolved analysis result
+        """
+        parallel = self.max_workers > 1
+        executor = None
+        submitted = []
+        batch = []
+        try:
+            for task in tasks:
+                batch.append(task)
+                if len(batch) < self.ANALYSIS_BATCH_SIZE:
+                    continue
+                
+                if parallel:
+                    try:
+                        if executor is None:
+                            executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                        submitted.append((batch, executor.submit(_analyze_file_batch, batch, flags)))
+                        batch = []
+                        continue
+                    except (OSError, BrokenProcessPool) as e:
+                        logger.warning(f"Parallel code analysis failed, analyzing serially: {e}")
+                        parallel = False
+                
+                yield from self._analyze_batch(batch, flags)
+                batch = []
+            
+            # Analyze the last partial batch here while the workers finish
+            yield from self._analyze_batch(batch, flags)
+            
+            for batch, future in submitted:
+                try:
+                    results = future.result()
+                except BrokenProcessPool as e:
+                    logger.warning(f"Parallel code analysis failed, analyzing serially: {e}")
+                    results = self._analyze_batch(batch, flags)
+                yield from results
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+    
+    def _analyze_batch(self, tasks: List[Tuple[str, str]],
+                       flags: Tuple[bool, bool, bool]) -> List[Tuple[str, str, Optional[str], Optional[Dict[str, Any]]]]:
+        """
+        Analyze a batch of files in this process.
+        
+        Args:
+            tasks: List of tuples of file path and language
+            flags: Whether to analyze imports, function calls and class hierarchy
+            
+        Returns:
+            List of tuples of file path, language, content digest and unresolved analysis result
+        """
+        return [
+            (file_path, language, *self._analyze_file(file_path, language, flags))
+            for file_path, language in tasks
+        ]
+    
+    def _analyze_file(self, file_path: str, language: str,
+                      flags: Tuple[bool, bool, bool]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Analyze a single file without resolving its imports.
+        
+        Args:
+            file_path: Path to the file
+            language: Programming language of the file
+            flags: Whether to analyze imports, function calls and class hierarchy
+            
+        Returns:
+            Tuple of the content digest and the analysis result,
+            or (None, None) if the file could not be read
+        """
+        try:
+            digest = file_digest(file_path)
+        except OSError as e:
+            logger.error(f"Error analyzing file {file_path}: {e}")
+            return None, None
+        
+        return digest, self.language_analyzers[language](file_path, *flags)
+    
     def _get_extensions_for_languages(self, languages: Optional[List[str]]) -> List[str]:
         """
         Get file extensions for the specified languages.
@@ -162,9 +406,12 @@ class CodeAnalyzerService:
                              extensions: List[str],
                              include_patterns: Optional[List[str]],
                              exclude_patterns: Optional[List[str]],
-                             max_depth: Optional[int]) -> List[str]:
+                             max_depth: Optional[int]) -> Iterator[str]:
         """
-        Find files to analyze in a project.
+        Find files to analyze in a project in a single walk.
+        
+        Excluded directories, directories ignored by .gitignore files and
+        directories deeper than max_depth are not entered.
         
         Args:
             project_path: Path to the project directory
@@ -173,52 +420,11 @@ class CodeAnalyzerService:
             exclude_patterns: List of glob patterns to exclude
             max_depth: Maximum depth to analyze
             
-        Returns:
-            List of file paths
+        Yields:
+            File paths
         """
-        # Initialize result
-        files = []
-        
-        # Create glob patterns for extensions
-        if not include_patterns:
-            include_patterns = [f"**/*{ext}" for ext in extensions]
-        
-        # Find files matching include patterns
-        for pattern in include_patterns:
-            # Create absolute pattern
-            abs_pattern = os.path.join(project_path, pattern)
-            
-            # Find matching files
-            matching_files = glob.glob(abs_pattern, recursive=True)
-            
-            # Add to result
-            files.extend(matching_files)
-        
-        # Filter by extension if include patterns were provided
-        if include_patterns:
-            files = [f for f in files if any(f.endswith(ext) for ext in extensions)]
-        
-        # Filter by exclude patterns
-        if exclude_patterns:
-            for pattern in exclude_patterns:
-                # Create absolute pattern
-                abs_pattern = os.path.join(project_path, pattern)
-                
-                # Find matching files
-                matching_files = glob.glob(abs_pattern, recursive=True)
-                
-                # Remove from result
-                files = [f for f in files if f not in matching_files]
-        
-        # Filter by depth
-        if max_depth is not None:
-            # Get project path as Path object
-            project_path_obj = Path(project_path)
-            
-            # Filter files by depth
-            files = [f for f in files if len(Path(f).relative_to(project_path_obj).parts) <= max_depth]
-        
-        return files
+        matcher = FileMatcher(extensions, include_patterns or [], exclude_patterns, max_depth)
+        return walk_project_files(project_path, matcher)
     
     def _get_language_from_file(self, file_path: str) -> Optional[str]:
         """
@@ -300,9 +506,6 @@ class CodeAnalyzerService:
         """
         imports = []
         
-        # Get directory of the file
-        file_dir = os.path.dirname(file_path)
-        
         # Visit all import nodes
         for node in ast.walk(tree):
             if isinstance(node, ast.Import):
@@ -313,11 +516,6 @@ class CodeAnalyzerService:
                         "alias": name.asname,
                         "type": "import"
                     })
-                    
-                    # Try to find the imported file
-                    imported_file = self._find_python_module(name.name, file_dir)
-                    if imported_file:
-                        imports[-1]["file"] = imported_file
             
             elif isinstance(node, ast.ImportFrom):
                 # Process from imports
@@ -329,11 +527,41 @@ class CodeAnalyzerService:
                         "type": "from_import",
                         "module": module
                     })
-                    
-                    # Try to find the imported file
-                    imported_file = self._find_python_module(module, file_dir)
-                    if imported_file:
-                        imports[-1]["file"] = imported_file
+        
+        return imports
+    
+    def _resolve_python_imports(self, file_result: Dict[str, Any], file_path: str,
+                                module_cache: Dict[Tuple[str, str, str], Optional[str]]) -> List[Dict[str, Any]]:
+        """
+        Resolve the imports of an analyzed Python file to files.
+        
+        Resolution depends on the files around the importing file, so it is
+        done on every analysis rather than cached with the file's result.
+        
+        Args:
+            file_result: Analysis result of the file
+            file_path: Path to the file
+            module_cache: Module lookups already done during this analysis
+            
+        Returns:
+            List of import information
+        """
+        imports = []
+        
+        # Get directory of the file
+        file_dir = os.path.dirname(file_path)
+        
+        for import_info in file_result["imports"]:
+            import_info = dict(import_info)
+            imports.append(import_info)
+            
+            # Try to find the imported file
+            module = import_info["module"] if import_info["type"] == "from_import" else import_info["name"]
+            key = ("python", module, file_dir)
+            if key not in module_cache:
+                module_cache[key] = self._find_python_module(module, file_dir)
+            if module_cache[key]:
+                import_info["file"] = module_cache[key]
         
         return imports
     
@@ -464,7 +692,8 @@ class CodeAnalyzerService:
         result = {
             "imports": [],
             "function_calls": [],
-            "classes": []
+            "classes": [],
+            "module_paths": []
         }
         
         try:
@@ -474,7 +703,7 @@ class CodeAnalyzerService:
             
             # Analyze imports
             if analyze_imports:
-                result["imports"] = self._analyze_javascript_imports(content, file_path)
+                result["imports"] = self._analyze_javascript_imports(content, file_path, result["module_paths"])
             
             # Analyze function calls and classes are more complex for JavaScript
             # and would require a proper parser like esprima or babel
@@ -489,22 +718,22 @@ class CodeAnalyzerService:
         
         return result
     
-    def _analyze_javascript_imports(self, content: str, file_path: str) -> List[Dict[str, Any]]:
+    def _analyze_javascript_imports(self, content: str, file_path: str,
+                                    module_paths: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
         """
         Analyze imports in a JavaScript file.
         
         Args:
             content: Content of the file
             file_path: Path to the file
+            module_paths: Receives (module path, number of imports found so far)
+                for each import statement, in order, for resolving the imports
             
         Returns:
             List of import information
         """
         imports = []
         
-        # Get directory of the file
-        file_dir = os.path.dirname(file_path)
-        
         # Find ES6 imports
         es6_import_pattern = r'import\s+(?:{([^}]*)}\s+from\s+)?(?:([^\s;]+)\s+from\s+)?[\'"]([^\'"]+)[\'"]'
         for match in re.finditer(es6_import_pattern, content):
@@ -533,12 +762,7 @@ class CodeAnalyzerService:
                     "type": "import_side_effect"
                 })
             
-            # Try to find the imported file
-            imported_file = self._find_javascript_module(module_path, file_dir)
-            if imported_file:
-                for imp in imports:
-                    if imp["name"].startswith(module_path):
-                        imp["file"] = imported_file
+            module_paths.append((module_path, len(imports)))
         
         # Find CommonJS requires
         require_pattern = r'(?:const|let|var)\s+(?:{([^}]*)}\s*=\s*)?(?:([^\s=]+)\s*=\s*)?require\([\'"]([^\'"]+)[\'"]\)'
@@ -561,10 +785,36 @@ class CodeAnalyzerService:
                         "type": "require_destructure"
                     })
             
-            # Try to find the imported file
-            imported_file = self._find_javascript_module(module_path, file_dir)
+            module_paths.append((module_path, len(imports)))
+        
+        return imports
+    
+    def _resolve_javascript_imports(self, file_result: Dict[str, Any], file_path: str,
+                                    module_cache: Dict[Tuple[str, str, str], Optional[str]]) -> List[Dict[str, Any]]:
+        """
+        Resolve the imports of an analyzed JavaScript or TypeScript file to files.
+        
+        Args:
+            file_result: Analysis result of the file
+            file_path: Path to the file
+            module_cache: Module lookups already done during this analysis
+            
+        Returns:
+            List of import information
+        """
+        imports = [dict(import_info) for import_info in file_result["imports"]]
+        
+        # Get directory of the file
+        file_dir = os.path.dirname(file_path)
+        
+        # Each import statement's file applies to the matching imports seen up to it
+        for module_path, count in file_result.get("module_paths", []):
+            key = ("javascript", module_path, file_dir)
+            if key not in module_cache:
+                module_cache[key] = self._find_javascript_module(module_path, file_dir)
+            imported_file = module_cache[key]
             if imported_file:
-                for imp in imports:
+                for imp in imports[:count]:
                     if imp["name"].startswith(module_path):
                         imp["file"] = imported_file
         
@@ -4,8 +4,10 @@ This module provides functionality to analyze dependencies between files, classe
 """
 
 import os
+import re
 import logging
 import json
+from fnmatch import fnmatch
 from typing import Dict, List, Set, Any, Optional, Tuple, Union
 import networkx as nx
 from pathlib import Path
@@ -135,6 +137,151 @@ class DependencyAnalyzerService:
         
         return graph
     
+    def update_dependency_graph(self, graph: DependencyGraph,
+                                code_dependencies: Dict[str, Any],
+                                package_dependencies: Dict[str, Any],
+                                project_path: str,
+                                changed_files: List[str]) -> Set[str]:
+        """
+        Patch a dependency graph for changed files instead of rebuilding it.
+        
+        The changed files are re-analyzed and their file and class nodes are
+        replaced. Files importing a deleted file, or possibly importing an
+        added one, are re-analyzed too, since their imports resolve
+        differently. Package dependencies are re-analyzed when a package
+        manifest changed. code_dependencies and package_dependencies are
+        updated in place to match the patched graph.
+        
+        Args:
+            graph: Dependency graph built from code_dependencies and package_dependencies
+            code_dependencies: Code dependencies of the whole project
+            package_dependencies: Package dependencies of the whole project
+            project_path: Path to the project directory
+            changed_files: Paths of added, modified or deleted files, relative
+                to the project or absolute
+            
+        Returns:
+            Set of relative paths of the files that were re-analyzed
+        """
+        # Import services here to avoid circular imports
+        from .code_analyzer import CodeAnalyzerService
+        from .package_analyzer import PackageAnalyzerService
+        
+        imports = code_dependencies.setdefault("imports", {})
+        function_calls = code_dependencies.setdefault("function_calls", {})
+        class_hierarchy = code_dependencies.setdefault("class_hierarchy", {})
+        
+        changed = {
+            os.path.normpath(os.path.relpath(f, project_path) if os.path.isabs(f) else f)
+            for f in changed_files
+        }
+        known_files = set(imports) | set(function_calls) | {
+            info.get("file") for info in class_hierarchy.values()
+        }
+        
+        # Importers of deleted or added files resolve their imports differently now
+        deleted = {
+            os.path.normpath(os.path.join(project_path, f)) for f in changed
+            if not os.path.exists(os.path.join(project_path, f))
+        }
+        added_stems = {
+            self._module_stem(f) for f in changed
+            if f not in known_files and os.path.exists(os.path.join(project_path, f))
+        }
+        for file_path, file_imports in imports.items():
+            for import_info in file_imports:
+                imported_file = import_info.get("file")
+                if imported_file:
+                    if os.path.normpath(imported_file) in deleted:
+                        changed.add(file_path)
+                        break
+                elif added_stems and added_stems.intersection(
+                    re.split(r"[./\\]", import_info.get("module") or import_info.get("name") or "")
+                ):
+                    changed.add(file_path)
+                    break
+        
+        # Re-analyze the changed files that still exist
+        file_dependencies = CodeAnalyzerService().analyze_files(project_path, sorted(changed))
+        
+        # Class names whose nodes or inheritance edges change
+        affected_classes = {
+            name for name, info in class_hierarchy.items() if info.get("file") in changed
+        }
+        affected_classes.update(file_dependencies["class_hierarchy"])
+        
+        # Classes that now take over the name of a class in an unchanged file
+        for name in file_dependencies["class_hierarchy"]:
+            previous_file = class_hierarchy.get(name, {}).get("file")
+            if previous_file and previous_file not in changed:
+                graph.remove_node(f"class:{name}:{previous_file}")
+        
+        # Replace the changed files' code dependencies
+        for file_path in changed:
+            imports.pop(file_path, None)
+            function_calls.pop(file_path, None)
+        for name in [name for name, info in class_hierarchy.items() if info.get("file") in changed]:
+            del class_hierarchy[name]
+        imports.update(file_dependencies["imports"])
+        function_calls.update(file_dependencies["function_calls"])
+        class_hierarchy.update(file_dependencies["class_hierarchy"])
+        
+        # Remove the changed files' nodes, which drops all of their edges
+        for node_id in list(graph.iter_nodes()):
+            if node_id.startswith("class:"):
+                if graph.get_node(node_id).get("path") in changed:
+                    graph.remove_node(node_id)
+            elif node_id.startswith("file:") and node_id[5:] in changed:
+                graph.remove_node(node_id)
+        
+        # Add them back from the new analysis, with the inheritance edges into them
+        self._process_imports(graph, file_dependencies["imports"])
+        self._process_function_calls(graph, file_dependencies["function_calls"])
+        self._process_class_hierarchy(graph, class_hierarchy, class_names={
+            name for name, info in class_hierarchy.items()
+            if name in affected_classes or affected_classes.intersection(info.get("parents", []))
+        })
+        
+        # Deleted files that nothing imports any more
+        for file_path in deleted:
+            node_id = f"file:{file_path}"
+            if graph.get_node(node_id) is not None and not graph.get_dependents(node_id):
+                graph.remove_node(node_id)
+        
+        # Re-analyze package dependencies if a manifest changed
+        package_analyzer = PackageAnalyzerService()
+        manifest_patterns = [
+            pattern for patterns in package_analyzer.package_manager_patterns.values() for pattern in patterns
+        ]
+        if any(fnmatch(os.path.basename(f), pattern) for f in changed for pattern in manifest_patterns):
+            for manager_graph in package_dependencies.get("dependency_graphs", {}).values():
+                for node_id in manager_graph.get("nodes", {}):
+                    graph.remove_node(node_id)
+            
+            package_dependencies.clear()
+            package_dependencies.update(package_analyzer.analyze_project_dependencies(project_path))
+            if "dependency_graphs" in package_dependencies:
+                self._process_package_dependencies(graph, package_dependencies["dependency_graphs"])
+        
+        logger.info(f"Dependency graph updated for {len(changed)} changed files")
+        
+        return changed
+    
+    def _module_stem(self, file_path: str) -> str:
+        """
+        Get the name a file is imported by, e.g. "utils" for "pkg/utils.py" and "pkg" for "pkg/__init__.py".
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            Module name
+        """
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        if stem in ("__init__", "index"):
+            stem = os.path.basename(os.path.dirname(file_path))
+        return stem
+    
     def _process_imports(self, graph: DependencyGraph, imports: Dict[str, List[Dict[str, Any]]]) -> None:
         """
         Process imports and add to the dependency graph.
@@ -232,15 +379,20 @@ class DependencyAnalyzerService:
                         attributes={"relationship": "defined_in"}
                     ))
     
-    def _process_class_hierarchy(self, graph: DependencyGraph, class_hierarchy: Dict[str, Dict[str, Any]]) -> None:
+    def _process_class_hierarchy(self, graph: DependencyGraph, class_hierarchy: Dict[str, Dict[str, Any]],
+                                 class_names: Optional[Set[str]] = None) -> None:
         """
         Process class hierarchy and add to the dependency graph.
         
         Args:
             graph: Dependency graph
             class_hierarchy: Dictionary mapping class names to class information
+            class_names: Names of the classes to process, or None for all of them
         """
         for class_name, class_info in class_hierarchy.items():
+            if class_names is not None and class_name not in class_names:
+                continue
+            
             class_file = class_info.get("file")
             parents = class_info.get("parents", [])
             
@@ -0,0 +1,343 @@
+"""
+File discovery for code analysis.
+This module walks a project tree once, matching files against compiled glob patterns and
+pruning excluded and ignored directories before they are entered.
+"""
+
+import os
+import re
+import logging
+from typing import Iterator, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Directories that never contain source worth analyzing
+DEFAULT_EXCLUDED_DIRS = frozenset({
+    ".git",
+    ".hg",
+    ".svn",
+    "node_modules",
+    "venv",
+    ".venv",
+    "__pycache__",
+    ".tox",
+    ".mypy_cache",
+    ".pytest_cache",
+})
+
+def compile_glob(pattern: str) -> Pattern:
+    """
+    Compile a glob pattern to a regular expression over "/"-separated relative paths.
+
+    "*" and "?" do not match "/", "**/" matches any number of directories and
+    a trailing "**" matches everything below.
+
+    Args:
+        pattern: Glob pattern
+
+    Returns:
+        Compiled regular expression
+    """
+    pattern = pattern.replace(os.sep, "/")
+    while pattern.startswith("./"):
+        pattern = pattern[2:]
+
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            parts.append("(?:[^/]*/)*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            chars = pattern[i + 1:end]
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            parts.append("[" + chars.replace("\\", "\\\\") + "]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+
+    return re.compile("".join(parts) + r"\Z")
+
+def _literal_prefix(pattern: str) -> Tuple[str, ...]:
+    """
+    Get the leading directories of a glob pattern that contain no wildcards.
+
+    Args:
+        pattern: Glob pattern
+
+    Returns:
+        Tuple of directory names
+    """
+    parts = pattern.replace(os.sep, "/").split("/")
+    prefix = []
+    for part in parts[:-1]:
+        if part in ("", "."):
+            continue
+        if any(c in part for c in "*?["):
+            break
+        prefix.append(part)
+    return tuple(prefix)
+
+class IgnoreRules:
+    """
+    Rules from one .gitignore file, matched against paths relative to its directory.
+    """
+
+    def __init__(self, rules: List[Tuple[Pattern, bool, bool]]):
+        """
+        Initialize the ignore rules.
+
+        Args:
+            rules: List of (regex, negated, directory only) tuples, in file order
+        """
+        self.rules = rules
+
+    @classmethod
+    def parse(cls, lines: List[str]) -> "IgnoreRules":
+        """
+        Parse the lines of a .gitignore file.
+
+        Args:
+            lines: Lines of the file
+
+        Returns:
+            Parsed ignore rules
+        """
+        rules = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            if line.startswith("\\"):
+                line = line[1:]
+
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+
+            # Patterns without a slash match at any depth, others are anchored
+            if "/" in line:
+                line = line.lstrip("/")
+            else:
+                line = f"**/{line}"
+
+            rules.append((compile_glob(line), negated, dir_only))
+
+        return cls(rules)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IgnoreRules"]:
+        """
+        Load a .gitignore file.
+
+        Args:
+            path: Path to the file
+
+        Returns:
+            Parsed ignore rules, or None if the file could not be read
+        """
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return cls.parse(f.readlines())
+        except OSError as e:
+            logger.warning(f"Error reading {path}: {e}")
+            return None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Check whether a path is ignored.
+
+        Args:
+            rel_path: Path relative to the directory of the .gitignore file
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if ignored, False if re-included, None if no rule matches
+        """
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negated
+        return result
+
+class FileMatcher:
+    """
+    Include, exclude and depth rules for one project walk.
+    """
+
+    def __init__(self, extensions: List[str],
+                 include_patterns: List[str],
+                 exclude_patterns: Optional[List[str]],
+                 max_depth: Optional[int]):
+        """
+        Initialize the file matcher.
+
+        Args:
+            extensions: List of file extensions to include
+            include_patterns: List of glob patterns to include, or empty to include
+                every file with one of the extensions
+            exclude_patterns: List of glob patterns to exclude
+            max_depth: Maximum depth to analyze
+        """
+        self.extensions = tuple(extensions)
+        self.includes = [compile_glob(pattern) for pattern in include_patterns]
+        self.excludes = [compile_glob(pattern) for pattern in exclude_patterns or []]
+
+        # "dir/**" excludes the directory itself, so it can be pruned
+        self.excluded_dirs = [
+            compile_glob(pattern[:-3]) for pattern in exclude_patterns or []
+            if pattern.endswith("/**") and len(pattern) > 3
+        ]
+
+        self.max_depth = max_depth
+
+        # Directories every include pattern is confined to, or None if any pattern is unanchored
+        prefixes = [_literal_prefix(pattern) for pattern in include_patterns]
+        self.include_prefixes = prefixes if prefixes and all(prefixes) else None
+
+    def should_enter(self, rel_parts: Tuple[str, ...], rel_path: str) -> bool:
+        """
+        Check whether a directory can contain files to analyze.
+
+        Args:
+            rel_parts: Parts of the directory's path relative to the project
+            rel_path: "/"-separated path relative to the project
+
+        Returns:
+            Whether to walk into the directory
+        """
+        # Files directly inside have one more part than the directory
+        if self.max_depth is not None and len(rel_parts) >= self.max_depth:
+            return False
+
+        if any(regex.match(rel_path) for regex in self.excludes):
+            return False
+        if any(regex.match(rel_path) for regex in self.excluded_dirs):
+            return False
+
+        if self.include_prefixes is not None:
+            depth = len(rel_parts)
+            return any(
+                prefix[:depth] == rel_parts[:len(prefix)]
+                for prefix in self.include_prefixes
+            )
+
+        return True
+
+    def matches_file(self, rel_path: str) -> bool:
+        """
+        Check whether a file should be analyzed.
+
+        Args:
+            rel_path: "/"-separated path relative to the project
+
+        Returns:
+            Whether the file matches
+        """
+        return (
+            rel_path.endswith(self.extensions)
+            and (not self.includes or any(regex.match(rel_path) for regex in self.includes))
+            and not any(regex.match(rel_path) for regex in self.excludes)
+        )
+
+def walk_project_files(project_path: str, matcher: FileMatcher,
+                       use_gitignore: bool = True) -> Iterator[str]:
+    """
+    Walk a project once and yield the files to analyze.
+
+    Hidden files and directories are skipped, as are directories in
+    DEFAULT_EXCLUDED_DIRS and anything ignored by a .gitignore file. Symlinked
+    directories are not followed. Entries are visited in name order.
+
+    Args:
+        project_path: Path to the project directory
+        matcher: Include, exclude and depth rules
+        use_gitignore: Whether to honour .gitignore files
+
+    Yields:
+        File paths
+    """
+    # (directory path, relative parts, applicable .gitignore rules with their base parts)
+    stack: List[Tuple[str, Tuple[str, ...], List[Tuple[Tuple[str, ...], IgnoreRules]]]] = [
+        (project_path, (), [])
+    ]
+
+    while stack:
+        dir_path, rel_parts, ignore_rules = stack.pop()
+
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning(f"Error listing {dir_path}: {e}")
+            continue
+
+        if use_gitignore and any(entry.name == ".gitignore" for entry in entries):
+            rules = IgnoreRules.load(os.path.join(dir_path, ".gitignore"))
+            if rules and rules.rules:
+                ignore_rules = ignore_rules + [(rel_parts, rules)]
+
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue
+
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            entry_parts = rel_parts + (name,)
+            rel_path = "/".join(entry_parts)
+
+            if _is_ignored(ignore_rules, entry_parts, is_dir):
+                continue
+
+            if is_dir:
+                if name not in DEFAULT_EXCLUDED_DIRS and matcher.should_enter(entry_parts, rel_path):
+                    subdirs.append((entry.path, entry_parts, ignore_rules))
+            elif matcher.matches_file(rel_path):
+                yield entry.path
+
+        # Reverse so directories are popped in name order
+        stack.extend(reversed(subdirs))
+
+def _is_ignored(ignore_rules: List[Tuple[Tuple[str, ...], IgnoreRules]],
+                entry_parts: Tuple[str, ...], is_dir: bool) -> bool:
+    """
+    Check a path against the .gitignore rules that apply to it; deeper files win.
+
+    Args:
+        ignore_rules: Applicable rules with the parts of their directory
+        entry_parts: Parts of the path relative to the project
+        is_dir: Whether the path is a directory
+
+    Returns:
+        Whether the path is ignored
+    """
+    ignored = False
+    for base_parts, rules in ignore_rules:
+        result = rules.match("/".join(entry_parts[len(base_parts):]), is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
@@ -0,0 +1,313 @@
+"""
+Generation cache for AI pipeline generation.
+This module caches pipeline generation results by the content of the request that produced them.
+"""
+
+import re
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable, FrozenSet, Tuple
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize free text so that formatting-only differences share a cache entry.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        Text with surrounding whitespace removed and inner whitespace collapsed
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+def content_key(payload: Any) -> str:
+    """
+    Compute the content address of a JSON-serializable payload.
+
+    Args:
+        payload: Payload to address
+
+    Returns:
+        SHA-256 hex digest of the payload's canonical JSON
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class GenerationEntry:
+    """
+    A cached generation: the raw text and its memoized parse.
+    """
+
+    def __init__(self, raw_content: str, pipeline_config: Dict[str, Any], tokens_used: int):
+        """
+        Initialize the entry.
+
+        Args:
+            raw_content: Extracted pipeline content
+            pipeline_config: Parsed and validated pipeline configuration
+            tokens_used: Tokens the generation consumed
+        """
+        self.raw_content = raw_content
+        self.pipeline_config = pipeline_config
+        self.tokens_used = tokens_used
+        self.created_at = 0.0
+
+class GenerationCache:
+    """
+    Bounded, expiring cache of generation results keyed by request content.
+
+    Identical requests share an entry, and an identical request arriving
+    while the first is still generating waits for that generation instead of
+    starting its own. Optionally, a request whose description is close enough
+    to a cached one with the same platform, variables and model settings is
+    answered from that entry.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 24 * 60 * 60,
+                 similarity_threshold: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the generation cache.
+
+        Args:
+            max_entries: Maximum number of cached generations
+            ttl_seconds: Seconds a generation stays valid
+            similarity_threshold: Jaccard similarity of description words at which
+                a cached generation is reused, or None to only reuse exact matches
+            clock: Time source, in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.clock = clock
+
+        # Key -> entry, least recently used first
+        self._entries: "OrderedDict[str, GenerationEntry]" = OrderedDict()
+
+        # Context key -> {key: description words} for near-duplicate matching
+        self._words: Dict[str, Dict[str, FrozenSet[str]]] = {}
+        self._contexts: Dict[str, str] = {}
+
+        # Key -> task of a generation in progress
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self.metrics = {
+            "hits": 0,
+            "near_duplicate_hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "tokens_saved": 0
+        }
+
+    async def get_or_generate(self, key: str,
+                              generate: Callable[[], Awaitable[GenerationEntry]],
+                              context_key: Optional[str] = None,
+                              text: Optional[str] = None) -> Tuple[GenerationEntry, str]:
+        """
+        Get a cached generation, or generate and cache it.
+
+        Args:
+            key: Content address of the request
+            generate: Coroutine function producing the generation on a miss
+            context_key: Content address of everything but the free text, for
+                near-duplicate matching
+            text: Normalized free text of the request, for near-duplicate matching
+
+        Returns:
+            Tuple of a private copy of the entry and how it was obtained:
+            "hit", "near_duplicate", "coalesced" or "miss"
+        """
+        entry = self._get(key)
+        if entry is not None:
+            self.metrics["hits"] += 1
+            self.metrics["tokens_saved"] += entry.tokens_used
+            return self._copy(entry), "hit"
+
+        if self.similarity_threshold is not None and context_key and text:
+            entry = self._find_near_duplicate(context_key, text)
+            if entry is not None:
+                self.metrics["near_duplicate_hits"] += 1
+                self.metrics["tokens_saved"] += entry.tokens_used
+                return self._copy(entry), "near_duplicate"
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.metrics["coalesced"] += 1
+            status = "coalesced"
+        else:
+            self.metrics["misses"] += 1
+            task = self._start_generation(key, generate, context_key, text)
+            status = "miss"
+
+        # Shield so one cancelled caller, the first one included, does not abort the shared generation
+        entry = await asyncio.shield(task)
+        if status == "coalesced":
+            self.metrics["tokens_saved"] += entry.tokens_used
+        return self._copy(entry), status
+
+    def _start_generation(self, key: str,
+                          generate: Callable[[], Awaitable[GenerationEntry]],
+                          context_key: Optional[str],
+                          text: Optional[str]) -> asyncio.Task:
+        """
+        Start the single in-flight generation for a key.
+
+        The generation runs in its own task, so it completes and is cached
+        even if every request waiting for it goes away. A failure is seen by
+        all waiters and nothing is cached, so a retry generates again.
+
+        Args:
+            key: Content address of the request
+            generate: Coroutine function producing the generation
+            context_key: Content address of everything but the free text
+            text: Normalized free text of the request
+
+        Returns:
+            The generation task
+        """
+        async def generate_and_store() -> GenerationEntry:
+            entry = await generate()
+            self._put(key, entry, context_key, text)
+            return entry
+
+        def on_done(task: asyncio.Task) -> None:
+            self._in_flight.pop(key, None)
+            if not task.cancelled() and task.exception():
+                logger.warning(f"Pipeline generation failed: {task.exception()}")
+
+        task = asyncio.create_task(generate_and_store())
+        task.add_done_callback(on_done)
+        self._in_flight[key] = task
+        return task
+
+    def get(self, key: str) -> Optional[GenerationEntry]:
+        """
+        Get a cached generation.
+
+        Args:
+            key: Content address of the request
+
+        Returns:
+            A private copy of the entry, or None if it is not cached
+        """
+        entry = self._get(key)
+        if entry is None:
+            self.metrics["misses"] += 1
+            return None
+
+        self.metrics["hits"] += 1
+        self.metrics["tokens_saved"] += entry.tokens_used
+        return self._copy(entry)
+
+    def put(self, key: str, entry: GenerationEntry,
+            context_key: Optional[str] = None, text: Optional[str] = None) -> None:
+        """
+        Cache a generation produced outside of get_or_generate.
+
+        Args:
+            key: Content address of the request
+            entry: Generation to cache
+            context_key: Content address of everything but the free text
+            text: Normalized free text of the request
+        """
+        self._put(key, entry, context_key, text)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get cache metrics.
+
+        Returns:
+            Dictionary of counters, the current number of entries and the hit rate
+        """
+        metrics = dict(self.metrics)
+        served = metrics["hits"] + metrics["near_duplicate_hits"] + metrics["coalesced"]
+        requests = served + metrics["misses"]
+        metrics["entries"] = len(self._entries)
+        metrics["hit_rate"] = served / requests if requests else 0.0
+        return metrics
+
+    def clear(self) -> None:
+        """Remove all cached generations."""
+        self._entries.clear()
+        self._words.clear()
+        self._contexts.clear()
+
+    def _get(self, key: str) -> Optional[GenerationEntry]:
+        """Get a live entry and mark it recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if self.clock() - entry.created_at > self.ttl_seconds:
+            self.metrics["expirations"] += 1
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: str, entry: GenerationEntry,
+             context_key: Optional[str], text: Optional[str]) -> None:
+        """Cache an entry, evicting the least recently used ones beyond the bound."""
+        entry.created_at = self.clock()
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        if context_key and text:
+            self._contexts[key] = context_key
+            self._words.setdefault(context_key, {})[key] = self._word_set(text)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self.metrics["evictions"] += 1
+            self._remove(oldest)
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry and its near-duplicate index entry."""
+        self._entries.pop(key, None)
+        context_key = self._contexts.pop(key, None)
+        if context_key is not None:
+            words = self._words.get(context_key)
+            if words is not None:
+                words.pop(key, None)
+                if not words:
+                    del self._words[context_key]
+
+    def _find_near_duplicate(self, context_key: str, text: str) -> Optional[GenerationEntry]:
+        """Find the most similar live entry with the same context, if similar enough."""
+        candidates = self._words.get(context_key)
+        if not candidates:
+            return None
+
+        words = self._word_set(text)
+        best_key = None
+        best_similarity = self.similarity_threshold
+        for key, candidate_words in candidates.items():
+            union = len(words | candidate_words)
+            similarity = len(words & candidate_words) / union if union else 1.0
+            if similarity >= best_similarity:
+                best_key = key
+                best_similarity = similarity
+
+        if best_key is None:
+            return None
+        return self._get(best_key)
+
+    def _word_set(self, text: str) -> FrozenSet[str]:
+        """Split text into a set of lowercase words."""
+        return frozenset(re.findall(r"\w+", text.lower()))
+
+    def _copy(self, entry: GenerationEntry) -> GenerationEntry:
+        """Copy an entry so callers can modify the configuration."""
+        result = GenerationEntry(entry.raw_content, copy.deepcopy(entry.pipeline_config), entry.tokens_used)
+        result.created_at = entry.created_at
+        return result
@@ -0,0 +1,301 @@
+"""
+Graph Clustering service for visualizing dependency graphs.
+This module groups the nodes of a dependency graph into hierarchical clusters and aggregates the graph to them.
+"""
+
+import heapq
+import logging
+from collections import Counter
+from typing import Dict, List, Set, Any, Optional, Tuple, Iterable
+
+from ..models.dependency_graph import DependencyGraph, NodeMetadata, DependencyMetadata, NodeType
+
+logger = logging.getLogger(__name__)
+
+# Ways of clustering nodes
+CLUSTER_MODES = ("directory", "package", "scc", "type")
+
+class ClusterHierarchy:
+    """
+    Hierarchy of clusters over the nodes of a dependency graph.
+
+    Each node has a cluster path, e.g. its directories, and every prefix of a
+    path is a cluster. Clusters with a single child are skipped, so chains of
+    directories such as a common absolute path prefix never show up as levels.
+    """
+
+    def __init__(self, graph: DependencyGraph, by: str):
+        """
+        Build the hierarchy.
+
+        Args:
+            graph: Dependency graph
+            by: What to cluster by: "directory", "package", "scc" or "type"
+
+        Raises:
+            ValueError: If the clustering mode is not supported
+        """
+        if by not in CLUSTER_MODES:
+            raise ValueError(f"Unsupported clustering: {by}")
+
+        self.by = by
+
+        # Map of node ID to its cluster path
+        self.paths: Dict[str, Tuple[str, ...]] = {}
+
+        if by == "scc":
+            # Name cycles by their smallest member, so names are stable across versions
+            for component in graph.strongly_connected_components():
+                path = (f"cycle-{min(component)}",) if len(component) > 1 else ()
+                for node_id in component:
+                    self.paths[node_id] = path
+        else:
+            for node_id, node_attrs in graph.get_all_nodes().items():
+                self.paths[node_id] = self._cluster_path(node_id, node_attrs)
+
+        # Map of cluster path to its child cluster paths and its direct member nodes
+        self.child_clusters: Dict[Tuple[str, ...], List[Tuple[str, ...]]] = {(): []}
+        self.members: Dict[Tuple[str, ...], List[str]] = {(): []}
+
+        # Map of cluster path to the number of nodes in it, including sub-clusters
+        self.sizes: Dict[Tuple[str, ...], int] = {(): 0}
+
+        for node_id, path in self.paths.items():
+            for depth in range(len(path) + 1):
+                prefix = path[:depth]
+                if prefix not in self.sizes:
+                    self.sizes[prefix] = 0
+                    self.child_clusters[prefix] = []
+                    self.members[prefix] = []
+                    self.child_clusters[path[:depth - 1]].append(prefix)
+                self.sizes[prefix] += 1
+            self.members[path].append(node_id)
+
+        # Map of cluster ID to cluster path
+        self.clusters = {self.cluster_id(path): path for path in self.sizes if path}
+
+        # Edges with their type, so views are aggregated without rebuilding edge metadata
+        self.edges: List[Tuple[str, str, Any]] = [
+            (source_id, target_id, edge_attrs.get("type", "unknown"))
+            for source_id, target_id, edge_attrs in graph.iter_edges()
+        ]
+
+        # Top of the hierarchy, below any chain of clusters all nodes are in
+        self.root: Tuple[str, ...] = ()
+        while not self.members[self.root] and len(self.child_clusters[self.root]) == 1:
+            self.root = self.child_clusters[self.root][0]
+
+        self._depth: Optional[int] = None
+
+    def _cluster_path(self, node_id: str, node_attrs: Dict[str, Any]) -> Tuple[str, ...]:
+        """
+        Get the cluster path of a node.
+
+        Args:
+            node_id: Node ID
+            node_attrs: Node metadata
+
+        Returns:
+            Tuple of cluster names, outermost first
+        """
+        node_type = node_attrs.get("type") or NodeType.CUSTOM
+        node_type = getattr(node_type, "value", node_type)
+
+        if self.by == "type":
+            return (str(node_type),)
+
+        path = node_attrs.get("path")
+        if not path:
+            if node_type == NodeType.PACKAGE.value:
+                # External packages, grouped by package manager
+                manager = (node_attrs.get("attributes") or {}).get("type")
+                return ("packages", str(manager)) if manager else ("packages",)
+            return (f"({node_type})",)
+
+        segments = tuple(segment for segment in str(path).replace("\\", "/").split("/") if segment)
+        if self.by == "package":
+            # Modules are clusters of their file, classes and functions
+            return segments
+        return segments[:-1]
+
+    def cluster_id(self, path: Tuple[str, ...]) -> str:
+        """
+        Get the ID of a cluster.
+
+        Args:
+            path: Cluster path
+
+        Returns:
+            Cluster ID
+        """
+        return f"cluster:{self.by}:{'/'.join(path)}"
+
+    def children(self, path: Tuple[str, ...]) -> List[Any]:
+        """
+        Get the visible children of a cluster.
+
+        Args:
+            path: Cluster path
+
+        Returns:
+            List of cluster paths (tuples) and node IDs (strings)
+        """
+        return [self._skip_chain(child) for child in self.child_clusters[path]] + self.members[path]
+
+    def _skip_chain(self, path: Tuple[str, ...]) -> Any:
+        """Follow clusters with a single child down to the first one that branches."""
+        while not self.members[path] and len(self.child_clusters[path]) == 1:
+            path = self.child_clusters[path][0]
+        if self.sizes[path] == 1 and not self.child_clusters[path]:
+            return self.members[path][0]
+        return path
+
+    def view(self, expanded: Iterable[str] = (), max_nodes: Optional[int] = None,
+             max_depth: Optional[int] = None) -> Dict[str, str]:
+        """
+        Choose which clusters to show.
+
+        Clusters are shown collapsed unless expanded. Explicitly expanded
+        clusters are always opened; then, the largest clusters are opened as
+        long as the number of visible items stays within max_nodes, or up to
+        max_depth levels.
+
+        Args:
+            expanded: IDs of clusters to expand
+            max_nodes: Maximum number of visible items for automatic expansion
+            max_depth: Number of levels to expand automatically
+
+        Returns:
+            Dictionary mapping each node ID to the ID of the item that shows it:
+            the node itself or its visible cluster
+        """
+        # Expanding a cluster also expands the clusters around it
+        forced: Set[Tuple[str, ...]] = set()
+        for cluster_id in expanded:
+            path = self.clusters.get(cluster_id)
+            if path is None:
+                raise ValueError(f"Unknown cluster: {cluster_id}")
+            forced.update(path[:depth] for depth in range(len(path) + 1))
+
+        visible: Set[Tuple[str, ...]] = set()
+        visible_count = 0
+        queue = [(0, self.root)]
+        candidates = []
+
+        # Open forced clusters and the first max_depth levels
+        while queue:
+            depth, path = queue.pop()
+            visible.discard(path)
+            visible_count -= 1 if path != self.root else 0
+            for child in self.children(path):
+                visible_count += 1
+                if isinstance(child, tuple):
+                    visible.add(child)
+                    if child in forced or (max_depth is not None and depth + 1 < max_depth):
+                        queue.append((depth + 1, child))
+                    else:
+                        heapq.heappush(candidates, (-self.sizes[child], child))
+
+        # Open the largest remaining clusters while they fit
+        if max_nodes is not None and max_depth is None:
+            while candidates:
+                _, path = heapq.heappop(candidates)
+                children = self.children(path)
+                if visible_count - 1 + len(children) > max_nodes:
+                    continue
+                visible.discard(path)
+                visible_count += len(children) - 1
+                for child in children:
+                    if isinstance(child, tuple):
+                        visible.add(child)
+                        heapq.heappush(candidates, (-self.sizes[child], child))
+
+        representatives = {}
+        for node_id, path in self.paths.items():
+            representative = node_id
+            for depth in range(1, len(path) + 1):
+                if path[:depth] in visible:
+                    representative = self.cluster_id(path[:depth])
+                    break
+            representatives[node_id] = representative
+        return representatives
+
+    def depth(self) -> int:
+        """
+        Get the number of levels of the hierarchy, not counting skipped chains.
+
+        Returns:
+            Number of levels above the nodes
+        """
+        if self._depth is None:
+            depth = 0
+            level = [self.root]
+            while level:
+                level = [child for path in level for child in self.children(path) if isinstance(child, tuple)]
+                if level:
+                    depth += 1
+            self._depth = depth
+        return self._depth
+
+def aggregate_graph(graph: DependencyGraph, hierarchy: ClusterHierarchy,
+                    representatives: Dict[str, str]) -> DependencyGraph:
+    """
+    Aggregate a graph to its visible items.
+
+    Nodes shown as themselves keep their metadata. Clusters become component
+    nodes with their size, and edges between the same two items are merged
+    into one edge with a weight and the most common type.
+
+    Args:
+        graph: Dependency graph
+        hierarchy: Cluster hierarchy of the graph
+        representatives: Item showing each node, as returned by ClusterHierarchy.view
+
+    Returns:
+        Aggregated dependency graph
+    """
+    aggregated = DependencyGraph()
+    nodes = graph.get_all_nodes()
+
+    cluster_members: Dict[str, int] = Counter()
+    for node_id, representative in representatives.items():
+        if representative == node_id:
+            aggregated.add_node(node_id, nodes[node_id])
+        else:
+            cluster_members[representative] += 1
+
+    for cluster_id, size in cluster_members.items():
+        path = hierarchy.clusters[cluster_id]
+        aggregated.add_node(cluster_id, NodeMetadata(
+            type=NodeType.COMPONENT,
+            attributes={
+                "cluster": hierarchy.by,
+                "name": "/".join(path),
+                "size": size,
+                "children": len(hierarchy.children(path))
+            }
+        ))
+
+    # Merge edges between the same items
+    edge_types: Dict[Tuple[str, str], Counter] = {}
+    for source_id, target_id, edge_type in hierarchy.edges:
+        key = (representatives[source_id], representatives[target_id])
+        if key[0] == key[1]:
+            continue
+        types = edge_types.get(key)
+        if types is None:
+            types = edge_types[key] = Counter()
+        types[edge_type] += 1
+
+    for (source_id, target_id), types in edge_types.items():
+        weight = sum(types.values())
+        if weight == 1 and source_id in nodes and target_id in nodes:
+            # An edge between two nodes shown as themselves
+            aggregated.add_edge(source_id, target_id, graph.get_edge(source_id, target_id))
+            continue
+        aggregated.add_edge(source_id, target_id, DependencyMetadata(
+            type=types.most_common(1)[0][0],
+            attributes={"weight": weight, "types": dict(types)}
+        ))
+
+    return aggregated
@@ -0,0 +1,101 @@
+"""
+Graph Layout service for visualizing dependency graphs.
+This module provides a layered layout that scales to large dependency graphs.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+from ..models.dependency_graph import DependencyGraph
+
+logger = logging.getLogger(__name__)
+
+def layered_layout(graph: DependencyGraph, sweeps: int = 4) -> Dict[str, Tuple[float, float]]:
+    """
+    Lay out a graph in layers, dependents above their dependencies.
+
+    A Sugiyama-style layout: nodes of a cycle are collapsed into one layer,
+    layers are assigned by longest path from the nodes nothing depends on,
+    and the order within each layer is refined with barycenter sweeps to
+    reduce edge crossings. Runs in O((V + E) * sweeps), so it stays fast on
+    graphs far larger than force-directed layouts can handle.
+
+    Args:
+        graph: Dependency graph to lay out
+        sweeps: Number of crossing reduction sweeps
+
+    Returns:
+        Dictionary mapping node IDs to positions in [-1, 1] x [-1, 1]
+    """
+    components = graph.strongly_connected_components()
+    if not components:
+        return {}
+
+    # Index nodes in component order, so dependencies come first
+    node_ids = [node_id for component in components for node_id in component]
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    component_of = [0] * len(node_ids)
+    for c, component in enumerate(components):
+        for node_id in component:
+            component_of[index[node_id]] = c
+
+    dependencies: List[List[int]] = [[] for _ in node_ids]
+    dependents: List[List[int]] = [[] for _ in node_ids]
+    for source_id, target_id, _ in graph.iter_edges():
+        source = index[source_id]
+        target = index[target_id]
+        dependencies[source].append(target)
+        dependents[target].append(source)
+
+    # Longest path layering over the components: dependents come after their
+    # dependencies, so walking backwards visits every dependent first
+    component_layer = [0] * len(components)
+    for c in range(len(components) - 1, -1, -1):
+        next_layer = component_layer[c] + 1
+        for node_id in components[c]:
+            for dep in dependencies[index[node_id]]:
+                d = component_of[dep]
+                if d != c and component_layer[d] < next_layer:
+                    component_layer[d] = next_layer
+
+    layer_count = max(component_layer) + 1
+    layers: List[List[int]] = [[] for _ in range(layer_count)]
+    for node in range(len(node_ids)):
+        layers[component_layer[component_of[node]]].append(node)
+
+    # Position of each node within its layer
+    position = [0.0] * len(node_ids)
+    for layer in layers:
+        for i, node in enumerate(layer):
+            position[node] = i
+
+    # Barycenter sweeps, alternating downwards (ordering by dependents) and
+    # upwards (ordering by dependencies); nodes without neighbors keep their place
+    for sweep in range(sweeps):
+        downwards = sweep % 2 == 0
+        neighbors = dependents if downwards else dependencies
+        for layer in (layers if downwards else reversed(layers)):
+            barycenter = {}
+            for node in layer:
+                adjacent = neighbors[node]
+                barycenter[node] = (
+                    sum(position[neighbor] for neighbor in adjacent) / len(adjacent)
+                    if adjacent else position[node]
+                )
+            layer.sort(key=barycenter.__getitem__)
+            for i, node in enumerate(layer):
+                position[node] = i
+
+    # Scale to [-1, 1], centering each layer
+    width = max(len(layer) for layer in layers)
+    x_scale = 2 / (width - 1) if width > 1 else 0
+    y_scale = 2 / (layer_count - 1) if layer_count > 1 else 0
+
+    positions = {}
+    for depth, layer in enumerate(layers):
+        offset = (len(layer) - 1) / 2
+        y = 1 - depth * y_scale
+        for i, node in enumerate(layer):
+            positions[node_ids[node]] = ((i - offset) * x_scale, y)
+
+    return positions
@@ -0,0 +1,405 @@
+"""
+Dependency Graph Store service for dependency analysis.
+This module persists dependency graphs per repository and commit and keeps them up to date with delta updates.
+"""
+
+import os
+import hashlib
+import logging
+import subprocess
+import threading
+from typing import Dict, List, Set, Any, Optional
+
+import msgpack
+
+from ..models.dependency_graph import DependencyGraph
+from ..models.file_storage import atomic_write
+from .dependency_analyzer import DependencyAnalyzerService
+
+logger = logging.getLogger(__name__)
+
+class GraphSnapshot:
+    """
+    A dependency graph together with the analysis results it was built from.
+    """
+
+    def __init__(self, graph: DependencyGraph,
+                 code_dependencies: Dict[str, Any],
+                 package_dependencies: Dict[str, Any],
+                 commit: Optional[str] = None,
+                 dirty_files: Optional[Dict[str, Optional[List[int]]]] = None):
+        """
+        Initialize the snapshot.
+
+        Args:
+            graph: Dependency graph
+            code_dependencies: Code dependencies the graph was built from
+            package_dependencies: Package dependencies the graph was built from
+            commit: Commit the graph was built at, or None outside git repositories
+            dirty_files: Files that differed from the commit when the graph was built,
+                mapped to their [mtime_ns, size] or None if they were deleted
+        """
+        self.graph = graph
+        self.code_dependencies = code_dependencies
+        self.package_dependencies = package_dependencies
+        self.commit = commit
+        self.dirty_files = dirty_files or {}
+
+    @property
+    def name(self) -> str:
+        """Name of the snapshot's file: the commit for clean checkouts."""
+        if self.commit and not self.dirty_files:
+            return self.commit
+        return "worktree"
+
+    def to_msgpack(self) -> bytes:
+        """
+        Convert to a compact binary representation.
+
+        Returns:
+            msgpack-encoded bytes
+        """
+        return msgpack.packb({
+            "version": 1,
+            "commit": self.commit,
+            "dirty_files": self.dirty_files,
+            "graph": self.graph.to_msgpack(),
+            "code_dependencies": self.code_dependencies,
+            "package_dependencies": self.package_dependencies
+        }, use_bin_type=True, default=str)
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> 'GraphSnapshot':
+        """
+        Create from the binary representation written by to_msgpack.
+
+        Args:
+            data: msgpack-encoded bytes
+
+        Returns:
+            GraphSnapshot instance
+        """
+        data = msgpack.unpackb(data, raw=False)
+        if data.get("version") != 1:
+            raise ValueError(f"Unsupported graph snapshot format version: {data.get('version')}")
+
+        return cls(
+            graph=DependencyGraph.from_msgpack(data["graph"]),
+            code_dependencies=data["code_dependencies"],
+            package_dependencies=data["package_dependencies"],
+            commit=data.get("commit"),
+            dirty_files=data.get("dirty_files")
+        )
+
+class DependencyGraphStore:
+    """
+    Service for keeping warm dependency graphs of projects.
+
+    Graphs are saved per repository and commit. When a project's checkout
+    moves, the last graph is patched with the files git reports as changed
+    instead of re-analyzing the whole project.
+
+    Calls for the same project run one at a time, so the store can be used
+    from worker threads. Patching works on a copy of the loaded graph, so a
+    graph that was already returned never changes under its reader.
+    """
+
+    def __init__(self, storage_dir: str = "data/dependency_graphs",
+                 dependency_analyzer: Optional[DependencyAnalyzerService] = None):
+        """
+        Initialize the dependency graph store.
+
+        Args:
+            storage_dir: Directory for saved graphs
+            dependency_analyzer: Dependency analyzer used to build and patch graphs
+        """
+        self.storage_dir = storage_dir
+        self.dependency_analyzer = dependency_analyzer or DependencyAnalyzerService()
+
+        # Map of project directory to its loaded snapshot
+        self._snapshots: Dict[str, GraphSnapshot] = {}
+
+        # Map of project directory to the lock serializing its updates
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_lock = threading.Lock()
+
+    def get_graph(self, project_path: str) -> DependencyGraph:
+        """
+        Get the dependency graph of a project's current checkout.
+
+        Args:
+            project_path: Path to the project directory
+
+        Returns:
+            Dependency graph
+        """
+        project_path = os.path.abspath(project_path)
+        with self._project_lock(project_path):
+            commit = self._git(project_path, "rev-parse", "HEAD")
+            commit = commit[0] if commit else None
+
+            snapshot = self._snapshots.get(project_path)
+            if snapshot is None and commit:
+                # A graph saved at this commit needs no patching for committed changes
+                snapshot = self._load(project_path, commit) or self._load_latest(project_path)
+
+            if snapshot is None or not snapshot.commit or not commit:
+                return self.build(project_path).graph
+
+            changed_files = self._changed_files(project_path, snapshot)
+            if changed_files is None:
+                return self.build(project_path).graph
+
+            if changed_files or snapshot.commit != commit:
+                return self.apply_delta(project_path, sorted(changed_files))
+
+            self._snapshots[project_path] = snapshot
+            return snapshot.graph
+
+    def build(self, project_path: str) -> GraphSnapshot:
+        """
+        Analyze a whole project and save its graph.
+
+        Args:
+            project_path: Path to the project directory
+
+        Returns:
+            Graph snapshot
+        """
+        # Import services here to avoid circular imports
+        from .code_analyzer import CodeAnalyzerService
+        from .package_analyzer import PackageAnalyzerService
+
+        project_path = os.path.abspath(project_path)
+        commit = self._git(project_path, "rev-parse", "HEAD")
+
+        code_dependencies = CodeAnalyzerService().analyze_code_dependencies(project_path)
+        package_dependencies = PackageAnalyzerService().analyze_project_dependencies(project_path)
+        graph = self.dependency_analyzer.create_dependency_graph(code_dependencies, package_dependencies)
+
+        snapshot = GraphSnapshot(
+            graph,
+            code_dependencies,
+            package_dependencies,
+            commit=commit[0] if commit else None,
+            dirty_files=self._file_stats(project_path, self._dirty_files(project_path) or set())
+        )
+        self._save(project_path, snapshot)
+
+        return snapshot
+
+    def apply_delta(self, project_path: str, changed_files: List[str]) -> DependencyGraph:
+        """
+        Patch a project's graph for changed files and save it.
+
+        Args:
+            project_path: Path to the project directory
+            changed_files: Paths of added, modified or deleted files, relative
+                to the project or absolute
+
+        Returns:
+            Patched dependency graph
+        """
+        project_path = os.path.abspath(project_path)
+        with self._project_lock(project_path):
+            snapshot = self._snapshots.get(project_path)
+            if snapshot is not None:
+                # The loaded graph may still be in use by earlier callers
+                snapshot = GraphSnapshot.from_msgpack(snapshot.to_msgpack())
+            else:
+                snapshot = self._load_latest(project_path)
+            if snapshot is None:
+                return self.build(project_path).graph
+
+            self.dependency_analyzer.update_dependency_graph(
+                snapshot.graph,
+                snapshot.code_dependencies,
+                snapshot.package_dependencies,
+                project_path,
+                changed_files
+            )
+
+            commit = self._git(project_path, "rev-parse", "HEAD")
+            snapshot.commit = commit[0] if commit else None
+            snapshot.dirty_files = self._file_stats(project_path, self._dirty_files(project_path) or set())
+            self._save(project_path, snapshot)
+
+            return snapshot.graph
+
+    def _project_lock(self, project_path: str) -> threading.RLock:
+        """
+        Get the lock serializing updates to a project's graph.
+
+        Args:
+            project_path: Absolute path to the project directory
+
+        Returns:
+            Reentrant lock of the project
+        """
+        with self._locks_lock:
+            return self._locks.setdefault(project_path, threading.RLock())
+
+    def _changed_files(self, project_path: str, snapshot: GraphSnapshot) -> Optional[Set[str]]:
+        """
+        Get the files that differ between a snapshot and the working tree.
+
+        Args:
+            project_path: Path to the project directory
+            snapshot: Graph snapshot
+
+        Returns:
+            Set of relative paths, or None if git could not tell
+        """
+        committed = self._git(project_path, "diff", "--name-only", "--no-renames", "--relative", snapshot.commit)
+        untracked = self._git(project_path, "ls-files", "--others", "--exclude-standard")
+        if committed is None or untracked is None:
+            return None
+
+        # Files that were dirty may have been reverted since
+        candidates = set(committed) | set(untracked) | set(snapshot.dirty_files)
+
+        # Dirty files that did not change since the graph was saved are already in it
+        stats = self._file_stats(project_path, candidates & set(snapshot.dirty_files))
+        return {
+            rel_path for rel_path in candidates
+            if rel_path not in stats or stats[rel_path] != snapshot.dirty_files[rel_path]
+        }
+
+    def _dirty_files(self, project_path: str) -> Optional[Set[str]]:
+        """
+        Get the files that differ from the checked out commit, untracked ones included.
+
+        Args:
+            project_path: Path to the project directory
+
+        Returns:
+            Set of relative paths, or None if git could not tell
+        """
+        modified = self._git(project_path, "diff", "--name-only", "--no-renames", "--relative", "HEAD")
+        untracked = self._git(project_path, "ls-files", "--others", "--exclude-standard")
+        if modified is None or untracked is None:
+            return None
+        return set(modified) | set(untracked)
+
+    def _file_stats(self, project_path: str,
+                    rel_paths: Set[str]) -> Dict[str, Optional[List[int]]]:
+        """
+        Get the modification time and size of files.
+
+        Args:
+            project_path: Path to the project directory
+            rel_paths: Paths relative to the project
+
+        Returns:
+            Map of path to [mtime_ns, size], or None for missing files
+        """
+        stats = {}
+        for rel_path in sorted(rel_paths):
+            try:
+                stat = os.stat(os.path.join(project_path, rel_path))
+                stats[rel_path] = [stat.st_mtime_ns, stat.st_size]
+            except OSError:
+                stats[rel_path] = None
+        return stats
+
+    def _git(self, project_path: str, *args: str) -> Optional[List[str]]:
+        """
+        Run a git command in a project.
+
+        Args:
+            project_path: Path to the project directory
+            args: Arguments of the git command
+
+        Returns:
+            Lines of output, or None if the command failed
+        """
+        try:
+            completed = subprocess.run(
+                ["git", *args],
+                cwd=project_path,
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Error running git in {project_path}: {e}")
+            return None
+
+        if completed.returncode != 0:
+            return None
+        return [line for line in completed.stdout.splitlines() if line]
+
+    def _snapshot_path(self, project_path: str, name: str) -> str:
+        """
+        Get the path of a saved snapshot.
+
+        Args:
+            project_path: Path to the project directory
+            name: Name of the snapshot
+
+        Returns:
+            Path to the snapshot file
+        """
+        project_key = hashlib.sha256(project_path.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.storage_dir, project_key, f"{name}.msgpack")
+
+    def _load(self, project_path: str, name: str) -> Optional[GraphSnapshot]:
+        """
+        Load a saved snapshot.
+
+        Args:
+            project_path: Path to the project directory
+            name: Name of the snapshot
+
+        Returns:
+            Graph snapshot, or None if it is missing or unreadable
+        """
+        path = self._snapshot_path(project_path, name)
+        try:
+            with open(path, "rb") as f:
+                snapshot = GraphSnapshot.from_msgpack(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable dependency graph {path}: {e}")
+            return None
+
+        self._snapshots[project_path] = snapshot
+        return snapshot
+
+    def _load_latest(self, project_path: str) -> Optional[GraphSnapshot]:
+        """
+        Load the snapshot saved last for a project.
+
+        Args:
+            project_path: Path to the project directory
+
+        Returns:
+            Graph snapshot, or None if there is none
+        """
+        try:
+            with open(self._snapshot_path(project_path, "latest"), "r", encoding="utf-8") as f:
+                name = f.read().strip()
+        except OSError:
+            return None
+        return self._load(project_path, name) if name else None
+
+    def _save(self, project_path: str, snapshot: GraphSnapshot) -> None:
+        """
+        Save a snapshot and keep it loaded.
+
+        Args:
+            project_path: Path to the project directory
+            snapshot: Graph snapshot
+        """
+        self._snapshots[project_path] = snapshot
+
+        path = self._snapshot_path(project_path, snapshot.name)
+        try:
+            with atomic_write(path, "wb") as f:
+                f.write(snapshot.to_msgpack())
+
+            with atomic_write(self._snapshot_path(project_path, "latest")) as f:
+                f.write(snapshot.name)
+        except OSError as e:
+            logger.warning(f"Error saving dependency graph {path}: {e}")
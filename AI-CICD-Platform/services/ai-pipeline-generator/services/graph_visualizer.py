@@ -6,18 +6,77 @@ This module provides functionality to visualize dependency graphs in various for
 import os
 import logging
 import json
+import threading
+import weakref
+from collections import OrderedDict
 import networkx as nx
 import matplotlib.pyplot as plt
-from typing import Dict, List, Set, Any, Optional, Tuple, Union
+from typing import Dict, List, Set, Any, Optional, Tuple, Union, Callable
 from pathlib import Path
 
 from ..models.dependency_graph import DependencyGraph, NodeType
+from .graph_clustering import ClusterHierarchy, aggregate_graph
+from .graph_layout import layered_layout
 
 logger = logging.getLogger(__name__)
 
+# Deepest zoom level of tiled views
+MAX_TILE_ZOOM = 20
+
+class GraphViewCache:
+    """
+    Views, cluster hierarchies and layouts derived from one version of a graph.
+    
+    Safe to share between threads. Entries are created outside the lock, so
+    two threads missing the same key may both create it; the first one
+    stored is kept.
+    """
+    
+    def __init__(self, version: int, max_entries: int = 64):
+        """
+        Initialize the cache.
+        
+        Args:
+            version: Graph version the entries belong to
+            max_entries: Maximum number of entries, least recently used are evicted
+        """
+        self.version = version
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple, create: Callable[[], Any]) -> Any:
+        """
+        Get an entry, creating it if needed.
+        
+        Args:
+            key: Entry key
+            create: Function creating the entry
+            
+        Returns:
+            The entry
+        """
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        
+        value = create()
+        with self._lock:
+            value = self.entries.setdefault(key, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
 class GraphVisualizerService:
     """
     Service for visualizing dependency graphs.
+    
+    Filtered graphs, cluster views and layouts are cached per graph and graph
+    version, so repeated requests for a warm graph skip the layout entirely.
+    Large graphs are aggregated into clusters instead of being truncated.
+    Tiles may be built from worker threads; rendering to images may not.
     """
     
     def __init__(self):
@@ -44,6 +103,15 @@ class GraphVisualizerService:
             "spiral": nx.spiral_layout,
             "multipartite": nx.multipartite_layout
         }
+        
+        # Layouts computed from the dependency graph rather than NetworkX
+        self.graph_layout_algorithms = {
+            "layered": layered_layout
+        }
+        
+        # Map of graph to the cache of its current version
+        self._graph_caches: "weakref.WeakKeyDictionary[DependencyGraph, GraphViewCache]" = weakref.WeakKeyDictionary()
+        self._graph_caches_lock = threading.Lock()
     
     def visualize_graph(self, graph: DependencyGraph,
                        format: str = "json",
@@ -51,10 +119,17 @@ class GraphVisualizerService:
                        include_node_types: Optional[List[str]] = None,
                        include_edge_types: Optional[List[str]] = None,
                        group_by: Optional[str] = None,
-                       max_nodes: int = 100) -> Dict[str, Any]:
+                       max_nodes: int = 100,
+                       cluster_by: Optional[str] = None,
+                       expand: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Visualize a dependency graph.
         
+        Without cluster_by, graphs with more than max_nodes nodes are cut to
+        their most connected nodes. With cluster_by, nodes are aggregated into
+        clusters instead, and the largest clusters are opened while the view
+        stays within max_nodes items.
+        
         Args:
             graph: Dependency graph to visualize
             format: Output format (json, dot, png, svg)
@@ -63,25 +138,29 @@ class GraphVisualizerService:
             include_edge_types: List of edge types to include
             group_by: Attribute to group nodes by
             max_nodes: Maximum number of nodes to include
+            cluster_by: Aggregate nodes by "directory", "package", "scc" or "type"
+            expand: IDs of clusters to drill down into
             
         Returns:
             Dictionary containing visualization data
         """
-        logger.info(f"Visualizing graph: format={format}, layout={layout}, max_nodes={max_nodes}")
+        logger.info(f"Visualizing graph: format={format}, layout={layout}, max_nodes={max_nodes}, cluster_by={cluster_by}")
         
-        # Filter graph
-        filtered_graph = self._filter_graph(
+        # Filter or aggregate graph
+        view_key, filtered_graph = self._get_view(
             graph,
             include_node_types,
             include_edge_types,
-            max_nodes
+            max_nodes,
+            cluster_by,
+            expand
         )
         
         # Convert to NetworkX graph
         nx_graph = self._to_networkx(filtered_graph, group_by)
         
-        # Apply layout
-        positions = self._apply_layout(nx_graph, layout)
+        # Apply layout, once per view and graph version
+        positions = self._get_layout(graph, view_key, filtered_graph, nx_graph, layout, group_by)
         
         # Generate visualization
         if format == "json":
@@ -96,17 +175,329 @@ class GraphVisualizerService:
         # Add stats
         result["stats"] = {
             "total_nodes": len(graph.get_all_nodes()),
-            "total_edges": len(graph.get_all_edges()),
+            "total_edges": self._count_edges(graph),
             "visible_nodes": len(filtered_graph.get_all_nodes()),
-            "visible_edges": len(filtered_graph.get_all_edges())
+            "visible_edges": len(filtered_graph.get_all_edges()),
+            "version": graph.version
         }
         
         return result
     
+    def _graph_cache(self, graph: DependencyGraph) -> GraphViewCache:
+        """
+        Get the cache of a graph's current version.
+        
+        Args:
+            graph: Dependency graph
+            
+        Returns:
+            Cache, emptied if the graph changed since it was filled
+        """
+        with self._graph_caches_lock:
+            cache = self._graph_caches.get(graph)
+            if cache is None or cache.version != graph.version:
+                cache = GraphViewCache(graph.version)
+                self._graph_caches[graph] = cache
+            return cache
+    
+    def _count_edges(self, graph: DependencyGraph) -> int:
+        """Count the edges of a graph, once per graph version."""
+        return self._graph_cache(graph).get(("edge_count",), lambda: sum(1 for _ in graph.iter_edges()))
+    
+    def _get_filtered_graph(self, graph: DependencyGraph,
+                          include_node_types: Optional[List[str]],
+                          include_edge_types: Optional[List[str]],
+                          max_nodes: Optional[int] = None) -> DependencyGraph:
+        """
+        Get a filtered graph, cached per graph version.
+        
+        Args:
+            graph: Dependency graph to filter
+            include_node_types: List of node types to include
+            include_edge_types: List of edge types to include
+            max_nodes: Maximum number of nodes to include, or None for all
+            
+        Returns:
+            Filtered dependency graph
+        """
+        # Views only read the graph, so an unfiltered graph is used as it is
+        if (not include_node_types or "all" in include_node_types) and \
+                (not include_edge_types or "all" in include_edge_types) and \
+                (max_nodes is None or len(graph.get_all_nodes()) <= max_nodes):
+            return graph
+        
+        key = ("filtered", tuple(include_node_types or ()), tuple(include_edge_types or ()), max_nodes)
+        return self._graph_cache(graph).get(key, lambda: self._filter_graph(
+            graph,
+            include_node_types,
+            include_edge_types,
+            max_nodes
+        ))
+    
+    def _get_hierarchy(self, graph: DependencyGraph,
+                     include_node_types: Optional[List[str]],
+                     include_edge_types: Optional[List[str]],
+                     cluster_by: str) -> Tuple[DependencyGraph, ClusterHierarchy]:
+        """
+        Get the cluster hierarchy of a filtered graph, cached per graph version.
+        
+        Args:
+            graph: Dependency graph
+            include_node_types: List of node types to include
+            include_edge_types: List of edge types to include
+            cluster_by: What to cluster by
+            
+        Returns:
+            Tuple of the filtered graph and its cluster hierarchy
+        """
+        filtered_graph = self._get_filtered_graph(graph, include_node_types, include_edge_types)
+        key = ("hierarchy", tuple(include_node_types or ()), tuple(include_edge_types or ()), cluster_by)
+        hierarchy = self._graph_cache(graph).get(key, lambda: ClusterHierarchy(filtered_graph, cluster_by))
+        return filtered_graph, hierarchy
+    
+    def _get_view(self, graph: DependencyGraph,
+                include_node_types: Optional[List[str]],
+                include_edge_types: Optional[List[str]],
+                max_nodes: int,
+                cluster_by: Optional[str] = None,
+                expand: Optional[List[str]] = None) -> Tuple[Tuple, DependencyGraph]:
+        """
+        Get the graph to show, cached per graph version.
+        
+        Args:
+            graph: Dependency graph
+            include_node_types: List of node types to include
+            include_edge_types: List of edge types to include
+            max_nodes: Maximum number of nodes to show
+            cluster_by: What to cluster by, or None to cut the graph to max_nodes nodes
+            expand: IDs of clusters to drill down into
+            
+        Returns:
+            Tuple of the view's cache key and the filtered or aggregated dependency graph
+        """
+        if not cluster_by:
+            key = ("filtered", tuple(include_node_types or ()), tuple(include_edge_types or ()), max_nodes)
+            return key, self._get_filtered_graph(graph, include_node_types, include_edge_types, max_nodes)
+        
+        filtered_graph, hierarchy = self._get_hierarchy(graph, include_node_types, include_edge_types, cluster_by)
+        key = ("view", tuple(include_node_types or ()), tuple(include_edge_types or ()),
+               max_nodes, cluster_by, tuple(sorted(expand or ())))
+        return key, self._graph_cache(graph).get(key, lambda: aggregate_graph(
+            filtered_graph,
+            hierarchy,
+            hierarchy.view(expand or (), max_nodes=max_nodes)
+        ))
+    
+    def _get_layout(self, graph: DependencyGraph, view_key: Tuple, view_graph: DependencyGraph,
+                  nx_graph: Optional[nx.DiGraph], layout: str,
+                  group_by: Optional[str] = None) -> Dict[str, Tuple[float, float]]:
+        """
+        Get the layout of a view, cached per graph version.
+        
+        Args:
+            graph: Dependency graph the view was derived from
+            view_key: Cache key of the view
+            view_graph: Filtered or aggregated graph to lay out
+            nx_graph: NetworkX graph of the view, created if needed and not given
+            layout: Layout algorithm to use
+            group_by: Attribute the nodes are grouped by
+            
+        Returns:
+            Dictionary mapping node IDs to positions
+        """
+        def create():
+            if layout in self.graph_layout_algorithms:
+                return self.graph_layout_algorithms[layout](view_graph)
+            positions = self._apply_layout(nx_graph if nx_graph is not None else self._to_networkx(view_graph, group_by), layout)
+            return {node_id: (float(pos[0]), float(pos[1])) for node_id, pos in positions.items()}
+        
+        key = ("layout", view_key, layout, group_by if layout == "multipartite" else None)
+        return self._graph_cache(graph).get(key, create)
+    
+    def get_tile(self, graph: DependencyGraph, zoom: int, x: int, y: int,
+               cluster_by: str = "directory",
+               layout: str = "layered",
+               include_node_types: Optional[List[str]] = None,
+               include_edge_types: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get one tile of a level-of-detail view of a graph.
+        
+        The whole graph is laid out once and scaled to the unit square, which
+        zoom level z splits into 2^z x 2^z tiles. Zoom level z shows the
+        cluster hierarchy opened z + 1 levels deep, with clusters placed at the
+        centroid of their nodes; from max_zoom on, every node is shown. A tile
+        holds the items placed in it and the links touching them, so clients
+        only fetch what is on screen.
+        
+        Args:
+            graph: Dependency graph to visualize
+            zoom: Zoom level, 0 for the whole graph in one tile
+            x: Tile column, from 0 to 2^zoom - 1
+            y: Tile row, from 0 to 2^zoom - 1
+            cluster_by: What to cluster by: "directory", "package", "scc" or "type"
+            layout: Layout algorithm to use
+            include_node_types: List of node types to include
+            include_edge_types: List of edge types to include
+            
+        Returns:
+            Dictionary containing the tile's visualization data
+        """
+        if not 0 <= zoom <= MAX_TILE_ZOOM:
+            raise ValueError(f"Invalid zoom level: {zoom}")
+        tile_count = 1 << zoom
+        if not (0 <= x < tile_count and 0 <= y < tile_count):
+            raise ValueError(f"Tile ({x}, {y}) is outside zoom level {zoom}")
+        
+        _, hierarchy = self._get_hierarchy(graph, include_node_types, include_edge_types, cluster_by)
+        max_zoom = hierarchy.depth()
+        
+        key = ("level", tuple(include_node_types or ()), tuple(include_edge_types or ()),
+               cluster_by, layout, zoom)
+        level = self._graph_cache(graph).get(key, lambda: self._build_level(
+            graph, hierarchy, layout, zoom, include_node_types, include_edge_types
+        ))
+        tile = level["tiles"].get((x, y), {"nodes": [], "links": []})
+        
+        return {
+            "format": "json",
+            "zoom": zoom,
+            "x": x,
+            "y": y,
+            "max_zoom": max_zoom,
+            "bounds": [x / tile_count, y / tile_count, (x + 1) / tile_count, (y + 1) / tile_count],
+            "data": tile,
+            "layout": layout,
+            "stats": {
+                "total_nodes": level["total_nodes"],
+                "total_edges": level["total_edges"],
+                "level_nodes": level["node_count"],
+                "level_edges": level["edge_count"],
+                "version": graph.version
+            }
+        }
+    
+    def _build_level(self, graph: DependencyGraph, hierarchy: ClusterHierarchy,
+                   layout: str, zoom: int,
+                   include_node_types: Optional[List[str]],
+                   include_edge_types: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        Build the tiles of one zoom level.
+        
+        Zoom levels past the depth of the hierarchy show every node.
+        
+        Args:
+            graph: Dependency graph to visualize
+            hierarchy: Cluster hierarchy of the filtered graph
+            layout: Layout algorithm to use
+            zoom: Zoom level
+            include_node_types: List of node types to include
+            include_edge_types: List of edge types to include
+            
+        Returns:
+            Dictionary with the map of tile to its items and links, and item and link counts
+        """
+        filtered_graph = self._get_filtered_graph(graph, include_node_types, include_edge_types)
+        positions = self._get_unit_layout(graph, layout, include_node_types, include_edge_types)
+        if zoom >= hierarchy.depth():
+            # Every node is shown as itself
+            representatives = {node_id: node_id for node_id in hierarchy.paths}
+            aggregated = filtered_graph
+        else:
+            representatives = hierarchy.view(max_depth=zoom + 1)
+            aggregated = aggregate_graph(filtered_graph, hierarchy, representatives)
+        
+        # Place clusters at the centroid of their nodes
+        sums: Dict[str, List[float]] = {}
+        for node_id, representative in representatives.items():
+            node_x, node_y = positions.get(node_id, (0.5, 0.5))
+            total = sums.setdefault(representative, [0.0, 0.0, 0])
+            total[0] += node_x
+            total[1] += node_y
+            total[2] += 1
+        item_positions = {item_id: (total[0] / total[2], total[1] / total[2]) for item_id, total in sums.items()}
+        
+        tile_count = 1 << zoom
+        tiles: Dict[Tuple[int, int], Dict[str, List[Dict[str, Any]]]] = {}
+        item_tiles = {}
+        for node_id, node_attrs in aggregated.get_all_nodes().items():
+            node_x, node_y = item_positions.get(node_id, (0.5, 0.5))
+            attributes = node_attrs.get("attributes", {})
+            tile = self._tile_of(node_x, node_y, tile_count)
+            item_tiles[node_id] = tile
+            tiles.setdefault(tile, {"nodes": [], "links": []})["nodes"].append({
+                "id": node_id,
+                "label": node_id.split(":")[-1] if ":" in node_id else node_id,
+                "type": node_attrs.get("type", NodeType.CUSTOM),
+                "x": node_x,
+                "y": node_y,
+                "size": attributes.get("size", 1) if "cluster" in attributes else 1,
+                "attributes": attributes
+            })
+        
+        edge_count = 0
+        for source_id, target_id, edge_attrs in aggregated.iter_edges():
+            edge_count += 1
+            link = {
+                "source": source_id,
+                "target": target_id,
+                "type": edge_attrs.get("type", "unknown"),
+                "points": [list(item_positions[source_id]), list(item_positions[target_id])],
+                "attributes": edge_attrs.get("attributes", {})
+            }
+            for tile in {item_tiles[source_id], item_tiles[target_id]}:
+                tiles.setdefault(tile, {"nodes": [], "links": []})["links"].append(link)
+        
+        return {
+            "tiles": tiles,
+            "node_count": len(item_tiles),
+            "edge_count": edge_count,
+            "total_nodes": len(graph.get_all_nodes()),
+            "total_edges": self._count_edges(graph)
+        }
+    
+    def _get_unit_layout(self, graph: DependencyGraph, layout: str,
+                       include_node_types: Optional[List[str]],
+                       include_edge_types: Optional[List[str]]) -> Dict[str, Tuple[float, float]]:
+        """
+        Get the layout of a whole filtered graph scaled to the unit square, y pointing down.
+        
+        Args:
+            graph: Dependency graph to visualize
+            layout: Layout algorithm to use
+            include_node_types: List of node types to include
+            include_edge_types: List of edge types to include
+            
+        Returns:
+            Dictionary mapping node IDs to positions in [0, 1] x [0, 1]
+        """
+        def create():
+            filtered_graph = self._get_filtered_graph(graph, include_node_types, include_edge_types)
+            view_key = ("filtered", tuple(include_node_types or ()), tuple(include_edge_types or ()), None)
+            positions = self._get_layout(graph, view_key, filtered_graph, None, layout)
+            if not positions:
+                return {}
+            xs = [pos[0] for pos in positions.values()]
+            ys = [pos[1] for pos in positions.values()]
+            min_x, min_y = min(xs), min(ys)
+            width = (max(xs) - min_x) or 1.0
+            height = (max(ys) - min_y) or 1.0
+            return {
+                node_id: ((pos[0] - min_x) / width, 1 - (pos[1] - min_y) / height)
+                for node_id, pos in positions.items()
+            }
+        
+        key = ("unit_layout", tuple(include_node_types or ()), tuple(include_edge_types or ()), layout)
+        return self._graph_cache(graph).get(key, create)
+    
+    @staticmethod
+    def _tile_of(x: float, y: float, tile_count: int) -> Tuple[int, int]:
+        """Get the tile containing a position in the unit square."""
+        return (min(int(x * tile_count), tile_count - 1), min(int(y * tile_count), tile_count - 1))
+    
     def _filter_graph(self, graph: DependencyGraph,
                     include_node_types: Optional[List[str]],
                     include_edge_types: Optional[List[str]],
-                    max_nodes: int) -> DependencyGraph:
+                    max_nodes: Optional[int]) -> DependencyGraph:
         """
         Filter a dependency graph.
         
@@ -114,7 +505,7 @@ class GraphVisualizerService:
             graph: Dependency graph to filter
             include_node_types: List of node types to include
             include_edge_types: List of edge types to include
-            max_nodes: Maximum number of nodes to include
+            max_nodes: Maximum number of nodes to include, or None for all
             
         Returns:
             Filtered dependency graph
@@ -137,7 +528,7 @@ class GraphVisualizerService:
             filtered_nodes = all_nodes
         
         # Limit number of nodes
-        if len(filtered_nodes) > max_nodes:
+        if max_nodes is not None and len(filtered_nodes) > max_nodes:
             # Sort nodes by number of connections
             node_connections = {}
             for node_id in filtered_nodes:
@@ -221,15 +612,14 @@ class GraphVisualizerService:
                 elif "attributes" in node_attrs and group_by in node_attrs["attributes"]:
                     node_group = node_attrs["attributes"][group_by]
             
-            # Add node
-            nx_graph.add_node(
-                node_id,
-                label=node_label,
-                type=node_type,
-                color=node_color,
-                group=node_group,
-                **node_attrs
-            )
+            # Add node, the derived attributes taking precedence over the metadata
+            nx_graph.add_node(node_id, **{
+                **node_attrs,
+                "label": node_label,
+                "type": node_type,
+                "color": node_color,
+                "group": node_group
+            })
         
         # Add edges
         for source_id, target_id, edge_attrs in all_edges:
@@ -498,7 +888,9 @@ class GraphVisualizerService:
                                 include_node_types: Optional[List[str]] = None,
                                 include_edge_types: Optional[List[str]] = None,
                                 group_by: Optional[str] = None,
-                                max_nodes: int = 100) -> Dict[str, Any]:
+                                max_nodes: int = 100,
+                                cluster_by: Optional[str] = None,
+                                expand: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Create visualization data for a dependency graph.
         
@@ -508,23 +900,27 @@ class GraphVisualizerService:
             include_edge_types: List of edge types to include
             group_by: Attribute to group nodes by
             max_nodes: Maximum number of nodes to include
+            cluster_by: Aggregate nodes by "directory", "package", "scc" or "type"
+            expand: IDs of clusters to drill down into
             
         Returns:
             Dictionary containing visualization data
         """
-        # Filter graph
-        filtered_graph = self._filter_graph(
+        # Filter or aggregate graph
+        view_key, filtered_graph = self._get_view(
             graph,
             include_node_types,
             include_edge_types,
-            max_nodes
+            max_nodes,
+            cluster_by,
+            expand
         )
         
         # Convert to NetworkX graph
         nx_graph = self._to_networkx(filtered_graph, group_by)
         
-        # Apply layout
-        positions = self._apply_layout(nx_graph, "spring")
+        # Apply layout, once per view and graph version
+        positions = self._get_layout(graph, view_key, filtered_graph, nx_graph, "spring", group_by)
         
         # Convert to JSON
         result = self._to_json(filtered_graph, nx_graph, positions)
@@ -532,7 +928,7 @@ class GraphVisualizerService:
         # Add stats
         result["stats"] = {
             "total_nodes": len(graph.get_all_nodes()),
-            "total_edges": len(graph.get_all_edges()),
+            "total_edges": self._count_edges(graph),
             "visible_nodes": len(filtered_graph.get_all_nodes()),
             "visible_edges": len(filtered_graph.get_all_edges())
         }
@@ -78,12 +78,8 @@ class ImpactAnalyzerService:
             if node_id:
                 directly_affected_nodes.add(node_id)
         
-        # Find indirectly affected nodes
-        indirectly_affected_nodes = set()
-        for node_id in directly_affected_nodes:
-            # Find dependents (nodes that depend on this node)
-            dependents = self._find_all_dependents(dependency_graph, node_id)
-            indirectly_affected_nodes.update(dependents)
+        # Find indirectly affected nodes (nodes that depend on the changed ones)
+        indirectly_affected_nodes = dependency_graph.get_all_dependents(directly_affected_nodes)
         
         # Combine affected nodes
         all_affected_nodes = directly_affected_nodes.union(indirectly_affected_nodes)
@@ -199,33 +195,6 @@ class ImpactAnalyzerService:
         
         return file_path
     
-    def _find_all_dependents(self, dependency_graph: DependencyGraph, node_id: str) -> Set[str]:
-        """
-        Find all nodes that depend on a given node.
-        
-        Args:
-            dependency_graph: Dependency graph
-            node_id: ID of the node
-            
-        Returns:
-            Set of node IDs that depend on the given node
-        """
-        # Initialize result
-        dependents = set()
-        
-        # Find direct dependents
-        direct_dependents = dependency_graph.get_dependents(node_id)
-        
-        # Add direct dependents
-        dependents.update(direct_dependents)
-        
-        # Find indirect dependents
-        for dependent_id in direct_dependents:
-            indirect_dependents = self._find_all_dependents(dependency_graph, dependent_id)
-            dependents.update(indirect_dependents)
-        
-        return dependents
-    
     def _calculate_high_risk_impacts(self, dependency_graph: DependencyGraph, affected_nodes: Set[str]) -> List[str]:
         """
         Calculate high-risk impacts.
@@ -0,0 +1,102 @@
+"""
+Optimization pass manager for CI/CD pipelines.
+This module runs optimizer analyses and optimizations as passes over a shared pipeline IR.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple, Callable
+from contextlib import nullcontext
+import logging
+
+from models.pipeline_ir import PipelineIR
+from models.optimization_metrics import OptimizationMetricsRepository
+
+logger = logging.getLogger(__name__)
+
+class OptimizationPass:
+    """An analysis over the pipeline IR and the optimizations it enables."""
+
+    def __init__(self, name: str,
+                 analyze: Callable[[str, PipelineIR, Optional[Dict[str, Any]]], Dict[str, Any]],
+                 apply: Optional[Callable[[str, Dict[str, Any], Dict[str, Any]], Tuple[Dict[str, Any], List[Dict[str, Any]]]]] = None,
+                 requires_execution_data: bool = False):
+        """
+        Initialize the pass.
+
+        Args:
+            name: The pass name
+            analyze: Function of the pipeline ID, IR and execution data returning the analysis
+            apply: Function of the platform, pipeline configuration and analysis returning
+                the optimized configuration and the applied optimizations
+            requires_execution_data: Whether the pass only runs with execution data
+        """
+        self.name = name
+        self.analyze = analyze
+        self.apply = apply
+        self.requires_execution_data = requires_execution_data
+
+class PassManager:
+    """Runs optimization passes over a pipeline IR."""
+
+    def __init__(self, passes: List[OptimizationPass],
+                 metrics_repository: Optional[OptimizationMetricsRepository] = None):
+        """
+        Initialize the pass manager.
+
+        Args:
+            passes: The passes, in the order they run
+            metrics_repository: Repository the passes save their results to
+        """
+        self.passes = passes
+        self.metrics_repository = metrics_repository
+
+    def analyze(self, pipeline_id: str, ir: PipelineIR,
+                execution_data: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the analysis of every pass.
+
+        Args:
+            pipeline_id: The pipeline ID
+            ir: The pipeline IR
+            execution_data: Optional pipeline execution data
+
+        Returns:
+            Dictionary of pass names to analyses; passes that need missing execution data get an empty analysis
+        """
+        analyses = {}
+        with self._batch():
+            for optimization_pass in self.passes:
+                if optimization_pass.requires_execution_data and not execution_data:
+                    analyses[optimization_pass.name] = {}
+                    continue
+                analyses[optimization_pass.name] = optimization_pass.analyze(pipeline_id, ir, execution_data)
+        return analyses
+
+    def apply(self, platform: str, pipeline_config: Dict[str, Any],
+              analyses: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, List[Dict[str, Any]]]]:
+        """
+        Apply the optimizations of every pass.
+
+        Args:
+            platform: The CI/CD platform
+            pipeline_config: Copy of the pipeline configuration, which is modified
+            analyses: Analyses returned by analyze
+
+        Returns:
+            Tuple containing:
+            - The optimized pipeline configuration
+            - Dictionary of pass names to applied optimizations
+        """
+        applied = {}
+        for optimization_pass in self.passes:
+            if optimization_pass.apply is None:
+                continue
+            pipeline_config, applied[optimization_pass.name] = optimization_pass.apply(
+                platform, pipeline_config, analyses.get(optimization_pass.name, {})
+            )
+        return pipeline_config, applied
+
+    def _batch(self):
+        """Batch the results the passes save into a single write."""
+        if self.metrics_repository is None:
+            return nullcontext()
+        return self.metrics_repository.batch()
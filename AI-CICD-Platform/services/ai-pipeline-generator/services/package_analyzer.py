@@ -6,26 +6,62 @@ This module provides functionality to analyze dependencies between packages.
 import os
 import logging
 import json
-import subprocess
 import re
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
 from typing import Dict, List, Set, Any, Optional, Tuple, Union
-from pathlib import Path
 
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from .analysis_cache import file_digest
+from .file_discovery import FileMatcher, walk_project_files
 from ..models.dependency_graph import DependencyGraph, NodeMetadata, DependencyMetadata, NodeType, DependencyType
+from ..models.file_storage import atomic_write
 
 logger = logging.getLogger(__name__)
 
+# Bump when the shape of cached analysis results changes
+CACHE_FORMAT_VERSION = 1
+
 class PackageAnalyzerService:
     """
     Service for analyzing package dependencies.
+    
+    Manifests and lockfiles are found in one walk of the project, and the
+    package managers are analyzed concurrently. Dependencies pinned in a
+    lockfile (package-lock.json, poetry.lock, or requirements files with
+    hashes) are resolved from it without running the package manager.
+    Results are cached per package manager, keyed by the content of its
+    manifests and lockfiles.
     """
     
-    def __init__(self):
-        """Initialize the package analyzer service."""
+    def __init__(self, cache_dir: Optional[str] = "data/package_analysis_cache",
+                 offline: bool = False,
+                 command_timeout: float = 120.0):
+        """
+        Initialize the package analyzer service.
+        
+        Args:
+            cache_dir: Directory for the package analysis cache, or None to disable caching
+            offline: Whether to resolve dependencies from files only, never running package managers
+            command_timeout: Seconds to wait for a package manager command
+        """
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.command_timeout = command_timeout
+        
         # Map of package manager to file patterns
         self.package_manager_patterns = {
-            "pip": ["requirements.txt", "setup.py", "pyproject.toml"],
-            "npm": ["package.json"],
+            "pip": ["requirements*.txt", "setup.py", "pyproject.toml", "poetry.lock"],
+            "npm": ["package.json", "package-lock.json"],
             "yarn": ["package.json", "yarn.lock"],
             "maven": ["pom.xml"],
             "gradle": ["build.gradle", "build.gradle.kts"],
@@ -40,6 +76,27 @@ class PackageAnalyzerService:
         """
         Analyze package dependencies in a project.
         
+        Args:
+            project_path: Path to the project directory
+            
+        Returns:
+            Dictionary containing package dependencies
+        """
+        coroutine = self.analyze_project_dependencies_async(project_path)
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        
+        # Called from a coroutine, so run the analysis on its own event loop
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+    
+    async def analyze_project_dependencies_async(self, project_path: str) -> Dict[str, Any]:
+        """
+        Analyze package dependencies in a project, analyzing package managers concurrently.
+        
         Args:
             project_path: Path to the project directory
             
@@ -57,30 +114,60 @@ class PackageAnalyzerService:
             "dev_dependencies": {}
         }
         
-        # Detect package managers
-        package_managers = self._detect_package_managers(project_path)
+        # Find manifests and lockfiles, and hash them for the cache
+        manager_files = await asyncio.to_thread(self._find_manager_files, project_path)
+        package_managers = list(manager_files)
         result["package_managers"] = package_managers
         
         logger.info(f"Detected package managers: {package_managers}")
         
-        # Analyze dependencies for each package manager
-        for manager in package_managers:
-            try:
-                # Get analyzer method
-                analyzer_method = getattr(self, f"_analyze_{manager}_dependencies", None)
-                
-                if analyzer_method:
-                    # Analyze dependencies
-                    manager_result = analyzer_method(project_path)
-                    
-                    # Add to result
-                    if manager_result:
-                        result["dependency_graphs"][manager] = manager_result.get("dependency_graph", {})
-                        result["direct_dependencies"][manager] = manager_result.get("direct_dependencies", {})
-                        result["transitive_dependencies"][manager] = manager_result.get("transitive_dependencies", {})
-                        result["dev_dependencies"][manager] = manager_result.get("dev_dependencies", {})
-            except Exception as e:
-                logger.error(f"Error analyzing {manager} dependencies: {e}")
+        analyzed = [
+            manager for manager in package_managers
+            if hasattr(self, f"_analyze_{manager}_dependencies")
+        ]
+        cache_keys = await asyncio.to_thread(self._cache_keys, project_path, {
+            manager: manager_files[manager] for manager in analyzed
+        })
+        cache = await asyncio.to_thread(self._load_cache, project_path)
+        
+        # Analyze dependencies for each package manager that is not cached
+        async def analyze(manager: str) -> Optional[Dict[str, Any]]:
+            entry = cache.get(manager)
+            if entry and entry.get("key") == cache_keys.get(manager):
+                return entry["result"]
+            
+            analyzer_method = getattr(self, f"_analyze_{manager}_dependencies")
+            manager_result = await analyzer_method(project_path, manager_files[manager])
+            
+            # A failed or timed out package manager command is retried next time
+            if manager_result.pop("complete", False):
+                cache[manager] = {"key": cache_keys.get(manager), "result": manager_result}
+            else:
+                cache.pop(manager, None)
+            return manager_result
+        
+        manager_results = await asyncio.gather(
+            *(analyze(manager) for manager in analyzed),
+            return_exceptions=True
+        )
+        
+        for manager, manager_result in zip(analyzed, manager_results):
+            if isinstance(manager_result, Exception):
+                logger.error(f"Error analyzing {manager} dependencies: {manager_result}")
+                cache.pop(manager, None)
+                continue
+            
+            # Add to result
+            if manager_result:
+                result["dependency_graphs"][manager] = manager_result.get("dependency_graph", {})
+                result["direct_dependencies"][manager] = manager_result.get("direct_dependencies", {})
+                result["transitive_dependencies"][manager] = manager_result.get("transitive_dependencies", {})
+                result["dev_dependencies"][manager] = manager_result.get("dev_dependencies", {})
+        
+        await asyncio.to_thread(self._save_cache, project_path, {
+            manager: entry for manager, entry in cache.items()
+            if manager in analyzed and entry.get("key")
+        })
         
         logger.info(f"Package analysis complete: {len(result['dependency_graphs'])} dependency graphs")
         
@@ -96,28 +183,173 @@ class PackageAnalyzerService:
         Returns:
             List of package managers
         """
-        # Initialize result
-        package_managers = []
+        return list(self._find_manager_files(project_path))
+    
+    def _find_manager_files(self, project_path: str) -> Dict[str, List[str]]:
+        """
+        Find the manifests and lockfiles of each package manager in one walk of the project.
         
-        # Check for each package manager
-        for manager, patterns in self.package_manager_patterns.items():
-            for pattern in patterns:
-                # Find matching files
-                matching_files = list(Path(project_path).glob(f"**/{pattern}"))
-                
-                # If any matching files found, add package manager
-                if matching_files:
-                    package_managers.append(manager)
-                    break
+        Hidden, vendored (such as node_modules) and ignored directories are
+        skipped, as in code analysis.
+        
+        Args:
+            project_path: Path to the project directory
+            
+        Returns:
+            Dictionary mapping detected package managers to their files, in detection order
+        """
+        patterns = sorted({
+            pattern for manager_patterns in self.package_manager_patterns.values()
+            for pattern in manager_patterns
+        })
+        matcher = FileMatcher([""], [f"**/{pattern}" for pattern in patterns], None, None)
+        
+        manager_files: Dict[str, List[str]] = {}
+        files = list(walk_project_files(project_path, matcher))
+        for manager, manager_patterns in self.package_manager_patterns.items():
+            matching_files = [
+                file_path for file_path in files
+                if any(fnmatch(os.path.basename(file_path), pattern) for pattern in manager_patterns)
+            ]
+            if matching_files:
+                manager_files[manager] = matching_files
+        
+        return manager_files
+    
+    def _cache_keys(self, project_path: str, manager_files: Dict[str, List[str]]) -> Dict[str, str]:
+        """
+        Compute the cache key of each package manager from the content of its files.
+        
+        Args:
+            project_path: Path to the project directory
+            manager_files: Files of each package manager
+            
+        Returns:
+            Dictionary mapping package managers to cache keys
+        """
+        if not self.cache_dir:
+            return {}
         
-        return package_managers
+        digests: Dict[str, str] = {}
+        keys = {}
+        for manager, files in manager_files.items():
+            key = hashlib.sha256()
+            key.update(json.dumps([CACHE_FORMAT_VERSION, manager, self.offline]).encode("utf-8"))
+            for file_path in sorted(files):
+                if file_path not in digests:
+                    digests[file_path] = file_digest(file_path)
+                key.update(f"\0{os.path.relpath(file_path, project_path)}\0{digests[file_path]}".encode("utf-8"))
+            keys[manager] = key.hexdigest()
+        return keys
+    
+    def _cache_path(self, project_path: str) -> str:
+        """
+        Get the path of a project's cache file.
+        
+        Args:
+            project_path: Path to the project directory
+            
+        Returns:
+            Path to the cache file
+        """
+        project_key = hashlib.sha256(os.path.abspath(project_path).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{project_key}.json")
     
-    def _analyze_pip_dependencies(self, project_path: str) -> Dict[str, Any]:
+    def _load_cache(self, project_path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the cached results of a project.
+        
+        Args:
+            project_path: Path to the project directory
+            
+        Returns:
+            Dictionary mapping package managers to their cache key and result
+        """
+        if not self.cache_dir:
+            return {}
+        
+        storage_path = self._cache_path(project_path)
+        try:
+            with open(storage_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable package analysis cache {storage_path}: {e}")
+            return {}
+        
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return {}
+        
+        return data.get("managers", {})
+    
+    def _save_cache(self, project_path: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Save the cached results of a project.
+        
+        Args:
+            project_path: Path to the project directory
+            entries: Dictionary mapping package managers to their cache key and result
+        """
+        if not self.cache_dir:
+            return
+        
+        storage_path = self._cache_path(project_path)
+        try:
+            with atomic_write(storage_path) as f:
+                json.dump({"version": CACHE_FORMAT_VERSION, "managers": entries}, f)
+        except OSError as e:
+            logger.warning(f"Error saving package analysis cache {storage_path}: {e}")
+    
+    async def _run_command(self, args: List[str], cwd: str) -> Optional[str]:
+        """
+        Run a package manager command without blocking the event loop.
+        
+        Args:
+            args: Command and arguments
+            cwd: Working directory
+            
+        Returns:
+            Standard output of the command, or None if it is not installed, failed,
+            timed out or the service is offline
+        """
+        if self.offline:
+            return None
+        
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                cwd=cwd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.info(f"Not running {args[0]}: {e}")
+            return None
+        
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=self.command_timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            logger.warning(f"{' '.join(args)} timed out after {self.command_timeout} seconds")
+            return None
+        
+        if process.returncode != 0:
+            return None
+        
+        return stdout.decode("utf-8", errors="replace")
+    
+    async def _analyze_pip_dependencies(self, project_path: str, files: List[str]) -> Dict[str, Any]:
         """
         Analyze pip dependencies.
         
+        Dependencies pinned in poetry.lock files or in requirements files with
+        hashes are resolved from them; pipdeptree is only run without a lockfile.
+        
         Args:
             project_path: Path to the project directory
+            files: Manifests and lockfiles of the project
             
         Returns:
             Dictionary containing pip dependencies
@@ -133,10 +365,10 @@ class PackageAnalyzerService:
             "dev_dependencies": {}
         }
         
-        # Find requirements files
-        requirements_files = list(Path(project_path).glob("**/requirements*.txt"))
-        setup_files = list(Path(project_path).glob("**/setup.py"))
-        pyproject_files = list(Path(project_path).glob("**/pyproject.toml"))
+        # Find requirements files and lockfiles
+        requirements_files = [f for f in files if fnmatch(os.path.basename(f), "requirements*.txt")]
+        poetry_lock_files = [f for f in files if os.path.basename(f) == "poetry.lock"]
+        resolved = False
         
         # Add project node
         result["dependency_graph"]["nodes"]["package:project"] = {
@@ -154,6 +386,13 @@ class PackageAnalyzerService:
                 with open(req_file, "r", encoding="utf-8") as f:
                     content = f.read()
                 
+                # Fully pinned requirements with hashes are a lockfile
+                pinned = self._parse_pinned_requirements(content)
+                if pinned is not None:
+                    self._add_pinned_requirements(result, pinned, str(req_file))
+                    resolved = True
+                    continue
+                
                 # Parse requirements
                 dependencies = self._parse_requirements_txt(content)
                 
@@ -192,20 +431,19 @@ class PackageAnalyzerService:
             except Exception as e:
                 logger.error(f"Error parsing requirements file {req_file}: {e}")
         
-        # Try to use pipdeptree if available
-        try:
-            # Run pipdeptree
-            process = subprocess.run(
-                ["pipdeptree", "--json-tree"],
-                cwd=project_path,
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            
-            if process.returncode == 0:
+        # Process poetry.lock files
+        for lock_file in poetry_lock_files:
+            try:
+                resolved = self._add_poetry_lock(result, lock_file) or resolved
+            except Exception as e:
+                logger.error(f"Error parsing poetry.lock file {lock_file}: {e}")
+        
+        # Without a lockfile, try to use pipdeptree if available
+        output = None if resolved else await self._run_command(["pipdeptree", "--json-tree"], project_path)
+        if output is not None:
+            try:
                 # Parse output
-                tree = json.loads(process.stdout)
+                tree = json.loads(output)
                 
                 # Process tree
                 for package in tree:
@@ -259,8 +497,12 @@ class PackageAnalyzerService:
                                     "version": dep_version,
                                     "parent": package_name
                                 }
-        except Exception as e:
-            logger.error(f"Error running pipdeptree: {e}")
+                resolved = True
+            except Exception as e:
+                logger.error(f"Error parsing pipdeptree output: {e}")
+        
+        # Without a lockfile or pipdeptree the result is not cached, except offline
+        result["complete"] = resolved or self.offline
         
         return result
     
@@ -278,16 +520,14 @@ class PackageAnalyzerService:
         dependencies = {}
         
         # Parse lines
-        for line in content.splitlines():
-            # Skip comments and empty lines
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            
+        for line, _ in self._split_requirements(content):
             # Skip options
             if line.startswith("-"):
                 continue
             
+            # Drop options of the requirement, such as --hash, and comments
+            line = re.split(r"\s+(?:--|#)", line, maxsplit=1)[0]
+            
             # Parse package
             match = re.match(r"([^=<>~!]+)(?:[=<>~!]=?)?([^;]*)", line)
             if match:
@@ -298,12 +538,285 @@ class PackageAnalyzerService:
         
         return dependencies
     
-    def _analyze_npm_dependencies(self, project_path: str) -> Dict[str, Any]:
+    def _split_requirements(self, content: str) -> List[Tuple[str, List[str]]]:
+        """
+        Split requirements.txt content into requirements and the comment lines after each.
+        
+        Lines continued with a backslash are joined, as pip does.
+        
+        Args:
+            content: Content of requirements.txt
+            
+        Returns:
+            List of (requirement line, comment lines) tuples, comments without their "#"
+        """
+        entries = []
+        continued = ""
+        for line in content.splitlines():
+            line = line.rstrip()
+            if line.endswith("\\"):
+                continued += line[:-1] + " "
+                continue
+            
+            line = (continued + line).strip()
+            continued = ""
+            if not line:
+                continue
+            
+            if line.startswith("#"):
+                if entries:
+                    entries[-1][1].append(line[1:])
+                continue
+            
+            entries.append((line, []))
+        
+        if continued.strip():
+            entries.append((continued.strip(), []))
+        
+        return entries
+    
+    def _parse_pinned_requirements(self, content: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Parse requirements.txt content that pins every package with hashes, as pip-compile does.
+        
+        The "# via" comments pip-compile writes after each requirement name
+        the packages requiring it.
+        
+        Args:
+            content: Content of requirements.txt
+            
+        Returns:
+            Dictionary mapping normalized package names to their version and the
+            packages or requirement files they are required via, or None if some
+            requirement is not pinned with a hash
+        """
+        requirements = {}
+        for line, comments in self._split_requirements(content):
+            # Skip options
+            if line.startswith("-"):
+                continue
+            
+            requirement = re.split(r"\s+(?:--|#)", line, maxsplit=1)[0]
+            match = re.match(r"([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*===?\s*([^\s;]+)", requirement)
+            if not match or "--hash" not in line:
+                return None
+            
+            # Either "# via parent" or "# via" followed by "#   parent" lines
+            via = []
+            in_via = False
+            for comment in comments:
+                text = comment.strip()
+                if text == "via" or text.startswith("via "):
+                    in_via = True
+                    via.extend(parent.strip() for parent in text[3:].split(",") if parent.strip())
+                elif in_via and comment.startswith("  ") and text:
+                    via.append(text)
+                else:
+                    in_via = False
+            
+            requirements[self._normalize_python_name(match.group(1))] = {
+                "version": match.group(2),
+                "via": via
+            }
+        
+        return requirements or None
+    
+    def _add_pinned_requirements(self, result: Dict[str, Any],
+                                 requirements: Dict[str, Dict[str, Any]],
+                                 source: str) -> None:
+        """
+        Add pinned requirements to a pip result.
+        
+        Requirements without a package requiring them, or required via a
+        requirements file, are direct dependencies.
+        
+        Args:
+            result: Result dictionary to update
+            requirements: Pinned requirements, as returned by _parse_pinned_requirements
+            source: Path of the requirements file
+        """
+        for name, requirement in requirements.items():
+            parents = [
+                self._normalize_python_name(parent) for parent in requirement["via"]
+                if not parent.startswith("-")
+            ]
+            parents = [parent for parent in parents if parent in requirements]
+            
+            if not parents or any(parent.startswith("-r") for parent in requirement["via"]):
+                self._add_locked_package(result, "pip", name, requirement["version"], None, source)
+            for parent in parents:
+                self._add_locked_package(result, "pip", name, requirement["version"], parent, source)
+    
+    def _add_poetry_lock(self, result: Dict[str, Any], lock_file: str) -> bool:
+        """
+        Add the packages of a poetry.lock file to a pip result.
+        
+        Direct dependencies are read from the pyproject.toml next to the
+        lockfile; without one, packages nothing depends on are direct.
+        
+        Args:
+            result: Result dictionary to update
+            lock_file: Path to the poetry.lock file
+            
+        Returns:
+            Whether the lockfile could be read
+        """
+        if tomllib is None:
+            logger.warning(f"Not reading {lock_file}: no TOML parser is available")
+            return False
+        
+        with open(lock_file, "rb") as f:
+            lock = tomllib.load(f)
+        
+        # Map of package name to its package entry and required packages
+        packages = {}
+        requires = {}
+        for package in lock.get("package", []):
+            name = self._normalize_python_name(package["name"])
+            packages[name] = package
+            requires[name] = [
+                self._normalize_python_name(dep_name)
+                for dep_name, spec in package.get("dependencies", {}).items()
+                if not (isinstance(spec, dict) and spec.get("optional"))
+            ]
+        
+        direct = self._parse_pyproject_dependencies(os.path.join(os.path.dirname(lock_file), "pyproject.toml"))
+        if not direct:
+            required = {dep_name for dep_names in requires.values() for dep_name in dep_names}
+            direct = {
+                name: package.get("category") == "dev"
+                for name, package in packages.items() if name not in required
+            }
+        
+        source = str(lock_file)
+        for name, dev in direct.items():
+            if name in packages:
+                self._add_locked_package(result, "pip", name, packages[name].get("version", ""), None, source, dev)
+        
+        for name, dep_names in requires.items():
+            for dep_name in dep_names:
+                if dep_name in packages:
+                    self._add_locked_package(result, "pip", dep_name, packages[dep_name].get("version", ""), name, source)
+        
+        return True
+    
+    def _parse_pyproject_dependencies(self, pyproject_file: str) -> Dict[str, bool]:
+        """
+        Parse the direct dependencies of a pyproject.toml file.
+        
+        Both PEP 621 [project] dependencies and Poetry dependencies and
+        dependency groups are read.
+        
+        Args:
+            pyproject_file: Path to the pyproject.toml file
+            
+        Returns:
+            Dictionary mapping normalized package names to whether they are dev dependencies
+        """
+        if tomllib is None or not os.path.exists(pyproject_file):
+            return {}
+        
+        with open(pyproject_file, "rb") as f:
+            pyproject = tomllib.load(f)
+        
+        dependencies = {}
+        for requirement in pyproject.get("project", {}).get("dependencies", []):
+            match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", requirement)
+            if match:
+                dependencies[self._normalize_python_name(match.group(1))] = False
+        
+        poetry = pyproject.get("tool", {}).get("poetry", {})
+        groups = [(poetry.get("dependencies", {}), False), (poetry.get("dev-dependencies", {}), True)]
+        groups.extend(
+            (group.get("dependencies", {}), group_name != "main")
+            for group_name, group in poetry.get("group", {}).items()
+        )
+        for group_dependencies, dev in groups:
+            for dep_name in group_dependencies:
+                if dep_name.lower() != "python":
+                    dependencies.setdefault(self._normalize_python_name(dep_name), dev)
+        
+        return dependencies
+    
+    def _normalize_python_name(self, name: str) -> str:
+        """
+        Normalize a Python package name, as pip does.
+        
+        Args:
+            name: Package name
+            
+        Returns:
+            Normalized package name
+        """
+        return re.sub(r"[-_.]+", "-", name).lower()
+    
+    def _add_locked_package(self, result: Dict[str, Any], manager: str,
+                            name: str, version: str, parent: Optional[str],
+                            source: str, dev: bool = False) -> None:
+        """
+        Add a package resolved from a lockfile to a result.
+        
+        Args:
+            result: Result dictionary to update
+            manager: Package manager
+            name: Package name
+            version: Locked version
+            parent: Name of the package requiring it, or None for a direct dependency
+            source: Path of the lockfile
+            dev: Whether it is a direct dev dependency
+        """
+        # Add node, keeping the attributes of the first time it was added
+        node_id = f"package:{name}"
+        attributes = {
+            "name": name,
+            "version": version,
+            "type": manager
+        }
+        if dev:
+            attributes["dev"] = True
+        result["dependency_graph"]["nodes"].setdefault(node_id, {
+            "type": "package",
+            "attributes": attributes
+        })
+        
+        # Add edge
+        edge_attributes = {"version": version}
+        if parent is None:
+            edge_attributes["source"] = source
+            if dev:
+                edge_attributes["dev"] = True
+        result["dependency_graph"]["edges"].append({
+            "source": f"package:{parent}" if parent else "package:project",
+            "target": node_id,
+            "metadata": {
+                "type": "package",
+                "is_direct": parent is None,
+                "attributes": edge_attributes
+            }
+        })
+        
+        # Add to direct, dev or transitive dependencies
+        if parent is None:
+            result["dev_dependencies" if dev else "direct_dependencies"][name] = {
+                "version": version,
+                "source": source
+            }
+        else:
+            result["transitive_dependencies"][name] = {
+                "version": version,
+                "parent": parent
+            }
+    
+    async def _analyze_npm_dependencies(self, project_path: str, files: List[str]) -> Dict[str, Any]:
         """
         Analyze npm dependencies.
         
+        Dependencies in package-lock.json files are resolved from them; npm
+        list is only run without a lockfile.
+        
         Args:
             project_path: Path to the project directory
+            files: Manifests and lockfiles of the project
             
         Returns:
             Dictionary containing npm dependencies
@@ -319,8 +832,10 @@ class PackageAnalyzerService:
             "dev_dependencies": {}
         }
         
-        # Find package.json files
-        package_files = list(Path(project_path).glob("**/package.json"))
+        # Find package.json and package-lock.json files
+        package_files = [f for f in files if os.path.basename(f) == "package.json"]
+        lock_files = [f for f in files if os.path.basename(f) == "package-lock.json"]
+        resolved = False
         
         # Add project node
         result["dependency_graph"]["nodes"]["package:project"] = {
@@ -413,20 +928,35 @@ class PackageAnalyzerService:
             except Exception as e:
                 logger.error(f"Error parsing package.json file {pkg_file}: {e}")
         
-        # Try to use npm list if available
-        try:
-            # Run npm list
-            process = subprocess.run(
-                ["npm", "list", "--json"],
-                cwd=project_path,
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            
-            if process.returncode == 0:
+        # Process package-lock.json files
+        for lock_file in lock_files:
+            try:
+                with open(lock_file, "r", encoding="utf-8") as f:
+                    package_lock = json.load(f)
+                
+                # The manifest next to the lockfile lists the direct dependencies of old lockfiles
+                manifest_file = os.path.join(os.path.dirname(lock_file), "package.json")
+                manifest = {}
+                if os.path.exists(manifest_file):
+                    with open(manifest_file, "r", encoding="utf-8") as f:
+                        manifest = json.load(f)
+                
+                self._process_npm_dependencies(
+                    self._parse_package_lock(package_lock, manifest),
+                    "package:project",
+                    result["dependency_graph"],
+                    result["transitive_dependencies"]
+                )
+                resolved = True
+            except Exception as e:
+                logger.error(f"Error parsing package-lock.json file {lock_file}: {e}")
+        
+        # Without a lockfile, try to use npm list if available
+        output = None if resolved else await self._run_command(["npm", "list", "--json"], project_path)
+        if output is not None:
+            try:
                 # Parse output
-                npm_list = json.loads(process.stdout)
+                npm_list = json.loads(output)
                 
                 # Process dependencies
                 self._process_npm_dependencies(
@@ -435,8 +965,12 @@ class PackageAnalyzerService:
                     result["dependency_graph"],
                     result["transitive_dependencies"]
                 )
-        except Exception as e:
-            logger.error(f"Error running npm list: {e}")
+                resolved = True
+            except Exception as e:
+                logger.error(f"Error parsing npm list output: {e}")
+        
+        # Without a lockfile or npm list the result is not cached, except offline
+        result["complete"] = resolved or self.offline
         
         return result
     
@@ -499,12 +1033,117 @@ class PackageAnalyzerService:
                     transitive_dependencies
                 )
     
-    def _analyze_maven_dependencies(self, project_path: str) -> Dict[str, Any]:
+    def _parse_package_lock(self, package_lock: Dict[str, Any],
+                            manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resolve the dependency tree of a package-lock.json file.
+        
+        Requirements are resolved the way Node.js finds modules: in the
+        package's own node_modules, then in those of its parents. As in the
+        output of npm list, the dependencies of a package are only listed the
+        first time it appears.
+        
+        Args:
+            package_lock: Parsed package-lock.json
+            manifest: Parsed package.json next to it, listing the direct dependencies
+                of lockfiles older than lockfileVersion 2
+            
+        Returns:
+            Dependencies in the shape of the "dependencies" of npm list --json
+        """
+        packages = package_lock.get("packages")
+        if packages is None:
+            return self._parse_package_lock_v1(package_lock.get("dependencies", {}), manifest)
+        
+        expanded: Set[str] = set()
+        
+        def resolve(path: str, name: str) -> Optional[str]:
+            while True:
+                candidate = f"{path}/node_modules/{name}" if path else f"node_modules/{name}"
+                if candidate in packages:
+                    return candidate
+                if not path:
+                    return None
+                index = path.rfind("/node_modules/")
+                path = path[:index] if index >= 0 else ""
+        
+        def build(path: str, root: bool = False) -> Dict[str, Any]:
+            info = packages.get(path, {})
+            if info.get("link"):
+                # Workspace packages link to their directory
+                path = info.get("resolved", "")
+                info = packages.get(path, {})
+            
+            names = list(info.get("dependencies", {}))
+            names.extend(info.get("optionalDependencies", {}))
+            names.extend(info.get("peerDependencies", {}))
+            if root:
+                names.extend(info.get("devDependencies", {}))
+            
+            tree = {}
+            for name in names:
+                dep_path = resolve(path, name)
+                if dep_path is None or name in tree:
+                    continue
+                
+                node = {"version": packages[dep_path].get("version", "")}
+                if dep_path not in expanded:
+                    expanded.add(dep_path)
+                    children = build(dep_path)
+                    if children:
+                        node["dependencies"] = children
+                tree[name] = node
+            return tree
+        
+        return build("", root=True)
+    
+    def _parse_package_lock_v1(self, dependencies: Dict[str, Any],
+                               manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resolve the dependency tree of a package-lock.json file older than lockfileVersion 2.
+        
+        Args:
+            dependencies: The "dependencies" of the lockfile, nested where packages are not hoisted
+            manifest: Parsed package.json, listing the direct dependencies
+            
+        Returns:
+            Dependencies in the shape of the "dependencies" of npm list --json
+        """
+        expanded: Set[int] = set()
+        
+        def build(scopes: List[Dict[str, Any]], names: List[str]) -> Dict[str, Any]:
+            tree = {}
+            for name in names:
+                # Look in the innermost scope first
+                for depth in range(len(scopes) - 1, -1, -1):
+                    if name in scopes[depth]:
+                        break
+                else:
+                    continue
+                
+                info = scopes[depth][name]
+                node = {"version": info.get("version", "")}
+                if id(info) not in expanded:
+                    expanded.add(id(info))
+                    children = build(
+                        scopes[:depth + 1] + [info.get("dependencies", {})],
+                        list(info.get("requires", {}))
+                    )
+                    if children:
+                        node["dependencies"] = children
+                tree[name] = node
+            return tree
+        
+        names = list(manifest.get("dependencies", {})) + list(manifest.get("devDependencies", {}))
+        return build([dependencies], names or list(dependencies))
+    
+    async def _analyze_maven_dependencies(self, project_path: str, files: List[str]) -> Dict[str, Any]:
         """
         Analyze Maven dependencies.
         
         Args:
             project_path: Path to the project directory
+            files: Manifests of the project
             
         Returns:
             Dictionary containing Maven dependencies
@@ -521,7 +1160,7 @@ class PackageAnalyzerService:
         }
         
         # Find pom.xml files
-        pom_files = list(Path(project_path).glob("**/pom.xml"))
+        pom_files = [f for f in files if os.path.basename(f) == "pom.xml"]
         
         # Add project node
         result["dependency_graph"]["nodes"]["package:project"] = {
@@ -598,24 +1237,18 @@ class PackageAnalyzerService:
                 logger.error(f"Error parsing pom.xml file {pom_file}: {e}")
         
         # Try to use mvn dependency:tree if available
-        try:
-            # Run mvn dependency:tree
-            process = subprocess.run(
-                ["mvn", "dependency:tree", "-DoutputType=dot"],
-                cwd=project_path,
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            
-            if process.returncode == 0:
-                # Parse output
-                dot_output = process.stdout
-                
+        resolved = False
+        dot_output = await self._run_command(["mvn", "dependency:tree", "-DoutputType=dot"], project_path)
+        if dot_output is not None:
+            try:
                 # Extract dependencies
                 self._parse_maven_dependency_tree(dot_output, result)
-        except Exception as e:
-            logger.error(f"Error running mvn dependency:tree: {e}")
+                resolved = True
+            except Exception as e:
+                logger.error(f"Error parsing mvn dependency:tree output: {e}")
+        
+        # Without mvn dependency:tree the result is not cached, except offline
+        result["complete"] = resolved or self.offline
         
         return result
     
@@ -6,6 +6,7 @@ This module provides tools to optimize parallel execution of pipeline steps.
 from typing import Dict, List, Any, Optional, Tuple, Set
 import copy
 import logging
+from models.pipeline_ir import PipelineIR
 from models.optimization_metrics import (
     OptimizationMetricsRepository,
     ParallelizationMetric,
@@ -25,7 +26,8 @@ class ParallelExecutionOptimizerService:
     
     def analyze_parallelization_opportunities(self, pipeline_id: str, platform: str,
                                            pipeline_config: Dict[str, Any],
-                                           execution_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                                           execution_data: Optional[Dict[str, Any]] = None,
+                                           ir: Optional[PipelineIR] = None) -> Dict[str, Any]:
         """
         Analyze parallelization opportunities in a pipeline configuration.
         
@@ -34,15 +36,17 @@ class ParallelExecutionOptimizerService:
             platform: The CI/CD platform
             pipeline_config: The pipeline configuration
             execution_data: Optional pipeline execution data
+            ir: Optional IR of the pipeline configuration, built if not given
             
         Returns:
             Analysis results with parallelization opportunities
         """
-        # Extract components from the pipeline configuration
-        components = self._extract_components(platform, pipeline_config)
+        # Extract components from the pipeline IR
+        ir = ir or PipelineIR.from_config(platform, pipeline_config)
+        components = ir.components
         
         # Extract dependencies
-        dependencies = self._extract_dependencies(platform, components)
+        dependencies = self._extract_dependencies(platform, ir)
         
         # Identify parallelizable components
         parallelizable_components = self._identify_parallelizable_components(
@@ -64,6 +68,9 @@ class ParallelExecutionOptimizerService:
             pipeline_id, platform, components, dependencies, parallelizable_components
         )
         
+        # Sets are not JSON serializable
+        dependency_lists = {component_id: sorted(needs) for component_id, needs in dependencies.items()}
+        
         # Create optimization result
         result = OptimizationResult(
             pipeline_id=pipeline_id,
@@ -74,7 +81,7 @@ class ParallelExecutionOptimizerService:
             improvement_percentage=time_savings.get("overall_percentage", 0),
             details={
                 "components": components,
-                "dependencies": dependencies,
+                "dependencies": dependency_lists,
                 "parallelizable_components": parallelizable_components,
                 "synchronization_points": synchronization_points,
                 "time_savings": time_savings
@@ -88,7 +95,7 @@ class ParallelExecutionOptimizerService:
             "pipeline_id": pipeline_id,
             "platform": platform,
             "components": components,
-            "dependencies": dependencies,
+            "dependencies": dependency_lists,
             "parallelizable_components": parallelizable_components,
             "synchronization_points": synchronization_points,
             "time_savings": time_savings,
@@ -143,11 +150,12 @@ class ParallelExecutionOptimizerService:
         Returns:
             Dependency graph representation
         """
-        # Extract components from the pipeline configuration
-        components = self._extract_components(platform, pipeline_config)
+        # Extract components from the pipeline IR
+        ir = PipelineIR.from_config(platform, pipeline_config)
+        components = ir.components
         
         # Extract dependencies
-        dependencies = self._extract_dependencies(platform, components)
+        dependencies = self._extract_dependencies(platform, ir)
         
         # Create graph representation
         graph = {
@@ -173,15 +181,9 @@ class ParallelExecutionOptimizerService:
         return graph
     
     # Implementation of private methods would go here
-    def _extract_components(self, platform: str, pipeline_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract components from pipeline config."""
-        # Implementation would go here
-        return {}
-    
-    def _extract_dependencies(self, platform: str, components: Dict[str, Any]) -> Dict[str, Set[str]]:
-        """Extract dependencies between components."""
-        # Implementation would go here
-        return {}
+    def _extract_dependencies(self, platform: str, ir: PipelineIR) -> Dict[str, Set[str]]:
+        """Extract the components each component waits for."""
+        return ir.get_dependencies()
     
     def _identify_parallelizable_components(self, platform: str, components: Dict[str, Any],
                                          dependencies: Dict[str, Set[str]]) -> List[List[str]]:
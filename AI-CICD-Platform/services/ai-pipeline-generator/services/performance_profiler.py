@@ -6,6 +6,7 @@ This module provides tools to analyze and profile pipeline execution performance
 from typing import Dict, List, Any, Optional, Tuple
 import copy
 import logging
+from models.pipeline_ir import PipelineIR
 from models.optimization_metrics import (
     OptimizationMetricsRepository,
     PerformanceMetric,
@@ -13,19 +14,38 @@ from models.optimization_metrics import (
     OptimizationResult,
     OptimizationType
 )
+from models.job_durations import JobDurationStore, parse_timestamp, record_duration
 
 logger = logging.getLogger(__name__)
 
 class PerformanceProfilerService:
     """Service for profiling performance of CI/CD pipelines."""
     
-    def __init__(self, metrics_repository: Optional[OptimizationMetricsRepository] = None):
+    # Share of the pipeline's total job time above which a job is a bottleneck
+    LONG_RUNNING_SHARE = 0.3
+    
+    # Share of a job's time above which a single step is a bottleneck
+    SLOW_STEP_SHARE = 0.5
+    
+    # Queue time in seconds above which waiting for a runner is a bottleneck
+    QUEUE_TIME_THRESHOLD = 60.0
+    
+    # Number of historical samples needed before flagging duration regressions
+    MIN_HISTORY_SAMPLES = 5
+    
+    # Relative change below which a trend counts as stable
+    STABLE_TREND_THRESHOLD = 0.05
+    
+    def __init__(self, metrics_repository: Optional[OptimizationMetricsRepository] = None,
+                 duration_store: Optional[JobDurationStore] = None):
         """Initialize the performance profiler service."""
         self.metrics_repository = metrics_repository or OptimizationMetricsRepository()
+        self.duration_store = duration_store or JobDurationStore()
     
     def analyze_pipeline_performance(self, pipeline_id: str, platform: str,
                                    pipeline_config: Dict[str, Any],
-                                   execution_data: Dict[str, Any]) -> Dict[str, Any]:
+                                   execution_data: Dict[str, Any],
+                                   ir: Optional[PipelineIR] = None) -> Dict[str, Any]:
         """
         Analyze pipeline execution performance.
         
@@ -34,15 +54,19 @@ class PerformanceProfilerService:
             platform: The CI/CD platform
             pipeline_config: The pipeline configuration
             execution_data: Pipeline execution data
+            ir: Optional IR of the pipeline configuration, built if not given
             
         Returns:
             Analysis results with performance metrics and bottlenecks
         """
-        # Extract components from the pipeline configuration
-        components = self._extract_components(platform, pipeline_config)
+        # Extract components from the pipeline IR
+        ir = ir or PipelineIR.from_config(platform, pipeline_config)
+        components = ir.components
         
-        # Extract execution times
-        execution_times = self._extract_execution_times(platform, components, execution_data)
+        # Extract execution times, compared against history before this run joins it
+        execution_times = self._extract_execution_times(platform, components, execution_data, pipeline_id)
+        if execution_data.get("jobs"):
+            self.duration_store.ingest_runs([dict(execution_data, pipeline_id=pipeline_id)])
         
         # Extract resource usage
         resource_usage = self._extract_resource_usage(platform, components, execution_data)
@@ -120,7 +144,7 @@ class PerformanceProfilerService:
             "pipeline_id": pipeline_id,
             "platform": platform,
             "execution_summary": {
-                "total_time": sum(execution_times.get(component_id, {}).get("total", 0) for component_id in components),
+                "total_time": sum(times.get("total", 0) for times in execution_times.values()),
                 "component_count": len(components),
                 "bottleneck_count": len(bottlenecks)
             },
@@ -160,6 +184,14 @@ class PerformanceProfilerService:
         # Extract metrics over time
         metrics_over_time = self._extract_metrics_over_time(historical_results)
         
+        # Add job durations from the duration store
+        start_time, end_time = time_range if time_range else (None, None)
+        for sample in self.duration_store.query(pipeline_id, start=start_time, end=end_time):
+            metrics_over_time.setdefault(f"{sample['job_id']}.duration", []).append({
+                "timestamp": sample["timestamp"],
+                "value": sample["duration"]
+            })
+        
         # Calculate trends
         trends = self._calculate_trends(metrics_over_time)
         
@@ -172,16 +204,55 @@ class PerformanceProfilerService:
         }
     
     # Implementation of private methods would go here
-    def _extract_components(self, platform: str, pipeline_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract components from pipeline config."""
-        # Implementation would go here
-        return {}
-    
     def _extract_execution_times(self, platform: str, components: Dict[str, Any],
-                              execution_data: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
-        """Extract execution times from execution data."""
-        # Implementation would go here
-        return {}
+                              execution_data: Dict[str, Any],
+                              pipeline_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Extract execution times from execution data.
+        
+        Each job gets its total and queue time, step times and cache hit flag,
+        plus its historical p50 and p95 from the duration store.
+        """
+        jobs = execution_data.get("jobs", [])
+        if isinstance(jobs, dict):
+            jobs = [dict(job, id=job_id) for job_id, job in jobs.items()]
+        
+        execution_times = {}
+        for job in jobs:
+            job_id = str(job.get("id") or job.get("name"))
+            if components and job_id not in components:
+                continue
+            
+            total = record_duration(job)
+            if total is None:
+                continue
+            
+            queue_time = job.get("queue_time")
+            if queue_time is None and job.get("queued_at") is not None and job.get("started_at") is not None:
+                queue_time = parse_timestamp(job["started_at"]) - parse_timestamp(job["queued_at"])
+            
+            steps = {}
+            for step in job.get("steps", []):
+                step_duration = record_duration(step)
+                if step_duration is not None:
+                    steps[str(step.get("id") or step.get("name"))] = step_duration
+            
+            times = {
+                "total": total,
+                "queue": float(queue_time or 0.0),
+                "steps": steps,
+                "cache_hit": job.get("cache_hit")
+            }
+            
+            if pipeline_id is not None:
+                history = self.duration_store.get_statistics(pipeline_id, job_id)
+                times["historical_count"] = history["count"]
+                times["historical_p50"] = history["p50"]
+                times["historical_p95"] = history["p95"]
+            
+            execution_times[job_id] = times
+        
+        return execution_times
     
     def _extract_resource_usage(self, platform: str, components: Dict[str, Any],
                              execution_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
@@ -190,11 +261,72 @@ class PerformanceProfilerService:
         return {}
     
     def _identify_bottlenecks(self, platform: str, components: Dict[str, Any],
-                           execution_times: Dict[str, Dict[str, float]],
+                           execution_times: Dict[str, Dict[str, Any]],
                            resource_usage: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Identify performance bottlenecks."""
-        # Implementation would go here
-        return []
+        """
+        Identify performance bottlenecks.
+        
+        Flags jobs taking a large share of the run, jobs slower than their
+        historical p95, long queue times, dominant steps and cache misses.
+        Bottlenecks are ordered by the time they cost, largest first.
+        """
+        bottlenecks = []
+        total_time = sum(times["total"] for times in execution_times.values())
+        
+        for job_id, times in execution_times.items():
+            total = times["total"]
+            
+            share = total / total_time if total_time else 0.0
+            if len(execution_times) > 1 and share >= self.LONG_RUNNING_SHARE:
+                bottlenecks.append({
+                    "component_id": job_id,
+                    "type": "long_running_job",
+                    "severity": "high" if share >= 2 * self.LONG_RUNNING_SHARE else "medium",
+                    "impact_seconds": total,
+                    "details": {"duration": total, "share": share}
+                })
+            
+            p95 = times.get("historical_p95", 0.0)
+            if times.get("historical_count", 0) >= self.MIN_HISTORY_SAMPLES and total > p95:
+                bottlenecks.append({
+                    "component_id": job_id,
+                    "type": "duration_regression",
+                    "severity": "high" if total > 1.5 * p95 else "medium",
+                    "impact_seconds": total - times["historical_p50"],
+                    "details": {"duration": total, "historical_p50": times["historical_p50"], "historical_p95": p95}
+                })
+            
+            if times["queue"] >= self.QUEUE_TIME_THRESHOLD:
+                bottlenecks.append({
+                    "component_id": job_id,
+                    "type": "queue_time",
+                    "severity": "high" if times["queue"] >= total else "medium",
+                    "impact_seconds": times["queue"],
+                    "details": {"queue_time": times["queue"]}
+                })
+            
+            if times["steps"] and total > 0:
+                step_id, step_duration = max(times["steps"].items(), key=lambda item: item[1])
+                if len(times["steps"]) > 1 and step_duration / total >= self.SLOW_STEP_SHARE:
+                    bottlenecks.append({
+                        "component_id": job_id,
+                        "type": "slow_step",
+                        "severity": "medium",
+                        "impact_seconds": step_duration,
+                        "details": {"step": step_id, "duration": step_duration, "share": step_duration / total}
+                    })
+            
+            if times.get("cache_hit") is False:
+                bottlenecks.append({
+                    "component_id": job_id,
+                    "type": "cache_miss",
+                    "severity": "low",
+                    "impact_seconds": max(0.0, total - times.get("historical_p50", total)),
+                    "details": {"duration": total}
+                })
+        
+        bottlenecks.sort(key=lambda bottleneck: bottleneck["impact_seconds"], reverse=True)
+        return bottlenecks
     
     def _calculate_performance_metrics(self, pipeline_id: str, platform: str,
                                     components: Dict[str, Any],
@@ -220,10 +352,55 @@ class PerformanceProfilerService:
     
     def _extract_metrics_over_time(self, historical_results: List[OptimizationResult]) -> Dict[str, List[Dict[str, Any]]]:
         """Extract metrics over time from historical results."""
-        # Implementation would go here
-        return {}
+        metrics_over_time = {}
+        for result in historical_results:
+            for metric in result.metrics_before:
+                metrics_over_time.setdefault(metric.name, []).append({
+                    "timestamp": result.timestamp,
+                    "value": metric.value
+                })
+        return metrics_over_time
     
     def _calculate_trends(self, metrics_over_time: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
-        """Calculate trends from metrics over time."""
-        # Implementation would go here
-        return {}
+        """
+        Calculate trends from metrics over time.
+        
+        Each metric gets the least-squares slope of its values per day, its
+        relative change over the period and a direction.
+        """
+        trends = {}
+        for name, points in metrics_over_time.items():
+            if len(points) < 2:
+                continue
+            
+            series = sorted((parse_timestamp(point["timestamp"]), point["value"]) for point in points)
+            days = [(timestamp - series[0][0]) / 86400.0 for timestamp, _ in series]
+            values = [value for _, value in series]
+            
+            mean_day = sum(days) / len(days)
+            mean_value = sum(values) / len(values)
+            variance = sum((day - mean_day) ** 2 for day in days)
+            slope = 0.0
+            if variance > 0:
+                slope = sum((day - mean_day) * (value - mean_value) for day, value in zip(days, values)) / variance
+            
+            # Change over the period along the fitted line, relative to the mean
+            change = slope * (days[-1] - days[0])
+            relative_change = change / mean_value if mean_value else 0.0
+            
+            direction = "stable"
+            if relative_change > self.STABLE_TREND_THRESHOLD:
+                direction = "increasing"
+            elif relative_change < -self.STABLE_TREND_THRESHOLD:
+                direction = "decreasing"
+            
+            trends[name] = {
+                "direction": direction,
+                "slope_per_day": slope,
+                "change_percentage": relative_change * 100,
+                "first": values[0],
+                "last": values[-1],
+                "count": len(values)
+            }
+        
+        return trends
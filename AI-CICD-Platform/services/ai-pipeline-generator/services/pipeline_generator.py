@@ -1,9 +1,9 @@
-from typing import Dict, Optional, List, Any, Tuple
+from typing import Dict, Optional, List, Any, Tuple, AsyncIterator
 import yaml
 import json
 import sys
 import os
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 # Add the parent directory to sys.path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -13,15 +13,20 @@ from services.platform_templates import (
     get_platform_guide, 
     get_available_templates, 
     get_template_variables, 
-    apply_template
+    apply_template,
+    load_template_config
 )
 from services.pipeline_optimizer import PipelineOptimizerService
+from services.generation_cache import GenerationCache, GenerationEntry, normalize_text, content_key
+from services.yaml_stream_validator import IncrementalYAMLValidator
+from services.yaml_loader import load_yaml, dump_yaml
 
 class PipelineGeneratorService:
-    def __init__(self):
+    def __init__(self, generation_cache: Optional[GenerationCache] = None):
         self.settings = get_settings()
-        self.client = OpenAI(api_key=self.settings.openai_api_key)
+        self.client = AsyncOpenAI(api_key=self.settings.OPENAI_API_KEY)
         self.optimizer = PipelineOptimizerService()
+        self.generation_cache = generation_cache or GenerationCache()
 
     async def generate_pipeline(
         self,
@@ -46,8 +51,8 @@ class PipelineGeneratorService:
         Returns:
             Dict containing the generated pipeline configuration and metadata
         """
-        if platform not in self.settings.supported_platforms:
-            raise ValueError(f"Unsupported platform: {platform}. Supported platforms: {', '.join(self.settings.supported_platforms)}")
+        if platform not in self.settings.SUPPORTED_PLATFORMS:
+            raise ValueError(f"Unsupported platform: {platform}. Supported platforms: {', '.join(self.settings.SUPPORTED_PLATFORMS)}")
 
         template_vars = template_vars or {}
         
@@ -89,10 +94,8 @@ class PipelineGeneratorService:
         
         # For YAML-based platforms, parse the YAML
         if platform != "jenkins":  # Jenkins uses Groovy, not YAML
-            try:
-                pipeline_config = yaml.safe_load(pipeline_content)
-            except yaml.YAMLError as e:
-                raise ValueError(f"Invalid YAML in template: {str(e)}")
+            # Rendered and parsed once per set of variables
+            pipeline_config = load_template_config(platform, template_name, variables)
         else:
             # For Jenkins, store as string
             pipeline_config = {"jenkinsfile": pipeline_content}
@@ -137,6 +140,138 @@ class PipelineGeneratorService:
         Returns:
             Dict containing the generated pipeline configuration and metadata
         """
+        messages, cache_key, context_key, description = self._build_generation_request(description, platform, template_vars)
+
+        try:
+            entry, cache_status = await self.generation_cache.get_or_generate(
+                cache_key,
+                lambda: self._request_generation(messages, platform),
+                context_key=context_key,
+                text=description
+            )
+
+            result = self._build_ai_result(entry, platform, cache_status)
+            
+            # Apply optimizations if requested
+            if optimize:
+                result = await self.optimize_pipeline(result, optimizations)
+                
+            return result
+
+        except Exception as e:
+            raise Exception(f"Pipeline generation failed: {str(e)}")
+
+    async def stream_pipeline(
+        self,
+        description: str,
+        platform: str = "github-actions",
+        template_vars: Optional[Dict] = None,
+        optimize: bool = False,
+        optimizations: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a pipeline configuration using OpenAI's GPT model, streaming the output.
+        
+        Tokens are forwarded as they arrive. For YAML-based platforms the output is
+        validated whenever a document or section (such as a job) is complete, and the
+        upstream request is cancelled as soon as the output is invalid.
+        
+        Args:
+            description (str): Natural language description of the desired pipeline
+            platform (str): Target CI/CD platform (github-actions, gitlab-ci, etc.)
+            template_vars (Dict, optional): Additional variables for pipeline customization
+            optimize (bool, optional): Whether to optimize the generated pipeline
+            optimizations (List[str], optional): Specific optimizations to apply
+            
+        Yields:
+            Dict with an "event" ("token", "section", "complete" or "error") and its "data"
+        """
+        if platform not in self.settings.SUPPORTED_PLATFORMS:
+            raise ValueError(f"Unsupported platform: {platform}. Supported platforms: {', '.join(self.settings.SUPPORTED_PLATFORMS)}")
+
+        template_vars = template_vars or {}
+        messages, cache_key, context_key, description = self._build_generation_request(description, platform, template_vars)
+
+        entry = self.generation_cache.get(cache_key)
+        cache_status = "hit"
+        if entry is not None:
+            yield {"event": "token", "data": {"content": entry.raw_content}}
+        else:
+            cache_status = "miss"
+            validator = IncrementalYAMLValidator() if platform != "jenkins" else None  # Jenkins uses Groovy, not YAML
+            content = []
+            tokens_used = 0
+
+            stream = await self.client.chat.completions.create(
+                model=self.settings.OPENAI_MODEL,
+                messages=messages,
+                temperature=self.settings.OPENAI_TEMPERATURE,
+                max_tokens=self.settings.OPENAI_MAX_TOKENS,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            try:
+                async for chunk in stream:
+                    # The last chunk carries the usage and no choices
+                    if chunk.usage:
+                        tokens_used = chunk.usage.total_tokens
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+
+                    delta = chunk.choices[0].delta.content
+                    content.append(delta)
+                    yield {"event": "token", "data": {"content": delta}}
+
+                    if validator:
+                        for path in validator.feed(delta):
+                            yield {"event": "section", "data": {"path": path}}
+
+                if validator:
+                    for path in validator.finish():
+                        yield {"event": "section", "data": {"path": path}}
+            except ValueError as e:
+                yield {"event": "error", "data": {"message": f"Generated invalid YAML for {platform}: {str(e)}"}}
+                return
+            finally:
+                # Stops the upstream generation if we return early or the client goes away
+                await stream.close()
+
+            try:
+                entry = self._parse_generation("".join(content), platform, tokens_used)
+            except ValueError as e:
+                yield {"event": "error", "data": {"message": str(e)}}
+                return
+
+            self.generation_cache.put(cache_key, entry, context_key, description)
+
+        result = self._build_ai_result(entry, platform, cache_status)
+        if optimize:
+            result = await self.optimize_pipeline(result, optimizations)
+
+        yield {"event": "complete", "data": result}
+
+    def _build_generation_request(
+        self,
+        description: str,
+        platform: str,
+        template_vars: Dict
+    ) -> Tuple[List[Dict[str, str]], str, str, str]:
+        """
+        Build the messages and cache keys of an AI generation request.
+        
+        Args:
+            description (str): Natural language description of the desired pipeline
+            platform (str): Target CI/CD platform
+            template_vars (Dict): Additional variables for pipeline customization
+            
+        Returns:
+            Tuple of the messages, the cache key, the cache key without the description,
+            and the normalized description
+        """
+        # Collapse whitespace so formatting-only differences share a cache entry
+        description = normalize_text(description)
+
         # Get platform-specific guidance
         platform_guide = get_platform_guide(platform)
         
@@ -149,7 +284,7 @@ class PipelineGeneratorService:
 {PIPELINE_USER_PROMPT.format(
     platform=platform,
     description=description,
-    template_vars=json.dumps(template_vars, indent=2)
+    template_vars=json.dumps(template_vars, indent=2, sort_keys=True)
 )}
 
 Platform-specific syntax guide:
@@ -168,51 +303,104 @@ Platform-specific security recommendations:
             {"role": "user", "content": enhanced_user_prompt}
         ]
 
-        try:
-            # Generate pipeline using OpenAI
-            response = await self.client.chat.completions.create(
-                model=self.settings.openai_model,
-                messages=messages,
-                temperature=self.settings.temperature,
-                max_tokens=self.settings.max_tokens
-            )
+        # Everything that determines the output is part of the cache key
+        model_settings = {
+            "platform": platform,
+            "model": self.settings.OPENAI_MODEL,
+            "temperature": self.settings.OPENAI_TEMPERATURE,
+            "max_tokens": self.settings.OPENAI_MAX_TOKENS
+        }
+        cache_key = content_key({**model_settings, "messages": messages})
+        context_key = content_key({
+            **model_settings,
+            "template_vars": template_vars,
+            "prompts": [PIPELINE_SYSTEM_PROMPT, PIPELINE_USER_PROMPT]
+        })
+
+        return messages, cache_key, context_key, description
+
+    async def _request_generation(self, messages: List[Dict[str, str]], platform: str) -> GenerationEntry:
+        """
+        Request a pipeline from OpenAI and parse it.
+        
+        Args:
+            messages (List[Dict[str, str]]): Conversation messages to send
+            platform (str): Target CI/CD platform
+            
+        Returns:
+            GenerationEntry: Extracted content, parsed configuration and tokens used
+        """
+        # Generate pipeline using OpenAI
+        response = await self.client.chat.completions.create(
+            model=self.settings.OPENAI_MODEL,
+            messages=messages,
+            temperature=self.settings.OPENAI_TEMPERATURE,
+            max_tokens=self.settings.OPENAI_MAX_TOKENS
+        )
 
-            # Extract the generated content
-            generated_content = response.choices[0].message.content
-
-            # For YAML-based platforms, validate the YAML
-            if platform != "jenkins":  # Jenkins uses Groovy, not YAML
-                try:
-                    # Extract YAML content (in case there's additional text)
-                    yaml_content = self._extract_yaml_or_code_block(generated_content)
-                    pipeline_config = yaml.safe_load(yaml_content)
-                except yaml.YAMLError as e:
-                    raise ValueError(f"Generated invalid YAML for {platform}: {str(e)}")
-            else:
-                # For Jenkins, just extract the code block but don't validate as YAML
+        # Extract the generated content
+        return self._parse_generation(response.choices[0].message.content, platform, response.usage.total_tokens)
+
+    def _parse_generation(self, generated_content: str, platform: str, tokens_used: int) -> GenerationEntry:
+        """
+        Extract and parse generated pipeline content.
+        
+        Args:
+            generated_content (str): Content generated by the model
+            platform (str): Target CI/CD platform
+            tokens_used (int): Tokens the generation consumed
+            
+        Returns:
+            GenerationEntry: Extracted content, parsed configuration and tokens used
+        """
+        # For YAML-based platforms, validate the YAML
+        if platform != "jenkins":  # Jenkins uses Groovy, not YAML
+            try:
+                # Extract YAML content (in case there's additional text)
                 yaml_content = self._extract_yaml_or_code_block(generated_content)
-                pipeline_config = {"jenkinsfile": yaml_content}  # Store as string
-
-            result = {
-                "status": "success",
-                "platform": platform,
-                "pipeline_config": pipeline_config,
-                "raw_content": yaml_content,
-                "metadata": {
-                    "source": "ai",
-                    "model": self.settings.openai_model,
-                    "tokens_used": response.usage.total_tokens
-                }
-            }
+                pipeline_config = load_yaml(yaml_content)
+            except yaml.YAMLError as e:
+                raise ValueError(f"Generated invalid YAML for {platform}: {str(e)}")
+        else:
+            # For Jenkins, just extract the code block but don't validate as YAML
+            yaml_content = self._extract_yaml_or_code_block(generated_content)
+            pipeline_config = {"jenkinsfile": yaml_content}  # Store as string
+
+        return GenerationEntry(yaml_content, pipeline_config, tokens_used)
+
+    def _build_ai_result(self, entry: GenerationEntry, platform: str, cache_status: str) -> Dict:
+        """
+        Build the result of an AI generation.
+        
+        Args:
+            entry (GenerationEntry): The generation
+            platform (str): Target CI/CD platform
+            cache_status (str): How the generation was obtained from the cache
             
-            # Apply optimizations if requested
-            if optimize:
-                result = await self.optimize_pipeline(result, optimizations)
-                
-            return result
+        Returns:
+            Dict containing the generated pipeline configuration and metadata
+        """
+        return {
+            "status": "success",
+            "platform": platform,
+            "pipeline_config": entry.pipeline_config,
+            "raw_content": entry.raw_content,
+            "metadata": {
+                "source": "ai",
+                "model": self.settings.OPENAI_MODEL,
+                "tokens_used": entry.tokens_used if cache_status == "miss" else 0,
+                "cache": cache_status
+            }
+        }
 
-        except Exception as e:
-            raise Exception(f"Pipeline generation failed: {str(e)}")
+    def get_cache_metrics(self) -> Dict[str, Any]:
+        """
+        Get metrics of the generation cache.
+        
+        Returns:
+            Dict[str, Any]: Hit, miss, coalescing and eviction counts, tokens saved and hit rate
+        """
+        return self.generation_cache.get_metrics()
             
     def _extract_yaml_or_code_block(self, content: str) -> str:
         """
@@ -252,7 +440,7 @@ Platform-specific security recommendations:
             bool: True if valid, raises exception if invalid
         """
         try:
-            yaml.safe_load(yaml_content)
+            load_yaml(yaml_content)
             return True
         except yaml.YAMLError as e:
             raise ValueError(f"Invalid YAML syntax: {str(e)}")
@@ -264,7 +452,7 @@ Platform-specific security recommendations:
         Returns:
             List of platform names
         """
-        return self.settings.supported_platforms
+        return self.settings.SUPPORTED_PLATFORMS
     
     def get_available_templates(self, platform: str) -> Dict[str, Dict[str, str]]:
         """
@@ -320,7 +508,7 @@ Platform-specific security recommendations:
         # Convert optimized config back to YAML for raw_content
         if platform != "jenkins":  # Jenkins uses Groovy, not YAML
             try:
-                optimized_content = yaml.dump(optimized_config, default_flow_style=False)
+                optimized_content = dump_yaml(optimized_config, default_flow_style=False)
                 pipeline_result["raw_content"] = optimized_content
             except yaml.YAMLError as e:
                 # If YAML conversion fails, keep the original raw_content
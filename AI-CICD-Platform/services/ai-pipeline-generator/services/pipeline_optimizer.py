@@ -11,6 +11,9 @@ from services.performance_profiler import PerformanceProfilerService
 from services.parallel_execution_optimizer import ParallelExecutionOptimizerService
 from services.resource_optimizer import ResourceOptimizerService
 from services.cache_optimizer import CacheOptimizerService
+from services.optimization_passes import OptimizationPass, PassManager
+from models.pipeline_ir import PipelineIR
+from models.job_durations import JobDurationStore
 from models.optimization_metrics import (
     OptimizationMetricsRepository,
     StructureMetric,
@@ -24,17 +27,56 @@ logger = logging.getLogger(__name__)
 class PipelineOptimizerService:
     """Service for optimizing CI/CD pipeline structures."""
     
-    def __init__(self, metrics_repository: Optional[OptimizationMetricsRepository] = None):
+    def __init__(self, metrics_repository: Optional[OptimizationMetricsRepository] = None,
+                 duration_store: Optional[JobDurationStore] = None):
         """Initialize the pipeline optimizer service."""
         self.metrics_repository = metrics_repository or OptimizationMetricsRepository()
-        self.performance_profiler = PerformanceProfilerService(self.metrics_repository)
+        self.performance_profiler = PerformanceProfilerService(self.metrics_repository, duration_store)
         self.parallel_execution_optimizer = ParallelExecutionOptimizerService(self.metrics_repository)
         self.resource_optimizer = ResourceOptimizerService(self.metrics_repository)
         self.cache_optimizer = CacheOptimizerService(self.metrics_repository)
+        
+        # Every optimizer runs as a pass over the same pipeline IR
+        self.pass_manager = PassManager([
+            OptimizationPass(
+                "structure",
+                lambda pipeline_id, ir, data: self._analyze_pipeline_structure(pipeline_id, ir.platform, ir.components),
+                self._apply_structure_optimizations
+            ),
+            OptimizationPass(
+                "performance",
+                lambda pipeline_id, ir, data: self.performance_profiler.analyze_pipeline_performance(
+                    pipeline_id, ir.platform, ir.config, data, ir=ir
+                ),
+                requires_execution_data=True
+            ),
+            OptimizationPass(
+                "parallelization",
+                lambda pipeline_id, ir, data: self.parallel_execution_optimizer.analyze_parallelization_opportunities(
+                    pipeline_id, ir.platform, ir.config, data, ir=ir
+                ),
+                self.parallel_execution_optimizer._apply_parallelization_optimizations
+            ),
+            OptimizationPass(
+                "resource",
+                lambda pipeline_id, ir, data: self.resource_optimizer.analyze_resource_usage(
+                    pipeline_id, ir.platform, ir.config, data, ir=ir
+                ),
+                self.resource_optimizer._apply_resource_optimizations
+            ),
+            OptimizationPass(
+                "caching",
+                lambda pipeline_id, ir, data: self.cache_optimizer.analyze_caching_strategies(
+                    pipeline_id, ir.platform, ir.config, data, ir=ir
+                ),
+                self.cache_optimizer._apply_caching_optimizations
+            )
+        ], self.metrics_repository)
     
     def analyze_pipeline(self, pipeline_id: str, platform: str,
                        pipeline_config: Dict[str, Any],
-                       execution_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                       execution_data: Optional[Dict[str, Any]] = None,
+                       ir: Optional[PipelineIR] = None) -> Dict[str, Any]:
         """
         Analyze a pipeline configuration and identify optimization opportunities.
         
@@ -43,65 +85,40 @@ class PipelineOptimizerService:
             platform: The CI/CD platform
             pipeline_config: The pipeline configuration
             execution_data: Optional pipeline execution data
+            ir: Optional IR of the pipeline configuration, built if not given
             
         Returns:
             Analysis results with optimization opportunities
         """
-        # Extract components from the pipeline configuration
-        components = self._extract_components(platform, pipeline_config)
-        
-        # Analyze pipeline structure
-        structure_analysis = self._analyze_pipeline_structure(
-            pipeline_id, platform, components
-        )
+        # Parse the pipeline configuration once for all passes
+        ir = ir or PipelineIR.from_config(platform, pipeline_config)
         
-        # Analyze performance if execution data is available
-        performance_analysis = {}
-        if execution_data:
-            performance_analysis = self.performance_profiler.analyze_pipeline_performance(
-                pipeline_id, platform, pipeline_config, execution_data
+        # Run all analyses, saving their results in one write
+        with self.metrics_repository.batch():
+            analyses = self.pass_manager.analyze(pipeline_id, ir, execution_data)
+            
+            # Combine all analyses
+            combined_analysis = {
+                "pipeline_id": pipeline_id,
+                "platform": platform,
+                "components": ir.components
+            }
+            for name, analysis in analyses.items():
+                combined_analysis[f"{name}_analysis"] = analysis
+            
+            # Create optimization result
+            result = OptimizationResult(
+                pipeline_id=pipeline_id,
+                platform=platform,
+                optimization_type=OptimizationType.STRUCTURE,
+                metrics_before=combined_analysis["structure_analysis"].get("metrics", []),
+                metrics_after=[],  # Will be populated after optimization
+                improvement_percentage=0,  # Will be calculated after optimization
+                details=combined_analysis
             )
-        
-        # Analyze parallelization opportunities
-        parallelization_analysis = self.parallel_execution_optimizer.analyze_parallelization_opportunities(
-            pipeline_id, platform, pipeline_config, execution_data
-        )
-        
-        # Analyze resource usage
-        resource_analysis = self.resource_optimizer.analyze_resource_usage(
-            pipeline_id, platform, pipeline_config, execution_data
-        )
-        
-        # Analyze caching strategies
-        caching_analysis = self.cache_optimizer.analyze_caching_strategies(
-            pipeline_id, platform, pipeline_config, execution_data
-        )
-        
-        # Combine all analyses
-        combined_analysis = {
-            "pipeline_id": pipeline_id,
-            "platform": platform,
-            "components": components,
-            "structure_analysis": structure_analysis,
-            "performance_analysis": performance_analysis,
-            "parallelization_analysis": parallelization_analysis,
-            "resource_analysis": resource_analysis,
-            "caching_analysis": caching_analysis
-        }
-        
-        # Create optimization result
-        result = OptimizationResult(
-            pipeline_id=pipeline_id,
-            platform=platform,
-            optimization_type=OptimizationType.STRUCTURE,
-            metrics_before=structure_analysis.get("metrics", []),
-            metrics_after=[],  # Will be populated after optimization
-            improvement_percentage=0,  # Will be calculated after optimization
-            details=combined_analysis
-        )
-        
-        # Save the result
-        self.metrics_repository.save_optimization_result(result)
+            
+            # Save the result
+            self.metrics_repository.save_optimization_result(result)
         
         return combined_analysis
     
@@ -122,38 +139,23 @@ class PipelineOptimizerService:
             - The optimized pipeline configuration
             - Optimization details
         """
-        # Create a deep copy of the pipeline config to avoid modifying the original
-        optimized_config = copy.deepcopy(pipeline_config)
-        
         # Analyze the pipeline
         analysis = self.analyze_pipeline(pipeline_id, platform, pipeline_config, execution_data)
         
-        # Apply structure optimizations
-        optimized_config, structure_optimizations = self._apply_structure_optimizations(
-            platform, optimized_config, analysis["structure_analysis"]
-        )
-        
-        # Apply parallelization optimizations
-        optimized_config, parallelization_optimizations = self.parallel_execution_optimizer._apply_parallelization_optimizations(
-            platform, optimized_config, analysis["parallelization_analysis"]
-        )
-        
-        # Apply resource optimizations
-        optimized_config, resource_optimizations = self.resource_optimizer._apply_resource_optimizations(
-            platform, optimized_config, analysis["resource_analysis"]
-        )
-        
-        # Apply caching optimizations
-        optimized_config, caching_optimizations = self.cache_optimizer._apply_caching_optimizations(
-            platform, optimized_config, analysis["caching_analysis"]
+        # Apply the optimizations of every pass to a single copy of the pipeline config
+        optimized_config, applied = self.pass_manager.apply(
+            platform,
+            copy.deepcopy(pipeline_config),
+            {
+                optimization_pass.name: analysis.get(f"{optimization_pass.name}_analysis", {})
+                for optimization_pass in self.pass_manager.passes
+            }
         )
         
         # Combine all optimizations
         applied_optimizations = {
-            "structure_optimizations": structure_optimizations,
-            "parallelization_optimizations": parallelization_optimizations,
-            "resource_optimizations": resource_optimizations,
-            "caching_optimizations": caching_optimizations
+            f"{name}_optimizations": optimizations
+            for name, optimizations in applied.items()
         }
         
         # Calculate improvement metrics
@@ -184,73 +186,6 @@ class PipelineOptimizerService:
             "improvement_metrics": [metric.to_dict() for metric in improvement_metrics]
         }
     
-    def _extract_components(self, platform: str, pipeline_config: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Extract components from a pipeline configuration.
-        
-        Args:
-            platform: The CI/CD platform
-            pipeline_config: The pipeline configuration
-            
-        Returns:
-            Dictionary of component IDs to component configurations
-        """
-        components = {}
-        
-        if platform == "github-actions":
-            # Extract jobs from GitHub Actions workflow
-            jobs = pipeline_config.get("jobs", {})
-            
-            for job_id, job_config in jobs.items():
-                components[job_id] = {
-                    "id": job_id,
-                    "type": "job",
-                    "config": job_config,
-                    "steps": job_config.get("steps", [])
-                }
-        
-        elif platform == "gitlab-ci":
-            # Extract jobs from GitLab CI pipeline
-            for job_id, job_config in pipeline_config.items():
-                if isinstance(job_config, dict) and "stage" in job_config:
-                    components[job_id] = {
-                        "id": job_id,
-                        "type": "job",
-                        "config": job_config,
-                        "stage": job_config.get("stage"),
-                        "script": job_config.get("script", [])
-                    }
-        
-        elif platform == "circle-ci":
-            # Extract jobs from CircleCI config
-            jobs = pipeline_config.get("jobs", {})
-            
-            for job_id, job_config in jobs.items():
-                components[job_id] = {
-                    "id": job_id,
-                    "type": "job",
-                    "config": job_config,
-                    "steps": job_config.get("steps", [])
-                }
-        
-        elif platform == "jenkins":
-            # Extract stages from Jenkins pipeline
-            stages = pipeline_config.get("stages", [])
-            
-            for i, stage in enumerate(stages):
-                if "name" in stage:
-                    stage_id = stage["name"]
-                    
-                    components[stage_id] = {
-                        "id": stage_id,
-                        "type": "stage",
-                        "config": stage,
-                        "steps": stage.get("steps", []),
-                        "stage_index": i
-                    }
-        
-        return components
-    
     def _analyze_pipeline_structure(self, pipeline_id: str, platform: str,
                                  components: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -590,7 +525,7 @@ class PipelineOptimizerService:
         
         Args:
             platform: The CI/CD platform
-            pipeline_config: The pipeline configuration
+            pipeline_config: Copy of the pipeline configuration, which is modified
             structure_analysis: Structure analysis results
             
         Returns:
@@ -598,7 +533,7 @@ class PipelineOptimizerService:
             - The optimized pipeline configuration
             - List of applied optimizations
         """
-        optimized_config = copy.deepcopy(pipeline_config)
+        optimized_config = pipeline_config
         applied_optimizations = []
         
         if platform == "github-actions":
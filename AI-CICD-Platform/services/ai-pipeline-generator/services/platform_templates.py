@@ -4,8 +4,20 @@ This module provides specialized templates and guidance for each supported CI/CD
 It also includes customizable templates for common CI/CD workflows.
 """
 
-from typing import Dict, List, Optional, Any
+import re
 import copy
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
+
+import yaml
+
+from services.yaml_loader import load_yaml
+
+# A {{variable}} placeholder in a template
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}]+)\}\}")
+
+# Number of rendered templates and parsed configurations to keep
+TEMPLATE_CACHE_SIZE = 256
 
 # Platform-specific syntax guides
 PLATFORM_SYNTAX_GUIDES = {
@@ -570,6 +582,82 @@ def get_available_templates(platform: str) -> Dict[str, Dict[str, str]]:
         for name, template in platform_templates.items()
     }
 
+class CompiledTemplate:
+    """
+    A pipeline template split once into literal text and placeholders.
+    """
+
+    def __init__(self, content: str, defaults: Dict[str, Any]):
+        """
+        Compile a template.
+
+        Args:
+            content (str): Template text with {{variable}} placeholders
+            defaults (Dict[str, Any]): Default values of the template's variables
+        """
+        # Literal text at even indices, placeholder names at odd indices
+        self.parts = PLACEHOLDER_PATTERN.split(content)
+        self.placeholders = tuple(dict.fromkeys(self.parts[1::2]))
+        self.defaults = defaults
+
+    def render_key(self, variables: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        """
+        Get the values a rendering depends on.
+
+        Args:
+            variables (Dict[str, Any]): Variables overriding the defaults
+
+        Returns:
+            Tuple of (placeholder, value) pairs for the placeholders that have a value
+        """
+        key = []
+        for name in self.placeholders:
+            if name in variables:
+                key.append((name, str(variables[name])))
+            elif name in self.defaults:
+                key.append((name, str(self.defaults[name])))
+        return tuple(key)
+
+    def render(self, values: Dict[str, str]) -> str:
+        """
+        Render the template.
+
+        Args:
+            values (Dict[str, str]): Placeholder values; placeholders without one are kept as is
+
+        Returns:
+            The rendered template
+        """
+        rendered = list(self.parts)
+        for i in range(1, len(rendered), 2):
+            name = rendered[i]
+            rendered[i] = values[name] if name in values else f"{{{{{name}}}}}"
+        return "".join(rendered)
+
+# Templates compiled on first use, by platform and template name
+_compiled_templates: Dict[Tuple[str, str], CompiledTemplate] = {}
+
+def get_compiled_template(platform: str, template_name: str) -> Optional[CompiledTemplate]:
+    """
+    Get a template compiled for rendering, compiling it on first use.
+    
+    Args:
+        platform (str): The CI/CD platform name
+        template_name (str): The template name
+        
+    Returns:
+        The compiled template, or None if template not found
+    """
+    compiled = _compiled_templates.get((platform, template_name))
+    if compiled is None:
+        template = PIPELINE_TEMPLATES.get(platform, {}).get(template_name)
+        if not template:
+            return None
+
+        compiled = CompiledTemplate(template.get("template", ""), template.get("variables", {}))
+        _compiled_templates[(platform, template_name)] = compiled
+    return compiled
+
 def get_template_variables(platform: str, template_name: str) -> Dict[str, str]:
     """
     Get the customizable variables for a specific template.
@@ -581,9 +669,8 @@ def get_template_variables(platform: str, template_name: str) -> Dict[str, str]:
     Returns:
         Dict of variable names and their default values
     """
-    platform_templates = PIPELINE_TEMPLATES.get(platform, {})
-    template = platform_templates.get(template_name, {})
-    return template.get("variables", {})
+    compiled = get_compiled_template(platform, template_name)
+    return compiled.defaults if compiled else {}
 
 def apply_template(platform: str, template_name: str, variables: Dict[str, Any]) -> Optional[str]:
     """
@@ -597,24 +684,43 @@ def apply_template(platform: str, template_name: str, variables: Dict[str, Any])
     Returns:
         String containing the customized pipeline configuration, or None if template not found
     """
-    platform_templates = PIPELINE_TEMPLATES.get(platform, {})
-    template = platform_templates.get(template_name, {})
-    
-    if not template:
+    compiled = get_compiled_template(platform, template_name)
+    if not compiled:
         return None
+
+    return _render_template(platform, template_name, compiled.render_key(variables))
+
+def load_template_config(platform: str, template_name: str, variables: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Apply variables to a YAML template and parse the result.
     
-    # Get template content
-    template_content = template.get("template", "")
-    
-    # Get default variables
-    default_vars = template.get("variables", {})
-    
-    # Merge provided variables with defaults
-    merged_vars = {**default_vars, **variables}
-    
-    # Apply variables to template
-    for var_name, var_value in merged_vars.items():
-        placeholder = f"{{{{{var_name}}}}}"
-        template_content = template_content.replace(placeholder, str(var_value))
-    
-    return template_content
+    Args:
+        platform (str): The CI/CD platform name
+        template_name (str): The template name
+        variables (Dict[str, Any]): The variables to apply to the template
+        
+    Returns:
+        The parsed pipeline configuration, which the caller may modify, or None if template not found
+        
+    Raises:
+        ValueError: If the rendered template is not valid YAML
+    """
+    compiled = get_compiled_template(platform, template_name)
+    if not compiled:
+        return None
+
+    try:
+        config = _parse_template(platform, template_name, compiled.render_key(variables))
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML in template: {str(e)}")
+    return copy.deepcopy(config)
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _render_template(platform: str, template_name: str, values: Tuple[Tuple[str, str], ...]) -> str:
+    """Render a template, cached by the values it depends on."""
+    return _compiled_templates[(platform, template_name)].render(dict(values))
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _parse_template(platform: str, template_name: str, values: Tuple[Tuple[str, str], ...]) -> Any:
+    """Render and parse a template, cached by the values it depends on."""
+    return load_yaml(_render_template(platform, template_name, values))
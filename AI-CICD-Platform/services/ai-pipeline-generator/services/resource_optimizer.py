@@ -6,6 +6,7 @@ This module provides tools to optimize resource usage in pipeline jobs.
 from typing import Dict, List, Any, Optional, Tuple
 import copy
 import logging
+from models.pipeline_ir import PipelineIR
 from models.optimization_metrics import (
     OptimizationMetricsRepository,
     ResourceMetric,
@@ -25,7 +26,8 @@ class ResourceOptimizerService:
     
     def analyze_resource_usage(self, pipeline_id: str, platform: str,
                              pipeline_config: Dict[str, Any],
-                             historical_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                             historical_data: Optional[Dict[str, Any]] = None,
+                             ir: Optional[PipelineIR] = None) -> Dict[str, Any]:
         """
         Analyze resource usage in a pipeline configuration.
         
@@ -34,15 +36,17 @@ class ResourceOptimizerService:
             platform: The CI/CD platform
             pipeline_config: The pipeline configuration
             historical_data: Optional historical execution data
+            ir: Optional IR of the pipeline configuration, built if not given
             
         Returns:
             Analysis results with resource usage optimization opportunities
         """
-        # Extract components from the pipeline configuration
-        components = self._extract_components(platform, pipeline_config)
+        # Extract components from the pipeline IR
+        ir = ir or PipelineIR.from_config(platform, pipeline_config)
+        components = ir.components
         
         # Extract resource requirements
-        resource_requirements = self._extract_resource_requirements(platform, components)
+        resource_requirements = self._extract_resource_requirements(platform, ir)
         
         # Extract resource usage
         resource_usage = self._extract_resource_usage(platform, components, historical_data)
@@ -131,15 +135,9 @@ class ResourceOptimizerService:
         }
     
     # Implementation of private methods would go here
-    def _extract_components(self, platform: str, pipeline_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract components from pipeline config."""
-        # Implementation would go here
-        return {}
-    
-    def _extract_resource_requirements(self, platform: str, components: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
-        """Extract resource requirements from components."""
-        # Implementation would go here
-        return {}
+    def _extract_resource_requirements(self, platform: str, ir: PipelineIR) -> Dict[str, Dict[str, Any]]:
+        """Extract the declared resource requirements of each job."""
+        return {job_id: dict(job.resources) for job_id, job in ir.jobs.items()}
     
     def _extract_resource_usage(self, platform: str, components: Dict[str, Any],
                              historical_data: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
@@ -0,0 +1,41 @@
+"""
+YAML loading and dumping for the AI Pipeline Generator service.
+This module uses the libyaml-based C loader and dumper when PyYAML was built with them.
+"""
+
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+def load_yaml(content: str) -> Any:
+    """
+    Parse a YAML document, like yaml.safe_load.
+
+    Args:
+        content: YAML content
+
+    Returns:
+        The parsed document
+
+    Raises:
+        yaml.YAMLError: If the content is not valid YAML
+    """
+    return yaml.load(content, Loader=SafeLoader)
+
+def dump_yaml(data: Any, **kwargs: Any) -> str:
+    """
+    Serialize data to YAML, like yaml.safe_dump.
+
+    Args:
+        data: Data to serialize
+        **kwargs: Options passed to yaml.dump, such as default_flow_style
+
+    Returns:
+        The YAML content
+    """
+    return yaml.dump(data, Dumper=SafeDumper, **kwargs)
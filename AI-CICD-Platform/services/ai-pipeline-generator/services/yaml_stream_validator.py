@@ -0,0 +1,176 @@
+"""
+Incremental YAML validation for streamed pipeline generation.
+This module validates generated YAML while it arrives, one document and section at a time.
+"""
+
+import re
+import logging
+from typing import List, Optional
+
+import yaml
+
+from services.yaml_loader import load_yaml
+
+logger = logging.getLogger(__name__)
+
+# A line that plausibly starts a YAML document rather than prose
+YAML_START = re.compile(r"^(---|#|[\w.\-'\"]+\s*:(\s|$))")
+
+# A mapping key line, e.g. "  build:" or "on: [push]"
+KEY_LINE = re.compile(r"^\s*(['\"]?)([^\s#:'\"\-][^:#]*?)\1\s*:(\s|$)")
+
+# A value that starts a block scalar, whose indented lines are text
+BLOCK_SCALAR = re.compile(r":\s*[|>][0-9+\-]*\s*(#.*)?$")
+
+class IncrementalYAMLValidator:
+    """
+    Validates streamed YAML at document and section boundaries.
+
+    Text is fed as it arrives. Whenever a line starts a new top-level key or
+    a new key directly below one (such as the next job under ``jobs``), or a
+    document ends, everything before that line is complete and is parsed.
+    Output fenced in a markdown code block is validated from the fence on;
+    output starting with prose is left to the final parse.
+    """
+
+    def __init__(self):
+        """Initialize the validator."""
+        self._pending = ""
+        self._mode: Optional[str] = None
+        self._lines: List[str] = []
+        self._section: List[str] = []
+        self._child_indent: Optional[int] = None
+        self._in_block_scalar = False
+        self.documents = 0
+
+    def feed(self, text: str) -> List[List[str]]:
+        """
+        Feed streamed text.
+
+        Args:
+            text: Next chunk of generated text
+
+        Returns:
+            Key paths of the sections completed and validated by this chunk
+
+        Raises:
+            ValueError: If the text generated so far is not valid YAML
+        """
+        self._pending += text
+        *lines, self._pending = self._pending.split("\n")
+
+        completed = []
+        for line in lines:
+            completed.extend(self._add_line(line))
+        return completed
+
+    def finish(self) -> List[List[str]]:
+        """
+        Validate the rest of the text once the stream has ended.
+
+        Returns:
+            Key paths of the remaining sections
+
+        Raises:
+            ValueError: If the remaining text is not valid YAML
+        """
+        completed = []
+        if self._pending:
+            completed.extend(self._add_line(self._pending))
+            self._pending = ""
+
+        if self._mode in ("yaml", "fenced"):
+            completed.extend(self._end_document())
+            self._mode = "done"
+        return completed
+
+    def _add_line(self, line: str) -> List[List[str]]:
+        """Add a complete line, validating the text before it at boundaries."""
+        stripped = line.strip()
+
+        # Find where the YAML starts
+        if self._mode is None:
+            if not stripped:
+                return []
+            if stripped.startswith("```"):
+                self._mode = "fenced"
+                return []
+            self._mode = "yaml" if YAML_START.match(stripped) else "prose"
+            if self._mode == "prose":
+                return []
+        elif self._mode == "prose":
+            if stripped.startswith("```"):
+                self._mode = "fenced"
+            return []
+        elif self._mode == "done":
+            return []
+
+        if stripped.startswith("```"):
+            # The code block ends, and with it the pipeline
+            self._mode = "done"
+            return self._end_document()
+
+        if line.rstrip() == "---" or line.startswith("--- "):
+            return self._end_document()
+
+        if not stripped or stripped.startswith("#"):
+            self._lines.append(line)
+            return []
+
+        indent = len(line) - len(line.lstrip(" "))
+        key = KEY_LINE.match(line)
+        completed = []
+
+        if indent == 0:
+            completed = self._boundary(0)
+            self._section = [key.group(2)] if key else []
+            self._child_indent = None
+            self._in_block_scalar = bool(BLOCK_SCALAR.search(line))
+        elif self._section and not self._in_block_scalar:
+            if self._child_indent is None:
+                self._child_indent = indent
+                if key:
+                    self._section = self._section[:1] + [key.group(2)]
+            elif indent == self._child_indent and key:
+                completed = self._boundary(1)
+                self._section = self._section[:1] + [key.group(2)]
+
+        self._lines.append(line)
+        return completed
+
+    def _boundary(self, depth: int) -> List[List[str]]:
+        """Validate the text so far and close the sections deeper than depth."""
+        self._validate()
+
+        completed = []
+        if len(self._section) > 1:
+            completed.append(list(self._section))
+        if depth == 0 and self._section:
+            completed.append(self._section[:1])
+        return completed
+
+    def _end_document(self) -> List[List[str]]:
+        """Validate the current document and start a new one."""
+        completed = self._boundary(0)
+        if any(line.strip() for line in self._lines):
+            self.documents += 1
+
+        self._lines = []
+        self._section = []
+        self._child_indent = None
+        self._in_block_scalar = False
+        return completed
+
+    def _validate(self) -> None:
+        """Parse the current document."""
+        text = "\n".join(self._lines)
+        if not text.strip():
+            return
+
+        try:
+            document = load_yaml(text)
+        except yaml.YAMLError as e:
+            raise ValueError(str(e))
+
+        if document is not None and not isinstance(document, dict):
+            raise ValueError(f"Expected a mapping at the top level, got {type(document).__name__}")
@@ -0,0 +1,220 @@
+import io
+import time
+import asyncio
+import tarfile
+import pytest
+
+from models.optimization_metrics import OptimizationMetricsRepository, OptimizationResult, OptimizationType
+from models.job_durations import JobDurationStore
+from services.batch_optimizer import (
+    BatchOptimizerService,
+    CollectingDurationStore,
+    CollectingMetricsRepository,
+    detect_platform,
+    load_pipelines_from_archive
+)
+
+def echo_worker(item):
+    """Worker that fails for pipelines marked as broken and records one result and sample otherwise."""
+    if item["config"].get("broken"):
+        raise RuntimeError("broken pipeline")
+    result = OptimizationResult(
+        item["pipeline_id"], item["platform"], OptimizationType.CACHING, [], [], 0, {}
+    )
+    sample = (item["pipeline_id"], "build", "", "", 0.0, 60.0, 0.0, 2)
+    return {"output": {"optimized_config": item["config"]}, "results": [result], "samples": [sample]}
+
+def slow_worker(item):
+    """Worker that takes a while before recording like echo_worker."""
+    time.sleep(0.5)
+    return echo_worker(item)
+
+def history_worker(item):
+    """Worker that reports the history it was given."""
+    return {"output": {"history": item["history"]}}
+
+def make_archive(files):
+    """Build a gzipped tar archive of files."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, content in files.items():
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+@pytest.fixture
+def metrics_repository(tmp_path):
+    return OptimizationMetricsRepository(str(tmp_path / "optimization_metrics.jsonl"))
+
+@pytest.fixture
+def duration_store(tmp_path):
+    return JobDurationStore(str(tmp_path / "job_durations.jsonl"))
+
+@pytest.mark.asyncio
+async def test_batch_reports_results_progress_and_failures(metrics_repository, duration_store):
+    """Test that a batch reports every pipeline, keeps going after failures and saves the results."""
+    service = BatchOptimizerService(
+        metrics_repository, duration_store, max_workers=2, max_concurrency=2, worker=echo_worker
+    )
+    pipelines = [
+        {"pipeline_id": "web", "platform": "github-actions", "config": {"jobs": {}}},
+        {"pipeline_id": "api", "platform": "github-actions", "config": {"broken": True}},
+        {"pipeline_id": "docs", "platform": "gitlab-ci", "error": "Invalid pipeline file"},
+        {"pipeline_id": "cli", "platform": "circle-ci", "config": {"jobs": {"build": {}}}}
+    ]
+
+    try:
+        events = [event async for event in service.process_batch(pipelines)]
+    finally:
+        service.shutdown()
+
+    assert events[0] == {"type": "start", "total": 4, "mode": "optimize"}
+    results = {event["pipeline_id"]: event for event in events[1:-1]}
+    assert results["web"]["status"] == "success"
+    assert results["web"]["optimized_config"] == {"jobs": {}}
+    assert results["api"]["error"] == "RuntimeError: broken pipeline"
+    assert results["docs"]["error"] == "Invalid pipeline file"
+    assert results["cli"]["index"] == 3
+    assert [event["progress"]["completed"] for event in events[1:-1]] == [1, 2, 3, 4]
+    assert events[-2]["progress"] == {"completed": 4, "failed": 2, "total": 4}
+
+    assert events[-1]["type"] == "summary"
+    assert (events[-1]["succeeded"], events[-1]["failed"]) == (2, 2)
+
+    # Results recorded in the workers are saved by the parent
+    assert metrics_repository.count_optimization_results() == 2
+    assert metrics_repository.count_optimization_results(pipeline_id="cli") == 1
+    assert duration_store.get_statistics("cli", "build")["count"] == 1
+    assert JobDurationStore(duration_store.storage_path).get_job_durations("web") == {"build": 60.0}
+
+@pytest.mark.asyncio
+async def test_batch_passes_pipeline_history(metrics_repository, duration_store):
+    """Test that workers receive the pipeline's samples from the parent's store."""
+    duration_store.add_sample("web", "build", 60.0, timestamp=100.0)
+    service = BatchOptimizerService(metrics_repository, duration_store, max_workers=1, worker=history_worker)
+    pipelines = [
+        {"pipeline_id": "web", "platform": "github-actions", "config": {}},
+        {"pipeline_id": "api", "platform": "github-actions", "config": {}}
+    ]
+
+    try:
+        events = [event async for event in service.process_batch(pipelines)]
+    finally:
+        service.shutdown()
+
+    results = {event["pipeline_id"]: event for event in events[1:-1]}
+    assert [tuple(sample) for sample in results["web"]["history"]] == [("web", "build", "", "", 100.0, 60.0, 0.0, 2)]
+    assert results["api"]["history"] == []
+
+@pytest.mark.asyncio
+async def test_stopped_batch_saves_running_pipelines(metrics_repository, duration_store):
+    """Test that pipelines still running when the client goes away are saved once they finish."""
+    service = BatchOptimizerService(
+        metrics_repository, duration_store, max_workers=1, max_concurrency=2, worker=slow_worker
+    )
+    pipelines = [
+        {"pipeline_id": "web", "platform": "github-actions", "config": {}},
+        {"pipeline_id": "api", "platform": "github-actions", "config": {}}
+    ]
+
+    try:
+        batch = service.process_batch(pipelines)
+        assert (await batch.__anext__())["type"] == "start"
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(batch.__anext__(), 0.1)
+
+        for _ in range(50):
+            if metrics_repository.count_optimization_results(pipeline_id="web"):
+                break
+            await asyncio.sleep(0.1)
+    finally:
+        service.shutdown()
+
+    assert metrics_repository.count_optimization_results(pipeline_id="web") == 1
+    assert duration_store.get_statistics("web", "build")["count"] == 1
+
+@pytest.mark.asyncio
+async def test_invalid_mode():
+    """Test that an unsupported mode is rejected."""
+    service = BatchOptimizerService(CollectingMetricsRepository(), CollectingDurationStore(), worker=echo_worker)
+
+    with pytest.raises(ValueError):
+        async for _ in service.process_batch([], mode="rewrite"):
+            pass
+
+def test_collecting_repository_keeps_results_in_memory(tmp_path, monkeypatch):
+    """Test that worker repositories write nothing and hand over their results once."""
+    monkeypatch.chdir(tmp_path)
+    repository = CollectingMetricsRepository()
+    with repository.batch():
+        repository.save_optimization_results([
+            OptimizationResult("web", "github-actions", OptimizationType.CACHING, [], [], 0, {}),
+            OptimizationResult("web", "github-actions", OptimizationType.RESOURCE, [], [], 0, {})
+        ])
+
+    results = repository.drain()
+    assert [result.optimization_type for result in results] == [OptimizationType.CACHING, OptimizationType.RESOURCE]
+    assert repository.drain() == []
+    assert repository.count_optimization_results(pipeline_id="web") == 0
+    assert list(tmp_path.iterdir()) == []
+
+def test_collecting_duration_store_keeps_samples_in_memory(tmp_path, monkeypatch):
+    """Test that worker duration stores write nothing and hand over their samples once."""
+    monkeypatch.chdir(tmp_path)
+    store = CollectingDurationStore()
+    store.ingest_runs([{"pipeline_id": "web", "started_at": 0, "jobs": [{"id": "build", "duration": 60}]}])
+
+    samples = store.drain()
+    assert [sample[:2] for sample in samples] == [("web", "build")]
+    assert store.drain() == []
+    assert store.get_statistics("web", "build")["count"] == 1
+    assert list(tmp_path.iterdir()) == []
+
+    parent = JobDurationStore(str(tmp_path / "job_durations.jsonl"))
+    assert parent.add_samples(samples) == 1
+    assert parent.get_statistics("web", "build")["p50"] == 60
+
+    # Seeding replaces the history and is never handed back
+    store.seed(parent.pipeline_samples("web") + [("web", "build", "", "", 120.0, 90.0, 0.0, 2)])
+    assert store.get_statistics("web", "build")["count"] == 2
+    assert store.drain() == []
+
+def test_load_pipelines_from_archive():
+    """Test that pipelines are read from an archive and their platforms detected."""
+    data = make_archive({
+        "repo/.github/workflows/ci.yml": "jobs:\n  test:\n    runs-on: ubuntu-latest\n",
+        "repo/.github/workflows/broken.yaml": "jobs: [unclosed\n",
+        "repo/.gitlab-ci.yml": "stages: [build]\n",
+        "repo/.circleci/config.yml": "- not a mapping\n",
+        "repo/README.md": "# Readme\n",
+        "repo/config.yml": "key: value\n"
+    })
+
+    pipelines = {pipeline["pipeline_id"]: pipeline for pipeline in load_pipelines_from_archive(data)}
+
+    assert set(pipelines) == {
+        "repo/.github/workflows/ci.yml",
+        "repo/.github/workflows/broken.yaml",
+        "repo/.gitlab-ci.yml",
+        "repo/.circleci/config.yml"
+    }
+    assert pipelines["repo/.github/workflows/ci.yml"]["config"]["jobs"]["test"]["runs-on"] == "ubuntu-latest"
+    assert pipelines["repo/.gitlab-ci.yml"]["platform"] == "gitlab-ci"
+    assert "error" in pipelines["repo/.github/workflows/broken.yaml"]
+    assert "error" in pipelines["repo/.circleci/config.yml"]
+
+    # With a platform, every YAML file is a pipeline
+    assert len(load_pipelines_from_archive(data, platform="github-actions")) == 5
+
+    with pytest.raises(ValueError):
+        load_pipelines_from_archive(b"not an archive")
+
+def test_detect_platform():
+    """Test platform detection from file paths."""
+    assert detect_platform(".github/workflows/release.yaml") == "github-actions"
+    assert detect_platform(".github/ci.yml") is None
+    assert detect_platform("service/.gitlab-ci.yml") == "gitlab-ci"
+    assert detect_platform(".circleci/config.yml") == "circle-ci"
+    assert detect_platform("Jenkinsfile") is None
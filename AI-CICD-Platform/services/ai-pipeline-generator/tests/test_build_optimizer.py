@@ -0,0 +1,94 @@
+"""
+Tests for the build optimizer service.
+"""
+
+import pytest
+
+from ..services.build_optimizer import BuildOptimizerService
+from ..models.dependency_graph import DependencyGraph, NodeMetadata, DependencyMetadata, NodeType
+
+class TestBuildOptimizerService:
+    """Tests for the BuildOptimizerService class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = BuildOptimizerService()
+        
+        # app needs lib and docs, lib needs core; core -> lib -> app is the long chain
+        self.graph = DependencyGraph()
+        for name in ["app", "lib", "core", "docs", "lint"]:
+            self.graph.add_node(f"job:{name}", NodeMetadata(type=NodeType.CUSTOM))
+        self.graph.add_edge("job:app", "job:lib", DependencyMetadata())
+        self.graph.add_edge("job:app", "job:docs", DependencyMetadata())
+        self.graph.add_edge("job:lib", "job:core", DependencyMetadata())
+        
+        self.durations = {"job:app": 2.0, "job:lib": 4.0, "job:core": 3.0, "job:docs": 1.0, "job:lint": 5.0}
+    
+    def schedule_by_node(self, result):
+        """Map node IDs to their scheduled jobs."""
+        return {entry["node_id"]: entry for entry in result["schedule"]}
+    
+    def test_schedule_respects_dependencies_and_durations(self):
+        """Test that jobs start once their dependencies finish and the makespan follows the critical path."""
+        result = self.service.optimize_parallel_execution(self.graph, max_parallel_jobs=4, durations=self.durations)
+        schedule = self.schedule_by_node(result)
+        
+        assert schedule["job:lib"]["start"] == schedule["job:core"]["end"] == 3.0
+        assert schedule["job:app"]["start"] == 7.0
+        assert result["metrics"]["estimated_time"] == 9.0
+        assert result["critical_path"] == ["job:app", "job:lib", "job:core"]
+        assert result["metrics"]["critical_path_duration"] == 9.0
+        assert result["execution_plan"][0] == ["job:core", "job:lint", "job:docs"]
+    
+    def test_schedule_prioritizes_critical_path(self):
+        """Test that freed workers go to the longest remaining chain first."""
+        result = self.service.optimize_parallel_execution(self.graph, max_parallel_jobs=2, durations=self.durations)
+        schedule = self.schedule_by_node(result)
+        
+        # docs waits so that lib starts as soon as core finishes
+        assert schedule["job:core"]["start"] == 0.0
+        assert schedule["job:lint"]["start"] == 0.0
+        assert schedule["job:lib"]["start"] == 3.0
+        assert schedule["job:docs"]["start"] == 5.0
+        assert result["metrics"]["estimated_time"] == 9.0
+        assert max(entry["worker"] for entry in result["schedule"]) == 1
+    
+    def test_schedule_respects_runner_resources(self):
+        """Test that jobs only run side by side when the runner has room."""
+        self.graph.add_node("job:lint", NodeMetadata(type=NodeType.CUSTOM, attributes={"resources": {"memory_gb": 6}}))
+        self.graph.add_node("job:core", {"type": "custom", "resources": {"memory_gb": 4}})
+        
+        result = self.service.optimize_parallel_execution(
+            self.graph, max_parallel_jobs=4, durations=self.durations, runners=[{"memory_gb": 8}]
+        )
+        schedule = self.schedule_by_node(result)
+        
+        # lint and core do not fit together, so lint waits for core
+        assert schedule["job:core"]["start"] == 0.0
+        assert schedule["job:lint"]["start"] == 3.0
+        assert result["metrics"]["estimated_time"] == 9.0
+    
+    def test_schedule_rejects_jobs_no_runner_fits(self):
+        """Test that a job whose resources fit no single runner is reported instead of left unscheduled."""
+        self.graph.add_node("job:lib", {"type": "custom", "resources": {"cpu": 4, "memory_gb": 8}})
+        
+        with pytest.raises(ValueError, match="job:lib"):
+            self.service.optimize_parallel_execution(
+                self.graph, max_parallel_jobs=4, durations=self.durations,
+                runners=[{"cpu": 4, "memory_gb": 1}, {"cpu": 1, "memory_gb": 8}]
+            )
+    
+    def test_schedule_handles_cycles(self):
+        """Test that jobs on a cycle are still scheduled."""
+        self.graph.add_edge("job:core", "job:app", DependencyMetadata())
+        
+        result = self.service.optimize_parallel_execution(self.graph, max_parallel_jobs=2)
+        
+        assert sorted(entry["node_id"] for entry in result["schedule"]) == sorted(self.graph.get_all_nodes())
+    
+    def test_build_order_critical_path_uses_durations(self):
+        """Test that the build order's critical path is weighted by duration."""
+        result = self.service.optimize_build_order(self.graph, durations={"job:docs": 10.0})
+        
+        assert result["critical_path"] == ["job:app", "job:docs"]
+        assert result["metrics"]["critical_path_duration"] == pytest.approx(11.0)
@@ -0,0 +1,117 @@
+"""
+Tests for the code analyzer service.
+"""
+
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from ..services.code_analyzer import CodeAnalyzerService
+
+class TestCodeAnalyzerService:
+    """Tests for the CodeAnalyzerService class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.project_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+
+        self.write_file("pkg/__init__.py", "")
+        self.write_file("pkg/models.py", "class Base:\n    pass\n")
+        self.write_file("app.py", "from pkg import models\n\nclass App(models.Base):\n    def run(self):\n        print('run')\n")
+        self.write_file("web/util.js", "export const add = (a, b) => a + b;\n")
+        self.write_file("web/index.js", "import { add } from './util';\nconsole.log(add(1, 2));\n")
+
+    def teardown_method(self):
+        """Tear down test fixtures."""
+        shutil.rmtree(self.project_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def write_file(self, rel_path, content):
+        """Write a file into the test project."""
+        path = os.path.join(self.project_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_cached_analysis_matches_uncached(self):
+        """Test that cached, parallel and serial analyses return the same result."""
+        expected = CodeAnalyzerService(cache_dir=None).analyze_code_dependencies(self.project_dir)
+
+        assert expected["imports"]["app.py"][0]["file"] == os.path.join(self.project_dir, "pkg", "__init__.py")
+        assert expected["imports"][os.path.join("web", "index.js")][0]["file"] == os.path.join(self.project_dir, "web", "util.js")
+        assert expected["class_hierarchy"]["App"] == {"file": "app.py", "parents": ["models.Base"]}
+
+        analyzer = CodeAnalyzerService(cache_dir=self.cache_dir)
+        analyzer.ANALYSIS_BATCH_SIZE = 2
+        assert analyzer.analyze_code_dependencies(self.project_dir) == expected
+        assert CodeAnalyzerService(cache_dir=self.cache_dir).analyze_code_dependencies(self.project_dir) == expected
+
+    def test_only_changed_files_are_reanalyzed(self):
+        """Test that repeat analyses only parse files that changed."""
+        CodeAnalyzerService(cache_dir=self.cache_dir).analyze_code_dependencies(self.project_dir)
+
+        analyzer = CodeAnalyzerService(cache_dir=self.cache_dir)
+        with patch.object(analyzer, "_analyze_file", wraps=analyzer._analyze_file) as analyze_file:
+            analyzer.analyze_code_dependencies(self.project_dir)
+            assert analyze_file.call_count == 0
+
+            self.write_file("pkg/models.py", "class Base:\n    pass\n\nclass Model(Base):\n    pass\n")
+            result = analyzer.analyze_code_dependencies(self.project_dir)
+
+            assert [call.args[0] for call in analyze_file.call_args_list] == [
+                os.path.join(self.project_dir, "pkg", "models.py")
+            ]
+            assert result["class_hierarchy"]["Model"]["parents"] == ["Base"]
+
+    def test_touched_file_with_same_content_is_not_reanalyzed(self):
+        """Test that the content hash is checked when mtime or size changed."""
+        CodeAnalyzerService(cache_dir=self.cache_dir).analyze_code_dependencies(self.project_dir)
+
+        path = os.path.join(self.project_dir, "app.py")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        analyzer = CodeAnalyzerService(cache_dir=self.cache_dir)
+        with patch.object(analyzer, "_analyze_file", wraps=analyzer._analyze_file) as analyze_file:
+            result = analyzer.analyze_code_dependencies(self.project_dir)
+
+            assert analyze_file.call_count == 0
+            assert result["class_hierarchy"]["App"]["file"] == "app.py"
+
+    def test_find_files_prunes_ignored_directories(self):
+        """Test that discovery skips excluded, ignored and vendored directories."""
+        self.write_file("node_modules/lib/index.js", "")
+        self.write_file("build/out.py", "")
+        self.write_file("build/keep.py", "")
+        self.write_file("pkg/generated/schema.py", "")
+        self.write_file(".gitignore", "build/\n!keep.py\n*.log\n")
+        self.write_file("pkg/.gitignore", "generated\n")
+
+        analyzer = CodeAnalyzerService(cache_dir=None)
+        extensions = analyzer._get_extensions_for_languages(None)
+        files = analyzer._find_files_to_analyze(self.project_dir, extensions, None, ["web/**"], None)
+
+        assert [os.path.relpath(f, self.project_dir) for f in files] == [
+            "app.py",
+            os.path.join("pkg", "__init__.py"),
+            os.path.join("pkg", "models.py")
+        ]
+
+    def test_find_files_with_patterns_and_depth(self):
+        """Test include patterns, exclude patterns and depth limits."""
+        self.write_file("pkg/sub/deep.py", "")
+
+        analyzer = CodeAnalyzerService(cache_dir=None)
+        extensions = analyzer._get_extensions_for_languages(["python"])
+
+        def find(include_patterns, exclude_patterns, max_depth):
+            files = analyzer._find_files_to_analyze(
+                self.project_dir, extensions, include_patterns, exclude_patterns, max_depth
+            )
+            return [os.path.relpath(f, self.project_dir).replace(os.sep, "/") for f in files]
+
+        assert find(None, None, 2) == ["app.py", "pkg/__init__.py", "pkg/models.py"]
+        assert find(["pkg/**/*.py"], ["**/__init__.py"], None) == ["pkg/models.py", "pkg/sub/deep.py"]
+        assert find(["*.py", "web/*.js"], None, None) == ["app.py"]
@@ -0,0 +1,70 @@
+"""
+Tests for the dependency API.
+"""
+
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..api import dependency_api
+from ..models.dependency_graph import (
+    DependencyGraph,
+    NodeMetadata,
+    DependencyMetadata,
+    NodeType,
+    DependencyType
+)
+
+FILES = [
+    "/repo/src/app/main.py",
+    "/repo/src/app/views.py",
+    "/repo/src/lib/util.py"
+]
+
+class TestDependencyAPI:
+    """Tests for the /dependencies visualization routes."""
+
+    def setup_method(self):
+        """Set up a client with a stored graph of a small project."""
+        graph = DependencyGraph()
+        for path in FILES:
+            graph.add_node(f"file:{path}", NodeMetadata(type=NodeType.FILE, path=path))
+        graph.add_edge(f"file:{FILES[0]}", f"file:{FILES[1]}", DependencyMetadata(type=DependencyType.IMPORT))
+        graph.add_edge(f"file:{FILES[1]}", f"file:{FILES[2]}", DependencyMetadata(type=DependencyType.IMPORT))
+
+        self.graph_patch = patch.object(dependency_api.graph_store, "get_graph", return_value=graph)
+        self.graph_patch.start()
+
+        app = FastAPI()
+        app.include_router(dependency_api.router)
+        self.client = TestClient(app)
+
+    def teardown_method(self):
+        """Tear down the patch."""
+        self.graph_patch.stop()
+
+    def test_tile(self):
+        """Test getting the single tile of zoom level 0."""
+        response = self.client.post("/dependencies/visualize/tile", json={"project_path": "/repo"})
+
+        assert response.status_code == 200
+        assert response.json()["zoom"] == 0
+        assert response.json()["data"]["nodes"]
+
+    def test_tile_rejects_invalid_requests(self):
+        """Test that invalid tiles and clusterings are client errors."""
+        response = self.client.post("/dependencies/visualize/tile", json={"project_path": "/repo", "zoom": -1})
+        assert response.status_code == 400
+
+        response = self.client.post("/dependencies/visualize/tile", json={"project_path": "/repo", "cluster_by": "color"})
+        assert response.status_code == 400
+
+    def test_visualize_rejects_unknown_cluster(self):
+        """Test that expanding an unknown cluster is a client error."""
+        response = self.client.post(
+            "/dependencies/visualize",
+            json={"project_path": "/repo", "cluster_by": "directory", "expand": ["missing"]}
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,190 @@
+"""
+Tests for the dependency graph model.
+"""
+
+import json
+import pytest
+
+from ..models.dependency_graph import (
+    DependencyGraph,
+    NodeMetadata,
+    DependencyMetadata,
+    NodeType,
+    DependencyType,
+    NodeIdView
+)
+
+class TestDependencyGraph:
+    """Tests for the DependencyGraph class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.graph = DependencyGraph()
+        for name in ["a", "b", "c", "d"]:
+            self.graph.add_node(f"file:{name}.py", NodeMetadata(type=NodeType.FILE, path=f"{name}.py"))
+        
+        # a -> b -> d, a -> c -> d
+        self.graph.add_edge("file:a.py", "file:b.py", DependencyMetadata(type=DependencyType.IMPORT))
+        self.graph.add_edge("file:a.py", "file:c.py", DependencyMetadata(type=DependencyType.IMPORT))
+        self.graph.add_edge("file:b.py", "file:d.py", DependencyMetadata(type=DependencyType.IMPORT))
+        self.graph.add_edge("file:c.py", "file:d.py", DependencyMetadata(type=DependencyType.IMPORT))
+    
+    def test_traversal_views(self):
+        """Test that dependencies and dependents are returned as views."""
+        dependencies = self.graph.get_dependencies("file:a.py")
+        
+        assert isinstance(dependencies, NodeIdView)
+        assert dependencies == ["file:b.py", "file:c.py"]
+        assert len(dependencies) == 2
+        assert "file:c.py" in dependencies
+        assert dependencies[-1] == "file:c.py"
+        assert sorted(self.graph.get_dependents("file:d.py")) == ["file:b.py", "file:c.py"]
+        assert self.graph.get_dependencies("file:missing.py") == []
+        
+        # Views are snapshots of the graph when they were taken
+        self.graph.add_edge("file:a.py", "file:d.py", DependencyMetadata())
+        assert len(dependencies) == 2
+        assert len(self.graph.get_dependencies("file:a.py")) == 3
+    
+    def test_dict_compatible_facade(self):
+        """Test the dict-compatible node and edge views."""
+        self.graph.add_node("package:pkg1", {"type": "package", "name": "pkg1", "version": "1.0"})
+        
+        assert len(self.graph.nodes) == 5
+        assert "file:a.py" in self.graph.nodes
+        assert self.graph.nodes["file:a.py"]["path"] == "a.py"
+        assert self.graph.get_node("package:pkg1") == {"type": "package", "name": "pkg1", "version": "1.0"}
+        assert list(self.graph.get_all_nodes())[:2] == ["file:a.py", "file:b.py"]
+        assert self.graph.edges["file:a.py"]["file:b.py"]["type"] == DependencyType.IMPORT
+        assert list(self.graph.reverse_edges["file:b.py"]) == ["file:a.py"]
+        assert json.loads(self.graph.to_json())["nodes"]["package:pkg1"]["version"] == "1.0"
+    
+    def test_msgpack_round_trip(self):
+        """Test that the binary format preserves nodes, edges and metadata."""
+        self.graph.add_node("package:pkg1", NodeMetadata(type=NodeType.PACKAGE, attributes={"name": "pkg1", "version": "1.0"}))
+        self.graph.add_edge("file:d.py", "package:pkg1", DependencyMetadata(type=DependencyType.PACKAGE, is_direct=False))
+        self.graph.remove_node("file:c.py")
+        
+        restored = DependencyGraph.from_msgpack(self.graph.to_msgpack())
+        
+        assert json.loads(restored.to_json()) == json.loads(self.graph.to_json())
+        assert restored.get_dependencies("file:a.py") == ["file:b.py"]
+        assert restored.get_all_dependents("package:pkg1") == {"file:a.py", "file:b.py", "file:d.py"}
+        
+        # The restored graph accepts further updates
+        restored.add_edge("file:b.py", "file:e.py", DependencyMetadata())
+        assert restored.get_dependents("file:e.py") == ["file:b.py"]
+        
+        with pytest.raises(ValueError):
+            DependencyGraph.from_msgpack(b"\x81\xa7version\x02")
+    
+    def test_remove_node_and_edge(self):
+        """Test removing nodes and edges."""
+        self.graph.remove_edge("file:a.py", "file:b.py")
+        assert self.graph.get_edge("file:a.py", "file:b.py") is None
+        assert self.graph.get_dependencies("file:a.py") == ["file:c.py"]
+        
+        self.graph.remove_node("file:d.py")
+        assert self.graph.get_node("file:d.py") is None
+        assert self.graph.get_dependencies("file:c.py") == []
+        assert len(self.graph.get_all_edges()) == 1
+        
+        # A re-added node does not get its old edges back
+        self.graph.add_node("file:d.py", NodeMetadata(type=NodeType.FILE))
+        assert self.graph.get_dependents("file:d.py") == []
+        assert self.graph.get_edge("file:c.py", "file:d.py") is None
+    
+    def test_topological_sort_and_critical_path(self):
+        """Test ordering and the critical path."""
+        order = self.graph._topological_sort()
+        
+        assert order[0] == "file:a.py"
+        assert order[-1] == "file:d.py"
+        assert self.graph.find_critical_path() == ["file:a.py", "file:b.py", "file:d.py"]
+        assert DependencyGraph().find_critical_path() == []
+        
+        # Durations outweigh hop counts
+        assert self.graph.find_critical_path({"file:c.py": 5.0}) == ["file:a.py", "file:c.py", "file:d.py"]
+    
+    def test_find_cycles(self):
+        """Test cycle detection."""
+        assert self.graph.find_cycles() == []
+        
+        self.graph.add_edge("file:d.py", "file:a.py", DependencyMetadata())
+        self.graph.add_edge("file:x.py", "file:y.py", DependencyMetadata())
+        self.graph.add_edge("file:y.py", "file:x.py", DependencyMetadata())
+        cycles = self.graph.find_cycles()
+        
+        assert ["file:a.py", "file:b.py", "file:d.py"] in cycles
+        assert ["file:x.py", "file:y.py"] in cycles
+        
+        # Cyclic nodes still get an order
+        assert len(self.graph._topological_sort()) == 6
+    
+    def test_transitive_queries(self):
+        """Test transitive dependency and dependent queries."""
+        assert self.graph.get_all_dependencies("file:a.py") == {"file:b.py", "file:c.py", "file:d.py"}
+        assert self.graph.get_all_dependents("file:d.py") == {"file:a.py", "file:b.py", "file:c.py"}
+        assert self.graph.get_all_dependents(["file:b.py", "file:c.py", "file:missing.py"]) == {"file:a.py"}
+        assert self.graph.get_all_dependencies([]) == set()
+        
+        # Nodes on a cycle reach themselves
+        self.graph.add_edge("file:d.py", "file:b.py", DependencyMetadata())
+        assert self.graph.get_all_dependencies("file:b.py") == {"file:b.py", "file:d.py"}
+        assert self.graph.get_all_dependents("file:c.py") == {"file:a.py"}
+        
+        # Removals are reflected in later queries
+        self.graph.remove_node("file:a.py")
+        assert self.graph.get_all_dependents("file:d.py") == {"file:b.py", "file:c.py", "file:d.py"}
+    
+    def test_transitive_queries_on_deep_diamonds(self):
+        """Test that long chains of diamonds are neither exponential nor recursive."""
+        graph = DependencyGraph()
+        for level in range(2000):
+            graph.add_edge(f"top:{level}", f"left:{level}", DependencyMetadata())
+            graph.add_edge(f"top:{level}", f"right:{level}", DependencyMetadata())
+            graph.add_edge(f"left:{level}", f"top:{level + 1}", DependencyMetadata())
+            graph.add_edge(f"right:{level}", f"top:{level + 1}", DependencyMetadata())
+        
+        assert len(graph.get_all_dependencies("top:0")) == 3 * 2000
+        assert len(graph.get_all_dependents("top:2000")) == 3 * 2000
+    
+    def test_strongly_connected_components(self):
+        """Test that components come before the components that depend on them."""
+        assert self.graph.strongly_connected_components() == [
+            ["file:d.py"], ["file:b.py"], ["file:c.py"], ["file:a.py"]
+        ]
+        
+        # b -> d -> c -> b forms one component
+        self.graph.add_edge("file:d.py", "file:c.py", DependencyMetadata())
+        self.graph.add_edge("file:c.py", "file:b.py", DependencyMetadata())
+        components = self.graph.strongly_connected_components()
+        assert [sorted(component) for component in components] == [
+            ["file:b.py", "file:c.py", "file:d.py"], ["file:a.py"]
+        ]
+        
+        # Long chains do not hit the recursion limit
+        graph = DependencyGraph()
+        for i in range(5000):
+            graph.add_edge(f"n:{i}", f"n:{i + 1}", DependencyMetadata())
+        graph.add_edge("n:5000", "n:0", DependencyMetadata())
+        assert len(graph.strongly_connected_components()) == 1
+    
+    def test_version_changes_with_graph(self):
+        """Test that every change to nodes, edges or metadata changes the version."""
+        versions = [self.graph.version]
+        
+        self.graph.add_node("file:a.py", NodeMetadata(type=NodeType.FILE, language="python"))
+        versions.append(self.graph.version)
+        self.graph.add_edge("file:a.py", "file:b.py", DependencyMetadata(type=DependencyType.CUSTOM))
+        versions.append(self.graph.version)
+        self.graph.remove_edge("file:a.py", "file:b.py")
+        versions.append(self.graph.version)
+        self.graph.remove_node("file:d.py")
+        versions.append(self.graph.version)
+        
+        assert len(set(versions)) == len(versions)
+        
+        # Removing what is not there changes nothing
+        self.graph.remove_node("file:missing.py")
+        assert self.graph.version == versions[-1]
@@ -0,0 +1,91 @@
+"""
+Tests for the pipeline generation API.
+"""
+
+from unittest.mock import Mock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..api import generation_api
+
+PIPELINE = "name: CI\non: [push]\njobs:\n  test:\n    runs-on: ubuntu-latest\n    steps:\n      - run: make test\n"
+
+class FakeChunkStream:
+    """Async stream of chat completion chunks."""
+
+    def __init__(self, content):
+        self.chunks = [Mock(usage=None, choices=[Mock(delta=Mock(content=line))]) for line in content.splitlines(True)]
+        self.chunks.append(Mock(usage=Mock(total_tokens=42), choices=[]))
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self):
+        pass
+
+class FakeAsyncOpenAI:
+    """AsyncOpenAI client answering every request with the same pipeline."""
+
+    def __init__(self, api_key=None):
+        self.chat = Mock(completions=Mock(create=self.create))
+        self.requests = 0
+
+    async def create(self, **kwargs):
+        self.requests += 1
+        if kwargs.get("stream"):
+            return FakeChunkStream(PIPELINE)
+        return Mock(choices=[Mock(message=Mock(content=PIPELINE))], usage=Mock(total_tokens=42))
+
+class TestGenerationAPI:
+    """Tests for the /generate routes."""
+
+    def setup_method(self):
+        """Set up a client for the generation routes with a fake OpenAI client."""
+        self.openai_patch = patch("services.pipeline_generator.AsyncOpenAI", FakeAsyncOpenAI)
+        self.openai_patch.start()
+        generation_api.generator_service = None
+
+        app = FastAPI()
+        app.include_router(generation_api.router)
+        self.client = TestClient(app)
+
+    def teardown_method(self):
+        """Tear down the shared service and the patch."""
+        generation_api.generator_service = None
+        self.openai_patch.stop()
+
+    def test_generate(self):
+        """Test that a generation is served from the cache the second time."""
+        request = {"description": "Run make test on push", "platform": "github-actions"}
+
+        response = self.client.post("/generate", json=request)
+        assert response.status_code == 200
+        assert response.json()["pipeline_config"]["jobs"]["test"]["runs-on"] == "ubuntu-latest"
+
+        assert self.client.post("/generate", json=request).status_code == 200
+        assert generation_api.generator_service.client.requests == 1
+
+        metrics = self.client.get("/generate/cache/metrics")
+        assert metrics.status_code == 200
+
+    def test_stream(self):
+        """Test that streamed generations end with a complete event."""
+        response = self.client.post(
+            "/generate/stream", json={"description": "Run make test on push", "platform": "github-actions"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert "event: section" in response.text
+        assert response.text.rstrip().split("\n\n")[-1].startswith("event: complete")
+
+    def test_stream_rejects_unsupported_platform(self):
+        """Test that an unknown platform is rejected before streaming."""
+        response = self.client.post("/generate/stream", json={"description": "Build", "platform": "unknown"})
+
+        assert response.status_code == 400
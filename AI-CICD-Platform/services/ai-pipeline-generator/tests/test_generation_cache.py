@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+
+from services.generation_cache import GenerationCache, GenerationEntry, content_key, normalize_text
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_generator(calls, tokens=150):
+    """Create a generation coroutine function that counts its calls."""
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return GenerationEntry("name: Test", {"name": "Test", "jobs": {}}, tokens)
+    return generate
+
+def test_content_key_is_canonical():
+    """Test that keys ignore dictionary order and whitespace-only description changes."""
+    assert content_key({"a": 1, "b": [1, 2]}) == content_key({"b": [1, 2], "a": 1})
+    assert content_key({"a": 1}) != content_key({"a": 2})
+    assert normalize_text("  Run tests\n on   push ") == "Run tests on push"
+
+@pytest.mark.asyncio
+async def test_hits_return_private_copies():
+    """Test that repeated requests are served from the cache without sharing state."""
+    cache = GenerationCache()
+    calls = []
+
+    entry, status = await cache.get_or_generate("key", make_generator(calls))
+    assert status == "miss"
+    entry.pipeline_config["jobs"]["mutated"] = True
+
+    entry, status = await cache.get_or_generate("key", make_generator(calls))
+    assert status == "hit"
+    assert entry.pipeline_config == {"name": "Test", "jobs": {}}
+    assert len(calls) == 1
+
+    metrics = cache.get_metrics()
+    assert metrics["hits"] == 1
+    assert metrics["misses"] == 1
+    assert metrics["tokens_saved"] == 150
+    assert metrics["hit_rate"] == 0.5
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced():
+    """Test that identical in-flight requests share one generation."""
+    cache = GenerationCache()
+    calls = []
+
+    results = await asyncio.gather(*[
+        cache.get_or_generate("key", make_generator(calls)) for _ in range(5)
+    ])
+
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ["coalesced"] * 4 + ["miss"]
+    assert cache.get_metrics()["coalesced"] == 4
+
+@pytest.mark.asyncio
+async def test_failures_are_shared_but_not_cached():
+    """Test that a failed generation fails its waiters and is retried afterwards."""
+    cache = GenerationCache()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("Generated invalid YAML")
+
+    results = await asyncio.gather(
+        cache.get_or_generate("key", fail),
+        cache.get_or_generate("key", fail),
+        return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    calls = []
+    _, status = await cache.get_or_generate("key", make_generator(calls))
+    assert status == "miss"
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_first_request_does_not_fail_waiters():
+    """Test that the generation continues for waiters when the request that started it goes away."""
+    cache = GenerationCache()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def generate():
+        started.set()
+        await release.wait()
+        return GenerationEntry("name: CI\n", {"name": "CI"}, 150)
+
+    leader = asyncio.create_task(cache.get_or_generate("key", generate))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_generate("key", generate))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    entry, status = await waiter
+    assert status == "coalesced"
+    assert entry.pipeline_config == {"name": "CI"}
+    assert leader.cancelled()
+    assert (await cache.get_or_generate("key", generate))[1] == "hit"
+
+@pytest.mark.asyncio
+async def test_expiry_and_eviction():
+    """Test the time-to-live and the least recently used bound."""
+    clock = FakeClock()
+    cache = GenerationCache(max_entries=2, ttl_seconds=60, clock=clock)
+    calls = []
+
+    await cache.get_or_generate("a", make_generator(calls))
+    await cache.get_or_generate("b", make_generator(calls))
+    await cache.get_or_generate("a", make_generator(calls))
+    await cache.get_or_generate("c", make_generator(calls))
+
+    # "b" was the least recently used entry
+    assert (await cache.get_or_generate("a", make_generator(calls)))[1] == "hit"
+    assert (await cache.get_or_generate("b", make_generator(calls)))[1] == "miss"
+    assert cache.get_metrics()["evictions"] == 2
+
+    clock.now = 61
+    assert (await cache.get_or_generate("b", make_generator(calls)))[1] == "miss"
+    assert cache.get_metrics()["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_near_duplicates():
+    """Test that similar descriptions share an entry only when enabled and in the same context."""
+    calls = []
+    description = "run tests and build a docker image on push to main"
+    similar = "Run tests and build the docker image on push to main"
+
+    exact_only = GenerationCache()
+    await exact_only.get_or_generate("a", make_generator(calls), context_key="ctx", text=description)
+    assert (await exact_only.get_or_generate("b", make_generator(calls), context_key="ctx", text=similar))[1] == "miss"
+
+    cache = GenerationCache(similarity_threshold=0.8)
+    await cache.get_or_generate("a", make_generator(calls), context_key="ctx", text=description)
+    assert (await cache.get_or_generate("b", make_generator(calls), context_key="ctx", text=similar))[1] == "near_duplicate"
+    assert (await cache.get_or_generate("c", make_generator(calls), context_key="other", text=similar))[1] == "miss"
+    assert (await cache.get_or_generate("d", make_generator(calls), context_key="ctx", text="deploy to production"))[1] == "miss"
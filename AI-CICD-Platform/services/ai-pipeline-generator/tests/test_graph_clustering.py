@@ -0,0 +1,142 @@
+"""
+Tests for graph clustering and layout.
+"""
+
+import pytest
+
+from ..models.dependency_graph import (
+    DependencyGraph,
+    NodeMetadata,
+    DependencyMetadata,
+    NodeType,
+    DependencyType
+)
+from ..services.graph_clustering import ClusterHierarchy, aggregate_graph
+from ..services.graph_layout import layered_layout
+
+FILES = [
+    "/repo/src/app/main.py",
+    "/repo/src/app/views.py",
+    "/repo/src/lib/util.py",
+    "/repo/src/lib/db.py",
+    "/repo/tests/test_main.py"
+]
+
+class TestClusterHierarchy:
+    """Tests for the ClusterHierarchy class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.graph = DependencyGraph()
+        for path in FILES:
+            self.graph.add_node(f"file:{path}", NodeMetadata(type=NodeType.FILE, path=path))
+        self.graph.add_node("package:requests", NodeMetadata(type=NodeType.PACKAGE, attributes={"type": "pip"}))
+        
+        # main -> views -> util <-> db, test_main -> main, main -> requests
+        for source, target in [(0, 1), (1, 2), (2, 3), (3, 2), (4, 0), (0, 2)]:
+            self.graph.add_edge(f"file:{FILES[source]}", f"file:{FILES[target]}", DependencyMetadata(type=DependencyType.IMPORT))
+        self.graph.add_edge(f"file:{FILES[0]}", "package:requests", DependencyMetadata(type=DependencyType.PACKAGE))
+    
+    def test_directory_hierarchy(self):
+        """Test that directories form clusters and single-child chains are skipped."""
+        hierarchy = ClusterHierarchy(self.graph, "directory")
+        
+        assert hierarchy.sizes[("repo", "src")] == 4
+        assert hierarchy.depth() == 3
+        
+        # "/repo" is skipped into its only child cluster, a lone package is shown as itself
+        assert hierarchy.children(()) == [("repo",), "package:requests"]
+        assert hierarchy.children(("repo",)) == [("repo", "src"), "file:/repo/tests/test_main.py"]
+        
+        with pytest.raises(ValueError):
+            ClusterHierarchy(self.graph, "owner")
+    
+    def test_view_fits_max_nodes_and_drills_down(self):
+        """Test that the largest clusters are opened within max_nodes and expanded clusters always are."""
+        hierarchy = ClusterHierarchy(self.graph, "directory")
+        
+        representatives = hierarchy.view(max_nodes=3)
+        assert set(representatives.values()) == {
+            "cluster:directory:repo/src",
+            "file:/repo/tests/test_main.py",
+            "package:requests"
+        }
+        
+        representatives = hierarchy.view(["cluster:directory:repo/src/lib"], max_nodes=1)
+        assert representatives[f"file:{FILES[2]}"] == f"file:{FILES[2]}"
+        assert representatives[f"file:{FILES[0]}"] == "cluster:directory:repo/src/app"
+        
+        # Levels open one by one
+        assert set(hierarchy.view(max_depth=1).values()) == {"cluster:directory:repo", "package:requests"}
+        assert all(node_id == item for node_id, item in hierarchy.view(max_depth=4).items())
+        
+        with pytest.raises(ValueError):
+            hierarchy.view(["cluster:directory:missing"])
+    
+    def test_aggregate_graph(self):
+        """Test that edges between the same items are merged with a weight."""
+        hierarchy = ClusterHierarchy(self.graph, "directory")
+        aggregated = aggregate_graph(self.graph, hierarchy, hierarchy.view(max_depth=3))
+        
+        app = aggregated.get_node("cluster:directory:repo/src/app")
+        assert app["type"] == NodeType.COMPONENT
+        assert app["attributes"]["size"] == 2
+        
+        # main -> util and views -> util
+        edge = aggregated.get_edge("cluster:directory:repo/src/app", "cluster:directory:repo/src/lib")
+        assert edge["attributes"]["weight"] == 2
+        assert edge["type"] == DependencyType.IMPORT
+        
+        # Edges inside a cluster are dropped, edges between shown nodes are kept as they are
+        assert aggregated.get_edge("cluster:directory:repo/src/lib", "cluster:directory:repo/src/lib") is None
+        assert aggregated.get_edge(f"file:{FILES[4]}", "cluster:directory:repo/src/app")["attributes"]["weight"] == 1
+        assert aggregated.get_edge("cluster:directory:repo/src/app", "package:requests")["type"] == DependencyType.PACKAGE
+    
+    def test_other_clusterings(self):
+        """Test clustering by strongly connected component, package and type."""
+        scc = ClusterHierarchy(self.graph, "scc")
+        representatives = scc.view(max_depth=1)
+        assert representatives[f"file:{FILES[2]}"] == representatives[f"file:{FILES[3]}"] == f"cluster:scc:cycle-file:{FILES[3]}"
+        assert representatives[f"file:{FILES[0]}"] == f"file:{FILES[0]}"
+        
+        # Modules group their file with its classes and functions
+        self.graph.add_node(f"class:App:{FILES[0]}", NodeMetadata(type=NodeType.CLASS, path=FILES[0]))
+        package = ClusterHierarchy(self.graph, "package")
+        assert package.paths[f"class:App:{FILES[0]}"] == package.paths[f"file:{FILES[0]}"] == ("repo", "src", "app", "main.py")
+        assert package.paths["package:requests"] == ("packages", "pip")
+        
+        by_type = ClusterHierarchy(self.graph, "type")
+        assert set(by_type.view(max_depth=1).values()) == {"cluster:type:file", f"class:App:{FILES[0]}", "package:requests"}
+
+class TestLayeredLayout:
+    """Tests for the layered layout."""
+    
+    def test_dependents_above_dependencies(self):
+        """Test that layers follow the dependencies and cycles share a layer."""
+        graph = DependencyGraph()
+        for source, target in [("app", "views"), ("app", "util"), ("views", "util"), ("util", "db"), ("db", "util")]:
+            graph.add_edge(source, target, DependencyMetadata())
+        graph.add_node("lonely", NodeMetadata())
+        
+        positions = layered_layout(graph)
+        
+        assert set(positions) == {"app", "views", "util", "db", "lonely"}
+        assert positions["app"][1] > positions["views"][1] > positions["util"][1]
+        assert positions["util"][1] == positions["db"][1]
+        assert positions["util"][0] != positions["db"][0]
+        assert all(-1 <= x <= 1 and -1 <= y <= 1 for x, y in positions.values())
+        
+        assert layered_layout(DependencyGraph()) == {}
+    
+    def test_crossing_reduction(self):
+        """Test that barycenter sweeps untangle crossed edges."""
+        graph = DependencyGraph()
+        for top, bottom in [("a", "z"), ("b", "y"), ("c", "x")]:
+            graph.add_edge(top, bottom, DependencyMetadata())
+        
+        positions = layered_layout(graph)
+        
+        order = lambda nodes: sorted(nodes, key=lambda node: positions[node][0])
+        tops = order(["a", "b", "c"])
+        bottoms = order(["x", "y", "z"])
+        assert [{"a": "z", "b": "y", "c": "x"}[top] for top in tops] == bottoms
@@ -0,0 +1,118 @@
+"""
+Tests for the dependency graph store service.
+"""
+
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+from ..services.graph_store import DependencyGraphStore
+
+def graph_contents(graph):
+    """Get a dependency graph's nodes and edges in a comparable form."""
+    data = json.loads(graph.to_json())
+    edges = sorted(
+        (edge["source"], edge["target"], edge["metadata"]["type"])
+        for edge in data["edges"]
+    )
+    return data["nodes"], edges
+
+class TestDependencyGraphStore:
+    """Tests for the DependencyGraphStore class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.project_dir = tempfile.mkdtemp()
+        self.storage_dir = tempfile.mkdtemp()
+
+        self.write_file("pkg/__init__.py", "")
+        self.write_file("pkg/models.py", "class Base:\n    pass\n")
+        self.write_file("pkg/views.py", "from pkg import models\n\nclass View(models.Base):\n    pass\n")
+        self.write_file("app.py", "import helpers\nfrom pkg import views\n\nclass App(views.View):\n    pass\n")
+        self.write_file("requirements.txt", "requests==2.31.0\n")
+
+        self.git("init", "-q")
+        self.commit("Initial commit")
+
+    def teardown_method(self):
+        """Tear down test fixtures."""
+        shutil.rmtree(self.project_dir)
+        shutil.rmtree(self.storage_dir)
+
+    def write_file(self, rel_path, content):
+        """Write a file into the test project."""
+        path = os.path.join(self.project_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def git(self, *args):
+        """Run a git command in the test project."""
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=self.project_dir, check=True, capture_output=True
+        )
+
+    def commit(self, message):
+        """Commit all changes of the test project."""
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", message)
+
+    def rebuild(self):
+        """Build the project's graph from scratch."""
+        return DependencyGraphStore(storage_dir=tempfile.mkdtemp(dir=self.storage_dir)).build(self.project_dir).graph
+
+    def test_delta_matches_full_rebuild(self):
+        """Test that patching the graph for changed files equals a full rebuild."""
+        store = DependencyGraphStore(storage_dir=self.storage_dir)
+        store.build(self.project_dir)
+
+        self.write_file("pkg/views.py", "from pkg import models\n\nclass View:\n    pass\n\nclass Form(models.Base):\n    pass\n")
+        self.write_file("helpers.py", "from pkg.models import Base\n")
+        os.remove(os.path.join(self.project_dir, "pkg", "models.py"))
+        self.write_file("requirements.txt", "requests==2.31.0\nflask==3.0.0\n")
+
+        graph = store.apply_delta(self.project_dir, ["pkg/views.py", "helpers.py", "pkg/models.py", "requirements.txt"])
+
+        assert graph_contents(graph) == graph_contents(self.rebuild())
+        assert "file:helpers.py" in graph.get_all_nodes()
+        assert "file:pkg/models.py" not in graph.get_all_nodes()
+
+    def test_get_graph_follows_commits(self):
+        """Test that a warm graph is patched from git instead of rebuilt."""
+        store = DependencyGraphStore(storage_dir=self.storage_dir)
+        store.get_graph(self.project_dir)
+
+        self.write_file("helpers.py", "from pkg import views\n")
+        self.commit("Add helpers")
+        self.write_file("pkg/models.py", "class Base:\n    pass\n\nclass Model(Base):\n    pass\n")
+
+        # A new store reads the saved graph and only re-analyzes the changed files
+        store = DependencyGraphStore(storage_dir=self.storage_dir)
+        with patch.object(store, "build", wraps=store.build) as build:
+            graph = store.get_graph(self.project_dir)
+            assert build.call_count == 0
+
+        assert graph_contents(graph) == graph_contents(self.rebuild())
+        assert "class:Model:pkg/models.py" in graph.get_all_nodes()
+
+        # Unchanged checkouts are answered from memory
+        with patch.object(store, "apply_delta") as apply_delta:
+            assert store.get_graph(self.project_dir) is graph
+            assert apply_delta.call_count == 0
+
+    def test_delta_leaves_returned_graph_unchanged(self):
+        """Test that patching never changes a graph a caller already holds."""
+        store = DependencyGraphStore(storage_dir=self.storage_dir)
+        graph = store.build(self.project_dir).graph
+        contents = graph_contents(graph)
+
+        self.write_file("helpers.py", "from pkg import views\n")
+        patched = store.apply_delta(self.project_dir, ["helpers.py"])
+
+        assert graph_contents(graph) == contents
+        assert "file:helpers.py" in patched.get_all_nodes()
+        assert store.get_graph(self.project_dir) is patched
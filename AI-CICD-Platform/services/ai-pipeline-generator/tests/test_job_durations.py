@@ -0,0 +1,145 @@
+import pytest
+from unittest.mock import Mock
+
+from models.job_durations import JobDurationStore
+from services.performance_profiler import PerformanceProfilerService
+
+DAY = 86400
+
+def make_run(day, build_duration, cache_hit=True):
+    """Create a CI run record for a given day."""
+    return {
+        "pipeline_id": "web",
+        "started_at": day * DAY,
+        "jobs": [
+            {
+                "id": "build",
+                "runner_type": "ubuntu-latest",
+                "started_at": day * DAY + 30,
+                "queued_at": day * DAY,
+                "duration": build_duration,
+                "cache_hit": cache_hit,
+                "steps": [
+                    {"name": "install", "duration": build_duration * 0.25},
+                    {"name": "compile", "duration": build_duration * 0.75}
+                ]
+            },
+            {
+                "id": "lint",
+                "runner_type": "ubuntu-small",
+                "started_at": day * DAY + 10,
+                "completed_at": day * DAY + 70
+            }
+        ]
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobDurationStore(storage_path=str(tmp_path / "job_durations.jsonl"))
+    store.ingest_runs(make_run(day, 100 + day) for day in range(10))
+    return store
+
+def test_ingest_and_statistics(store):
+    """Test bulk ingestion and percentile statistics."""
+    build = store.get_statistics("web", "build")
+    assert build["count"] == 10
+    assert build["p50"] == pytest.approx(104.5)
+    assert build["p95"] == pytest.approx(108.55)
+    assert build["queue_p50"] == 30
+    assert build["cache_hit_rate"] == 1.0
+
+    assert store.get_statistics("web", "lint")["p50"] == 60
+    assert store.get_statistics("web", "build", step_id="compile")["max"] == pytest.approx(81.75)
+    assert store.get_statistics("web", runner_type="ubuntu-small")["count"] == 10
+    assert store.get_job_durations("web") == {"build": pytest.approx(104.5), "lint": 60}
+
+def test_windowed_queries(store):
+    """Test that queries only see samples inside the window."""
+    samples = store.query("web", "build", start=3 * DAY, end=5 * DAY + 30)
+    assert [sample["duration"] for sample in samples] == [103, 104, 105]
+
+    assert store.get_statistics("web", "build", start=8 * DAY)["count"] == 2
+    assert [sample["step_id"] for sample in store.query("web", step_id="*", end=DAY)] == ["install", "compile"]
+
+def test_statistics_follow_new_samples(store):
+    """Test that cached statistics are refreshed by new samples, including late ones."""
+    assert store.get_statistics("web", "build")["max"] == 109
+
+    store.add_sample("web", "build", 500, timestamp=-DAY, cache_hit=False)
+
+    build = store.get_statistics("web", "build")
+    assert build["max"] == 500
+    assert build["cache_hit_rate"] == pytest.approx(10 / 11)
+    assert store.query("web", "build")[0]["duration"] == 500
+
+def test_reload_and_compaction(store, tmp_path):
+    """Test that samples survive a restart and retention bounds the file."""
+    reloaded = JobDurationStore(storage_path=store.storage_path)
+    assert reloaded.get_statistics("web", "build") == store.get_statistics("web", "build")
+
+    bounded = JobDurationStore(storage_path=str(tmp_path / "bounded.jsonl"), max_samples_per_series=4)
+    bounded.ingest_runs(make_run(day, 100 + day) for day in range(40))
+    assert bounded.get_statistics("web", "build")["count"] <= 5
+
+    bounded.compact()
+    reloaded = JobDurationStore(storage_path=bounded.storage_path, max_samples_per_series=4)
+    assert [sample["duration"] for sample in reloaded.query("web", "build")][-1] == 139
+    with open(bounded.storage_path) as f:
+        assert len(f.readlines()) <= 4 * 5 * 2
+
+def test_sample_after_partial_line(store):
+    """Test that a sample added after a crash mid-append is not joined to the partial line."""
+    with open(store.storage_path, "a") as f:
+        f.write('["web", "build", "", "ubuntu-lat')
+
+    JobDurationStore(storage_path=store.storage_path).add_sample("web", "build", 500, timestamp=20 * DAY)
+
+    reloaded = JobDurationStore(storage_path=store.storage_path)
+    assert reloaded.get_statistics("web", "build")["count"] == 11
+    assert reloaded.query("web", "build")[-1]["duration"] == 500
+
+def test_profiler_uses_history(store):
+    """Test that the profiler flags regressions against history and records the run."""
+    profiler = PerformanceProfilerService(metrics_repository=Mock(), duration_store=store)
+
+    analysis = profiler.analyze_pipeline_performance("web", "github-actions", {}, make_run(10, 300, cache_hit=False))
+
+    build = analysis["execution_times"]["build"]
+    assert build["total"] == 300
+    assert build["queue"] == 30
+    assert build["historical_p95"] == pytest.approx(108.55)
+
+    bottleneck_types = [(b["component_id"], b["type"]) for b in analysis["bottlenecks"]]
+    assert bottleneck_types[0] == ("build", "long_running_job")
+    assert ("build", "duration_regression") in bottleneck_types
+    assert ("build", "slow_step") in bottleneck_types
+    assert ("build", "cache_miss") in bottleneck_types
+    assert store.get_statistics("web", "build")["count"] == 11
+
+    trends = profiler._calculate_trends({
+        "build.duration": [{"timestamp": sample["timestamp"], "value": sample["duration"]} for sample in store.query("web", "build")]
+    })
+    assert trends["build.duration"]["direction"] == "increasing"
+
+def test_reanalyzed_runs_are_recorded_once(store):
+    """Test that ingesting a run again, also after a restart, adds no samples."""
+    assert store.ingest_runs([make_run(3, 103)]) == 0
+    assert store.add_samples([("web", "build", "", "ubuntu-latest", 3 * DAY + 30, 103.0, 30.0, 1)]) == 0
+    assert store.ingest_runs([make_run(3, 150)]) == 3
+
+    reloaded = JobDurationStore(storage_path=store.storage_path)
+    assert reloaded.ingest_runs([make_run(day, 100 + day) for day in range(10)]) == 0
+    assert reloaded.get_statistics("web", "build")["count"] == 11
+
+def test_malformed_samples_are_skipped_and_kept(store):
+    """Test that a sample with the wrong shape does not hide later samples or get compacted away."""
+    with open(store.storage_path, "a") as f:
+        f.write('["web", "build"]\n')
+    store.add_sample("web", "build", 500, timestamp=20 * DAY)
+
+    reloaded = JobDurationStore(storage_path=store.storage_path)
+    assert reloaded.get_statistics("web", "build")["max"] == 500
+
+    reloaded.compact()
+    with open(store.storage_path) as f:
+        assert '["web", "build"]\n' in f.readlines()
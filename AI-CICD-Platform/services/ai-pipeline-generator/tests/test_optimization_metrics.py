@@ -0,0 +1,131 @@
+import os
+
+import pytest
+
+from models.optimization_metrics import (
+    OptimizationMetricsRepository,
+    OptimizationResult,
+    OptimizationType,
+    PerformanceMetric,
+    MetricUnit
+)
+
+def make_result(pipeline_id, optimization_type=OptimizationType.PERFORMANCE):
+    """Create an optimization result with one metric."""
+    return OptimizationResult(
+        pipeline_id=pipeline_id,
+        platform="github-actions",
+        optimization_type=optimization_type,
+        metrics_before=[PerformanceMetric("duration", 120.0, MetricUnit.SECONDS, "Total duration", job_id="build")],
+        metrics_after=[],
+        improvement_percentage=0,
+        details={"jobs": ["build"]}
+    )
+
+@pytest.fixture
+def storage_path(tmp_path):
+    return str(tmp_path / "optimization_metrics.jsonl")
+
+def test_save_get_and_list(storage_path):
+    """Test saving results and querying them through the indexes."""
+    repository = OptimizationMetricsRepository(storage_path)
+    web_performance = make_result("web")
+    web_caching = make_result("web", OptimizationType.CACHING)
+    api_performance = make_result("api")
+    for result in (web_performance, web_caching, api_performance):
+        repository.save_optimization_result(result)
+
+    assert repository.get_optimization_result(web_caching.id) is web_caching
+    assert repository.get_optimization_result("missing") is None
+    assert repository.list_optimization_results(pipeline_id="web") == [web_performance, web_caching]
+    assert repository.list_optimization_results(optimization_type=OptimizationType.PERFORMANCE) == [web_performance, api_performance]
+    assert repository.list_optimization_results(pipeline_id="web", optimization_type="caching") == [web_caching]
+    assert repository.list_optimization_results() == [web_performance, web_caching, api_performance]
+
+def test_pagination(storage_path):
+    """Test offset and limit when listing results."""
+    repository = OptimizationMetricsRepository(storage_path)
+    results = [make_result("web") for _ in range(5)]
+    repository.save_optimization_results(results)
+
+    assert repository.list_optimization_results(pipeline_id="web", offset=1, limit=2) == results[1:3]
+    assert repository.list_optimization_results(pipeline_id="web", offset=4, limit=10) == results[4:]
+    assert repository.count_optimization_results(pipeline_id="web") == 5
+
+def test_reload_from_log(storage_path):
+    """Test that results, deletes and metrics survive a restart."""
+    repository = OptimizationMetricsRepository(storage_path)
+    kept = make_result("web")
+    deleted = make_result("web", OptimizationType.RESOURCE)
+    with repository.batch():
+        repository.save_optimization_result(kept)
+        repository.save_optimization_result(deleted)
+    assert repository.delete_optimization_result(deleted.id)
+    assert not repository.delete_optimization_result(deleted.id)
+
+    # A crash mid-append leaves a partial line, which is skipped
+    with open(storage_path, "a") as f:
+        f.write('{"op": "put", "res')
+
+    reloaded = OptimizationMetricsRepository(storage_path)
+    assert [result.id for result in reloaded.results] == [kept.id]
+
+    restored = reloaded.get_optimization_result(kept.id)
+    assert restored.to_dict() == kept.to_dict()
+    assert restored.optimization_type is OptimizationType.PERFORMANCE
+    assert isinstance(restored.metrics_before[0], PerformanceMetric)
+    assert reloaded.list_optimization_results(optimization_type=OptimizationType.RESOURCE) == []
+
+def test_writes_append_and_compact(storage_path):
+    """Test that saves append records and superseded records get compacted."""
+    repository = OptimizationMetricsRepository(storage_path)
+    repository.COMPACTION_THRESHOLD = 4
+    result = make_result("web")
+    repository.save_optimization_result(make_result("api"))
+
+    for _ in range(3):
+        repository.save_optimization_result(result)
+    with open(storage_path) as f:
+        assert len(f.readlines()) == 4
+
+    # The fourth superseded record triggers compaction
+    repository.save_optimization_result(result)
+    repository.save_optimization_result(result)
+    with open(storage_path) as f:
+        assert len(f.readlines()) <= 3
+
+    reloaded = OptimizationMetricsRepository(storage_path)
+    assert [r.pipeline_id for r in reloaded.results] == ["api", "web"]
+
+def test_save_after_partial_line(storage_path):
+    """Test that a save after a crash mid-append is not joined to the partial line."""
+    repository = OptimizationMetricsRepository(storage_path)
+    first = make_result("web")
+    repository.save_optimization_result(first)
+    with open(storage_path, "a") as f:
+        f.write('{"op": "put", "res')
+
+    second = make_result("api")
+    OptimizationMetricsRepository(storage_path).save_optimization_result(second)
+
+    reloaded = OptimizationMetricsRepository(storage_path)
+    assert reloaded.get_optimization_result(second.id) is not None
+    assert [result.id for result in reloaded.results] == [first.id, second.id]
+    assert not any(name.endswith(".tmp") for name in os.listdir(os.path.dirname(storage_path)))
+
+def test_malformed_records_are_skipped_and_kept(storage_path):
+    """Test that a record with the wrong shape does not hide later records or get compacted away."""
+    repository = OptimizationMetricsRepository(storage_path)
+    first = make_result("web")
+    repository.save_optimization_result(first)
+    with open(storage_path, "a") as f:
+        f.write('{"op": "put", "result": {"pipeline_id": "web"}}\n')
+        f.write('["not", "a", "record"]\n')
+    repository.save_optimization_result(make_result("api"))
+
+    reloaded = OptimizationMetricsRepository(storage_path)
+    assert [result.pipeline_id for result in reloaded.results] == ["web", "api"]
+
+    reloaded.compact()
+    with open(storage_path) as f:
+        assert len(f.readlines()) == 4
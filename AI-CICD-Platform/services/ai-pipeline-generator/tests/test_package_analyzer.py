@@ -0,0 +1,229 @@
+"""
+Tests for the package analyzer service.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from ..services.package_analyzer import PackageAnalyzerService
+
+PINNED_REQUIREMENTS = """\
+#
+# This file is autogenerated by pip-compile
+#
+certifi==2023.7.22 \\
+    --hash=sha256:539cc1d13202e33ca466e88b2807e29f4c13049d6d87031a3c110744495cb082
+    # via requests
+idna==3.4 \\
+    --hash=sha256:90b77e79eaa3eba6de819a0c442c0b4ceefc341a7a2ab77d7562bf49f425c5c2
+    # via requests
+requests==2.31.0 \\
+    --hash=sha256:58cd2187c01e70e6e26505bca751777aa9f2ee0b7f4300988b709f44e013003f
+    # via -r requirements.in
+urllib3==2.0.4 \\
+    --hash=sha256:8d22f86aae8ef5e410d4f539fde9ce6b2113a001bb4d189e0aed70642d602b11
+    # via
+    #   -r requirements.in
+    #   requests
+"""
+
+POETRY_LOCK = """\
+[[package]]
+name = "Flask"
+version = "3.0.0"
+
+[package.dependencies]
+Werkzeug = ">=3.0.0"
+python-dotenv = {version = "*", optional = true}
+
+[[package]]
+name = "werkzeug"
+version = "3.0.1"
+
+[[package]]
+name = "python-dotenv"
+version = "1.0.0"
+
+[[package]]
+name = "pytest"
+version = "7.4.3"
+"""
+
+PYPROJECT = """\
+[tool.poetry.dependencies]
+python = "^3.11"
+flask = "^3.0"
+
+[tool.poetry.group.dev.dependencies]
+pytest = "^7.4"
+"""
+
+class TestPackageAnalyzerService:
+    """Tests for the PackageAnalyzerService class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.project_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Tear down test fixtures."""
+        shutil.rmtree(self.project_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def write_file(self, rel_path, content):
+        """Write a file into the test project."""
+        path = os.path.join(self.project_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content if isinstance(content, str) else json.dumps(content))
+
+    def edges(self, result, manager):
+        """Get the edges of a package manager's graph as (source, target) pairs."""
+        return {
+            (edge["source"], edge["target"])
+            for edge in result["dependency_graphs"][manager]["edges"]
+        }
+
+    def test_pinned_requirements_resolve_offline(self):
+        """Test that requirements pinned with hashes are resolved without running pipdeptree."""
+        self.write_file("requirements.txt", PINNED_REQUIREMENTS)
+        analyzer = PackageAnalyzerService(cache_dir=None)
+
+        with patch.object(analyzer, "_run_command") as run_command:
+            result = analyzer.analyze_project_dependencies(self.project_dir)
+
+        run_command.assert_not_called()
+        assert result["package_managers"] == ["pip"]
+        assert result["direct_dependencies"]["pip"]["requests"]["version"] == "2.31.0"
+        assert set(result["direct_dependencies"]["pip"]) == {"requests", "urllib3"}
+        assert result["transitive_dependencies"]["pip"]["certifi"] == {"version": "2023.7.22", "parent": "requests"}
+        assert self.edges(result, "pip") == {
+            ("package:project", "package:requests"),
+            ("package:project", "package:urllib3"),
+            ("package:requests", "package:certifi"),
+            ("package:requests", "package:idna"),
+            ("package:requests", "package:urllib3")
+        }
+
+    def test_requirements_without_hashes(self):
+        """Test that unpinned requirements are direct dependencies and hashes are not part of versions."""
+        analyzer = PackageAnalyzerService(cache_dir=None)
+
+        assert analyzer._parse_pinned_requirements("requests>=2.0\n") is None
+        assert analyzer._parse_requirements_txt(
+            "requests==2.31.0 \\\n    --hash=sha256:abc\nflask>=3.0  # web\n"
+        ) == {"requests": "2.31.0", "flask": "3.0"}
+
+    def test_poetry_lock(self):
+        """Test that poetry.lock packages are resolved with direct dependencies from pyproject.toml."""
+        self.write_file("poetry.lock", POETRY_LOCK)
+        self.write_file("pyproject.toml", PYPROJECT)
+        analyzer = PackageAnalyzerService(cache_dir=None, offline=True)
+
+        result = analyzer.analyze_project_dependencies(self.project_dir)
+
+        assert result["direct_dependencies"]["pip"]["flask"]["version"] == "3.0.0"
+        assert result["dev_dependencies"]["pip"]["pytest"]["version"] == "7.4.3"
+        assert result["transitive_dependencies"]["pip"]["werkzeug"] == {"version": "3.0.1", "parent": "flask"}
+        assert self.edges(result, "pip") == {
+            ("package:project", "package:flask"),
+            ("package:project", "package:pytest"),
+            ("package:flask", "package:werkzeug")
+        }
+
+    def test_package_lock(self):
+        """Test that package-lock.json trees are resolved like node does, including nested versions."""
+        self.write_file("package.json", {"dependencies": {"express": "^4.18.0"}, "devDependencies": {"jest": "^29.0.0"}})
+        self.write_file("package-lock.json", {
+            "lockfileVersion": 3,
+            "packages": {
+                "": {"dependencies": {"express": "^4.18.0"}, "devDependencies": {"jest": "^29.0.0"}},
+                "node_modules/express": {"version": "4.18.2", "dependencies": {"debug": "2.6.9", "ms": "2.0.0"}},
+                "node_modules/express/node_modules/debug": {"version": "2.6.9", "dependencies": {"ms": "2.0.0"}},
+                "node_modules/ms": {"version": "2.1.3"},
+                "node_modules/express/node_modules/ms": {"version": "2.0.0"},
+                "node_modules/jest": {"version": "29.7.0", "dev": True, "dependencies": {"ms": "^2.1.0"}}
+            }
+        })
+        analyzer = PackageAnalyzerService(cache_dir=None)
+
+        with patch.object(analyzer, "_run_command") as run_command:
+            result = analyzer.analyze_project_dependencies(self.project_dir)
+
+        run_command.assert_not_called()
+        assert result["dev_dependencies"]["npm"]["jest"]["version"] == "^29.0.0"
+        assert result["transitive_dependencies"]["npm"]["debug"] == {"version": "2.6.9", "parent": "express"}
+        assert ("package:debug", "package:ms") in self.edges(result, "npm")
+        assert ("package:jest", "package:ms") in self.edges(result, "npm")
+
+        tree = analyzer._parse_package_lock(json.load(open(os.path.join(self.project_dir, "package-lock.json"))), {})
+        assert tree["express"]["dependencies"]["ms"] == {"version": "2.0.0"}
+        assert tree["jest"]["dependencies"]["ms"] == {"version": "2.1.3"}
+
+    def test_package_lock_v1(self):
+        """Test that old lockfiles are resolved from their nested dependencies and requirements."""
+        analyzer = PackageAnalyzerService(cache_dir=None)
+
+        tree = analyzer._parse_package_lock({
+            "lockfileVersion": 1,
+            "dependencies": {
+                "express": {
+                    "version": "4.18.2",
+                    "requires": {"ms": "2.0.0"},
+                    "dependencies": {"ms": {"version": "2.0.0"}}
+                },
+                "ms": {"version": "2.1.3"}
+            }
+        }, {"dependencies": {"express": "^4.18.0"}})
+
+        assert tree == {"express": {"version": "4.18.2", "dependencies": {"ms": {"version": "2.0.0"}}}}
+
+    def test_results_are_cached_by_file_content(self):
+        """Test that unchanged manifests are served from the cache and changed ones re-analyzed."""
+        self.write_file("requirements.txt", "requests==2.31.0\n")
+        self.write_file("web/package.json", {"dependencies": {"express": "^4.18.0"}})
+        self.write_file("node_modules/left-pad/package.json", {"dependencies": {"ignored": "1.0.0"}})
+
+        analyzer = PackageAnalyzerService(cache_dir=self.cache_dir, offline=True)
+        expected = analyzer.analyze_project_dependencies(self.project_dir)
+        assert expected["package_managers"] == ["pip", "npm", "yarn"]
+        assert set(expected["direct_dependencies"]["npm"]) == {"express"}
+
+        analyzer = PackageAnalyzerService(cache_dir=self.cache_dir, offline=True)
+        with patch.object(analyzer, "_analyze_pip_dependencies") as analyze_pip, \
+             patch.object(analyzer, "_analyze_npm_dependencies") as analyze_npm:
+            assert analyzer.analyze_project_dependencies(self.project_dir) == expected
+        analyze_pip.assert_not_called()
+        analyze_npm.assert_not_called()
+
+        self.write_file("requirements.txt", "requests==2.32.0\n")
+        analyzer = PackageAnalyzerService(cache_dir=self.cache_dir, offline=True)
+        with patch.object(analyzer, "_analyze_npm_dependencies") as analyze_npm:
+            result = analyzer.analyze_project_dependencies(self.project_dir)
+        analyze_npm.assert_not_called()
+        assert result["direct_dependencies"]["pip"]["requests"]["version"] == "2.32.0"
+
+    def test_failed_commands_are_not_cached(self):
+        """Test that results the package manager failed to resolve are re-analyzed instead of cached."""
+        self.write_file("requirements.txt", "requests>=2.0\n")
+        tree = json.dumps([{"package": {"key": "requests", "installed_version": "2.31.0"}, "dependencies": []}])
+
+        analyzer = PackageAnalyzerService(cache_dir=self.cache_dir)
+        with patch.object(analyzer, "_run_command", return_value=None) as run_command:
+            analyzer.analyze_project_dependencies(self.project_dir)
+        run_command.assert_called_once()
+
+        analyzer = PackageAnalyzerService(cache_dir=self.cache_dir)
+        with patch.object(analyzer, "_run_command", return_value=tree) as run_command:
+            result = analyzer.analyze_project_dependencies(self.project_dir)
+        run_command.assert_called_once()
+        assert result["dependency_graphs"]["pip"]["nodes"]["package:requests"]["attributes"]["version"] == "2.31.0"
+
+        analyzer = PackageAnalyzerService(cache_dir=self.cache_dir)
+        with patch.object(analyzer, "_run_command") as run_command:
+            assert analyzer.analyze_project_dependencies(self.project_dir) == result
+        run_command.assert_not_called()
@@ -195,7 +195,7 @@ def mock_optimizer():
 
 @pytest.fixture
 def pipeline_generator(mock_openai_response, mock_optimizer):
-    with patch('services.pipeline_generator.OpenAI') as mock_openai:
+    with patch('services.pipeline_generator.AsyncOpenAI') as mock_openai:
         # Create a proper async mock for the create method
         async def mock_create(*args, **kwargs):
             return mock_openai_response
@@ -309,6 +309,53 @@ async def test_generate_pipeline_invalid_platform(pipeline_generator):
         )
     assert "Unsupported platform" in str(exc_info.value)
 
+class FakeChunkStream:
+    """Async stream of chat completion chunks, as returned by AsyncOpenAI with stream=True."""
+    
+    def __init__(self, content, chunk_size=16):
+        self.chunks = [
+            Mock(usage=None, choices=[Mock(delta=Mock(content=content[i:i + chunk_size]))])
+            for i in range(0, len(content), chunk_size)
+        ]
+        self.chunks.append(Mock(usage=Mock(total_tokens=150), choices=[]))
+        self.closed = False
+    
+    def __aiter__(self):
+        return self._iterate()
+    
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+    
+    async def close(self):
+        self.closed = True
+
+@pytest.mark.asyncio
+async def test_stream_pipeline(pipeline_generator):
+    stream = FakeChunkStream(MOCK_RESPONSES["github-actions"])
+    requests = []
+    
+    async def mock_create(*args, **kwargs):
+        requests.append(kwargs)
+        return stream
+    
+    pipeline_generator.client.chat.completions.create = mock_create
+    
+    events = [
+        event async for event in pipeline_generator.stream_pipeline(
+            description="Run tests on push to main branch",
+            platform="github-actions"
+        )
+    ]
+    
+    assert requests[0]["stream"] is True
+    assert "".join(e["data"]["content"] for e in events if e["event"] == "token") == MOCK_RESPONSES["github-actions"]
+    assert ["jobs", "test"] in [e["data"]["path"] for e in events if e["event"] == "section"]
+    assert events[-1]["event"] == "complete"
+    assert events[-1]["data"]["pipeline_config"]["name"] == "Test Pipeline"
+    assert events[-1]["data"]["metadata"]["tokens_used"] == 150
+    assert stream.closed
+
 def test_validate_yaml_success(pipeline_generator):
     valid_yaml = """
 name: Test
@@ -0,0 +1,145 @@
+import pytest
+from unittest.mock import patch
+
+from models.pipeline_ir import PipelineIR
+from models.optimization_metrics import OptimizationMetricsRepository
+from services.optimization_passes import OptimizationPass, PassManager
+from services.cache_optimizer import CacheOptimizerService
+from services.resource_optimizer import ResourceOptimizerService
+from services.parallel_execution_optimizer import ParallelExecutionOptimizerService
+
+GITHUB_PIPELINE = {
+    "name": "CI",
+    "jobs": {
+        "test": {
+            "runs-on": "ubuntu-latest",
+            "timeout-minutes": 10,
+            "steps": [
+                {"uses": "actions/checkout@v3"},
+                {"uses": "actions/setup-node@v3", "with": {"cache": "npm"}},
+                {"uses": "actions/cache@v3", "with": {"path": "~/.cache", "key": "deps"}},
+                {"name": "Test", "run": "npm test"}
+            ]
+        },
+        "lint": {"runs-on": "ubuntu-latest", "steps": [{"run": "npm run lint"}]},
+        "build": {"runs-on": "ubuntu-latest", "needs": ["test", "lint"], "steps": []},
+        "deploy": {"runs-on": "ubuntu-latest", "needs": "build"}
+    }
+}
+
+@pytest.fixture
+def metrics_repository(tmp_path):
+    return OptimizationMetricsRepository(str(tmp_path / "optimization_metrics.jsonl"))
+
+def test_github_actions_ir():
+    """Test jobs, steps, needs, caches, resources and indexes of a GitHub Actions workflow."""
+    ir = PipelineIR.from_config("github-actions", GITHUB_PIPELINE)
+
+    assert list(ir.jobs) == ["test", "lint", "build", "deploy"]
+    test = ir.jobs["test"]
+    assert [step.name for step in test.steps] == ["actions/checkout@v3", "actions/setup-node@v3", "actions/cache@v3", "Test"]
+    assert test.steps[3].run == "npm test"
+    assert [cache["type"] for cache in test.caches] == ["setup", "cache"]
+    assert test.caches[1]["paths"] == ["~/.cache"]
+    assert test.resources == {"runner": "ubuntu-latest", "timeout_minutes": 10}
+
+    assert ir.jobs["deploy"].needs == ("build",)
+    assert ir.dependents["test"] == ("build",)
+    assert ir.dependents["build"] == ("deploy",)
+    assert ir.get_dependencies()["build"] == {"test", "lint"}
+
+def test_ir_is_immutable_and_components_are_shared():
+    """Test that the IR cannot be modified and builds its component view once."""
+    ir = PipelineIR.from_config("github-actions", GITHUB_PIPELINE)
+
+    with pytest.raises(AttributeError):
+        ir.platform = "gitlab-ci"
+    with pytest.raises(AttributeError):
+        ir.jobs["test"].needs = ()
+    with pytest.raises(TypeError):
+        ir.jobs["new"] = None
+
+    assert ir.components is ir.components
+    assert ir.components["test"] == {
+        "id": "test",
+        "type": "job",
+        "config": GITHUB_PIPELINE["jobs"]["test"],
+        "steps": GITHUB_PIPELINE["jobs"]["test"]["steps"]
+    }
+
+def test_other_platforms():
+    """Test needs and stages on GitLab CI, CircleCI and Jenkins."""
+    gitlab = PipelineIR.from_config("gitlab-ci", {
+        "stages": ["build", "test"],
+        "compile": {"stage": "build", "script": ["make"], "cache": {"key": "make", "paths": ["out/"]}},
+        "unit": {"stage": "test", "script": "make test", "needs": [{"job": "compile"}], "image": "gcc"},
+        ".template": {"script": ["echo"]}
+    })
+    assert list(gitlab.jobs) == ["compile", "unit"]
+    assert gitlab.jobs["unit"].needs == ("compile",)
+    assert gitlab.jobs["unit"].stage_index == 1
+    assert gitlab.jobs["compile"].caches[0]["paths"] == ["out/"]
+    assert gitlab.jobs_by_stage == {"build": ("compile",), "test": ("unit",)}
+    assert gitlab.components["unit"]["script"] == "make test"
+
+    circle = PipelineIR.from_config("circle-ci", {
+        "jobs": {
+            "build": {"docker": [{"image": "cimg/node:16"}], "steps": ["checkout", {"restore_cache": {"keys": ["v1"]}}, {"run": "npm ci"}]},
+            "test": {"resource_class": "large", "steps": [{"run": {"name": "Test", "command": "npm test"}}]}
+        },
+        "workflows": {"main": {"jobs": ["build", {"test": {"requires": ["build"]}}]}}
+    })
+    assert circle.jobs["test"].needs == ("build",)
+    assert [step.name for step in circle.jobs["build"].steps] == ["checkout", "restore_cache", "npm ci"]
+    assert circle.jobs["build"].caches[0]["key"] == ["v1"]
+    assert circle.jobs["build"].resources == {"image": "cimg/node:16"}
+    assert circle.jobs["test"].steps[0].run == "npm test"
+
+    jenkins = PipelineIR.from_config("jenkins", {"stages": [{"name": "Build"}, {"name": "Test", "steps": ["sh 'make test'"]}]})
+    assert jenkins.jobs["Test"].needs == ("Build",)
+    assert jenkins.components["Test"]["stage_index"] == 1
+
+    assert PipelineIR.from_config("unsupported-platform", {}).jobs == {}
+    assert PipelineIR.from_config("gitlab-ci", {"jenkinsfile": "pipeline {}"}).jobs == {}
+
+def test_pass_manager_shares_one_ir(metrics_repository):
+    """Test that optimizer passes run over one IR and save their results in one write."""
+    cache_optimizer = CacheOptimizerService(metrics_repository)
+    resource_optimizer = ResourceOptimizerService(metrics_repository)
+    parallel_optimizer = ParallelExecutionOptimizerService(metrics_repository)
+    manager = PassManager([
+        OptimizationPass(
+            "parallelization",
+            lambda pipeline_id, ir, data: parallel_optimizer.analyze_parallelization_opportunities(pipeline_id, ir.platform, ir.config, data, ir=ir),
+            parallel_optimizer._apply_parallelization_optimizations
+        ),
+        OptimizationPass(
+            "resource",
+            lambda pipeline_id, ir, data: resource_optimizer.analyze_resource_usage(pipeline_id, ir.platform, ir.config, data, ir=ir)
+        ),
+        OptimizationPass(
+            "caching",
+            lambda pipeline_id, ir, data: cache_optimizer.analyze_caching_strategies(pipeline_id, ir.platform, ir.config, data, ir=ir),
+            cache_optimizer._apply_caching_optimizations
+        ),
+        OptimizationPass("performance", lambda pipeline_id, ir, data: {"ran": True}, requires_execution_data=True)
+    ], metrics_repository)
+
+    ir = PipelineIR.from_config("github-actions", GITHUB_PIPELINE)
+    with patch.object(PipelineIR, "from_config") as from_config:
+        analyses = manager.analyze("web", ir)
+        assert from_config.call_count == 0
+
+    assert analyses["parallelization"]["dependencies"]["build"] == ["lint", "test"]
+    assert analyses["resource"]["resource_requirements"]["lint"] == {"runner": "ubuntu-latest"}
+    assert list(analyses["caching"]["caching_configs"]) == ["test"]
+    assert analyses["performance"] == {}
+
+    # Three results, written in one append
+    with open(metrics_repository.storage_path) as f:
+        assert len(f.readlines()) == 3
+    assert metrics_repository.count_optimization_results(pipeline_id="web") == 3
+
+    optimized_config, applied = manager.apply("github-actions", dict(GITHUB_PIPELINE), analyses)
+    assert list(applied) == ["parallelization", "caching"]
+    assert optimized_config["jobs"] == GITHUB_PIPELINE["jobs"]
@@ -0,0 +1,74 @@
+import pytest
+import yaml
+
+from services import yaml_loader
+from services.platform_templates import (
+    PIPELINE_TEMPLATES,
+    apply_template,
+    get_compiled_template,
+    get_template_variables,
+    load_template_config,
+    _parse_template
+)
+
+def replace_placeholders(platform, template_name, variables):
+    """Render a template by plain text replacement."""
+    template = PIPELINE_TEMPLATES[platform][template_name]
+    content = template["template"]
+    for name, value in {**template["variables"], **variables}.items():
+        content = content.replace(f"{{{{{name}}}}}", str(value))
+    return content
+
+@pytest.mark.parametrize("platform,template_name", [
+    (platform, template_name)
+    for platform, templates in PIPELINE_TEMPLATES.items()
+    for template_name in templates
+])
+def test_compiled_templates_render_like_replacement(platform, template_name):
+    """Test that compiled templates render every template like plain replacement."""
+    variables = {"main_branch": "release", "node_version": 20, "unused": "x"}
+
+    assert apply_template(platform, template_name, {}) == replace_placeholders(platform, template_name, {})
+    assert apply_template(platform, template_name, variables) == replace_placeholders(platform, template_name, variables)
+
+def test_placeholders_are_extracted_once():
+    """Test that templates are compiled once and keep other expressions intact."""
+    compiled = get_compiled_template("github-actions", "basic-node")
+
+    assert compiled is get_compiled_template("github-actions", "basic-node")
+    assert {"main_branch", "node_version", "install_command", "test_command"} <= set(compiled.placeholders)
+    assert get_template_variables("github-actions", "basic-node") is compiled.defaults
+    assert "${{ matrix.node-version }}" in apply_template("github-actions", "basic-node", {})
+    assert get_compiled_template("github-actions", "missing") is None
+    assert apply_template("github-actions", "missing", {}) is None
+
+def test_parsed_configs_are_cached_and_copied():
+    """Test that configurations are parsed once per set of values and can be modified safely."""
+    _parse_template.cache_clear()
+
+    config = load_template_config("github-actions", "basic-node", {"main_branch": "develop", "unused": 1})
+    config["jobs"]["build"]["runs-on"] = "modified"
+
+    # Variables without a placeholder do not affect the cache key
+    again = load_template_config("github-actions", "basic-node", {"main_branch": "develop"})
+    assert again["jobs"]["build"]["runs-on"] == "ubuntu-latest"
+    assert again[True]["push"]["branches"] == ["develop"]
+    assert _parse_template.cache_info().hits == 1
+
+    assert load_template_config("github-actions", "basic-node", {"main_branch": "main"})[True]["push"]["branches"] == ["main"]
+    assert _parse_template.cache_info().misses == 2
+
+def test_invalid_template_yaml():
+    """Test that variables producing invalid YAML raise a ValueError."""
+    with pytest.raises(ValueError):
+        load_template_config("github-actions", "basic-node", {"main_branch": "[unclosed"})
+
+def test_yaml_loader_matches_safe_load():
+    """Test that the YAML helpers behave like the safe loader and dumper."""
+    content = apply_template("gitlab-ci", next(iter(PIPELINE_TEMPLATES["gitlab-ci"])), {})
+    config = yaml_loader.load_yaml(content)
+
+    assert config == yaml.safe_load(content)
+    assert yaml.safe_load(yaml_loader.dump_yaml(config, default_flow_style=False)) == config
+    if yaml.__with_libyaml__:
+        assert yaml_loader.SafeLoader is yaml.CSafeLoader
@@ -0,0 +1,77 @@
+import pytest
+
+from services.yaml_stream_validator import IncrementalYAMLValidator
+
+GITHUB_ACTIONS = """Here is your pipeline:
+
+```yaml
+name: CI
+on:
+  push:
+    branches: [main,
+      develop]
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - run: |
+          npm ci
+          npm test
+  build:
+    needs: test
+    runs-on: ubuntu-latest
+```
+
+It runs tests before building.
+"""
+
+def feed_in_chunks(validator, text, size=7):
+    """Feed text in fixed-size chunks, collecting the completed sections."""
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(validator.feed(text[i:i + size]))
+    completed.extend(validator.finish())
+    return completed
+
+def test_sections_are_validated_as_they_complete():
+    """Test that jobs and top-level keys are reported once complete."""
+    validator = IncrementalYAMLValidator()
+
+    completed = feed_in_chunks(validator, GITHUB_ACTIONS)
+
+    assert completed == [["name"], ["on", "push"], ["on"], ["jobs", "test"], ["jobs", "build"], ["jobs"]]
+    assert validator.documents == 1
+
+def test_job_is_reported_before_the_stream_ends():
+    """Test that a job is validated when the next one starts."""
+    validator = IncrementalYAMLValidator()
+
+    completed = validator.feed("jobs:\n  test:\n    script: make test\n  deploy:\n")
+
+    assert completed == [["jobs", "test"]]
+
+def test_invalid_section_fails_early():
+    """Test that invalid YAML is reported at the next boundary, before the stream ends."""
+    validator = IncrementalYAMLValidator()
+    validator.feed("stages:\n  - test\ntest_job:\n  script: [make test\n")
+
+    with pytest.raises(ValueError):
+        validator.feed("deploy_job:\n")
+
+def test_documents_and_raw_yaml():
+    """Test unfenced YAML with several documents."""
+    validator = IncrementalYAMLValidator()
+
+    completed = feed_in_chunks(validator, "version: 2.1\n---\njobs:\n  test:\n    docker: []\n")
+
+    assert completed == [["version"], ["jobs", "test"], ["jobs"]]
+    assert validator.documents == 2
+
+    with pytest.raises(ValueError):
+        feed_in_chunks(IncrementalYAMLValidator(), "name: CI\n---\n[not, a, pipeline]\n")
+
+def test_prose_without_code_block_is_left_to_final_parse():
+    """Test that prose is not mistaken for invalid YAML."""
+    validator = IncrementalYAMLValidator()
+
+    assert feed_in_chunks(validator, "Sure! I can't write that: it needs [more detail.\n") == []
@@ -0,0 +1,77 @@
+"""
+Benchmark API key validation throughput with and without the verified-key cache.
+
+Usage:
+    python benchmarks/benchmark_api_key_validation.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import importlib
+import sys
+import os
+import time
+import types
+
+# The gateway's modules use package-relative imports, and its directory name is
+# not a valid package name, so register the directory as the "api_gateway" package
+GATEWAY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if "api_gateway" not in sys.modules:
+    gateway_package = types.ModuleType("api_gateway")
+    gateway_package.__path__ = [GATEWAY_DIR]
+    sys.modules["api_gateway"] = gateway_package
+
+ApiKeyService = importlib.import_module("api_gateway.services.api_key_service").ApiKeyService
+get_settings = importlib.import_module("api_gateway.config").get_settings
+
+async def run_validations(service: ApiKeyService, raw_keys, requests: int, concurrency: int) -> float:
+    """
+    Validate keys from `concurrency` concurrent clients and return requests per second
+    """
+    per_client = max(1, requests // concurrency)
+
+    async def client(index: int):
+        raw_key = raw_keys[index % len(raw_keys)]
+        for _ in range(per_client):
+            result = await service.validate_api_key(raw_key)
+            assert result is not None
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return per_client * concurrency / elapsed
+
+async def benchmark(requests: int, concurrency: int, keys: int, cache_ttl: int) -> float:
+    service = ApiKeyService()
+    service.settings = get_settings().model_copy(update={"api_key_cache_ttl": cache_ttl})
+
+    raw_keys = []
+    for i in range(keys):
+        raw_key, _ = await service.create_api_key(user_id=f"user_{i}", name=f"bench-{i}")
+        raw_keys.append(raw_key)
+
+    # Warm up so the cached run measures steady-state traffic
+    for raw_key in raw_keys:
+        await service.validate_api_key(raw_key)
+
+    return await run_validations(service, raw_keys, requests, concurrency)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--keys", type=int, default=10, help="distinct API keys in the traffic mix")
+    args = parser.parse_args()
+
+    # Baseline: cache disabled, every request runs PBKDF2 (in the thread pool)
+    uncached = asyncio.run(benchmark(args.requests, args.concurrency, args.keys, cache_ttl=0))
+    cached = asyncio.run(
+        benchmark(args.requests, args.concurrency, args.keys, cache_ttl=get_settings().api_key_cache_ttl)
+    )
+
+    print(f"requests={args.requests} concurrency={args.concurrency} keys={args.keys}")
+    print(f"uncached: {uncached:10.1f} req/s")
+    print(f"cached:   {cached:10.1f} req/s")
+    print(f"speedup:  {cached / uncached:10.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -40,12 +40,19 @@ class Settings(BaseSettings):
     jwt_refresh_expiration_days: int = 7
     jwt_blacklist_enabled: bool = True
     jwt_blacklist_token_checks: List[str] = ["access", "refresh"]
+    jwt_verified_cache_size: int = 10000  # Verified tokens kept in memory
+    jwt_revocation_filter_capacity: int = 100000  # Revoked token IDs before the filter degrades
+    jwt_revocation_filter_error_rate: float = 0.001
     
     # Token Security
     token_rotation_enabled: bool = True
     token_reuse_detection_enabled: bool = True
     token_jti_claim_enabled: bool = True
     
+    # API Key Verification Cache
+    api_key_cache_ttl: int = 300  # Seconds a verified key skips PBKDF2
+    api_key_cache_max_entries: int = 10000
+    
     # OAuth2 Configuration (if using OAuth2)
     oauth2_issuer_url: Optional[str] = None
     oauth2_client_id: Optional[str] = None
@@ -82,6 +89,9 @@ class Settings(BaseSettings):
     rate_limit_enabled: bool = True
     rate_limit_requests: int = 100
     rate_limit_window: int = 60  # seconds
+    rate_limit_storage: str = "redis"  # "redis" (shared across replicas) or "memory"
+    rate_limit_fast_path_ratio: float = 0.1  # share of remaining quota a replica may admit locally
+    rate_limit_fast_path_ttl: float = 1.0  # seconds a local budget stays valid
     
     # Circuit Breaker
     circuit_breaker_enabled: bool = True
@@ -98,6 +108,30 @@ class Settings(BaseSettings):
         "security-enforcement": "http://localhost:8001",
         "self-healing-debugger": "http://localhost:8002"
     }
+    service_replicas: Dict[str, List[str]] = {}  # Extra static instances per service
+    
+    # Upstream Load Balancing
+    upstream_timeout: float = 30.0  # seconds
+    upstream_http2_enabled: bool = True  # Requires the h2 package
+    upstream_max_connections: int = 100  # per instance
+    upstream_max_keepalive_connections: int = 20  # per instance
+    load_balancer_ewma_decay: float = 0.3  # Weight of the newest latency sample
+    
+    # Health Checks
+    health_check_interval: float = 15.0  # seconds between probes of one instance
+    health_check_jitter: float = 0.2  # +/- share of the interval, spreads probes out
+    health_check_timeout: float = 5.0  # seconds
+    health_check_concurrency: int = 20  # probes in flight at once
+    passive_health_failure_threshold: int = 3  # consecutive 5xx/timeouts before an instance is marked down
+    
+    # Proxy Streaming
+    proxy_streaming_enabled: bool = True
+    proxy_stream_chunk_size: int = 64 * 1024  # bytes
+    
+    # WebSocket Fan-out
+    websocket_coalesce_interval: float = 0.25  # seconds; latest progress update per key wins
+    websocket_send_queue_limit: int = 100  # queued packets before a connection counts as slow
+    websocket_backlog_check_interval: float = 1.0  # seconds
     
     # Monitoring & Tracing
     prometheus_enabled: bool = True
@@ -108,6 +142,9 @@ class Settings(BaseSettings):
     # Caching
     cache_enabled: bool = True
     cache_ttl: int = 300  # seconds
+    cache_l1_max_bytes: int = 64 * 1024 * 1024  # in-process LRU budget
+    cache_l1_ttl: int = 30  # max seconds an entry stays in the in-process LRU
+    cache_invalidation_batch_size: int = 500  # keys per SCAN/DELETE round trip
     
     # CORS Configuration
     cors_origins: List[str] = ["*"]
@@ -283,43 +320,50 @@ CACHE_CONFIGS = {
         "ttl": 300,  # 5 minutes
         "max_size": 1000,  # KB
         "vary_by_user": False,
-        "vary_by_role": False
+        "vary_by_role": False,
+        "stale_while_revalidate": 0  # seconds served stale while refreshing
     },
     "short_term": {
         "ttl": 60,  # 1 minute
         "max_size": 500,
         "vary_by_user": False,
-        "vary_by_role": False
+        "vary_by_role": False,
+        "stale_while_revalidate": 30
     },
     "medium_term": {
         "ttl": 600,  # 10 minutes
         "max_size": 800,
         "vary_by_user": False,
-        "vary_by_role": True
+        "vary_by_role": True,
+        "stale_while_revalidate": 120
     },
     "long_term": {
         "ttl": 3600,  # 1 hour
         "max_size": 200,
         "vary_by_user": False,
-        "vary_by_role": False
+        "vary_by_role": False,
+        "stale_while_revalidate": 600
     },
     "user_specific": {
         "ttl": 300,  # 5 minutes
         "max_size": 500,
         "vary_by_user": True,
-        "vary_by_role": False
+        "vary_by_role": False,
+        "stale_while_revalidate": 60
     },
     "role_specific": {
         "ttl": 600,  # 10 minutes
         "max_size": 800,
         "vary_by_user": False,
-        "vary_by_role": True
+        "vary_by_role": True,
+        "stale_while_revalidate": 120
     },
     "no_cache": {
         "ttl": 0,
         "max_size": 0,
         "vary_by_user": False,
-        "vary_by_role": False
+        "vary_by_role": False,
+        "stale_while_revalidate": 0
     }
 }
 
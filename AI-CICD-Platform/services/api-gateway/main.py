@@ -1,6 +1,7 @@
 from fastapi import FastAPI, HTTPException, Depends, Request, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import structlog
 import uvicorn
 from typing import Optional, Dict, Any, List
@@ -27,6 +28,7 @@ from .services.token_service import TokenService
 from .services.version_service import VersionService
 from .services.api_key_service import ApiKeyService
 from .services.websocket_service import WebSocketService, WebSocketEvent
+from .services.route_compiler import RouteCompiler, RoutePlan
 
 # Configure structured logging
 logger = structlog.get_logger()
@@ -49,15 +51,25 @@ app.add_middleware(
 class GatewayService:
     def __init__(self):
         self.settings = get_settings()
-        self.auth_service = AuthService()
         self.resilience_service = ResilienceService()
-        self.routing_service = RoutingService()
+        self.auth_service = AuthService(
+            rate_limit_backend=self.resilience_service.rate_limit_backend
+        )
+        self.websocket_service = WebSocketService()
+        self.routing_service = RoutingService(
+            resilience_service=self.resilience_service,
+            websocket_service=self.websocket_service
+        )
         self.metrics_service = MetricsService()
         self.cache_service = CacheService()
         self.token_service = TokenService()
         self.version_service = VersionService()
         self.api_key_service = ApiKeyService()
-        self.websocket_service = WebSocketService()
+        
+        # Compile per-(service, endpoint, version) request plans up front
+        self.route_compiler = RouteCompiler(self.version_service._versions.values())
+        for service, service_config in SERVICE_ROUTES.items():
+            self.route_compiler.register_service(service, service_config)
 
     def get_auth_service(self) -> AuthService:
         return self.auth_service
@@ -85,6 +97,9 @@ class GatewayService:
         
     def get_websocket_service(self) -> WebSocketService:
         return self.websocket_service
+        
+    def get_route_compiler(self) -> RouteCompiler:
+        return self.route_compiler
 
 gateway_service = GatewayService()
 
@@ -100,6 +115,7 @@ async def shutdown_event():
     await gateway_service.metrics_service.cleanup()
     await gateway_service.cache_service.cleanup()
     await gateway_service.token_service.cleanup()
+    await gateway_service.websocket_service.cleanup()
 
 @app.post("/api/v{version}/events/emit")
 async def emit_event(
@@ -188,6 +204,18 @@ async def list_versions(
     
     return response
 
+@app.get("/routes")
+async def list_routes(
+    route_compiler: RouteCompiler = Depends(gateway_service.get_route_compiler)
+):
+    """List the compiled route plans"""
+    routes = route_compiler.describe()
+    return {
+        "routes": routes,
+        "count": len(routes),
+        "compiled_at": route_compiler.compiled_at.isoformat() if route_compiler.compiled_at else None
+    }
+
 @app.post("/api/v{version}/auth/token")
 async def login(
     version: str,
@@ -473,255 +501,265 @@ async def get_current_user(
     
     return None
 
-@app.api_route("/api/v{version}/{service}/{endpoint:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def proxy_request_versioned(
-    version: str,
-    service: str,
-    endpoint: str,
+def should_stream_response(endpoint_config: Dict[str, Any]) -> bool:
+    """Non-cacheable endpoints are relayed as raw streams unless they opt out"""
+    if not gateway_service.settings.proxy_streaming_enabled:
+        return False
+    return endpoint_config.get(
+        "stream_response",
+        not endpoint_config.get("cache_enabled", False)
+    )
+
+async def stream_proxy_response(
+    context: RequestContext,
     request: Request,
-    response: Response,
-    accept_version: Optional[str] = Header(None),
-    current_user: Optional[UserInfo] = Depends(get_current_user),
-    auth_service: AuthService = Depends(gateway_service.get_auth_service),
-    resilience_service: ResilienceService = Depends(gateway_service.get_resilience_service),
-    routing_service: RoutingService = Depends(gateway_service.get_routing_service),
-    metrics_service: MetricsService = Depends(gateway_service.get_metrics_service),
-    cache_service: CacheService = Depends(gateway_service.get_cache_service),
-    version_service: VersionService = Depends(gateway_service.get_version_service)
-):
+    headers: Dict[str, str],
+    routing_service: RoutingService,
+    metrics_service: MetricsService
+) -> StreamingResponse:
     """
-    Versioned proxy endpoint that handles all service requests
+    Relay an upstream response chunk by chunk without buffering or decoding it
     """
+    start_time = datetime.utcnow()
+    
+    # Forward the request body as a stream as well
+    content = request.stream() if request.method in ["POST", "PUT"] else None
+    upstream = await routing_service.stream_request(
+        context.service,
+        context.endpoint,
+        request.method,
+        headers,
+        content
+    )
+    
+    async def record_metrics(response_bytes: int):
+        await metrics_service.record_request_metrics(
+            context,
+            ServiceResponse(
+                status_code=upstream.status_code,
+                body=None,
+                duration_ms=(datetime.utcnow() - start_time).total_seconds() * 1000,
+                metadata={"streamed": True}
+            ),
+            cache_hit=False,
+            response_bytes=response_bytes
+        )
+    
+    # The upstream is released after the response is sent even if the
+    # body is never iterated, and here if the handoff itself fails
     try:
-        # Validate API version
-        if not await version_service.is_version_supported(version):
-            raise HTTPException(
-                status_code=400,
-                detail=f"API version {version} is not supported"
-            )
-        
-        # Create request context with version information
-        context = RequestContext(
-            service=service,
-            endpoint=endpoint,
-            user=current_user,
-            trace_id=str(uuid.uuid4()),
-            api_version=version,
-            is_version_explicit=True
+        return StreamingResponse(
+            routing_service.iter_stream_response(upstream, on_complete=record_metrics),
+            status_code=upstream.status_code,
+            headers=routing_service.filter_stream_headers(upstream.headers),
+            background=BackgroundTask(routing_service.release_stream_response, upstream)
         )
-
-        # Check service configuration
-        service_config = SERVICE_ROUTES.get(service)
-        if not service_config:
-            raise HTTPException(status_code=404, detail=f"Service {service} not found")
-
-        endpoint_config = service_config["endpoints"].get(endpoint)
-        if not endpoint_config:
-            raise HTTPException(status_code=404, detail=f"Endpoint {endpoint} not found")
-        
-        # Check version compatibility for endpoint
-        min_version = endpoint_config.get("min_api_version")
-        max_version = endpoint_config.get("max_api_version")
-        
-        if min_version and version < min_version:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Endpoint requires API version {min_version} or higher"
-            )
-        
-        if max_version and version > max_version:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Endpoint supports API version {max_version} or lower"
-            )
-
-        # Check authentication
-        if endpoint_config.get("auth_required", True) and not current_user:
-            raise HTTPException(
-                status_code=401,
-                detail="Authentication required"
-            )
-
-        # Check permissions
-        if current_user:
-            # Check if user is allowed to use this API version
-            if current_user.allowed_versions and version not in current_user.allowed_versions:
-                raise HTTPException(
-                    status_code=403,
-                    detail=f"User is not authorized to use API version {version}"
-                )
-            
-            # Check version-specific permissions if available
-            version_permissions = current_user.version_specific_permissions.get(version, [])
-            required_permissions = endpoint_config.get("permissions_required", [])
-            
-            # If we have version-specific permissions, use those instead of the global ones
-            if version_permissions and required_permissions:
-                if not any(perm in version_permissions for perm in required_permissions):
-                    raise HTTPException(
-                        status_code=403,
-                        detail="Insufficient permissions for this API version"
-                    )
-            # Otherwise fall back to standard permission check
-            elif not await auth_service.check_permissions(
-                current_user,
-                endpoint_config.get("roles_required", []),
-                endpoint_config.get("permissions_required", [])
-            ):
-                raise HTTPException(
-                    status_code=403,
-                    detail="Insufficient permissions"
-                )
-
-        # Check rate limit
-        rate_limit_key = f"{service}:{endpoint}:{version}:{current_user.user_id if current_user else 'anonymous'}"
-        is_allowed, retry_after = await resilience_service.check_rate_limit(
-            rate_limit_key,
-            endpoint_config.get("rate_limit_type", "default")
+    except BaseException:
+        await routing_service.release_stream_response(upstream)
+        raise
+
+async def route_not_found(service: str, endpoint: str, version: str) -> HTTPException:
+    """Explain why no compiled plan matches a versioned request"""
+    if not await gateway_service.version_service.is_version_supported(version):
+        return HTTPException(
+            status_code=400,
+            detail=f"API version {version} is not supported"
         )
-        
-        if not is_allowed:
-            await metrics_service.record_rate_limit(service, endpoint)
-            return JSONResponse(
-                status_code=429,
-                content=ERROR_TEMPLATES["rate_limit_exceeded"],
-                headers={"Retry-After": str(retry_after)}
-            )
+    
+    service_config = SERVICE_ROUTES.get(service)
+    if not service_config:
+        return HTTPException(status_code=404, detail=f"Service {service} not found")
+    
+    return HTTPException(status_code=404, detail=f"Endpoint {endpoint} not found")
 
-        # Check circuit breaker
-        is_allowed, retry_after = await resilience_service.check_circuit_breaker(
+async def execute_route_plan(
+    plan: RoutePlan,
+    request: Request,
+    current_user: Optional[UserInfo]
+) -> Response:
+    """
+    Run a versioned request through its compiled plan.
+    
+    Checks run in order: version, access, rate limit, circuit breaker,
+    then the request is served from cache, streamed, or forwarded.
+    """
+    resilience_service = gateway_service.resilience_service
+    routing_service = gateway_service.routing_service
+    metrics_service = gateway_service.metrics_service
+    cache_service = gateway_service.cache_service
+    version_service = gateway_service.version_service
+    service = plan.service
+    endpoint = plan.endpoint
+    version = plan.version
+    
+    # Check version compatibility
+    if plan.version_error:
+        raise HTTPException(status_code=400, detail=plan.version_error)
+    
+    if plan.sunset_date and datetime.utcnow() > plan.sunset_date:
+        raise HTTPException(
+            status_code=400,
+            detail=f"API version {version} is not supported"
+        )
+    
+    # Check authentication and permissions
+    denied = plan.check_access(current_user)
+    if denied:
+        raise HTTPException(status_code=denied[0], detail=denied[1])
+    
+    context = RequestContext(
+        service=service,
+        endpoint=endpoint,
+        user=current_user,
+        trace_id=str(uuid.uuid4()),
+        api_version=version,
+        is_version_explicit=True
+    )
+    
+    # Check rate limit
+    is_allowed, retry_after = await resilience_service.check_rate_limit(
+        plan.rate_limit_key_prefix + (current_user.user_id if current_user else "anonymous"),
+        plan.rate_limit_type,
+        plan.rate_limit_config
+    )
+    
+    if not is_allowed:
+        await metrics_service.record_rate_limit(service, endpoint)
+        return JSONResponse(
+            status_code=429,
+            content=ERROR_TEMPLATES["rate_limit_exceeded"],
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    # Check that the circuit breaker of at least one instance is closed
+    is_allowed, retry_after = routing_service.check_availability(service)
+    
+    if not is_allowed:
+        await metrics_service.record_circuit_break(service)
+        return JSONResponse(
+            status_code=503,
+            content=ERROR_TEMPLATES["circuit_open"],
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    # Add version information to headers
+    headers = dict(request.headers)
+    headers["X-API-Version"] = version
+    
+    # Check cache
+    if plan.cache_enabled and request.method == "GET":
+        cache_key = plan.cache_key_prefix + cache_service.generate_cache_key(
             service,
-            endpoint_config.get("circuit_breaker_type", "default")
+            endpoint,
+            request.method,
+            dict(request.query_params),
+            current_user,
+            plan.cache_vary_by_user,
+            plan.cache_vary_by_role
         )
         
-        if not is_allowed:
-            await metrics_service.record_circuit_break(service)
-            return JSONResponse(
-                status_code=503,
-                content=ERROR_TEMPLATES["circuit_open"],
-                headers={"Retry-After": str(retry_after)}
-            )
-
-        # Check cache
-        if endpoint_config.get("cache_enabled", False) and request.method == "GET":
-            # Get cache configuration
-            cache_config_type = endpoint_config.get("cache_config", "default")
-            cache_config = CACHE_CONFIGS.get(cache_config_type, CACHE_CONFIGS["default"])
-            
-            # Determine if we should vary cache by user or role
-            vary_by_user = endpoint_config.get("cache_vary_by_user", False)
-            vary_by_role = endpoint_config.get("cache_vary_by_role", False)
-            
-            # Generate cache key with version information
-            cache_key = f"v{version}:" + cache_service.generate_cache_key(
+        cache_tags = list(plan.cache_tags)
+        if current_user and plan.cache_vary_by_user:
+            cache_tags.append(CacheService.user_tag(current_user.user_id))
+        
+        async def fetch_response() -> ServiceResponse:
+            return await routing_service.route_request(
                 service,
                 endpoint,
                 request.method,
-                dict(request.query_params),
-                current_user,
-                vary_by_user,
-                vary_by_role
+                headers
             )
-            
-            # Try to get from cache
-            cached_response = await cache_service.get_cached_response(cache_key, cache_config)
-            if cached_response:
-                # Apply cache headers
-                response = JSONResponse(
-                    content=cached_response.body,
-                    status_code=cached_response.status_code,
-                    headers=cached_response.headers
-                )
-                await cache_service.apply_cache_headers(response, cache_config, is_cached=True)
-                
-                # Add version headers
-                await version_service.add_version_headers(response, version)
-                
-                # Record metrics
-                await metrics_service.record_request_metrics(
-                    context,
-                    cached_response,
-                    cache_hit=True
-                )
-                
-                return response
-
-        # Forward request
-        body = await request.json() if request.method in ["POST", "PUT"] else None
         
-        # Add version information to headers
-        headers = dict(request.headers)
-        headers["X-API-Version"] = version
+        # Serve from cache; concurrent misses share one upstream fetch
+        service_response, cache_hit = await cache_service.get_or_fetch(
+            cache_key,
+            fetch_response,
+            request,
+            plan.cache_config,
+            plan.cache_ttl,
+            cache_tags
+        )
         
-        service_response = await routing_service.route_request(
-            service,
-            endpoint,
-            request.method,
-            headers,
-            body
+        response = JSONResponse(
+            content=service_response.body,
+            status_code=service_response.status_code,
+            headers=service_response.headers
         )
-
+        if cache_hit or service_response.status_code < 400:
+            await cache_service.apply_cache_headers(response, plan.cache_config, is_cached=cache_hit)
+        
+        # Add version headers
+        await version_service.add_version_headers(response, version)
+        
         # Record metrics
         await metrics_service.record_request_metrics(
             context,
             service_response,
-            cache_hit=False
+            cache_hit=cache_hit
         )
-
-        # Cache successful GET responses if appropriate
-        if endpoint_config.get("cache_enabled", False) and request.method == "GET":
-            # Get cache configuration
-            cache_config_type = endpoint_config.get("cache_config", "default")
-            cache_config = CACHE_CONFIGS.get(cache_config_type, CACHE_CONFIGS["default"])
-            
-            # Check if response should be cached
-            should_cache = await cache_service.should_cache_response(
-                request, 
-                service_response,
-                cache_config
-            )
-            
-            if should_cache and service_response.status_code < 400:
-                # Cache the response
-                await cache_service.cache_response(
-                    cache_key,
-                    service_response,
-                    endpoint_config.get("cache_ttl"),
-                    cache_config
-                )
-                
-                # Apply cache headers to response
-                response = JSONResponse(
-                    content=service_response.body,
-                    status_code=service_response.status_code,
-                    headers=service_response.headers
-                )
-                await cache_service.apply_cache_headers(response, cache_config, is_cached=False)
-                
-                # Add version headers
-                await version_service.add_version_headers(response, version)
-                
-                return response
-
-        # Update circuit breaker
-        if service_response.status_code >= 500:
-            await resilience_service.record_failure(
-                service,
-                endpoint_config.get("circuit_breaker_type", "default")
-            )
-        else:
-            await resilience_service.record_success(service)
-
-        # Create response with version headers
-        response = JSONResponse(
-            content=service_response.body,
-            status_code=service_response.status_code,
-            headers=service_response.headers
+        
+        return response
+    
+    # Relay non-cacheable responses without buffering them
+    if plan.stream_response:
+        response = await stream_proxy_response(
+            context,
+            request,
+            headers,
+            routing_service,
+            metrics_service
         )
         await version_service.add_version_headers(response, version)
-        
         return response
+    
+    # Forward request
+    body = await request.json() if request.method in ["POST", "PUT"] else None
+    
+    service_response = await routing_service.route_request(
+        service,
+        endpoint,
+        request.method,
+        headers,
+        body
+    )
+    
+    # Record metrics
+    await metrics_service.record_request_metrics(
+        context,
+        service_response,
+        cache_hit=False
+    )
+    
+    # Create response with version headers
+    response = JSONResponse(
+        content=service_response.body,
+        status_code=service_response.status_code,
+        headers=service_response.headers
+    )
+    await version_service.add_version_headers(response, version)
+    
+    return response
+
+@app.api_route("/api/v{version}/{service}/{endpoint:path}", methods=["GET", "POST", "PUT", "DELETE"])
+async def proxy_request_versioned(
+    version: str,
+    service: str,
+    endpoint: str,
+    request: Request,
+    current_user: Optional[UserInfo] = Depends(get_current_user)
+):
+    """
+    Versioned proxy endpoint that handles all service requests
+    """
+    try:
+        plan = gateway_service.route_compiler.get_plan(service, endpoint, version)
+        if not plan:
+            raise await route_not_found(service, endpoint, version)
+        
+        return await execute_route_plan(plan, request, current_user)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             "request_failed",
@@ -742,7 +780,8 @@ async def proxy_request(
     auth_service: AuthService = Depends(gateway_service.get_auth_service),
     resilience_service: ResilienceService = Depends(gateway_service.get_resilience_service),
     routing_service: RoutingService = Depends(gateway_service.get_routing_service),
-    metrics_service: MetricsService = Depends(gateway_service.get_metrics_service)
+    metrics_service: MetricsService = Depends(gateway_service.get_metrics_service),
+    cache_service: CacheService = Depends(gateway_service.get_cache_service)
 ):
     """
     Main proxy endpoint that handles all service requests
@@ -798,11 +837,8 @@ async def proxy_request(
                 headers={"Retry-After": str(retry_after)}
             )
 
-        # Check circuit breaker
-        is_allowed, retry_after = await resilience_service.check_circuit_breaker(
-            service,
-            endpoint_config.get("circuit_breaker_type", "default")
-        )
+        # Check that the circuit breaker of at least one instance is closed
+        is_allowed, retry_after = routing_service.check_availability(service)
         
         if not is_allowed:
             await metrics_service.record_circuit_break(service)
@@ -833,25 +869,50 @@ async def proxy_request(
                 vary_by_role
             )
             
-            # Try to get from cache
-            cached_response = await cache_service.get_cached_response(cache_key, cache_config)
-            if cached_response:
-                # Apply cache headers
-                response = JSONResponse(
-                    content=cached_response.body,
-                    status_code=cached_response.status_code,
-                    headers=cached_response.headers
-                )
-                await cache_service.apply_cache_headers(response, cache_config, is_cached=True)
-                
-                # Record metrics
-                await metrics_service.record_request_metrics(
-                    context,
-                    cached_response,
-                    cache_hit=True
+            async def fetch_response() -> ServiceResponse:
+                return await routing_service.route_request(
+                    service,
+                    endpoint,
+                    request.method,
+                    dict(request.headers)
                 )
-                
-                return response
+            
+            # Serve from cache; concurrent misses share one upstream fetch
+            service_response, cache_hit = await cache_service.get_or_fetch(
+                cache_key,
+                fetch_response,
+                request,
+                cache_config,
+                endpoint_config.get("cache_ttl"),
+                cache_service.build_cache_tags(service, endpoint, current_user, vary_by_user)
+            )
+            
+            response = JSONResponse(
+                content=service_response.body,
+                status_code=service_response.status_code,
+                headers=service_response.headers
+            )
+            if cache_hit or service_response.status_code < 400:
+                await cache_service.apply_cache_headers(response, cache_config, is_cached=cache_hit)
+            
+            # Record metrics
+            await metrics_service.record_request_metrics(
+                context,
+                service_response,
+                cache_hit=cache_hit
+            )
+            
+            return response
+
+        # Relay non-cacheable responses without buffering them
+        if should_stream_response(endpoint_config):
+            return await stream_proxy_response(
+                context,
+                request,
+                dict(request.headers),
+                routing_service,
+                metrics_service
+            )
 
         # Forward request
         body = await request.json() if request.method in ["POST", "PUT"] else None
@@ -869,48 +930,6 @@ async def proxy_request(
             service_response,
             cache_hit=False
         )
-
-        # Cache successful GET responses if appropriate
-        if endpoint_config.get("cache_enabled", False) and request.method == "GET":
-            # Get cache configuration
-            cache_config_type = endpoint_config.get("cache_config", "default")
-            cache_config = CACHE_CONFIGS.get(cache_config_type, CACHE_CONFIGS["default"])
-            
-            # Check if response should be cached
-            should_cache = await cache_service.should_cache_response(
-                request, 
-                service_response,
-                cache_config
-            )
-            
-            if should_cache and service_response.status_code < 400:
-                # Cache the response
-                await cache_service.cache_response(
-                    cache_key,
-                    service_response,
-                    endpoint_config.get("cache_ttl"),
-                    cache_config
-                )
-                
-                # Apply cache headers to response
-                response = JSONResponse(
-                    content=service_response.body,
-                    status_code=service_response.status_code,
-                    headers=service_response.headers
-                )
-                await cache_service.apply_cache_headers(response, cache_config, is_cached=False)
-                
-                return response
-
-        # Update circuit breaker
-        if service_response.status_code >= 500:
-            await resilience_service.record_failure(
-                service,
-                endpoint_config.get("circuit_breaker_type", "default")
-            )
-        else:
-            await resilience_service.record_success(service)
-
         return service_response
 
     except Exception as e:
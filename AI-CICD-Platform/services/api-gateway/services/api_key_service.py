@@ -1,7 +1,11 @@
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Set, Tuple, Any
+import asyncio
+from collections import OrderedDict
 import secrets
 import hashlib
+import hmac
 import base64
+import time
 from datetime import datetime, timedelta
 import uuid
 import structlog
@@ -22,6 +26,12 @@ class ApiKeyService:
         
         # Mapping of key prefixes to full keys for quick lookups
         self._prefix_map: Dict[str, str] = {}
+        
+        # Keys that already passed PBKDF2 verification, keyed by an HMAC
+        # digest of the presented key: digest -> (key_id, expires_at)
+        self._digest_secret = secrets.token_bytes(32)
+        self._verified_keys: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._verified_by_key_id: Dict[str, Set[bytes]] = {}
     
     async def create_api_key(
         self,
@@ -41,8 +51,10 @@ class ApiKeyService:
         raw_key = f"ak_{secrets.token_urlsafe(32)}"
         key_prefix = raw_key[:8]  # First 8 chars as prefix
         
-        # Hash the key for storage
-        key_hash = self._hash_key(raw_key)
+        # Hash the key for storage without blocking the event loop
+        key_hash = await asyncio.get_running_loop().run_in_executor(
+            None, self._hash_key, raw_key
+        )
         
         # Set expiration if provided
         expires_at = None
@@ -106,10 +118,16 @@ class ApiKeyService:
             logger.warning("API key record not found", key_id=key_id)
             return None
         
-        # Verify the key hash
-        if not self._verify_key(api_key, api_key_record.key_hash):
-            logger.warning("API key hash verification failed", key_id=key_id)
-            return None
+        # Verify the key hash, skipping PBKDF2 for recently verified keys
+        digest = self._key_digest(api_key)
+        if not self._is_key_verified(digest, key_id):
+            is_valid = await asyncio.get_running_loop().run_in_executor(
+                None, self._verify_key, api_key, api_key_record.key_hash
+            )
+            if not is_valid:
+                logger.warning("API key hash verification failed", key_id=key_id)
+                return None
+            self._remember_verified_key(digest, key_id)
         
         # Check if the key is enabled
         if not api_key_record.enabled:
@@ -179,6 +197,7 @@ class ApiKeyService:
         
         # Disable the key
         api_key.enabled = False
+        self._forget_verified_keys(key_id)
         
         logger.info(
             "API key revoked",
@@ -264,6 +283,9 @@ class ApiKeyService:
         if metadata is not None:
             api_key.metadata = metadata
         
+        # Re-verify the key on its next use
+        self._forget_verified_keys(key_id)
+        
         logger.info(
             "API key updated",
             key_id=key_id,
@@ -272,6 +294,64 @@ class ApiKeyService:
         
         return api_key
     
+    def _key_digest(self, key: str) -> bytes:
+        """
+        Fast keyed digest of a presented API key, used as the cache key
+        """
+        return hmac.new(self._digest_secret, key.encode(), hashlib.sha256).digest()
+    
+    def _is_key_verified(self, digest: bytes, key_id: str) -> bool:
+        """
+        Check if a key digest was verified for this key ID within the TTL
+        """
+        entry = self._verified_keys.get(digest)
+        if not entry:
+            return False
+        
+        verified_key_id, expires_at = entry
+        if verified_key_id != key_id or time.monotonic() >= expires_at:
+            self._drop_verified_key(digest)
+            return False
+        
+        self._verified_keys.move_to_end(digest)
+        return True
+    
+    def _remember_verified_key(self, digest: bytes, key_id: str):
+        """
+        Cache a successful verification
+        """
+        ttl = self.settings.api_key_cache_ttl
+        if ttl <= 0 or self.settings.api_key_cache_max_entries <= 0:
+            return
+        
+        self._verified_keys[digest] = (key_id, time.monotonic() + ttl)
+        self._verified_keys.move_to_end(digest)
+        self._verified_by_key_id.setdefault(key_id, set()).add(digest)
+        
+        # Evict least recently used entries
+        while len(self._verified_keys) > self.settings.api_key_cache_max_entries:
+            oldest = next(iter(self._verified_keys))
+            self._drop_verified_key(oldest)
+    
+    def _drop_verified_key(self, digest: bytes):
+        """
+        Remove a single cached verification
+        """
+        entry = self._verified_keys.pop(digest, None)
+        if entry:
+            digests = self._verified_by_key_id.get(entry[0])
+            if digests:
+                digests.discard(digest)
+                if not digests:
+                    del self._verified_by_key_id[entry[0]]
+    
+    def _forget_verified_keys(self, key_id: str):
+        """
+        Drop cached verifications for a key so its next use re-verifies
+        """
+        for digest in self._verified_by_key_id.pop(key_id, set()):
+            self._verified_keys.pop(digest, None)
+    
     def _hash_key(self, key: str) -> str:
         """
         Hash an API key for secure storage
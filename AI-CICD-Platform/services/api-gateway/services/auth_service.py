@@ -12,12 +12,13 @@ from ..config import get_settings, AuthProvider, RATE_LIMIT_CONFIGS
 from ..models.gateway_models import AuthToken, UserInfo, UserRole, TokenType, MFAMethod, RateLimitState
 from .token_service import TokenService
 from .cache_service import CacheService
+from .rate_limit_backend import RateLimitBackend
 
 # Configure structured logging
 logger = structlog.get_logger()
 
 class AuthService:
-    def __init__(self):
+    def __init__(self, rate_limit_backend: Optional[RateLimitBackend] = None):
         self.settings = get_settings()
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
         
@@ -49,6 +50,9 @@ class AuthService:
         # In-memory rate limiting for auth endpoints
         # In production, use Redis or similar
         self.auth_attempts: Dict[str, RateLimitState] = {}  # ip or username -> rate limit state
+        
+        # Optional shared backend for request counting; lockouts stay local
+        self.rate_limit_backend = rate_limit_backend
 
     async def authenticate_user(
         self,
@@ -527,7 +531,16 @@ class AuthService:
             state.consecutive_failures = consecutive_failures
         
         # Check if limit exceeded
-        if state.is_exceeded:
+        if self.rate_limit_backend:
+            is_allowed, _ = await self.rate_limit_backend.hit(
+                f"auth:{limit_type}:{key}",
+                config["requests"],
+                config["window"]
+            )
+        else:
+            is_allowed = not state.is_exceeded
+        
+        if not is_allowed:
             # Apply lockout if threshold reached
             if "lockout_threshold" in config and state.failed_count >= config["lockout_threshold"]:
                 lockout_minutes = config["lockout_duration"]
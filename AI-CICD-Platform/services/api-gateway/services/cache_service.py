@@ -1,8 +1,11 @@
-from typing import Dict, Optional, Any, List, Union
+from typing import Dict, Optional, Any, List, Union, Tuple, Callable, Awaitable
+from collections import OrderedDict
 import asyncio
 from datetime import datetime, timedelta
+import fnmatch
 import json
 import hashlib
+import time
 import aioredis
 import aiocache
 from aiocache.serializers import StringSerializer, PickleSerializer
@@ -22,6 +25,98 @@ from ..models.gateway_models import (
 # Configure structured logging
 logger = structlog.get_logger()
 
+# Response metadata field holding the epoch time a cached entry goes stale
+FRESH_UNTIL_FIELD = "cache_fresh_until"
+
+# Namespace of the gateway's cache entries
+CACHE_NAMESPACE = "api_gateway_cache"
+
+# Prefix of cache entry keys in Redis; aiocache's RedisCache joins the
+# namespace and the key with ":"
+CACHE_KEY_PREFIX = f"{CACHE_NAMESPACE}:"
+
+# Secondary index: one Redis set of cache keys per tag, plus a registry of tags
+TAG_PREFIX = "api_gateway_cache_tag:"
+TAG_REGISTRY_KEY = "api_gateway_cache_tags"
+
+# Tag sets outlive the longest-lived entry they can reference
+TAG_TTL = max(
+    config["ttl"] + config.get("stale_while_revalidate", 0)
+    for config in CACHE_CONFIGS.values()
+)
+
+def estimate_response_size(response: ServiceResponse) -> int:
+    """
+    Approximate serialized size of a response body in bytes
+    """
+    if isinstance(response.body, (dict, list)):
+        return len(json.dumps(response.body, default=str))
+    return len(str(response.body))
+
+class LocalResponseCache:
+    """
+    In-process LRU of cached responses bounded by an approximate byte budget.
+    Entries are owned by the cache; lookups return copies so callers cannot
+    mutate them
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        # key -> (response, expires_at, size)
+        self._entries: "OrderedDict[str, Tuple[ServiceResponse, float, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[ServiceResponse]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        
+        response, expires_at, _ = entry
+        if time.time() >= expires_at:
+            self.delete(key)
+            return None
+        
+        self._entries.move_to_end(key)
+        return response.model_copy(deep=True)
+
+    def set(self, key: str, response: ServiceResponse, expires_at: float, size: int):
+        if size > self.max_bytes:
+            return
+        
+        self.delete(key)
+        self._entries[key] = (response, expires_at, size)
+        self.size_bytes += size
+        
+        # Evict least recently used entries until within budget
+        while self.size_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+
+    def delete(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return False
+        self.size_bytes -= entry[2]
+        return True
+
+    def delete_matching(self, pattern: str) -> int:
+        keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def purge_expired(self):
+        now = time.time()
+        expired_keys = [
+            key for key, (_, expires_at, _) in self._entries.items()
+            if now >= expires_at
+        ]
+        for key in expired_keys:
+            self.delete(key)
+
 class CacheService:
     def __init__(self):
         self.settings = get_settings()
@@ -31,9 +126,20 @@ class CacheService:
             "hits": 0,
             "misses": 0,
             "invalidations": 0,
-            "stored": 0
+            "stored": 0,
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "stale_hits": 0,
+            "coalesced": 0,
+            "revalidations": 0
         }
         
+        # L1: in-process LRU in front of Redis
+        self._local = LocalResponseCache(self.settings.cache_l1_max_bytes)
+        
+        # In-flight upstream fetches by cache key (singleflight)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
         # Start background tasks
         self._init_task = asyncio.create_task(self._initialize())
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
@@ -52,7 +158,7 @@ class CacheService:
             self._cache = aiocache.Cache(
                 aiocache.Cache.REDIS,
                 endpoint=self.settings.redis_url,
-                namespace="api_gateway_cache",
+                namespace=CACHE_NAMESPACE,
                 serializer=PickleSerializer(),
                 pool_size=self.settings.redis_pool_size
             )
@@ -63,7 +169,7 @@ class CacheService:
             # Fallback to in-memory cache
             self._cache = aiocache.Cache(
                 aiocache.Cache.MEMORY,
-                namespace="api_gateway_cache",
+                namespace=CACHE_NAMESPACE,
                 serializer=PickleSerializer()
             )
             logger.warning("Using in-memory cache as fallback")
@@ -74,19 +180,29 @@ class CacheService:
         cache_config: Optional[Dict] = None
     ) -> Optional[ServiceResponse]:
         """
-        Get cached response if available
+        Get cached response if available, checking the in-process LRU
+        before Redis
         """
         if not self.settings.cache_enabled or not self._cache:
             return None
         
+        # L1 lookup
+        cached_data = self._local.get(cache_key)
+        if cached_data:
+            self._stats["hits"] += 1
+            self._stats["l1_hits"] += 1
+            return cached_data
+        
         try:
-            # Get from cache
+            # L2 lookup
             cached_data = await self._cache.get(cache_key)
             if not cached_data:
                 self._stats["misses"] += 1
                 return None
             
             self._stats["hits"] += 1
+            self._stats["l2_hits"] += 1
+            self._store_local(cache_key, cached_data.model_copy(deep=True))
             return cached_data
         except Exception as e:
             logger.error("Cache get error", error=str(e), key=cache_key)
@@ -97,10 +213,12 @@ class CacheService:
         cache_key: str,
         response: ServiceResponse,
         ttl: Optional[int] = None,
-        cache_config: Optional[Dict] = None
+        cache_config: Optional[Dict] = None,
+        tags: Optional[List[str]] = None
     ):
         """
-        Cache response for future use
+        Cache response for future use, registering the key under ``tags``
+        for later invalidation
         """
         if not self.settings.cache_enabled or not self._cache:
             return
@@ -109,21 +227,113 @@ class CacheService:
             # Use provided TTL or get from config
             config = cache_config or CACHE_CONFIGS.get("default")
             ttl = ttl or config["ttl"]
+            stale_ttl = config.get("stale_while_revalidate", 0)
+            
+            # Entries outlive their freshness by the stale-while-revalidate window;
+            # the freshness stamp goes on the cached copy, not the caller's response
+            entry = response.model_copy(deep=True)
+            entry.metadata[FRESH_UNTIL_FIELD] = time.time() + ttl
             
             # Store in cache
-            await self._cache.set(cache_key, response, ttl=ttl)
+            await self._cache.set(cache_key, entry, ttl=ttl + stale_ttl)
+            self._store_local(cache_key, entry)
             self._stats["stored"] += 1
             
+            if tags:
+                await self._register_tags(cache_key, tags)
+            
             # Log cache operation
             logger.debug(
                 "Response cached",
                 key=cache_key,
                 ttl=ttl,
+                stale_ttl=stale_ttl,
                 status_code=response.status_code
             )
         except Exception as e:
             logger.error("Cache set error", error=str(e), key=cache_key)
 
+    async def get_or_fetch(
+        self,
+        cache_key: str,
+        fetch: Callable[[], Awaitable[ServiceResponse]],
+        request: Request,
+        cache_config: Optional[Dict] = None,
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> Tuple[ServiceResponse, bool]:
+        """
+        Serve a response from cache or fetch it upstream.
+        
+        Concurrent misses for the same key share a single upstream fetch.
+        Stale entries within the config's ``stale_while_revalidate`` window
+        are served immediately while one background fetch refreshes them.
+        Fetched responses are registered under ``tags``.
+        Returns (response, cache_hit)
+        """
+        cached_response = await self.get_cached_response(cache_key, cache_config)
+        if cached_response:
+            fresh_until = cached_response.metadata.get(FRESH_UNTIL_FIELD)
+            if fresh_until and time.time() >= fresh_until:
+                self._stats["stale_hits"] += 1
+                if cache_key not in self._inflight:
+                    self._stats["revalidations"] += 1
+                    self._start_fetch(cache_key, fetch, request, cache_config, ttl, tags)
+            return cached_response, True
+        
+        task = self._inflight.get(cache_key)
+        if task:
+            self._stats["coalesced"] += 1
+        else:
+            task = self._start_fetch(cache_key, fetch, request, cache_config, ttl, tags)
+        
+        # Shield so one cancelled caller does not abort the shared fetch
+        return await asyncio.shield(task), False
+
+    def _start_fetch(
+        self,
+        cache_key: str,
+        fetch: Callable[[], Awaitable[ServiceResponse]],
+        request: Request,
+        cache_config: Optional[Dict],
+        ttl: Optional[int],
+        tags: Optional[List[str]]
+    ) -> asyncio.Task:
+        """
+        Start the single in-flight upstream fetch for a cache key
+        """
+        async def fetch_and_store() -> ServiceResponse:
+            response = await fetch()
+            if await self.should_cache_response(request, response, cache_config):
+                await self.cache_response(cache_key, response, ttl, cache_config, tags)
+            return response
+        
+        def on_done(task: asyncio.Task):
+            self._inflight.pop(cache_key, None)
+            if not task.cancelled() and task.exception():
+                logger.error(
+                    "Cache fetch error",
+                    error=str(task.exception()),
+                    key=cache_key
+                )
+        
+        task = asyncio.create_task(fetch_and_store())
+        task.add_done_callback(on_done)
+        self._inflight[cache_key] = task
+        return task
+
+    def _store_local(self, cache_key: str, response: ServiceResponse):
+        """
+        Store a response in the in-process LRU
+        """
+        # Bound L1 lifetime so entries invalidated on other replicas age out
+        expires_at = time.time() + self.settings.cache_l1_ttl
+        fresh_until = response.metadata.get(FRESH_UNTIL_FIELD)
+        if fresh_until:
+            expires_at = min(expires_at, fresh_until)
+        
+        self._local.set(cache_key, response, expires_at, estimate_response_size(response))
+
     async def invalidate_cache(
         self,
         pattern: str = "*",
@@ -131,42 +341,186 @@ class CacheService:
         endpoint: Optional[str] = None
     ):
         """
-        Invalidate cache entries matching pattern
+        Invalidate cache entries by service and endpoint, or by key pattern
         """
         if not self.settings.cache_enabled or not self._redis:
             return 0
         
+        # Service and endpoint invalidation goes through the tag index
+        if service:
+            tag = self.endpoint_tag(service, endpoint) if endpoint else self.service_tag(service)
+            return await self.invalidate_tags([tag])
+        
+        pattern = f"{CACHE_KEY_PREFIX}{pattern}"
         try:
-            # Build pattern
-            if service and endpoint:
-                pattern = f"api_gateway_cache:{service}:{endpoint}:*"
-            elif service:
-                pattern = f"api_gateway_cache:{service}:*"
-            else:
-                pattern = f"api_gateway_cache:{pattern}"
+            # Drop matching entries from the in-process LRU
+            self._local.delete_matching(pattern[len(CACHE_KEY_PREFIX):])
             
-            # Find keys matching pattern
-            keys = await self._redis.keys(pattern)
+            # Walk the keyspace incrementally rather than blocking Redis
+            count = 0
+            batch = []
+            async for key in self._redis.scan_iter(
+                match=pattern,
+                count=self.settings.cache_invalidation_batch_size
+            ):
+                batch.append(key)
+                if len(batch) >= self.settings.cache_invalidation_batch_size:
+                    count += await self._redis.delete(*batch)
+                    batch = []
+            if batch:
+                count += await self._redis.delete(*batch)
             
-            # Delete keys
-            if keys:
-                count = await self._redis.delete(*keys)
-                self._stats["invalidations"] += count
-                
-                # Log invalidation
-                logger.info(
-                    "Cache invalidated",
-                    pattern=pattern,
-                    keys_count=len(keys),
-                    deleted_count=count
-                )
-                
-                return count
-            return 0
+            self._stats["invalidations"] += count
+            
+            # Log invalidation
+            logger.info(
+                "Cache invalidated",
+                pattern=pattern,
+                deleted_count=count
+            )
+            
+            return count
         except Exception as e:
             logger.error("Cache invalidation error", error=str(e), pattern=pattern)
             return 0
 
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """
+        Invalidate every cache entry registered under any of ``tags``.
+        Cost scales with the number of matching keys, not the keyspace.
+        """
+        if not self.settings.cache_enabled or not self._redis:
+            return 0
+        
+        count = 0
+        batch_size = self.settings.cache_invalidation_batch_size
+        try:
+            for tag in tags:
+                tag_key = f"{TAG_PREFIX}{tag}"
+                batch = []
+                async for key in self._redis.sscan_iter(tag_key, count=batch_size):
+                    batch.append(key)
+                    if len(batch) >= batch_size:
+                        count += await self._delete_keys(batch)
+                        batch = []
+                if batch:
+                    count += await self._delete_keys(batch)
+                
+                # Drop the tag's index
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.delete(tag_key)
+                pipe.srem(TAG_REGISTRY_KEY, tag_key)
+                await pipe.execute()
+            
+            self._stats["invalidations"] += count
+            
+            # Log invalidation
+            logger.info(
+                "Cache invalidated",
+                tags=tags,
+                deleted_count=count
+            )
+            
+            return count
+        except Exception as e:
+            logger.error("Cache invalidation error", error=str(e), tags=tags)
+            return count
+
+    async def invalidate_user_cache(self, user_id: str) -> int:
+        """
+        Invalidate all user-specific cache entries for a user
+        """
+        return await self.invalidate_tags([self.user_tag(user_id)])
+
+    def build_cache_tags(
+        self,
+        service: str,
+        endpoint: str,
+        user: Optional[UserInfo] = None,
+        vary_by_user: bool = False
+    ) -> List[str]:
+        """
+        Tags a cached response is registered under
+        """
+        tags = [
+            self.service_tag(service),
+            self.endpoint_tag(service, endpoint)
+        ]
+        if user and vary_by_user:
+            tags.append(self.user_tag(user.user_id))
+        return tags
+
+    @staticmethod
+    def service_tag(service: str) -> str:
+        return f"service:{service}"
+
+    @staticmethod
+    def endpoint_tag(service: str, endpoint: str) -> str:
+        return f"endpoint:{service}:{endpoint}"
+
+    @staticmethod
+    def user_tag(user_id: str) -> str:
+        return f"user:{user_id}"
+
+    async def _register_tags(self, cache_key: str, tags: List[str]):
+        """
+        Add a cache key to each tag's index set in one round trip
+        """
+        if not self._redis:
+            return
+        
+        redis_key = f"{CACHE_KEY_PREFIX}{cache_key}"
+        pipe = self._redis.pipeline(transaction=False)
+        for tag in tags:
+            tag_key = f"{TAG_PREFIX}{tag}"
+            pipe.sadd(tag_key, redis_key)
+            pipe.expire(tag_key, TAG_TTL)
+            pipe.sadd(TAG_REGISTRY_KEY, tag_key)
+        await pipe.execute()
+
+    async def _delete_keys(self, redis_keys: List[str]) -> int:
+        """
+        Delete a batch of namespaced cache keys from Redis and the local LRU
+        """
+        for redis_key in redis_keys:
+            self._local.delete(redis_key[len(CACHE_KEY_PREFIX):])
+        return await self._redis.delete(*redis_keys)
+
+    async def _prune_tag_index(self):
+        """
+        Remove keys that have already expired from the tag index sets
+        """
+        if not self._redis:
+            return
+        
+        batch_size = self.settings.cache_invalidation_batch_size
+        async for tag_key in self._redis.sscan_iter(TAG_REGISTRY_KEY, count=batch_size):
+            if not await self._redis.exists(tag_key):
+                await self._redis.srem(TAG_REGISTRY_KEY, tag_key)
+                continue
+            
+            batch = []
+            async for key in self._redis.sscan_iter(tag_key, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    await self._prune_tag_members(tag_key, batch)
+                    batch = []
+            if batch:
+                await self._prune_tag_members(tag_key, batch)
+
+    async def _prune_tag_members(self, tag_key: str, redis_keys: List[str]):
+        """
+        Drop members of a tag set whose cache entries no longer exist
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        for redis_key in redis_keys:
+            pipe.exists(redis_key)
+        exists = await pipe.execute()
+        
+        expired = [key for key, found in zip(redis_keys, exists) if not found]
+        if expired:
+            await self._redis.srem(tag_key, *expired)
+
     def generate_cache_key(
         self,
         service: str,
@@ -211,9 +565,16 @@ class CacheService:
         """
         stats = dict(self._stats)
         
-        # Add hit ratio
+        # Add hit ratios, overall and per tier
         total_requests = stats["hits"] + stats["misses"]
         stats["hit_ratio"] = stats["hits"] / total_requests if total_requests > 0 else 0
+        stats["l1_hit_ratio"] = stats.get("l1_hits", 0) / total_requests if total_requests > 0 else 0
+        stats["l2_hit_ratio"] = stats.get("l2_hits", 0) / total_requests if total_requests > 0 else 0
+        
+        # Add in-process cache usage
+        stats["l1_entries"] = len(self._local)
+        stats["l1_bytes"] = self._local.size_bytes
+        stats["in_flight"] = len(self._inflight)
         
         # Add memory usage if using Redis
         if self._redis:
@@ -296,7 +657,7 @@ class CacheService:
         max_size = config.get("max_size", 1000)
         
         # Don't cache large responses
-        response_size = len(json.dumps(response.body)) if isinstance(response.body, (dict, list)) else len(str(response.body))
+        response_size = estimate_response_size(response)
         if response_size > max_size * 1024:  # Convert KB to bytes
             return False
         
@@ -327,7 +688,9 @@ class CacheService:
         while True:
             try:
                 # Redis automatically handles TTL expiration
-                # This is just for additional maintenance if needed
+                # Expired L1 entries and tag index members are dropped here
+                self._local.purge_expired()
+                await self._prune_tag_index()
                 
                 await asyncio.sleep(3600)  # Run every hour
                 
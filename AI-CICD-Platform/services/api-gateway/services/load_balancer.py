@@ -0,0 +1,222 @@
+from typing import Dict, List, Optional, Any, Set
+import importlib.util
+import random
+import httpx
+import structlog
+
+from ..config import Settings
+from ..models.gateway_models import ServiceRegistration, ServiceStatus
+
+# Configure structured logging
+logger = structlog.get_logger()
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class ServiceInstance:
+    """
+    One upstream replica of a service with its own connection pool
+    """
+
+    __slots__ = (
+        "service",
+        "instance_id",
+        "url",
+        "registration",
+        "client",
+        "outstanding",
+        "draining",
+        "ewma_latency_ms",
+        "requests",
+        "failures",
+        "consecutive_failures"
+    )
+
+    # Latency assumed for instances without samples, so new replicas get traffic
+    INITIAL_LATENCY_MS = 50.0
+
+    def __init__(
+        self,
+        service: str,
+        instance_id: str,
+        url: str,
+        client: httpx.AsyncClient,
+        registration: Optional[ServiceRegistration] = None
+    ):
+        self.service = service
+        self.instance_id = instance_id
+        self.url = url
+        self.registration = registration
+        self.client = client
+        self.outstanding = 0
+        # Removed from the balancer; the pool closes once outstanding drops to 0
+        self.draining = False
+        self.ewma_latency_ms: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    @property
+    def circuit_id(self) -> str:
+        """Key of this instance's circuit breaker in ResilienceService"""
+        return f"{self.service}@{self.instance_id}"
+
+    @property
+    def is_registered(self) -> bool:
+        return self.registration is not None
+
+    @property
+    def is_routable(self) -> bool:
+        return self.registration is None or self.registration.status != ServiceStatus.DOWN
+
+    def score(self) -> float:
+        """
+        Expected cost of sending one more request here: in-flight requests
+        weighted by smoothed latency. Lower is better.
+        """
+        latency = self.ewma_latency_ms if self.ewma_latency_ms is not None else self.INITIAL_LATENCY_MS
+        return (self.outstanding + 1) * latency
+
+    def record_latency(self, latency_ms: float, decay: float):
+        if self.ewma_latency_ms is None:
+            self.ewma_latency_ms = latency_ms
+        else:
+            self.ewma_latency_ms = decay * latency_ms + (1 - decay) * self.ewma_latency_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "instance_id": self.instance_id,
+            "url": self.url,
+            "registered": self.is_registered,
+            "status": self.registration.status.value if self.registration else ServiceStatus.HEALTHY.value,
+            "outstanding": self.outstanding,
+            "draining": self.draining,
+            "ewma_latency_ms": self.ewma_latency_ms,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures
+        }
+
+class LoadBalancer:
+    """
+    Tracks the instances of each service and picks one per request using
+    power-of-two-choices over latency-weighted outstanding requests
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+
+        # service name -> instance ID -> instance
+        self._instances: Dict[str, Dict[str, ServiceInstance]] = {}
+
+        # Removed instances still serving requests
+        self._draining: Set[ServiceInstance] = set()
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.settings.upstream_timeout,
+            follow_redirects=True,
+            http2=self.settings.upstream_http2_enabled and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=self.settings.upstream_max_connections,
+                max_keepalive_connections=self.settings.upstream_max_keepalive_connections
+            )
+        )
+
+    def add_instance(
+        self,
+        service: str,
+        instance_id: str,
+        url: str,
+        registration: Optional[ServiceRegistration] = None
+    ) -> ServiceInstance:
+        """
+        Add an instance, or update the URL and registration of an existing one
+        """
+        instances = self._instances.setdefault(service, {})
+        instance = instances.get(instance_id)
+        if instance:
+            # Requests carry absolute URLs, so the pool can be kept
+            instance.url = url
+            instance.registration = registration
+            return instance
+
+        instance = ServiceInstance(service, instance_id, url, self._create_client(), registration)
+        instances[instance_id] = instance
+        return instance
+
+    async def remove_instance(self, service: str, instance_id: str) -> bool:
+        """
+        Stop selecting an instance and close its connection pool once the
+        requests and streams it is serving have finished
+        """
+        instances = self._instances.get(service)
+        if not instances or instance_id not in instances:
+            return False
+
+        instance = instances.pop(instance_id)
+        if not instances:
+            del self._instances[service]
+
+        instance.draining = True
+        if instance.outstanding > 0:
+            logger.info(
+                "instance_draining",
+                service=service,
+                instance_id=instance_id,
+                outstanding=instance.outstanding
+            )
+            self._draining.add(instance)
+        else:
+            await instance.client.aclose()
+        return True
+
+    async def release(self, instance: ServiceInstance):
+        """
+        Mark one request to an instance as finished, closing the pool of a
+        removed instance once its last request is done
+        """
+        instance.outstanding -= 1
+        if instance.outstanding == 0 and instance in self._draining:
+            self._draining.discard(instance)
+            await instance.client.aclose()
+
+    def get_instance(self, service: str, instance_id: str) -> Optional[ServiceInstance]:
+        return self._instances.get(service, {}).get(instance_id)
+
+    def get_instances(self, service: str) -> List[ServiceInstance]:
+        """
+        Instances that serve a service. Registered instances replace the
+        statically configured ones once any exist.
+        """
+        instances = list(self._instances.get(service, {}).values())
+        registered = [instance for instance in instances if instance.is_registered]
+        return registered or instances
+
+    def choose(self, candidates: List[ServiceInstance]) -> ServiceInstance:
+        """
+        Power of two choices: sample two candidates, keep the cheaper one
+        """
+        if len(candidates) == 1:
+            return candidates[0]
+
+        first, second = random.sample(candidates, 2)
+        return first if first.score() <= second.score() else second
+
+    def get_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {
+            service: [instance.to_dict() for instance in instances.values()]
+            for service, instances in self._instances.items()
+        }
+
+    async def close(self):
+        """
+        Close all connection pools
+        """
+        for instances in self._instances.values():
+            for instance in instances.values():
+                await instance.client.aclose()
+        for instance in self._draining:
+            await instance.client.aclose()
+        self._instances.clear()
+        self._draining.clear()
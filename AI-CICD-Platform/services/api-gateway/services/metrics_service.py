@@ -32,6 +32,13 @@ RESPONSE_TIME = Histogram(
     buckets=[0.1, 0.5, 1.0, 2.0, 5.0]
 )
 
+RESPONSE_BYTES = Histogram(
+    'gateway_response_bytes',
+    'Response payload size relayed to clients',
+    ['service', 'endpoint'],
+    buckets=[1024, 16384, 262144, 4194304, 67108864, 1073741824]
+)
+
 CACHE_HITS = Counter(
     'gateway_cache_hits_total',
     'Total cache hits',
@@ -135,10 +142,14 @@ class MetricsService:
         self,
         context: RequestContext,
         response: ServiceResponse,
-        cache_hit: bool = False
+        cache_hit: bool = False,
+        response_bytes: Optional[int] = None
     ):
         """
         Record metrics for a request
+        
+        ``response_bytes`` is the relayed payload size for streamed
+        responses, whose bodies are never held by the gateway.
         """
         # Update Prometheus metrics
         REQUEST_COUNT.labels(
@@ -153,6 +164,12 @@ class MetricsService:
             endpoint=context.endpoint
         ).observe(response.duration_ms / 1000.0)
         
+        if response_bytes is not None:
+            RESPONSE_BYTES.labels(
+                service=context.service,
+                endpoint=context.endpoint
+            ).observe(response_bytes)
+        
         if cache_hit:
             CACHE_HITS.labels(
                 service=context.service,
@@ -171,7 +188,8 @@ class MetricsService:
             circuit_breaker_trips=0,  # Updated separately
             active_connections=ACTIVE_CONNECTIONS.labels(
                 service=context.service
-            )._value.get()
+            )._value.get(),
+            metadata={"response_bytes": response_bytes} if response_bytes is not None else {}
         )
         
         service_metrics = self._metrics.setdefault(context.service, [])
@@ -184,7 +202,8 @@ class MetricsService:
             endpoint=context.endpoint,
             duration_ms=response.duration_ms,
             status_code=response.status_code,
-            cache_hit=cache_hit
+            cache_hit=cache_hit,
+            response_bytes=response_bytes
         )
 
     async def record_rate_limit(self, service: str, endpoint: str):
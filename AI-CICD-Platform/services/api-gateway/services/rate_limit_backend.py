@@ -0,0 +1,314 @@
+from typing import Dict, Optional, Tuple
+from collections import deque
+import itertools
+import math
+import time
+import uuid
+import aioredis
+import structlog
+
+from ..config import Settings
+
+# Configure structured logging
+logger = structlog.get_logger()
+
+# Sliding-window-log check-and-increment, executed atomically in Redis.
+# Hits already admitted locally (ARGV[4]) are recorded unconditionally,
+# then the current request (ARGV[6]) is admitted only if the log still
+# has room. Returns {allowed, count, retry_after_ms}.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local pending = tonumber(ARGV[4])
+local member = ARGV[5]
+local acquire = tonumber(ARGV[6])
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+for i = 1, pending do
+    redis.call('ZADD', key, now, member .. ':' .. i)
+end
+
+local count = redis.call('ZCARD', key)
+local allowed = 1
+if acquire == 1 then
+    if count < limit then
+        redis.call('ZADD', key, now, member)
+        count = count + 1
+    else
+        allowed = 0
+    end
+end
+redis.call('PEXPIRE', key, window)
+
+local retry_after = 0
+if allowed == 0 then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    if oldest[2] then
+        retry_after = tonumber(oldest[2]) + window - now
+    else
+        retry_after = window
+    end
+end
+return {allowed, count, retry_after}
+"""
+
+class RateLimitBackend:
+    """
+    Storage backend for request rate limiting
+    """
+
+    async def hit(
+        self,
+        key: str,
+        limit: int,
+        window: int
+    ) -> Tuple[bool, Optional[int]]:
+        """
+        Record a request against ``key`` if it fits within ``limit``
+        requests per ``window`` seconds.
+        Returns (is_allowed, retry_after)
+        """
+        raise NotImplementedError
+
+    async def purge_expired(self):
+        """
+        Drop state for keys with no requests left in their window
+        """
+
+    async def close(self):
+        """
+        Cleanup resources
+        """
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local sliding-window-log rate limiter
+    """
+
+    def __init__(self):
+        # key -> (window, request timestamps)
+        self._logs: Dict[str, Tuple[int, deque]] = {}
+
+    async def hit(
+        self,
+        key: str,
+        limit: int,
+        window: int
+    ) -> Tuple[bool, Optional[int]]:
+        now = time.monotonic()
+        entry = self._logs.get(key)
+        if not entry:
+            entry = (window, deque())
+            self._logs[key] = entry
+
+        # Slide the window forward
+        log = entry[1]
+        cutoff = now - window
+        while log and log[0] <= cutoff:
+            log.popleft()
+
+        if len(log) >= limit:
+            retry_after = max(1, math.ceil(log[0] + window - now)) if log else window
+            return False, retry_after
+
+        log.append(now)
+        return True, None
+
+    async def purge_expired(self):
+        now = time.monotonic()
+        expired_keys = [
+            key for key, (window, log) in self._logs.items()
+            if not log or log[-1] <= now - window
+        ]
+        for key in expired_keys:
+            del self._logs[key]
+
+class _LocalBudget:
+    """Requests a replica may admit for a key without asking Redis"""
+    __slots__ = ("tokens", "pending", "window", "limit", "expires_at")
+
+    def __init__(self, tokens: int, window: int, limit: int, expires_at: float):
+        self.tokens = tokens
+        self.pending = 0
+        self.window = window
+        self.limit = limit
+        self.expires_at = expires_at
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Sliding-window-log rate limiter shared by all gateway replicas.
+
+    Every network check is a single script round trip. Keys that Redis
+    reports as clearly under their limit are granted a small local token
+    budget, so the next few requests are admitted without touching the
+    network; those hits are written back on the key's next round trip.
+    """
+
+    KEY_PREFIX = "ratelimit:"
+
+    # A key must have at least this share of its limit remaining
+    # before any requests are admitted locally
+    CLEARLY_UNDER_RATIO = 0.5
+
+    # Seconds to stay on the in-memory fallback after a Redis error
+    RETRY_INTERVAL = 5.0
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._redis = aioredis.from_url(
+            settings.redis_url,
+            encoding="utf-8",
+            decode_responses=True,
+            max_connections=settings.redis_pool_size
+        )
+        self._script = self._redis.register_script(SLIDING_WINDOW_SCRIPT)
+
+        # Local fast-path budgets per key
+        self._budgets: Dict[str, _LocalBudget] = {}
+
+        # Used while Redis is unreachable
+        self._fallback = InMemoryRateLimitBackend()
+        self._redis_retry_at = 0.0
+
+        # Unique log members across replicas
+        self._instance_id = uuid.uuid4().hex
+        self._sequence = itertools.count()
+
+    async def hit(
+        self,
+        key: str,
+        limit: int,
+        window: int
+    ) -> Tuple[bool, Optional[int]]:
+        now = time.monotonic()
+
+        # Fast path: admit locally while the key's budget lasts
+        budget = self._budgets.get(key)
+        if budget and budget.tokens > 0 and now < budget.expires_at:
+            budget.tokens -= 1
+            budget.pending += 1
+            return True, None
+
+        if now < self._redis_retry_at:
+            return await self._fallback.hit(key, limit, window)
+
+        # Claim the locally admitted hits before awaiting, so concurrent
+        # round trips and flushes for the key do not send them again
+        pending = 0
+        if budget:
+            pending, budget.pending = budget.pending, 0
+        try:
+            allowed, count, retry_after_ms = await self._run_script(
+                key, limit, window, pending, acquire=True
+            )
+        except Exception as e:
+            logger.warning("rate_limit_redis_unavailable", error=str(e))
+            self._redis_retry_at = now + self.RETRY_INTERVAL
+            self._restore_pending(key, budget, pending)
+            return await self._fallback.hit(key, limit, window)
+
+        # Hits put back by a concurrent failed round trip are kept
+        previous = self._budgets.pop(key, None)
+        carried = previous.pending if previous else 0
+
+        # Grant a share of the remaining quota to the local fast path
+        remaining = limit - count
+        tokens = int(remaining * self.settings.rate_limit_fast_path_ratio)
+        if allowed and remaining >= limit * self.CLEARLY_UNDER_RATIO and tokens > 0:
+            self._budgets[key] = _LocalBudget(
+                tokens=tokens,
+                window=window,
+                limit=limit,
+                expires_at=now + self.settings.rate_limit_fast_path_ttl
+            )
+            self._budgets[key].pending = carried
+        else:
+            self._restore_pending(key, previous, carried)
+
+        if not allowed:
+            return False, max(1, math.ceil(retry_after_ms / 1000))
+        return True, None
+
+    async def purge_expired(self):
+        now = time.monotonic()
+        expired = [
+            (key, budget) for key, budget in self._budgets.items()
+            if now >= budget.expires_at
+        ]
+        for key, budget in expired:
+            del self._budgets[key]
+
+            # Write back hits admitted locally that were never synced
+            pending, budget.pending = budget.pending, 0
+            if pending:
+                try:
+                    await self._run_script(
+                        key, budget.limit, budget.window, pending, acquire=False
+                    )
+                except Exception as e:
+                    logger.warning("rate_limit_flush_failed", key=key, error=str(e))
+                    self._restore_pending(key, budget, pending)
+
+        await self._fallback.purge_expired()
+
+    def _restore_pending(
+        self,
+        key: str,
+        budget: Optional["_LocalBudget"],
+        pending: int
+    ):
+        """
+        Put back locally admitted hits that were not written to Redis,
+        so the key's next round trip or flush sends them
+        """
+        if not pending:
+            return
+
+        current = self._budgets.get(key)
+        if current is None:
+            # Keep the hits without admitting more requests locally
+            budget.tokens = 0
+            self._budgets[key] = current = budget
+        current.pending += pending
+
+    async def _run_script(
+        self,
+        key: str,
+        limit: int,
+        window: int,
+        pending: int,
+        acquire: bool
+    ) -> Tuple[int, int, int]:
+        """
+        Run the sliding-window script for a key in one round trip
+        """
+        member = f"{self._instance_id}:{next(self._sequence)}"
+        allowed, count, retry_after_ms = await self._script(
+            keys=[f"{self.KEY_PREFIX}{key}"],
+            args=[
+                int(time.time() * 1000),
+                window * 1000,
+                limit,
+                pending,
+                member,
+                1 if acquire else 0
+            ]
+        )
+        return int(allowed), int(count), int(retry_after_ms)
+
+    async def close(self):
+        await self._redis.close()
+
+def create_rate_limit_backend(settings: Settings) -> RateLimitBackend:
+    """
+    Create the rate limit backend selected in settings
+    """
+    if settings.rate_limit_storage == "redis":
+        try:
+            return RedisRateLimitBackend(settings)
+        except Exception as e:
+            logger.error("Failed to initialize Redis for rate limiting", error=str(e))
+            logger.warning("Using in-memory storage for rate limits as fallback")
+    return InMemoryRateLimitBackend()
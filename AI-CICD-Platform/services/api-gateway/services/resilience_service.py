@@ -1,22 +1,20 @@
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 import asyncio
-import time
 from ..config import get_settings, RATE_LIMIT_CONFIGS, CIRCUIT_BREAKER_CONFIGS
 from ..models.gateway_models import (
-    RateLimitState,
     CircuitBreakerState,
     CircuitState,
     ServiceStatus
 )
+from .rate_limit_backend import RateLimitBackend, create_rate_limit_backend
 
 class ResilienceService:
     def __init__(self):
         self.settings = get_settings()
         
-        # In-memory storage for rate limiting
-        # In production, use Redis or similar
-        self._rate_limits: Dict[str, RateLimitState] = {}
+        # Rate limit storage, shared across replicas when Redis-backed
+        self.rate_limit_backend: RateLimitBackend = create_rate_limit_backend(self.settings)
         
         # Circuit breaker state
         self._circuit_states: Dict[str, CircuitBreakerState] = {}
@@ -27,36 +25,22 @@ class ResilienceService:
     async def check_rate_limit(
         self,
         key: str,
-        limit_type: str = "default"
+        limit_type: str = "default",
+        config: Optional[Dict[str, Any]] = None
     ) -> Tuple[bool, Optional[int]]:
         """
         Check if request should be rate limited
+        A pre-resolved config skips the lookup by limit_type
         Returns (is_allowed, retry_after)
         """
         try:
-            config = RATE_LIMIT_CONFIGS.get(limit_type, RATE_LIMIT_CONFIGS["default"])
-            current_time = datetime.utcnow()
-            
-            # Get or create rate limit state
-            state = self._rate_limits.get(key)
-            if not state or self._is_window_expired(state, current_time):
-                state = RateLimitState(
-                    key=key,
-                    window_start=current_time,
-                    request_count=0,
-                    window_size=config["window"],
-                    limit=config["requests"]
-                )
-                self._rate_limits[key] = state
-            
-            # Check if limit is exceeded
-            if state.is_exceeded:
-                retry_after = self._calculate_retry_after(state)
-                return False, retry_after
-            
-            # Increment request count
-            state.request_count += 1
-            return True, None
+            if config is None:
+                config = RATE_LIMIT_CONFIGS.get(limit_type, RATE_LIMIT_CONFIGS["default"])
+            return await self.rate_limit_backend.hit(
+                key,
+                config["requests"],
+                config["window"]
+            )
 
         except Exception as e:
             # Log error but allow request
@@ -160,6 +144,20 @@ class ResilienceService:
                 seconds=config["recovery_timeout"]
             )
 
+    def get_circuit_retry_after(self, service_id: str) -> Optional[int]:
+        """
+        Seconds until an open circuit may be retried, or None if the
+        circuit currently lets requests through
+        """
+        state = self._circuit_states.get(service_id)
+        if not state or state.state != CircuitState.OPEN:
+            return None
+        
+        if not state.recovery_time or datetime.utcnow() >= state.recovery_time:
+            return None
+        
+        return max(1, self._calculate_recovery_time(state))
+
     def get_service_status(self, service_id: str) -> ServiceStatus:
         """
         Get current service status based on circuit state
@@ -181,15 +179,8 @@ class ResilienceService:
         """
         while True:
             try:
-                current_time = datetime.utcnow()
-                
                 # Clean up rate limits
-                expired_keys = [
-                    key for key, state in self._rate_limits.items()
-                    if self._is_window_expired(state, current_time)
-                ]
-                for key in expired_keys:
-                    del self._rate_limits[key]
+                await self.rate_limit_backend.purge_expired()
                 
                 # Clean up circuit states
                 closed_circuits = [
@@ -205,24 +196,6 @@ class ResilienceService:
                 print(f"Cleanup task error: {str(e)}")
                 await asyncio.sleep(60)
 
-    def _is_window_expired(
-        self,
-        state: RateLimitState,
-        current_time: datetime
-    ) -> bool:
-        """
-        Check if rate limit window has expired
-        """
-        window_end = state.window_start + timedelta(seconds=state.window_size)
-        return current_time >= window_end
-
-    def _calculate_retry_after(self, state: RateLimitState) -> int:
-        """
-        Calculate seconds until rate limit resets
-        """
-        window_end = state.window_start + timedelta(seconds=state.window_size)
-        return int((window_end - datetime.utcnow()).total_seconds())
-
     def _calculate_recovery_time(self, state: CircuitBreakerState) -> int:
         """
         Calculate seconds until circuit breaker recovery
@@ -241,3 +214,5 @@ class ResilienceService:
                 await self._cleanup_task
             except asyncio.CancelledError:
                 pass
+        
+        await self.rate_limit_backend.close()
@@ -0,0 +1,248 @@
+from typing import Dict, List, Optional, Tuple, Any, Iterable
+from datetime import datetime
+from types import MappingProxyType
+import structlog
+
+from ..config import (
+    get_settings,
+    CACHE_CONFIGS,
+    RATE_LIMIT_CONFIGS
+)
+from ..models.gateway_models import ApiVersion, UserInfo, UserRole
+from .cache_service import CacheService
+
+# Configure structured logging
+logger = structlog.get_logger()
+
+def parse_version(version: str) -> Tuple[int, ...]:
+    """
+    Parse a version string such as "2" or "v1.3" for numeric comparison
+    """
+    parts = version.lstrip("v").split(".")
+    return tuple(int(part) for part in parts if part.isdigit())
+
+class RoutePlan:
+    """
+    Immutable request plan for one (service, endpoint, API version).
+
+    Everything that only depends on configuration is resolved when the
+    plan is compiled, so the request path does no config lookups.
+    """
+
+    __slots__ = (
+        "service",
+        "endpoint",
+        "version",
+        "endpoint_config",
+        "version_error",
+        "sunset_date",
+        "auth_required",
+        "required_roles",
+        "required_permissions",
+        "rate_limit_type",
+        "rate_limit_config",
+        "rate_limit_key_prefix",
+        "circuit_breaker_type",
+        "cache_enabled",
+        "cache_config",
+        "cache_ttl",
+        "cache_key_prefix",
+        "cache_tags",
+        "cache_vary_by_user",
+        "cache_vary_by_role",
+        "stream_response"
+    )
+
+    def __init__(self, **fields: Any):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("RoutePlan is immutable")
+
+    def check_access(self, user: Optional[UserInfo]) -> Optional[Tuple[int, str]]:
+        """
+        Check authentication and permissions for a user.
+        Returns (status_code, detail) when access is denied.
+        """
+        if not user:
+            if self.auth_required:
+                return 401, "Authentication required"
+            return None
+
+        # Check if user is allowed to use this API version
+        if user.allowed_versions and self.version not in user.allowed_versions:
+            return 403, f"User is not authorized to use API version {self.version}"
+
+        # Version-specific permissions replace the global ones when present
+        version_permissions = user.version_specific_permissions.get(self.version)
+        if version_permissions and self.required_permissions:
+            if self.required_permissions.isdisjoint(version_permissions):
+                return 403, "Insufficient permissions for this API version"
+            return None
+
+        # Admin role has all permissions
+        if UserRole.ADMIN in user.roles:
+            return None
+
+        if self.required_roles and self.required_roles.isdisjoint(user.roles):
+            return 403, "Insufficient permissions"
+
+        if self.required_permissions:
+            user_permissions = set(user.permissions)
+            if "*" not in user_permissions and not self.required_permissions <= user_permissions:
+                return 403, "Insufficient permissions"
+
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Describe the plan for the /routes endpoint
+        """
+        return {
+            "service": self.service,
+            "endpoint": self.endpoint,
+            "version": self.version,
+            "method": self.endpoint_config.get("method"),
+            "path": self.endpoint_config.get("path"),
+            "available": self.version_error is None,
+            "version_error": self.version_error,
+            "sunset_date": self.sunset_date.isoformat() if self.sunset_date else None,
+            "auth_required": self.auth_required,
+            "required_roles": sorted(str(getattr(role, "value", role)) for role in self.required_roles),
+            "required_permissions": sorted(self.required_permissions),
+            "rate_limit": {
+                "type": self.rate_limit_type,
+                "requests": self.rate_limit_config["requests"],
+                "window": self.rate_limit_config["window"]
+            },
+            "circuit_breaker": self.circuit_breaker_type,
+            "cache": {
+                "enabled": self.cache_enabled,
+                "config": dict(self.cache_config) if self.cache_enabled else None,
+                "ttl": self.cache_ttl,
+                "key_prefix": self.cache_key_prefix,
+                "vary_by_user": self.cache_vary_by_user,
+                "vary_by_role": self.cache_vary_by_role
+            },
+            "stream_response": self.stream_response
+        }
+
+class RouteCompiler:
+    """
+    Compiles service route configuration into a table of RoutePlans
+    """
+
+    def __init__(self, versions: Iterable[ApiVersion]):
+        self.settings = get_settings()
+
+        # Only versions that are not deprecated can be served
+        self._versions: List[ApiVersion] = [
+            version for version in versions if not version.deprecated
+        ]
+
+        # (service, endpoint, version) -> plan
+        self._plans: Dict[Tuple[str, str, str], RoutePlan] = {}
+
+        self.compiled_at: Optional[datetime] = None
+
+    def register_service(self, service: str, service_config: Dict[str, Any]) -> List[RoutePlan]:
+        """
+        Compile plans for every endpoint of a service and every API version,
+        replacing any plans previously compiled for the service
+        """
+        self.deregister_service(service)
+
+        plans = []
+        for endpoint, endpoint_config in service_config.get("endpoints", {}).items():
+            for api_version in self._versions:
+                plan = self._compile_plan(service, endpoint, endpoint_config, api_version)
+                self._plans[(service, endpoint, api_version.version)] = plan
+                plans.append(plan)
+
+        self.compiled_at = datetime.utcnow()
+        logger.info("Routes compiled", service=service, plans=len(plans))
+        return plans
+
+    def deregister_service(self, service: str):
+        """
+        Remove all plans for a service
+        """
+        for key in [key for key in self._plans if key[0] == service]:
+            del self._plans[key]
+
+    def get_plan(self, service: str, endpoint: str, version: str) -> Optional[RoutePlan]:
+        """
+        Look up the compiled plan for a request
+        """
+        return self._plans.get((service, endpoint, version))
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """
+        Describe all compiled plans
+        """
+        return [
+            plan.to_dict()
+            for _, plan in sorted(self._plans.items(), key=lambda item: item[0])
+        ]
+
+    def _compile_plan(
+        self,
+        service: str,
+        endpoint: str,
+        endpoint_config: Dict[str, Any],
+        api_version: ApiVersion
+    ) -> RoutePlan:
+        version = api_version.version
+
+        # Version bounds are fixed for a plan, so evaluate them once
+        version_error = None
+        parsed_version = parse_version(version)
+        min_version = endpoint_config.get("min_api_version")
+        max_version = endpoint_config.get("max_api_version")
+        if min_version and parsed_version < parse_version(min_version):
+            version_error = f"Endpoint requires API version {min_version} or higher"
+        elif max_version and parsed_version > parse_version(max_version):
+            version_error = f"Endpoint supports API version {max_version} or lower"
+
+        rate_limit_type = endpoint_config.get("rate_limit_type", "default")
+        cache_enabled = endpoint_config.get("cache_enabled", False)
+        cache_config = CACHE_CONFIGS.get(
+            endpoint_config.get("cache_config", "default"),
+            CACHE_CONFIGS["default"]
+        )
+
+        # Non-cacheable endpoints are relayed as raw streams unless they opt out
+        stream_response = self.settings.proxy_streaming_enabled and endpoint_config.get(
+            "stream_response",
+            not cache_enabled
+        )
+
+        return RoutePlan(
+            service=service,
+            endpoint=endpoint,
+            version=version,
+            endpoint_config=MappingProxyType(dict(endpoint_config)),
+            version_error=version_error,
+            sunset_date=api_version.sunset_date,
+            auth_required=endpoint_config.get("auth_required", True),
+            required_roles=frozenset(endpoint_config.get("roles_required", [])),
+            required_permissions=frozenset(endpoint_config.get("permissions_required", [])),
+            rate_limit_type=rate_limit_type,
+            rate_limit_config=MappingProxyType(
+                RATE_LIMIT_CONFIGS.get(rate_limit_type, RATE_LIMIT_CONFIGS["default"])
+            ),
+            rate_limit_key_prefix=f"{service}:{endpoint}:{version}:",
+            circuit_breaker_type=endpoint_config.get("circuit_breaker_type", "default"),
+            cache_enabled=cache_enabled,
+            cache_config=MappingProxyType(cache_config),
+            cache_ttl=endpoint_config.get("cache_ttl"),
+            cache_key_prefix=f"v{version}:",
+            cache_tags=(
+                CacheService.service_tag(service),
+                CacheService.endpoint_tag(service, endpoint)
+            ),
+            cache_vary_by_user=endpoint_config.get("cache_vary_by_user", False),
+            cache_vary_by_role=endpoint_config.get("cache_vary_by_role", False),
+            stream_response=stream_response
+        )
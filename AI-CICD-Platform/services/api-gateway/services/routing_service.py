@@ -1,9 +1,13 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple, Any, AsyncIterator, Awaitable, Callable
 import asyncio
 import httpx
 from datetime import datetime, timedelta
 import json
+import random
+import time
+import weakref
 from urllib.parse import urljoin
+import structlog
 
 from ..config import get_settings, SERVICE_ROUTES
 from ..models.gateway_models import (
@@ -13,20 +17,68 @@ from ..models.gateway_models import (
     RequestContext,
     ServiceResponse
 )
+from .load_balancer import LoadBalancer, ServiceInstance
+from .resilience_service import ResilienceService
+from .websocket_service import WebSocketService
+
+# Configure structured logging
+logger = structlog.get_logger()
+
+# Connection-level headers that only apply to a single transport hop
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade"
+}
 
 class RoutingService:
-    def __init__(self):
+    def __init__(
+        self,
+        resilience_service: Optional[ResilienceService] = None,
+        websocket_service: Optional[WebSocketService] = None
+    ):
         self.settings = get_settings()
         
         # Service registry
         self._services: Dict[str, ServiceRegistration] = {}
         
-        # HTTP client for forwarding requests
+        # HTTP client for health checks
         self._client = httpx.AsyncClient(
             timeout=30.0,
             follow_redirects=True
         )
         
+        # Upstream instances, each with its own connection pool
+        self._load_balancer = LoadBalancer(self.settings)
+        for service, url in self.settings.service_registry.items():
+            self._load_balancer.add_instance(service, "default", url)
+        for service, urls in self.settings.service_replicas.items():
+            for index, url in enumerate(urls):
+                self._load_balancer.add_instance(service, f"replica-{index}", url)
+        
+        # Per-instance circuit breakers
+        self.resilience_service = resilience_service
+        
+        # Instances serving responses that are still being streamed
+        self._stream_instances: "weakref.WeakKeyDictionary[Any, ServiceInstance]" = (
+            weakref.WeakKeyDictionary()
+        )
+        
+        # Health check schedule: service ID -> monotonic time the next probe is due
+        self._health_check_due: Dict[str, float] = {}
+        self._health_checks_in_flight: Set[str] = set()
+        self._health_check_semaphore = asyncio.Semaphore(self.settings.health_check_concurrency)
+        self._health_check_wakeup = asyncio.Event()
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        # Status change events
+        self.websocket_service = websocket_service
+        
         # Start background tasks
         self._health_check_task = asyncio.create_task(self._health_check_loop())
 
@@ -46,7 +98,7 @@ class RoutingService:
                 return False
             
             registration.last_health_check = datetime.utcnow()
-            self._services[registration.service_id] = registration
+            self._add_registration(registration)
             return True
 
         except Exception as e:
@@ -57,22 +109,164 @@ class RoutingService:
         """
         Remove a service from registry
         """
-        if service_id in self._services:
-            del self._services[service_id]
+        registration = self._services.pop(service_id, None)
+        self._health_check_due.pop(service_id, None)
+        if registration:
+            await self._load_balancer.remove_instance(registration.name, service_id)
             return True
         return False
 
+    def _add_registration(self, registration: ServiceRegistration):
+        """
+        Store a registration and route traffic to it as a service instance
+        """
+        self._services[registration.service_id] = registration
+        self._load_balancer.add_instance(
+            registration.name,
+            registration.service_id,
+            registration.url,
+            registration
+        )
+        self._schedule_health_check(registration.service_id)
+
     async def get_service(
         self,
         service_name: str
     ) -> Optional[ServiceRegistration]:
         """
-        Get service by name
+        Get service by name, preferring an instance that is not down
+        """
+        registrations = [
+            instance.registration
+            for instance in self._load_balancer.get_instances(service_name)
+            if instance.is_registered
+        ]
+        for registration in registrations:
+            if registration.status != ServiceStatus.DOWN:
+                return registration
+        return registrations[0] if registrations else None
+
+    async def get_service_instances(
+        self,
+        service_name: str
+    ) -> List[ServiceRegistration]:
+        """
+        Get all registered instances of a service
+        """
+        return [
+            instance.registration
+            for instance in self._load_balancer.get_instances(service_name)
+            if instance.is_registered
+        ]
+
+    def get_load_balancer_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get per-instance load and latency statistics
+        """
+        return self._load_balancer.get_stats()
+
+    def check_availability(self, service: str) -> Tuple[bool, Optional[int]]:
+        """
+        Check if any instance of a service can take requests
+        Returns (is_available, retry_after)
+        """
+        instances = self._load_balancer.get_instances(service)
+        if not instances or not self.resilience_service:
+            return True, None
+        
+        retry_after = None
+        for instance in instances:
+            if not instance.is_routable:
+                continue
+            instance_retry = self.resilience_service.get_circuit_retry_after(instance.circuit_id)
+            if instance_retry is None:
+                return True, None
+            retry_after = min(retry_after or instance_retry, instance_retry)
+        
+        return False, retry_after
+
+    async def _select_instance(
+        self,
+        service: str,
+        endpoint: str
+    ) -> Tuple[ServiceInstance, str, str]:
+        """
+        Pick an upstream instance for a service endpoint
+        Returns (instance, url, circuit_breaker_type)
+        """
+        # Get service configuration
+        service_config = SERVICE_ROUTES.get(service)
+        if not service_config:
+            raise ValueError(f"Unknown service: {service}")
+        
+        # Get endpoint configuration
+        endpoint_config = service_config["endpoints"].get(endpoint)
+        if not endpoint_config:
+            raise ValueError(f"Unknown endpoint: {endpoint}")
+        
+        breaker_type = endpoint_config.get("circuit_breaker_type", "default")
+        candidates = [
+            instance for instance in self._load_balancer.get_instances(service)
+            if instance.is_routable
+        ]
+        
+        # Skip instances ejected by their circuit breaker
+        if self.resilience_service:
+            candidates = [
+                instance for instance in candidates
+                if self.resilience_service.get_circuit_retry_after(instance.circuit_id) is None
+            ]
+        
+        while candidates:
+            instance = self._load_balancer.choose(candidates)
+            if self.resilience_service:
+                # Moves a recovered circuit to half-open and enforces its limit
+                is_allowed, _ = await self.resilience_service.check_circuit_breaker(
+                    instance.circuit_id,
+                    breaker_type
+                )
+                if not is_allowed:
+                    candidates.remove(instance)
+                    continue
+                
+                # Removed while the circuit breaker was consulted
+                if instance.draining:
+                    candidates.remove(instance)
+                    continue
+            
+            url = urljoin(
+                instance.url,
+                f"{service_config['prefix']}{endpoint_config['path']}"
+            )
+            return instance, url, breaker_type
+        
+        raise ValueError(f"Service {service} not available")
+
+    async def _record_result(
+        self,
+        instance: ServiceInstance,
+        breaker_type: str,
+        latency_ms: float,
+        failed: bool
+    ):
+        """
+        Feed a proxied response into the instance's latency and circuit breaker
         """
-        for service in self._services.values():
-            if service.name == service_name:
-                return service
-        return None
+        instance.requests += 1
+        instance.record_latency(latency_ms, self.settings.load_balancer_ewma_decay)
+        
+        if failed:
+            instance.failures += 1
+            instance.consecutive_failures += 1
+            self._check_passive_health(instance)
+        else:
+            instance.consecutive_failures = 0
+        
+        if self.resilience_service:
+            if failed:
+                await self.resilience_service.record_failure(instance.circuit_id, breaker_type)
+            else:
+                await self.resilience_service.record_success(instance.circuit_id)
 
     async def route_request(
         self,
@@ -86,59 +280,151 @@ class RoutingService:
         Route request to appropriate service
         """
         try:
-            # Get service configuration
-            service_config = SERVICE_ROUTES.get(service)
-            if not service_config:
-                raise ValueError(f"Unknown service: {service}")
-            
-            # Get endpoint configuration
-            endpoint_config = service_config["endpoints"].get(endpoint)
-            if not endpoint_config:
-                raise ValueError(f"Unknown endpoint: {endpoint}")
-            
-            # Get service registration
-            service_reg = await self.get_service(service)
-            if not service_reg:
-                # Fall back to default URL from config
-                service_url = self.settings.service_registry.get(service)
-                if not service_url:
-                    raise ValueError(f"Service {service} not available")
-            else:
-                service_url = service_reg.url
-            
-            # Build request URL
-            url = urljoin(
-                service_url,
-                f"{service_config['prefix']}{endpoint_config['path']}"
-            )
+            instance, url, breaker_type = await self._select_instance(service, endpoint)
             
             # Forward request
-            start_time = datetime.utcnow()
-            async with self._client.stream(
+            start_time = time.perf_counter()
+            instance.outstanding += 1
+            failed = True
+            try:
+                async with instance.client.stream(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    json=body
+                ) as response:
+                    # Stream response content
+                    content = await response.aread()
+                    duration = (time.perf_counter() - start_time) * 1000
+                    failed = response.status_code >= 500
+                    try:
+                        body = json.loads(content)
+                    except:
+                        body = content.decode()
+                    
+                    return ServiceResponse(
+                        status_code=response.status_code,
+                        headers=dict(response.headers),
+                        body=body,
+                        duration_ms=duration
+                    )
+            finally:
+                await self._load_balancer.release(instance)
+                await self._record_result(
+                    instance,
+                    breaker_type,
+                    (time.perf_counter() - start_time) * 1000,
+                    failed
+                )
+
+        except Exception as e:
+            raise Exception(f"Request routing failed: {str(e)}")
+
+    async def stream_request(
+        self,
+        service: str,
+        endpoint: str,
+        method: str,
+        headers: Dict[str, str],
+        content: Optional[AsyncIterator[bytes]] = None
+    ) -> httpx.Response:
+        """
+        Open a pass-through stream to the appropriate service.
+        
+        Only the status line and headers are read; the body is left on the
+        wire for the caller to relay with ``iter_stream_response`` so the
+        gateway never buffers or decodes it. The caller owns the returned
+        response and must hand it to ``release_stream_response`` once done,
+        whether or not the body was relayed.
+        """
+        try:
+            instance, url, breaker_type = await self._select_instance(service, endpoint)
+            
+            request = instance.client.build_request(
                 method=method,
                 url=url,
                 headers=headers,
-                json=body
-            ) as response:
-                duration = (datetime.utcnow() - start_time).total_seconds() * 1000
-                
-                # Stream response content
-                content = await response.aread()
-                try:
-                    body = json.loads(content)
-                except:
-                    body = content.decode()
-                
-                return ServiceResponse(
-                    status_code=response.status_code,
-                    headers=dict(response.headers),
-                    body=body,
-                    duration_ms=duration
+                content=content
+            )
+            
+            # The instance stays loaded until the body has been relayed
+            start_time = time.perf_counter()
+            instance.outstanding += 1
+            try:
+                response = await instance.client.send(request, stream=True)
+            except Exception:
+                await self._load_balancer.release(instance)
+                await self._record_result(
+                    instance,
+                    breaker_type,
+                    (time.perf_counter() - start_time) * 1000,
+                    failed=True
+                )
+                raise
+            
+            self._stream_instances[response] = instance
+            try:
+                # Latency and health are judged from the status line
+                await self._record_result(
+                    instance,
+                    breaker_type,
+                    (time.perf_counter() - start_time) * 1000,
+                    failed=response.status_code >= 500
                 )
+            except BaseException:
+                await self.release_stream_response(response)
+                raise
+            return response
 
         except Exception as e:
             raise Exception(f"Request routing failed: {str(e)}")
 
+    async def iter_stream_response(
+        self,
+        response: httpx.Response,
+        on_complete: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Relay raw upstream chunks without decoding them.
+        
+        Chunks are pulled from the upstream socket only as fast as the
+        client consumes them, and ``on_complete`` receives the number of
+        bytes relayed once the stream ends, is aborted or fails.
+        """
+        response_bytes = 0
+        try:
+            async for chunk in response.aiter_raw(self.settings.proxy_stream_chunk_size):
+                response_bytes += len(chunk)
+                yield chunk
+        finally:
+            await self.release_stream_response(response)
+            if on_complete:
+                await on_complete(response_bytes)
+
+    async def release_stream_response(self, response: httpx.Response):
+        """
+        Close a streamed upstream response and stop counting it against
+        its instance.
+        
+        Safe to call more than once, so it can back both the relay and a
+        cleanup hook that runs when the body was never iterated.
+        """
+        instance = self._stream_instances.pop(response, None)
+        await response.aclose()
+        if instance:
+            await self._load_balancer.release(instance)
+
+    @staticmethod
+    def filter_stream_headers(headers: httpx.Headers) -> Dict[str, str]:
+        """
+        Drop hop-by-hop headers that must not be relayed to the client
+        """
+        return {
+            name: value
+            for name, value in headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+        }
+
     async def get_service_status(
         self,
         service_id: str
@@ -155,30 +441,162 @@ class RoutingService:
         
         return service.status, None
 
+    def _schedule_health_check(self, service_id: str, delay: Optional[float] = None):
+        """
+        Schedule the next active probe of an instance. Without an explicit
+        delay the interval is jittered so instances are not probed in lockstep.
+        """
+        if delay is None:
+            jitter = self.settings.health_check_jitter
+            delay = self.settings.health_check_interval * random.uniform(1 - jitter, 1 + jitter)
+        self._health_check_due[service_id] = time.monotonic() + delay
+        self._health_check_wakeup.set()
+
+    def _check_passive_health(self, instance: ServiceInstance):
+        """
+        Mark a registered instance down after consecutive 5xx responses or
+        timeouts seen on live traffic, and probe it again right away so it
+        recovers as soon as it answers its health check
+        """
+        registration = instance.registration
+        if (
+            registration is None
+            or registration.status == ServiceStatus.DOWN
+            or instance.consecutive_failures < self.settings.passive_health_failure_threshold
+        ):
+            return
+        
+        self._set_instance_status(
+            registration,
+            ServiceStatus.DOWN,
+            f"{instance.consecutive_failures} consecutive upstream failures"
+        )
+        self._schedule_health_check(registration.service_id, self.settings.health_check_timeout)
+
+    def _set_instance_status(
+        self,
+        registration: ServiceRegistration,
+        status: ServiceStatus,
+        reason: str
+    ):
+        """
+        Update an instance's status and publish the change
+        """
+        previous = registration.status
+        registration.status = status
+        if previous == status:
+            return
+        
+        log = logger.info if status == ServiceStatus.HEALTHY else logger.warning
+        log(
+            "Service status changed",
+            service_id=registration.service_id,
+            previous_status=previous.value,
+            status=status.value,
+            reason=reason
+        )
+        
+        if not self.websocket_service:
+            return
+        
+        task = asyncio.create_task(self._publish_status_change(registration, previous, reason))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _publish_status_change(
+        self,
+        registration: ServiceRegistration,
+        previous: ServiceStatus,
+        reason: str
+    ):
+        try:
+            await self.websocket_service.emit_service_status_changed(
+                registration.service_id,
+                {
+                    "service": registration.name,
+                    "url": registration.url,
+                    "status": registration.status.value,
+                    "previousStatus": previous.value,
+                    "reason": reason
+                }
+            )
+        except Exception as e:
+            logger.warning(
+                "Service status event failed",
+                error=str(e),
+                service_id=registration.service_id
+            )
+
     async def _health_check_loop(self):
         """
-        Background task to perform health checks
+        Background task that starts probes as they fall due. Probes run
+        concurrently, bounded by the health check semaphore, so slow or
+        unreachable instances do not delay the others.
         """
         while True:
             try:
-                for service in list(self._services.values()):
-                    try:
-                        is_healthy = await self._check_service_health(
-                            service.health_check_url
-                        )
-                        service.status = (
-                            ServiceStatus.HEALTHY if is_healthy
-                            else ServiceStatus.DOWN
-                        )
-                        service.last_health_check = datetime.utcnow()
-                    except:
-                        service.status = ServiceStatus.DOWN
+                now = time.monotonic()
+                next_due = now + self.settings.health_check_interval
                 
-                await asyncio.sleep(60)  # Check every minute
+                for service_id, due in list(self._health_check_due.items()):
+                    if service_id in self._health_checks_in_flight:
+                        continue
+                    if due > now:
+                        next_due = min(next_due, due)
+                        continue
+                    
+                    registration = self._services.get(service_id)
+                    if not registration:
+                        self._health_check_due.pop(service_id, None)
+                        continue
+                    
+                    self._health_checks_in_flight.add(service_id)
+                    task = asyncio.create_task(self._probe_instance(registration))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._background_tasks.discard)
+                
+                # Sleep until the next probe is due or the schedule changes.
+                # asyncio.wait (unlike wait_for) never swallows a cancellation.
+                self._health_check_wakeup.clear()
+                waiter = asyncio.ensure_future(self._health_check_wakeup.wait())
+                try:
+                    await asyncio.wait({waiter}, timeout=max(next_due - time.monotonic(), 0))
+                finally:
+                    waiter.cancel()
                 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"Health check loop error: {str(e)}")
-                await asyncio.sleep(60)
+                await asyncio.sleep(self.settings.health_check_interval)
+
+    async def _probe_instance(self, registration: ServiceRegistration):
+        """
+        Actively probe one instance and reschedule its next check
+        """
+        service_id = registration.service_id
+        try:
+            async with self._health_check_semaphore:
+                is_healthy = await self._check_service_health(
+                    registration.health_check_url
+                )
+            
+            # The instance may have been deregistered while the probe ran
+            if self._services.get(service_id) is not registration:
+                return
+            
+            registration.last_health_check = datetime.utcnow()
+            if is_healthy:
+                instance = self._load_balancer.get_instance(registration.name, service_id)
+                if instance:
+                    instance.consecutive_failures = 0
+                self._set_instance_status(registration, ServiceStatus.HEALTHY, "health check passed")
+            else:
+                self._set_instance_status(registration, ServiceStatus.DOWN, "health check failed")
+        finally:
+            self._health_checks_in_flight.discard(service_id)
+            if service_id in self._services:
+                self._schedule_health_check(service_id)
 
     async def _check_service_health(self, health_check_url: str) -> bool:
         """
@@ -188,7 +606,7 @@ class RoutingService:
             async with self._client.stream(
                 "GET",
                 health_check_url,
-                timeout=5.0
+                timeout=self.settings.health_check_timeout
             ) as response:
                 return response.status_code == 200
         except:
@@ -205,5 +623,12 @@ class RoutingService:
             except asyncio.CancelledError:
                 pass
         
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        
         if self._client:
             await self._client.aclose()
+        
+        await self._load_balancer.close()
@@ -1,7 +1,11 @@
-from typing import Dict, Optional, Any, List, Tuple
+from typing import Dict, Optional, Any, List, Tuple, Iterator
 import asyncio
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import hashlib
 import json
+import math
+import time
 import uuid
 import jwt
 import secrets
@@ -19,19 +23,138 @@ from ..models.gateway_models import (
 # Configure structured logging
 logger = structlog.get_logger()
 
+# Add a refresh key to a user's index and extend the index TTL to cover
+# it, never shortening it for a token that expires sooner
+REFRESH_INDEX_SCRIPT = """
+redis.call('SADD', KEYS[1], ARGV[1])
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < tonumber(ARGV[2]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return ttl
+"""
+
+class RevocationFilter:
+    """
+    Bloom filter of revoked token IDs.
+
+    Membership tests never give false negatives, so a token ID the filter
+    does not contain is known not to be blacklisted without asking Redis.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing over one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+class VerifiedToken:
+    """Claims of a token whose signature has already been verified"""
+    __slots__ = ("user", "token_id", "token_type", "expires_at")
+
+    def __init__(self, user: UserInfo, token_id: str, token_type: str, expires_at: float):
+        self.user = user
+        self.token_id = token_id
+        self.token_type = token_type
+        self.expires_at = expires_at
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified tokens keyed by the token's SHA-256 digest.
+    Entries are dropped once the token's exp has passed.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, VerifiedToken]" = OrderedDict()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, digest: bytes, now: float) -> Optional[VerifiedToken]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        
+        if now >= entry.expires_at:
+            del self._entries[digest]
+            return None
+        
+        self._entries.move_to_end(digest)
+        return entry
+
+    def set(self, digest: bytes, entry: VerifiedToken):
+        if self.max_entries <= 0:
+            return
+        
+        self._entries[digest] = entry
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def purge_expired(self, now: float):
+        expired = [
+            digest for digest, entry in self._entries.items()
+            if now >= entry.expires_at
+        ]
+        for digest in expired:
+            del self._entries[digest]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 class TokenService:
+    # Pub/sub channel announcing newly blacklisted token IDs
+    REVOCATION_CHANNEL = "token:revocations"
+    
+    # Seconds to wait before resubscribing after a pub/sub failure
+    REVOCATION_RETRY_INTERVAL = 5.0
+
     def __init__(self):
         self.settings = get_settings()
         self._redis = None
         
         # Prefixes for Redis keys
         self.BLACKLIST_PREFIX = "token:blacklist:"
+        self.BLACKLIST_INDEX_KEY = "token:blacklist_index"
         self.REFRESH_PREFIX = "token:refresh:"
+        self.REFRESH_INDEX_PREFIX = "token:refresh_index:"
         self.USER_TOKENS_PREFIX = "user:tokens:"
         
+        # Verified claims, so repeat requests skip JWT decoding
+        self._verified_tokens = VerifiedTokenCache(self.settings.jwt_verified_cache_size)
+        
+        # Local view of the Redis blacklist. Only trusted while the
+        # pub/sub subscription is live and the initial load has finished.
+        self._revocation_filter = self._new_revocation_filter()
+        self._pending_revocation_filter: Optional[RevocationFilter] = None
+        self._revocation_rebuild_lock = asyncio.Lock()
+        self._revocations_synced = False
+        
         # Start background tasks
         self._init_task = asyncio.create_task(self._initialize())
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        self._revocation_task = asyncio.create_task(self._revocation_listener())
 
     async def _initialize(self):
         """Initialize Redis connection"""
@@ -123,30 +246,28 @@ class TokenService:
         token_type: str = "access"
     ) -> Optional[UserInfo]:
         """
-        Verify JWT token and return user info
+        Verify JWT token and return user info.
+        Tokens verified before are answered from the in-memory cache.
         """
-        try:
-            # Decode token without verification first to get the token ID
-            unverified_payload = jwt.decode(
-                token,
-                options={"verify_signature": False}
-            )
-            
-            token_id = unverified_payload.get("jti")
-            if not token_id:
+        digest = VerifiedTokenCache.digest(token)
+        cached = self._verified_tokens.get(digest, time.time())
+        if cached:
+            if cached.token_type != token_type:
                 raise HTTPException(
                     status_code=401,
-                    detail="Invalid token format"
+                    detail=f"Invalid token type. Expected {token_type}"
                 )
             
-            # Check if token is blacklisted
-            is_blacklisted = await self._is_token_blacklisted(token_id)
-            if is_blacklisted:
+            if await self._is_token_revoked(cached.token_id):
                 raise HTTPException(
                     status_code=401,
                     detail="Token has been revoked"
                 )
             
+            # Callers may modify the user, so never hand out the cached one
+            return cached.user.model_copy(deep=True)
+        
+        try:
             # Verify token signature and claims
             payload = jwt.decode(
                 token,
@@ -155,6 +276,20 @@ class TokenService:
                 options={"verify_signature": True, "verify_exp": True, "verify_iat": True}
             )
             
+            token_id = payload.get("jti")
+            if not token_id:
+                raise HTTPException(
+                    status_code=401,
+                    detail="Invalid token format"
+                )
+            
+            # Check if token is blacklisted
+            if await self._is_token_revoked(token_id):
+                raise HTTPException(
+                    status_code=401,
+                    detail="Token has been revoked"
+                )
+            
             # Verify token type
             if payload.get("type") != token_type:
                 raise HTTPException(
@@ -172,8 +307,18 @@ class TokenService:
                 metadata=payload.get("metadata", {})
             )
             
+            # Cache until the token expires
+            exp = payload.get("exp")
+            if exp:
+                self._verified_tokens.set(
+                    digest,
+                    VerifiedToken(user_info.model_copy(deep=True), token_id, token_type, float(exp))
+                )
+            
             return user_info
             
+        except HTTPException:
+            raise
         except jwt.ExpiredSignatureError:
             raise HTTPException(
                 status_code=401,
@@ -184,11 +329,6 @@ class TokenService:
                 status_code=401,
                 detail="Invalid token"
             )
-        except jwt.JWTError:
-            raise HTTPException(
-                status_code=401,
-                detail="Could not validate token"
-            )
 
     async def refresh_access_token(
         self,
@@ -338,11 +478,10 @@ class TokenService:
                         # Add to blacklist
                         await self._blacklist_token(token_id, ttl)
                 
-                # Remove all refresh tokens for the user
-                refresh_pattern = f"{self.REFRESH_PREFIX}{user_id}:*"
-                refresh_keys = await self._redis.keys(refresh_pattern)
-                if refresh_keys:
-                    await self._redis.delete(*refresh_keys)
+                # Remove all refresh tokens for the user via their index
+                refresh_index_key = f"{self.REFRESH_INDEX_PREFIX}{user_id}"
+                refresh_keys = await self._redis.smembers(refresh_index_key)
+                await self._redis.delete(*refresh_keys, refresh_index_key)
                 
                 # Clear the user's token hash
                 await self._redis.delete(user_tokens_key)
@@ -416,6 +555,17 @@ class TokenService:
                 json.dumps(refresh_data),
                 ex=int(expires_delta.total_seconds())
             )
+            
+            # Index the key per user so revocation never scans the keyspace;
+            # the index lives as long as the user's longest-lived refresh token
+            refresh_index_key = f"{self.REFRESH_INDEX_PREFIX}{user_id}"
+            await self._redis.eval(
+                REFRESH_INDEX_SCRIPT,
+                1,
+                refresh_index_key,
+                refresh_key,
+                int(expires_delta.total_seconds()) + 1
+            )
         else:
             # In-memory fallback
             key = f"{user_id}:{refresh_token_id}"
@@ -433,6 +583,13 @@ class TokenService:
         if self._redis:
             blacklist_key = f"{self.BLACKLIST_PREFIX}{token_id}"
             await self._redis.set(blacklist_key, "1", ex=ttl)
+            
+            # Index by expiry so the filter rebuild reads one key, not a scan
+            await self._redis.zadd(self.BLACKLIST_INDEX_KEY, {token_id: time.time() + ttl})
+            
+            # Update this replica's filter now and notify the others
+            self._add_revoked_token(token_id)
+            await self._redis.publish(self.REVOCATION_CHANNEL, token_id)
         else:
             # In-memory fallback
             self._blacklist.add(token_id)
@@ -450,6 +607,89 @@ class TokenService:
             # In-memory fallback
             return token_id in self._blacklist
 
+    async def _is_token_revoked(self, token_id: str) -> bool:
+        """
+        Check if a token is blacklisted, consulting Redis only when the
+        local revocation filter cannot rule it out
+        """
+        if (
+            self._redis
+            and self._revocations_synced
+            and token_id not in self._revocation_filter
+        ):
+            return False
+        return await self._is_token_blacklisted(token_id)
+
+    def _new_revocation_filter(self) -> RevocationFilter:
+        return RevocationFilter(
+            self.settings.jwt_revocation_filter_capacity,
+            self.settings.jwt_revocation_filter_error_rate
+        )
+
+    def _add_revoked_token(self, token_id: str):
+        """
+        Record a revoked token ID in the local filter
+        """
+        self._revocation_filter.add(token_id)
+        if self._pending_revocation_filter is not None:
+            self._pending_revocation_filter.add(token_id)
+
+    async def _rebuild_revocation_filter(self):
+        """
+        Load every blacklisted token ID from the blacklist index into a
+        fresh filter. Rebuilding also drops IDs whose blacklist entries
+        have expired. Rebuilds run one at a time, so revocations received
+        meanwhile always reach the filter being built.
+        """
+        async with self._revocation_rebuild_lock:
+            revocation_filter = self._new_revocation_filter()
+            self._pending_revocation_filter = revocation_filter
+            try:
+                now = time.time()
+                await self._redis.zremrangebyscore(self.BLACKLIST_INDEX_KEY, "-inf", now)
+                for token_id in await self._redis.zrangebyscore(
+                    self.BLACKLIST_INDEX_KEY, now, "+inf"
+                ):
+                    revocation_filter.add(token_id)
+            finally:
+                self._pending_revocation_filter = None
+            
+            self._revocation_filter = revocation_filter
+            self._revocations_synced = True
+            logger.info("Token revocation filter loaded", revoked_tokens=revocation_filter.count)
+
+    async def _revocation_listener(self):
+        """
+        Background task keeping the revocation filter in sync with
+        revocations made by any gateway replica
+        """
+        await self._init_task
+        
+        while self._redis:
+            pubsub = self._redis.pubsub()
+            try:
+                # Subscribe before loading so no revocation is missed
+                await pubsub.subscribe(self.REVOCATION_CHANNEL)
+                await self._rebuild_revocation_filter()
+                
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._add_revoked_token(message["data"])
+                        
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Token revocation listener error", error=str(e))
+            finally:
+                # Fall back to Redis blacklist checks until resynced
+                self._revocations_synced = False
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            
+            await asyncio.sleep(self.REVOCATION_RETRY_INTERVAL)
+
     async def _validate_refresh_token(
         self,
         user_id: str,
@@ -485,6 +725,7 @@ class TokenService:
         if self._redis:
             refresh_key = f"{self.REFRESH_PREFIX}{user_id}:{refresh_token_id}"
             await self._redis.delete(refresh_key)
+            await self._redis.srem(f"{self.REFRESH_INDEX_PREFIX}{user_id}", refresh_key)
         else:
             # In-memory fallback
             key = f"{user_id}:{refresh_token_id}"
@@ -496,16 +737,26 @@ class TokenService:
         Revoke all refresh tokens associated with an access token
         """
         if self._redis:
-            # Get all refresh tokens for the user
-            refresh_pattern = f"{self.REFRESH_PREFIX}{user_id}:*"
-            refresh_keys = await self._redis.keys(refresh_pattern)
-            
-            for key in refresh_keys:
-                data = await self._redis.get(key)
-                if data:
-                    refresh_data = json.loads(data)
-                    if refresh_data.get("access_token_id") == access_token_id:
-                        await self._redis.delete(key)
+            # Get all refresh tokens for the user from their index
+            refresh_index_key = f"{self.REFRESH_INDEX_PREFIX}{user_id}"
+            refresh_keys = list(await self._redis.smembers(refresh_index_key))
+            if not refresh_keys:
+                return
+            
+            # Fetch all token data in one round trip
+            values = await self._redis.mget(refresh_keys)
+            keys_to_delete = []
+            stale_keys = []
+            for key, data in zip(refresh_keys, values):
+                if not data:
+                    stale_keys.append(key)
+                elif json.loads(data).get("access_token_id") == access_token_id:
+                    keys_to_delete.append(key)
+            
+            if keys_to_delete:
+                await self._redis.delete(*keys_to_delete)
+            if keys_to_delete or stale_keys:
+                await self._redis.srem(refresh_index_key, *keys_to_delete, *stale_keys)
         else:
             # In-memory fallback
             keys_to_delete = []
@@ -524,6 +775,11 @@ class TokenService:
             try:
                 # Redis automatically handles TTL expiration
                 # This is just for additional maintenance if needed
+                self._verified_tokens.purge_expired(time.time())
+                
+                # Rebuild the revocation filter to forget expired entries
+                if self._redis and self._revocations_synced:
+                    await self._rebuild_revocation_filter()
                 
                 # For in-memory fallback, we would clean up expired tokens here
                 if not self._redis:
@@ -555,6 +811,13 @@ class TokenService:
             except asyncio.CancelledError:
                 pass
         
+        if self._revocation_task:
+            self._revocation_task.cancel()
+            try:
+                await self._revocation_task
+            except asyncio.CancelledError:
+                pass
+        
         if self._init_task:
             self._init_task.cancel()
             try:
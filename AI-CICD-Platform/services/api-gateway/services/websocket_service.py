@@ -10,8 +10,8 @@ import socketio
 from fastapi import FastAPI, Depends, HTTPException, status
 from pydantic import BaseModel, Field
 
+from ..config import get_settings
 from ..models.gateway_models import UserInfo
-from ..services.auth_service import get_current_user
 
 logger = logging.getLogger(__name__)
 
@@ -41,10 +41,31 @@ class WebSocketEvent(BaseModel):
     category: Optional[EventCategory] = None  # Category for event filtering
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
 
+# Room every authenticated connection joins, used for broadcasts
+AUTHENTICATED_ROOM = "authenticated"
+
+def user_room(user_id: str) -> str:
+    """Room joined by every connection of a user"""
+    return f"user:{user_id}"
+
+def role_room(role: str) -> str:
+    """Room joined by every connection of a user with a role"""
+    return f"role:{role}"
+
+# Send backlog, as a multiple of websocket_send_queue_limit, at which a slow
+# connection stops receiving events of a priority (None: always delivered)
+DROP_POLICY: Dict[Optional[EventPriority], Optional[int]] = {
+    EventPriority.LOW: 1,
+    None: 2,
+    EventPriority.MEDIUM: 2,
+    EventPriority.HIGH: None
+}
+
 class WebSocketService:
     """Service for handling WebSocket connections and events"""
     
     def __init__(self):
+        self.settings = get_settings()
         self.sio = socketio.AsyncServer(
             async_mode="asgi",
             cors_allowed_origins="*",  # TODO: Configure for production
@@ -56,6 +77,15 @@ class WebSocketService:
         self.user_roles: Dict[str, List[str]] = {}  # user_id -> list of roles
         self.sid_to_user: Dict[str, str] = {}  # sid -> user_id
         
+        # Latest pending event per coalescing key, flushed once per interval
+        self._coalesced: Dict[tuple, WebSocketEvent] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Send backlog of connections at or over the queue limit: sid -> queued packets
+        self._backlogs: Dict[str, int] = {}
+        self._backlog_task: Optional[asyncio.Task] = None
+        self.dropped_events = 0
+        
         # Set up event handlers
         self.sio.on("connect", self.handle_connect)
         self.sio.on("disconnect", self.handle_disconnect)
@@ -70,13 +100,15 @@ class WebSocketService:
         """Handle disconnection"""
         logger.info(f"Disconnected: {sid}")
         
-        # Remove user from connected users
+        # Remove user from connected users (Socket.IO drops the sid from its rooms)
+        self._backlogs.pop(sid, None)
         if sid in self.sid_to_user:
             user_id = self.sid_to_user[sid]
             if user_id in self.connected_users:
                 self.connected_users[user_id].remove(sid)
                 if not self.connected_users[user_id]:
                     del self.connected_users[user_id]
+                    self.user_roles.pop(user_id, None)
             del self.sid_to_user[sid]
     
     async def handle_authenticate(self, sid, data):
@@ -99,6 +131,13 @@ class WebSocketService:
             self.sid_to_user[sid] = user_id
             self.user_roles[user_id] = roles
             
+            # Join the rooms events are addressed to
+            await self.sio.enter_room(sid, AUTHENTICATED_ROOM)
+            await self.sio.enter_room(sid, user_room(user_id))
+            for role in roles:
+                await self.sio.enter_room(sid, role_room(role))
+            self._start_backlog_monitor()
+            
             # Send success response
             await self.sio.emit("authenticated", {"user_id": user_id}, room=sid)
             logger.info(f"User {user_id} authenticated with sid {sid}")
@@ -109,40 +148,108 @@ class WebSocketService:
     
     async def emit_event(self, event: WebSocketEvent):
         """Emit an event to connected clients based on targeting criteria"""
-        target_sids = set()
-        
-        # Determine target sids based on targeting criteria
+        # Address rooms rather than individual sids
         if event.target_users:
-            # Target specific users
-            for user_id in event.target_users:
-                if user_id in self.connected_users:
-                    target_sids.update(self.connected_users[user_id])
+            rooms = [user_room(user_id) for user_id in event.target_users]
         elif event.target_roles:
-            # Target users with specific roles
-            for user_id, roles in self.user_roles.items():
-                if any(role in event.target_roles for role in roles):
-                    if user_id in self.connected_users:
-                        target_sids.update(self.connected_users[user_id])
+            rooms = [role_room(role) for role in event.target_roles]
         else:
-            # Broadcast to all authenticated users
-            for sids in self.connected_users.values():
-                target_sids.update(sids)
+            rooms = [AUTHENTICATED_ROOM]
         
         # Prepare event data with priority if specified
         event_data = event.data
         if event.priority:
             event_data = {**event_data, "priority": event.priority}
         
-        # Emit event to target sids
-        for sid in target_sids:
-            await self.sio.emit(
-                event.event_type,
-                event_data,
-                room=sid,
-                namespace=event.namespace
-            )
+        # Slow consumers miss events their backlog no longer has room for
+        skip_sids = self._skipped_sids(event.priority)
+        if skip_sids:
+            self.dropped_events += len(skip_sids)
+            logger.warning(f"Dropping event {event.event_type} for {len(skip_sids)} slow clients")
+        
+        # One emit: the packet is encoded once and queued on every connection
+        # in the rooms without waiting for each socket in turn
+        await self.sio.emit(
+            event.event_type,
+            event_data,
+            to=rooms,
+            skip_sid=skip_sids or None,
+            namespace=event.namespace
+        )
+        
+        logger.debug(f"Emitted event {event.event_type} to rooms {rooms}")
+    
+    async def emit_coalesced(self, key: str, event: WebSocketEvent):
+        """
+        Emit a high-frequency event, keeping only the latest event per key within
+        each coalescing interval. Only low-priority events are coalesced.
+        """
+        if event.priority not in (EventPriority.LOW, None) or self.settings.websocket_coalesce_interval <= 0:
+            await self.emit_event(event)
+            return
         
-        logger.info(f"Emitted event {event.event_type} to {len(target_sids)} clients")
+        coalesce_key = (
+            event.event_type,
+            key,
+            event.namespace,
+            tuple(event.target_users or ()),
+            tuple(event.target_roles or ())
+        )
+        self._coalesced[coalesce_key] = event
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_coalesced())
+    
+    def discard_coalesced(self, event_type: str, key: str):
+        """Drop pending coalesced events that a final event supersedes"""
+        for coalesce_key in [k for k in self._coalesced if k[0] == event_type and k[1] == key]:
+            del self._coalesced[coalesce_key]
+    
+    async def _flush_coalesced(self):
+        """Send the latest pending event per key at the end of the interval"""
+        await asyncio.sleep(self.settings.websocket_coalesce_interval)
+        pending, self._coalesced = self._coalesced, {}
+        for event in pending.values():
+            try:
+                await self.emit_event(event)
+            except Exception as e:
+                logger.error(f"Coalesced event {event.event_type} failed: {str(e)}")
+    
+    def _skipped_sids(self, priority: Optional[EventPriority]) -> List[str]:
+        """Connections whose send backlog is too deep for an event of this priority"""
+        multiple = DROP_POLICY.get(priority)
+        if multiple is None or not self._backlogs:
+            return []
+        threshold = multiple * self.settings.websocket_send_queue_limit
+        return [sid for sid, backlog in self._backlogs.items() if backlog >= threshold]
+    
+    def _start_backlog_monitor(self):
+        if self._backlog_task is None or self._backlog_task.done():
+            self._backlog_task = asyncio.create_task(self._backlog_monitor_loop())
+    
+    async def _backlog_monitor_loop(self):
+        """
+        Sample the per-connection Engine.IO send queues so emits can skip slow
+        consumers without inspecting every connection per event
+        """
+        while True:
+            await asyncio.sleep(self.settings.websocket_backlog_check_interval)
+            try:
+                self._backlogs = self._sample_backlogs()
+            except Exception as e:
+                logger.error(f"Backlog check failed: {str(e)}")
+    
+    def _sample_backlogs(self) -> Dict[str, int]:
+        limit = self.settings.websocket_send_queue_limit
+        backlogs = {}
+        for sid in self.sid_to_user:
+            eio_sid = self.sio.manager.eio_sid_from_sid(sid, "/")
+            socket = self.sio.eio.sockets.get(eio_sid) if eio_sid else None
+            if socket is None:
+                continue
+            backlog = socket.queue.qsize()
+            if backlog >= limit:
+                backlogs[sid] = backlog
+        return backlogs
     
     def register_event_handler(self, event_type: str, handler: Callable, namespace: str = "/"):
         """Register a handler for a custom event type"""
@@ -175,8 +282,8 @@ class WebSocketService:
         ))
         
     async def emit_ml_training_progress(self, training_id: str, progress_data: Dict[str, Any], target_users: Optional[List[str]] = None):
-        """Helper method to emit ML training progress events"""
-        await self.emit_event(WebSocketEvent(
+        """Helper method to emit ML training progress events (coalesced per training)"""
+        await self.emit_coalesced(training_id, WebSocketEvent(
             event_type="debug_ml_training_progress",
             data={
                 "trainingId": training_id,
@@ -189,6 +296,7 @@ class WebSocketService:
         
     async def emit_ml_training_completed(self, training_id: str, result_data: Dict[str, Any], target_users: Optional[List[str]] = None):
         """Helper method to emit ML training completed events"""
+        self.discard_coalesced("debug_ml_training_progress", training_id)
         await self.emit_event(WebSocketEvent(
             event_type="debug_ml_training_completed",
             data={
@@ -345,8 +453,8 @@ class WebSocketService:
         ))
         
     async def emit_pipeline_execution_updated(self, execution_id: str, pipeline_id: str, execution_data: Dict[str, Any], target_users: Optional[List[str]] = None):
-        """Helper method to emit pipeline execution updated events"""
-        await self.emit_event(WebSocketEvent(
+        """Helper method to emit pipeline execution updated events (coalesced per execution)"""
+        await self.emit_coalesced(execution_id, WebSocketEvent(
             event_type="pipeline_execution_updated",
             data={
                 "executionId": execution_id,
@@ -360,6 +468,7 @@ class WebSocketService:
         
     async def emit_pipeline_execution_completed(self, execution_id: str, pipeline_id: str, execution_data: Dict[str, Any], target_users: Optional[List[str]] = None):
         """Helper method to emit pipeline execution completed events"""
+        self.discard_coalesced("pipeline_execution_updated", execution_id)
         await self.emit_event(WebSocketEvent(
             event_type="pipeline_execution_completed",
             data={
@@ -493,6 +602,34 @@ class WebSocketService:
             category=EventCategory.SYSTEM
         ))
     
+    async def emit_service_status_changed(self, service_id: str, status_data: Dict[str, Any], target_users: Optional[List[str]] = None):
+        """Helper method to emit service instance health status change events"""
+        await self.emit_event(WebSocketEvent(
+            event_type="system_service_status_changed",
+            data={
+                "serviceId": service_id,
+                "status": status_data
+            },
+            target_users=target_users,
+            priority=EventPriority.HIGH if status_data.get("status") == "down" else EventPriority.MEDIUM,
+            category=EventCategory.SYSTEM
+        ))
+    
     def mount_to_app(self, app: FastAPI, path: str = "/ws"):
         """Mount the Socket.IO ASGI app to the FastAPI app"""
         app.mount(path, self.app)
+    
+    async def cleanup(self):
+        """Flush pending coalesced events and stop background tasks"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        pending, self._coalesced = self._coalesced, {}
+        for event in pending.values():
+            await self.emit_event(event)
+        
+        if self._backlog_task:
+            self._backlog_task.cancel()
+            try:
+                await self._backlog_task
+            except asyncio.CancelledError:
+                pass
@@ -351,3 +351,68 @@ async def test_hash_and_verify_key(api_key_service):
     # Verify a different key fails
     is_valid = api_key_service._verify_key("wrong_key", key_hash)
     assert is_valid is False
+
+@pytest.mark.asyncio
+async def test_validate_api_key_cached(api_key_service):
+    """Test that repeat validations skip PBKDF2 verification"""
+    raw_key, api_key = await api_key_service.create_api_key(
+        user_id="test_user_id",
+        name="Cached Key"
+    )
+    
+    # First validation runs the full hash verification
+    with patch.object(api_key_service, '_verify_key', wraps=api_key_service._verify_key) as mock_verify:
+        assert await api_key_service.validate_api_key(raw_key) is not None
+        assert await api_key_service.validate_api_key(raw_key) is not None
+        assert await api_key_service.validate_api_key(raw_key) is not None
+    
+    # Only the first validation hashed the key
+    assert mock_verify.call_count == 1
+    assert api_key.key_id in api_key_service._verified_by_key_id
+    
+    # A different key with the same prefix is still verified
+    wrong_key = raw_key[:8] + "wrong"
+    with patch.object(api_key_service, '_verify_key', return_value=False) as mock_verify:
+        assert await api_key_service.validate_api_key(wrong_key) is None
+    mock_verify.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_revoke_and_update_api_key_clear_cache(api_key_service):
+    """Test that revoking or updating a key drops its cached verification"""
+    raw_key, api_key = await api_key_service.create_api_key(
+        user_id="test_user_id",
+        name="Cached Key"
+    )
+    await api_key_service.validate_api_key(raw_key)
+    assert len(api_key_service._verified_keys) == 1
+    
+    # Updating forces re-verification
+    await api_key_service.update_api_key(api_key.key_id, permissions=["read:all"])
+    assert len(api_key_service._verified_keys) == 0
+    
+    result = await api_key_service.validate_api_key(raw_key)
+    assert result is not None
+    assert result[1].permissions == ["read:all"]
+    
+    # Revoking drops the cached verification and rejects the key
+    await api_key_service.revoke_api_key(api_key.key_id)
+    assert len(api_key_service._verified_keys) == 0
+    assert api_key.key_id not in api_key_service._verified_by_key_id
+    assert await api_key_service.validate_api_key(raw_key) is None
+
+@pytest.mark.asyncio
+async def test_verified_key_cache_ttl(api_key_service):
+    """Test that cached verifications expire after the configured TTL"""
+    raw_key, api_key = await api_key_service.create_api_key(
+        user_id="test_user_id",
+        name="Cached Key"
+    )
+    await api_key_service.validate_api_key(raw_key)
+    
+    # Expire the cached verification
+    digest = api_key_service._key_digest(raw_key)
+    api_key_service._verified_keys[digest] = (api_key.key_id, 0)
+    
+    with patch.object(api_key_service, '_verify_key', return_value=True) as mock_verify:
+        assert await api_key_service.validate_api_key(raw_key) is not None
+    mock_verify.assert_called_once()
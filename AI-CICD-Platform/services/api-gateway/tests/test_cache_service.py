@@ -4,7 +4,10 @@ from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch, AsyncMock
 import json
 
-from ..services.cache_service import CacheService
+import fnmatch
+from aiocache.backends.redis import RedisCache
+
+from ..services.cache_service import CacheService, LocalResponseCache, estimate_response_size, CACHE_NAMESPACE
 from ..models.gateway_models import (
     ServiceResponse,
     UserInfo,
@@ -172,8 +175,11 @@ async def test_cache_response(cache_service, mock_service_response):
     cache_service._cache.set.assert_called_once()
     # Check that the first argument to set() is the key
     assert cache_service._cache.set.call_args[0][0] == "test-key"
-    # Check that the second argument to set() is the response
-    assert cache_service._cache.set.call_args[0][1] == mock_service_response
+    # Check that the second argument to set() is a copy of the response
+    cached = cache_service._cache.set.call_args[0][1]
+    assert cached is not mock_service_response
+    assert cached.body == mock_service_response.body
+    assert cached.status_code == mock_service_response.status_code
     # Check that ttl was passed as a keyword argument
     assert cache_service._cache.set.call_args[1]["ttl"] == 60
 
@@ -190,11 +196,18 @@ async def test_cache_disabled(cache_service, mock_service_response):
     assert cache_service._stats["stored"] == 0
     cache_service._cache.set.assert_not_called()
 
+def scan_results(keys):
+    """Create an async iterator over SCAN results"""
+    async def iterate(*args, **kwargs):
+        for key in keys:
+            yield key
+    return iterate
+
 @pytest.mark.asyncio
 async def test_invalidate_cache(cache_service):
-    """Test invalidating cache entries"""
+    """Test invalidating cache entries by pattern with incremental SCAN"""
     # Setup mocks
-    cache_service._redis.keys.return_value = ["key1", "key2", "key3"]
+    cache_service._redis.scan_iter = MagicMock(side_effect=scan_results(["key1", "key2", "key3"]))
     cache_service._redis.delete.return_value = 3
     
     # Test
@@ -203,15 +216,21 @@ async def test_invalidate_cache(cache_service):
     # Verify
     assert count == 3
     assert cache_service._stats["invalidations"] == 3
-    cache_service._redis.keys.assert_called_once()
+    cache_service._redis.keys.assert_not_called()
+    assert cache_service._redis.scan_iter.call_args[1]["match"] == "api_gateway_cache:test*"
     cache_service._redis.delete.assert_called_once_with("key1", "key2", "key3")
 
 @pytest.mark.asyncio
 async def test_invalidate_cache_by_service(cache_service):
-    """Test invalidating cache entries by service"""
+    """Test invalidating cache entries by service through the tag index"""
     # Setup mocks
-    cache_service._redis.keys.return_value = ["key1", "key2"]
+    cache_service._redis.sscan_iter = MagicMock(side_effect=scan_results([
+        "api_gateway_cache:key1",
+        "api_gateway_cache:key2"
+    ]))
     cache_service._redis.delete.return_value = 2
+    cache_service._redis.pipeline = MagicMock()
+    cache_service._redis.pipeline.return_value.execute = AsyncMock()
     
     # Test
     count = await cache_service.invalidate_cache(service="test-service")
@@ -219,15 +238,22 @@ async def test_invalidate_cache_by_service(cache_service):
     # Verify
     assert count == 2
     assert cache_service._stats["invalidations"] == 2
-    cache_service._redis.keys.assert_called_once()
-    cache_service._redis.delete.assert_called_once_with("key1", "key2")
+    cache_service._redis.keys.assert_not_called()
+    cache_service._redis.sscan_iter.assert_called_once()
+    assert cache_service._redis.sscan_iter.call_args[0][0].endswith("service:test-service")
+    cache_service._redis.delete.assert_called_once_with(
+        "api_gateway_cache:key1",
+        "api_gateway_cache:key2"
+    )
 
 @pytest.mark.asyncio
 async def test_invalidate_cache_by_service_and_endpoint(cache_service):
-    """Test invalidating cache entries by service and endpoint"""
+    """Test invalidating cache entries by service and endpoint through the tag index"""
     # Setup mocks
-    cache_service._redis.keys.return_value = ["key1"]
+    cache_service._redis.sscan_iter = MagicMock(side_effect=scan_results(["api_gateway_cache:key1"]))
     cache_service._redis.delete.return_value = 1
+    cache_service._redis.pipeline = MagicMock()
+    cache_service._redis.pipeline.return_value.execute = AsyncMock()
     
     # Test
     count = await cache_service.invalidate_cache(
@@ -238,14 +264,14 @@ async def test_invalidate_cache_by_service_and_endpoint(cache_service):
     # Verify
     assert count == 1
     assert cache_service._stats["invalidations"] == 1
-    cache_service._redis.keys.assert_called_once()
-    cache_service._redis.delete.assert_called_once_with("key1")
+    assert cache_service._redis.sscan_iter.call_args[0][0].endswith("endpoint:test-service:test-endpoint")
+    cache_service._redis.delete.assert_called_once_with("api_gateway_cache:key1")
 
 @pytest.mark.asyncio
 async def test_invalidate_cache_no_keys(cache_service):
     """Test invalidating cache when no keys match"""
     # Setup mocks
-    cache_service._redis.keys.return_value = []
+    cache_service._redis.scan_iter = MagicMock(side_effect=scan_results([]))
     
     # Test
     count = await cache_service.invalidate_cache(pattern="test*")
@@ -253,9 +279,55 @@ async def test_invalidate_cache_no_keys(cache_service):
     # Verify
     assert count == 0
     assert cache_service._stats["invalidations"] == 0
-    cache_service._redis.keys.assert_called_once()
+    cache_service._redis.scan_iter.assert_called_once()
     cache_service._redis.delete.assert_not_called()
 
+@pytest.mark.asyncio
+async def test_cache_response_registers_tags(cache_service, mock_service_response, mock_user):
+    """Test that cached responses are added to their tag index sets"""
+    # Setup
+    cache_service.settings.cache_enabled = True
+    cache_service._redis.pipeline = MagicMock()
+    pipe = cache_service._redis.pipeline.return_value
+    pipe.execute = AsyncMock()
+    tags = cache_service.build_cache_tags("test-service", "test-endpoint", mock_user, vary_by_user=True)
+    
+    # Test
+    await cache_service.cache_response("test-key", mock_service_response, ttl=60, tags=tags)
+    
+    # Verify
+    assert tags == [
+        "service:test-service",
+        "endpoint:test-service:test-endpoint",
+        f"user:{mock_user.user_id}"
+    ]
+    indexed = [call[0] for call in pipe.sadd.call_args_list]
+    for tag in tags:
+        assert (f"api_gateway_cache_tag:{tag}", "api_gateway_cache:test-key") in indexed
+    pipe.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_invalidation_uses_redis_key_format(cache_service, mock_service_response):
+    """Test that tag members and invalidation patterns match the keys aiocache writes to Redis"""
+    # Setup
+    cache_service.settings.cache_enabled = True
+    cache_service._redis.pipeline = MagicMock()
+    pipe = cache_service._redis.pipeline.return_value
+    pipe.execute = AsyncMock()
+    redis_key = RedisCache(namespace=CACHE_NAMESPACE)._build_key("svc:ep:GET")
+    
+    # Test
+    await cache_service.cache_response("svc:ep:GET", mock_service_response, ttl=60, tags=["service:svc"])
+    cache_service._redis.scan_iter = MagicMock(side_effect=scan_results([redis_key]))
+    cache_service._redis.delete.return_value = 1
+    count = await cache_service.invalidate_cache(pattern="svc:*")
+    
+    # Verify
+    assert ("api_gateway_cache_tag:service:svc", redis_key) in [call[0] for call in pipe.sadd.call_args_list]
+    assert fnmatch.fnmatchcase(redis_key, cache_service._redis.scan_iter.call_args[1]["match"])
+    assert count == 1
+    assert cache_service._local.get("svc:ep:GET") is None
+
 # Test cache decision logic
 @pytest.mark.asyncio
 async def test_should_cache_response_true(cache_service, mock_request, mock_service_response):
@@ -455,6 +527,159 @@ async def test_get_cache_stats(cache_service):
     assert stats["memory_used"] == "1.5M"
     assert stats["memory_peak"] == "2M"
 
+# Test two-tier caching
+@pytest.mark.asyncio
+async def test_get_cached_response_l1_hit(cache_service, mock_service_response):
+    """Test that L2 hits are served from the in-process cache afterwards"""
+    # Setup mock
+    cache_service._cache.get.return_value = mock_service_response
+    
+    # Test
+    await cache_service.get_cached_response("test-key")
+    result = await cache_service.get_cached_response("test-key")
+    
+    # Verify
+    assert result == mock_service_response
+    assert cache_service._stats["hits"] == 2
+    assert cache_service._stats["l2_hits"] == 1
+    assert cache_service._stats["l1_hits"] == 1
+    cache_service._cache.get.assert_called_once_with("test-key")
+
+@pytest.mark.asyncio
+async def test_l1_byte_budget(cache_service, mock_service_response):
+    """Test that the in-process cache evicts least recently used entries"""
+    size = estimate_response_size(mock_service_response)
+    cache_service._local = LocalResponseCache(max_bytes=size * 2)
+    expires_at = datetime.utcnow().timestamp() + 60
+    
+    # Test
+    cache_service._local.set("key1", mock_service_response, expires_at, size)
+    cache_service._local.set("key2", mock_service_response, expires_at, size)
+    cache_service._local.get("key1")
+    cache_service._local.set("key3", mock_service_response, expires_at, size)
+    
+    # Verify
+    assert cache_service._local.get("key1") is not None
+    assert cache_service._local.get("key2") is None
+    assert cache_service._local.get("key3") is not None
+    assert cache_service._local.size_bytes == size * 2
+
+@pytest.mark.asyncio
+async def test_get_or_fetch_coalesces_misses(cache_service, mock_request, mock_service_response):
+    """Test that concurrent misses for the same key share one upstream fetch"""
+    # Setup
+    cache_service.settings.cache_enabled = True
+    cache_service._cache.get.return_value = None
+    fetch_started = asyncio.Event()
+    release_fetch = asyncio.Event()
+    fetch_count = 0
+    
+    async def fetch():
+        nonlocal fetch_count
+        fetch_count += 1
+        fetch_started.set()
+        await release_fetch.wait()
+        return mock_service_response
+    
+    # Test
+    first = asyncio.create_task(cache_service.get_or_fetch("test-key", fetch, mock_request))
+    await fetch_started.wait()
+    second = asyncio.create_task(cache_service.get_or_fetch("test-key", fetch, mock_request))
+    await asyncio.sleep(0)
+    release_fetch.set()
+    results = await asyncio.gather(first, second)
+    
+    # Verify
+    assert fetch_count == 1
+    assert results == [(mock_service_response, False), (mock_service_response, False)]
+    assert cache_service._stats["coalesced"] == 1
+    cache_service._cache.set.assert_called_once()
+    assert "test-key" not in cache_service._inflight
+
+@pytest.mark.asyncio
+async def test_get_or_fetch_stale_while_revalidate(cache_service, mock_request, mock_service_response):
+    """Test that stale entries are served while being refreshed in the background"""
+    # Setup
+    cache_service.settings.cache_enabled = True
+    mock_service_response.metadata["cache_fresh_until"] = datetime.utcnow().timestamp() - 1
+    cache_service._cache.get.return_value = mock_service_response
+    fetch = AsyncMock(return_value=mock_service_response)
+    
+    # Test
+    result, cache_hit = await cache_service.get_or_fetch(
+        "test-key",
+        fetch,
+        mock_request,
+        {"ttl": 60, "stale_while_revalidate": 30}
+    )
+    await asyncio.sleep(0)
+    
+    # Verify
+    assert cache_hit is True
+    assert result == mock_service_response
+    assert cache_service._stats["stale_hits"] == 1
+    assert cache_service._stats["revalidations"] == 1
+    fetch.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_cache_response_stale_ttl(cache_service, mock_service_response):
+    """Test that Redis entries outlive their freshness by the stale window"""
+    # Setup
+    cache_service.settings.cache_enabled = True
+    
+    # Test
+    await cache_service.cache_response(
+        "test-key",
+        mock_service_response,
+        ttl=60,
+        cache_config={"ttl": 60, "stale_while_revalidate": 30}
+    )
+    
+    # Verify
+    assert cache_service._cache.set.call_args[1]["ttl"] == 90
+    assert "cache_fresh_until" in cache_service._cache.set.call_args[0][1].metadata
+    assert "cache_fresh_until" not in mock_service_response.metadata
+
+@pytest.mark.asyncio
+async def test_l1_hits_return_copies(cache_service, mock_service_response):
+    """Test that mutating a response served from the in-process cache does not change the cache"""
+    # Setup
+    cache_service.settings.cache_enabled = True
+    await cache_service.cache_response("test-key", mock_service_response, ttl=60)
+    
+    # Test
+    first = await cache_service.get_cached_response("test-key")
+    first.body["data"] = "changed"
+    first.metadata.clear()
+    second = await cache_service.get_cached_response("test-key")
+    
+    # Verify
+    assert cache_service._stats["l1_hits"] == 2
+    assert second.body == {"data": "test data"}
+    assert "cache_fresh_until" in second.metadata
+    mock_service_response.body["data"] = "mutated by caller"
+    assert (await cache_service.get_cached_response("test-key")).body == {"data": "test data"}
+
+@pytest.mark.asyncio
+async def test_get_cache_stats_tiers(cache_service):
+    """Test that cache statistics report per-tier hit ratios"""
+    # Setup
+    cache_service._stats.update({
+        "hits": 8,
+        "misses": 2,
+        "l1_hits": 6,
+        "l2_hits": 2
+    })
+    cache_service._redis.info.return_value = {}
+    
+    # Test
+    stats = await cache_service.get_cache_stats()
+    
+    # Verify
+    assert stats["l1_hit_ratio"] == 0.6
+    assert stats["l2_hit_ratio"] == 0.2
+    assert stats["l1_entries"] == 0
+
 @pytest.mark.asyncio
 async def test_cleanup(cache_service):
     """Test cleanup method"""
@@ -0,0 +1,96 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# Add the parent directory to sys.path to allow imports from the main application
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.load_balancer import LoadBalancer, ServiceInstance
+from config import get_settings
+
+@pytest.fixture
+def load_balancer():
+    """
+    Create a load balancer with mocked connection pools.
+    """
+    with patch('httpx.AsyncClient') as mock_client:
+        mock_client.return_value.aclose = AsyncMock()
+        yield LoadBalancer(get_settings())
+
+def test_record_latency_ewma(load_balancer):
+    """
+    Test that latency is smoothed with an exponentially weighted average.
+    """
+    instance = load_balancer.add_instance("svc", "a", "http://a")
+
+    instance.record_latency(100.0, decay=0.5)
+    assert instance.ewma_latency_ms == 100.0
+
+    instance.record_latency(200.0, decay=0.5)
+    assert instance.ewma_latency_ms == 150.0
+
+def test_choose_prefers_cheaper_instance(load_balancer):
+    """
+    Test that power-of-two-choices picks the less loaded, faster instance.
+    """
+    fast = load_balancer.add_instance("svc", "fast", "http://fast")
+    slow = load_balancer.add_instance("svc", "slow", "http://slow")
+    fast.record_latency(10.0, decay=1.0)
+    slow.record_latency(100.0, decay=1.0)
+
+    assert load_balancer.choose([fast, slow]) is fast
+
+    # Enough outstanding requests outweigh lower latency
+    fast.outstanding = 20
+    assert load_balancer.choose([fast, slow]) is slow
+
+def test_registered_instances_replace_static(load_balancer):
+    """
+    Test that registered instances take over from statically configured ones.
+    """
+    load_balancer.add_instance("svc", "default", "http://static")
+    assert [i.instance_id for i in load_balancer.get_instances("svc")] == ["default"]
+
+    registration = MagicMock()
+    load_balancer.add_instance("svc", "reg-1", "http://registered", registration)
+    assert [i.instance_id for i in load_balancer.get_instances("svc")] == ["reg-1"]
+
+    # Re-adding an instance keeps its connection pool
+    instance = load_balancer.get_instance("svc", "reg-1")
+    client = instance.client
+    load_balancer.add_instance("svc", "reg-1", "http://moved", registration)
+    assert instance.url == "http://moved"
+    assert instance.client is client
+
+@pytest.mark.asyncio
+async def test_remove_instance_closes_pool(load_balancer):
+    """
+    Test that removing an instance closes its connection pool.
+    """
+    instance = load_balancer.add_instance("svc", "a", "http://a")
+
+    assert await load_balancer.remove_instance("svc", "a") is True
+    instance.client.aclose.assert_awaited()
+    assert load_balancer.get_instances("svc") == []
+    assert await load_balancer.remove_instance("svc", "a") is False
+
+@pytest.mark.asyncio
+async def test_remove_busy_instance_drains(load_balancer):
+    """
+    Test that a busy instance is no longer selected but keeps its pool
+    until its last request finishes.
+    """
+    instance = load_balancer.add_instance("svc", "a", "http://a")
+    instance.outstanding = 2
+
+    assert await load_balancer.remove_instance("svc", "a") is True
+    assert instance.draining is True
+    assert load_balancer.get_instances("svc") == []
+    instance.client.aclose.assert_not_awaited()
+
+    await load_balancer.release(instance)
+    instance.client.aclose.assert_not_awaited()
+
+    await load_balancer.release(instance)
+    instance.client.aclose.assert_awaited_once()
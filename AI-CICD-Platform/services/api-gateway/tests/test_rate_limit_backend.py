@@ -0,0 +1,218 @@
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# Add the parent directory to sys.path to allow imports from the main application
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.rate_limit_backend import (
+    InMemoryRateLimitBackend,
+    RedisRateLimitBackend,
+    create_rate_limit_backend
+)
+from config import get_settings
+
+@pytest.fixture
+def memory_backend():
+    """
+    Create an in-memory rate limit backend.
+    """
+    return InMemoryRateLimitBackend()
+
+@pytest.fixture
+def mock_script():
+    """
+    Create a mock for the registered Redis rate limit script.
+    """
+    with patch('aioredis.from_url') as mock_from_url:
+        mock_redis = MagicMock()
+        mock_redis.close = AsyncMock()
+        script = AsyncMock()
+        mock_redis.register_script.return_value = script
+        mock_from_url.return_value = mock_redis
+        yield script
+
+@pytest.fixture
+def redis_backend(mock_script):
+    """
+    Create a Redis rate limit backend with a mocked script.
+    """
+    settings = get_settings().model_copy(update={
+        "rate_limit_fast_path_ratio": 0.1,
+        "rate_limit_fast_path_ttl": 60.0
+    })
+    return RedisRateLimitBackend(settings)
+
+@pytest.mark.asyncio
+async def test_memory_backend_enforces_limit(memory_backend):
+    """
+    Test that the in-memory backend rejects requests over the limit.
+    """
+    for _ in range(3):
+        is_allowed, retry_after = await memory_backend.hit("user:1", 3, 60)
+        assert is_allowed is True
+        assert retry_after is None
+
+    is_allowed, retry_after = await memory_backend.hit("user:1", 3, 60)
+    assert is_allowed is False
+    assert 0 < retry_after <= 60
+
+    # Other keys are unaffected
+    is_allowed, _ = await memory_backend.hit("user:2", 3, 60)
+    assert is_allowed is True
+
+@pytest.mark.asyncio
+async def test_memory_backend_purge_expired(memory_backend):
+    """
+    Test that keys without requests in their window are purged.
+    """
+    await memory_backend.hit("user:1", 3, 0)
+    await memory_backend.hit("user:2", 3, 60)
+
+    await memory_backend.purge_expired()
+
+    assert "user:1" not in memory_backend._logs
+    assert "user:2" in memory_backend._logs
+
+@pytest.mark.asyncio
+async def test_redis_backend_fast_path(redis_backend, mock_script):
+    """
+    Test that keys clearly under their limit skip the network.
+    """
+    # 1 of 100 used: 9 further requests may be admitted locally
+    mock_script.return_value = [1, 1, 0]
+
+    is_allowed, _ = await redis_backend.hit("user:1", 100, 60)
+    assert is_allowed is True
+    assert mock_script.await_count == 1
+
+    for _ in range(9):
+        is_allowed, _ = await redis_backend.hit("user:1", 100, 60)
+        assert is_allowed is True
+    assert mock_script.await_count == 1
+
+    # Budget exhausted: the next check syncs the locally admitted hits
+    mock_script.return_value = [1, 11, 0]
+    is_allowed, _ = await redis_backend.hit("user:1", 100, 60)
+    assert is_allowed is True
+    assert mock_script.await_count == 2
+    assert mock_script.call_args[1]["args"][3] == 9
+
+@pytest.mark.asyncio
+async def test_redis_backend_rejects_over_limit(redis_backend, mock_script):
+    """
+    Test that Redis rejections are returned with a retry delay.
+    """
+    mock_script.return_value = [0, 100, 1500]
+
+    is_allowed, retry_after = await redis_backend.hit("user:1", 100, 60)
+
+    assert is_allowed is False
+    assert retry_after == 2
+    assert "user:1" not in redis_backend._budgets
+
+@pytest.mark.asyncio
+async def test_redis_backend_no_fast_path_near_limit(redis_backend, mock_script):
+    """
+    Test that keys close to their limit always go to Redis.
+    """
+    mock_script.return_value = [1, 80, 0]
+
+    await redis_backend.hit("user:1", 100, 60)
+    await redis_backend.hit("user:1", 100, 60)
+
+    assert mock_script.await_count == 2
+
+@pytest.mark.asyncio
+async def test_redis_backend_falls_back_to_memory(redis_backend, mock_script):
+    """
+    Test that Redis errors fall back to the in-memory limiter.
+    """
+    mock_script.side_effect = ConnectionError("Redis unavailable")
+
+    for _ in range(2):
+        is_allowed, _ = await redis_backend.hit("user:1", 2, 60)
+        assert is_allowed is True
+
+    is_allowed, _ = await redis_backend.hit("user:1", 2, 60)
+    assert is_allowed is False
+
+    # Redis is not retried until the retry interval has passed
+    assert mock_script.await_count == 1
+
+@pytest.mark.asyncio
+async def test_redis_backend_flushes_pending_hits(redis_backend, mock_script):
+    """
+    Test that expired local budgets write their hits back to Redis.
+    """
+    mock_script.return_value = [1, 1, 0]
+    await redis_backend.hit("user:1", 100, 60)
+    await redis_backend.hit("user:1", 100, 60)
+
+    # Expire the local budget
+    redis_backend._budgets["user:1"].expires_at = 0
+    await redis_backend.purge_expired()
+
+    assert "user:1" not in redis_backend._budgets
+    args = mock_script.call_args[1]["args"]
+    assert args[3] == 1  # pending hits
+    assert args[5] == 0  # no new request acquired
+
+@pytest.mark.asyncio
+async def test_redis_backend_sends_pending_hits_once(redis_backend, mock_script):
+    """
+    Test that concurrent round trips for a key do not send its hits twice.
+    """
+    mock_script.return_value = [1, 1, 0]
+    await redis_backend.hit("user:1", 100, 60)
+    await redis_backend.hit("user:1", 100, 60)
+    redis_backend._budgets["user:1"].tokens = 0
+
+    release = asyncio.Event()
+
+    async def slow_script(*args, **kwargs):
+        await release.wait()
+        return [1, 2, 0]
+
+    mock_script.side_effect = slow_script
+    first = asyncio.ensure_future(redis_backend.hit("user:1", 100, 60))
+    second = asyncio.ensure_future(redis_backend.hit("user:1", 100, 60))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, second)
+
+    sent = [call[1]["args"][3] for call in mock_script.call_args_list[1:]]
+    assert sorted(sent) == [0, 1]
+
+@pytest.mark.asyncio
+async def test_redis_backend_keeps_hits_when_flush_fails(redis_backend, mock_script):
+    """
+    Test that hits whose flush failed are sent by the next flush.
+    """
+    mock_script.return_value = [1, 1, 0]
+    await redis_backend.hit("user:1", 100, 60)
+    await redis_backend.hit("user:1", 100, 60)
+    redis_backend._budgets["user:1"].expires_at = 0
+
+    mock_script.side_effect = ConnectionError("Redis unavailable")
+    await redis_backend.purge_expired()
+    assert redis_backend._budgets["user:1"].pending == 1
+    assert redis_backend._budgets["user:1"].tokens == 0
+
+    mock_script.side_effect = None
+    await redis_backend.purge_expired()
+
+    assert "user:1" not in redis_backend._budgets
+    assert mock_script.call_args[1]["args"][3] == 1
+
+def test_create_memory_backend():
+    """
+    Test selecting the in-memory backend.
+    """
+    settings = get_settings().model_copy(update={"rate_limit_storage": "memory"})
+
+    backend = create_rate_limit_backend(settings)
+
+    assert isinstance(backend, InMemoryRateLimitBackend)
@@ -0,0 +1,175 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add the parent directory to sys.path to allow imports from the main application
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.route_compiler import RouteCompiler, parse_version
+from models.gateway_models import ApiVersion, UserInfo, UserRole
+from config import SERVICE_ROUTES, CACHE_CONFIGS, RATE_LIMIT_CONFIGS
+
+@pytest.fixture
+def versions():
+    """
+    Create the API versions plans are compiled for.
+    """
+    return [
+        ApiVersion(version="1", release_date=datetime(2024, 1, 1)),
+        ApiVersion(version="2", release_date=datetime(2025, 2, 1)),
+        ApiVersion(version="3", release_date=datetime(2025, 6, 1), deprecated=True)
+    ]
+
+@pytest.fixture
+def route_compiler(versions):
+    """
+    Create a route compiler with a test service registered.
+    """
+    compiler = RouteCompiler(versions)
+    compiler.register_service("test-service", {
+        "prefix": "/api/v1/test",
+        "endpoints": {
+            "items": {
+                "method": "GET",
+                "path": "/items",
+                "cache_enabled": True,
+                "cache_config": "user_specific",
+                "cache_vary_by_user": True,
+                "rate_limit_type": "auth",
+                "permissions_required": ["read:items"]
+            },
+            "admin": {
+                "method": "POST",
+                "path": "/admin",
+                "cache_enabled": False,
+                "roles_required": ["admin"],
+                "min_api_version": "2"
+            },
+            "public": {
+                "method": "GET",
+                "path": "/public",
+                "cache_enabled": False,
+                "auth_required": False
+            }
+        }
+    })
+    return compiler
+
+@pytest.fixture
+def developer():
+    """
+    Create a developer user.
+    """
+    return UserInfo(
+        user_id="dev_id",
+        username="dev",
+        email="dev@example.com",
+        roles=[UserRole.DEVELOPER],
+        permissions=["read:items"]
+    )
+
+def test_parse_version():
+    """
+    Test that versions compare numerically rather than lexically.
+    """
+    assert parse_version("2") == (2,)
+    assert parse_version("v1.3") == (1, 3)
+    assert parse_version("10") > parse_version("9")
+
+def test_register_service_compiles_plans(route_compiler):
+    """
+    Test that plans are compiled for every endpoint and supported version.
+    """
+    plan = route_compiler.get_plan("test-service", "items", "2")
+
+    assert plan is not None
+    assert plan.rate_limit_key_prefix == "test-service:items:2:"
+    assert plan.rate_limit_config["requests"] == RATE_LIMIT_CONFIGS["auth"]["requests"]
+    assert plan.cache_config["ttl"] == CACHE_CONFIGS["user_specific"]["ttl"]
+    assert plan.cache_key_prefix == "v2:"
+    assert plan.cache_tags == ("service:test-service", "endpoint:test-service:items")
+    assert plan.required_permissions == frozenset(["read:items"])
+    assert plan.stream_response is False
+
+    # Non-cacheable endpoints stream by default
+    assert route_compiler.get_plan("test-service", "public", "1").stream_response is True
+
+    # Deprecated versions and unknown routes have no plan
+    assert route_compiler.get_plan("test-service", "items", "3") is None
+    assert route_compiler.get_plan("test-service", "missing", "1") is None
+    assert route_compiler.get_plan("unknown", "items", "1") is None
+
+def test_plan_is_immutable(route_compiler):
+    """
+    Test that compiled plans cannot be modified.
+    """
+    plan = route_compiler.get_plan("test-service", "items", "1")
+
+    with pytest.raises(AttributeError):
+        plan.cache_enabled = False
+
+    with pytest.raises(TypeError):
+        plan.endpoint_config["cache_enabled"] = False
+
+def test_version_bounds(route_compiler):
+    """
+    Test that version bounds are evaluated at compile time.
+    """
+    assert route_compiler.get_plan("test-service", "admin", "1").version_error == (
+        "Endpoint requires API version 2 or higher"
+    )
+    assert route_compiler.get_plan("test-service", "admin", "2").version_error is None
+
+def test_check_access(route_compiler, developer):
+    """
+    Test authentication and permission checks against a plan.
+    """
+    items = route_compiler.get_plan("test-service", "items", "1")
+    admin = route_compiler.get_plan("test-service", "admin", "2")
+    public = route_compiler.get_plan("test-service", "public", "1")
+
+    assert items.check_access(None) == (401, "Authentication required")
+    assert public.check_access(None) is None
+    assert items.check_access(developer) is None
+    assert admin.check_access(developer) == (403, "Insufficient permissions")
+
+    # Admins pass every role and permission check
+    admin_user = developer.model_copy(update={"roles": [UserRole.ADMIN], "permissions": []})
+    assert admin.check_access(admin_user) is None
+    assert items.check_access(admin_user) is None
+
+    # Version restrictions on the user
+    restricted = developer.model_copy(update={"allowed_versions": ["2"]})
+    assert items.check_access(restricted)[0] == 403
+
+    # Version-specific permissions replace the global ones
+    scoped = developer.model_copy(update={"version_specific_permissions": {"1": ["write:items"]}})
+    assert items.check_access(scoped) == (403, "Insufficient permissions for this API version")
+
+def test_describe_and_reregister(route_compiler):
+    """
+    Test route introspection and recompiling a service.
+    """
+    routes = route_compiler.describe()
+
+    assert len(routes) == 6
+    items = next(r for r in routes if r["endpoint"] == "items" and r["version"] == "1")
+    assert items["path"] == "/items"
+    assert items["rate_limit"]["type"] == "auth"
+    assert items["cache"]["enabled"] is True
+
+    # Registering again replaces the service's plans
+    route_compiler.register_service("test-service", {"endpoints": {}})
+    assert route_compiler.describe() == []
+
+def test_compile_service_routes(versions):
+    """
+    Test that the configured service routes compile.
+    """
+    compiler = RouteCompiler(versions)
+    for service, service_config in SERVICE_ROUTES.items():
+        compiler.register_service(service, service_config)
+
+    expected = sum(len(config["endpoints"]) for config in SERVICE_ROUTES.values()) * 2
+    assert len(compiler.describe()) == expected
@@ -3,14 +3,16 @@ import sys
 import os
 import json
 import asyncio
+import time
 from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime, timedelta
-from httpx import Response, AsyncClient
+from httpx import Response, AsyncClient, Headers
 
 # Add the parent directory to sys.path to allow imports from the main application
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from services.routing_service import RoutingService
+from services.resilience_service import ResilienceService
 from models.gateway_models import (
     ServiceRegistration, 
     ServiceEndpoint, 
@@ -108,7 +110,7 @@ async def test_deregister_service(routing_service):
         endpoints={},
         last_health_check=datetime.utcnow()
     )
-    routing_service._services["test-id"] = service_reg
+    routing_service._add_registration(service_reg)
     
     # Deregister the service
     result = await routing_service.deregister_service("test-id")
@@ -116,6 +118,7 @@ async def test_deregister_service(routing_service):
     # Verify the service was deregistered
     assert result is True
     assert "test-id" not in routing_service._services
+    assert await routing_service.get_service("test-service") is None
 
 @pytest.mark.asyncio
 async def test_get_service(routing_service):
@@ -132,7 +135,7 @@ async def test_get_service(routing_service):
         endpoints={},
         last_health_check=datetime.utcnow()
     )
-    routing_service._services["test-id"] = service_reg
+    routing_service._add_registration(service_reg)
     
     # Get the service
     result = await routing_service.get_service("test-service")
@@ -279,3 +282,298 @@ async def test_health_check(routing_service, mock_httpx_client):
     
     # Reset the mock
     mock_httpx_client.stream.side_effect = None
+
+@pytest.mark.asyncio
+async def test_stream_request(routing_service, mock_httpx_client):
+    """
+    Test opening a pass-through stream to a service.
+    """
+    mock_request = MagicMock()
+    mock_httpx_client.build_request = MagicMock(return_value=mock_request)
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_httpx_client.send.return_value = mock_response
+    
+    # Open the stream
+    response = await routing_service.stream_request(
+        service="self-healing-debugger",
+        endpoint="analyze",
+        method="POST",
+        headers={"Content-Type": "application/json"}
+    )
+    
+    # Verify the body was left unread on the wire
+    assert response is mock_response
+    mock_httpx_client.send.assert_called_once_with(mock_request, stream=True)
+    call_args = mock_httpx_client.build_request.call_args[1]
+    assert call_args["method"] == "POST"
+    assert "/api/v1/debug/analyze" in call_args["url"]
+
+@pytest.mark.asyncio
+async def test_release_unread_stream(routing_service, mock_httpx_client):
+    """
+    Test that a stream whose body is never relayed is still released once.
+    """
+    mock_httpx_client.build_request = MagicMock(return_value=MagicMock())
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.aclose = AsyncMock()
+    mock_httpx_client.send.return_value = mock_response
+
+    response = await routing_service.stream_request(
+        service="self-healing-debugger",
+        endpoint="analyze",
+        method="GET",
+        headers={}
+    )
+    instance = routing_service._stream_instances[response]
+    assert instance.outstanding == 1
+
+    # Released by the cleanup hook, then again by a late relay
+    await routing_service.release_stream_response(response)
+    await routing_service.release_stream_response(response)
+
+    assert instance.outstanding == 0
+    assert mock_response.aclose.await_count == 2
+
+@pytest.mark.asyncio
+async def test_stream_request_unknown_endpoint(routing_service):
+    """
+    Test opening a stream to an unknown endpoint.
+    """
+    with pytest.raises(Exception) as excinfo:
+        await routing_service.stream_request(
+            service="pipeline-generator",
+            endpoint="unknown-endpoint",
+            method="GET",
+            headers={}
+        )
+    
+    assert "Unknown endpoint" in str(excinfo.value)
+
+@pytest.mark.asyncio
+async def test_iter_stream_response(routing_service):
+    """
+    Test relaying upstream chunks and reporting the byte count.
+    """
+    async def aiter_raw(chunk_size):
+        for chunk in [b"abc", b"defgh", b""]:
+            yield chunk
+    
+    mock_response = MagicMock()
+    mock_response.aiter_raw = aiter_raw
+    mock_response.aclose = AsyncMock()
+    on_complete = AsyncMock()
+    
+    # Relay the stream
+    chunks = [
+        chunk async for chunk in routing_service.iter_stream_response(
+            mock_response,
+            on_complete=on_complete
+        )
+    ]
+    
+    # Verify chunks were relayed untouched and the upstream was closed
+    assert b"".join(chunks) == b"abcdefgh"
+    mock_response.aclose.assert_awaited_once()
+    on_complete.assert_awaited_once_with(8)
+
+def test_filter_stream_headers():
+    """
+    Test that hop-by-hop headers are not relayed.
+    """
+    headers = Headers({
+        "Content-Type": "application/octet-stream",
+        "Content-Length": "8",
+        "Transfer-Encoding": "chunked",
+        "Connection": "keep-alive"
+    })
+    
+    result = RoutingService.filter_stream_headers(headers)
+    
+    assert result == {
+        "content-type": "application/octet-stream",
+        "content-length": "8"
+    }
+
+def mock_upstream(mock_httpx_client, status_code=200):
+    """
+    Make client.stream() usable as an async context manager returning a response.
+    """
+    response = AsyncMock()
+    response.status_code = status_code
+    response.headers = {"Content-Type": "application/json"}
+    response.aread.return_value = json.dumps({"message": "Success"}).encode()
+    mock_httpx_client.stream = MagicMock()
+    mock_httpx_client.stream.return_value.__aenter__ = AsyncMock(return_value=response)
+    mock_httpx_client.stream.return_value.__aexit__ = AsyncMock(return_value=False)
+    return response
+
+def make_registration(service_id, url, status=ServiceStatus.HEALTHY):
+    """
+    Create a registration for an instance of the self-healing-debugger service.
+    """
+    return ServiceRegistration(
+        service_id=service_id,
+        name="self-healing-debugger",
+        version="1.0.0",
+        url=url,
+        health_check_url=f"{url}/health",
+        endpoints={},
+        status=status,
+        last_health_check=datetime.utcnow()
+    )
+
+@pytest.mark.asyncio
+async def test_registered_instances_replace_static_url(routing_service, mock_httpx_client):
+    """
+    Test that traffic is spread over registered instances instead of the configured URL.
+    """
+    mock_upstream(mock_httpx_client)
+    routing_service._add_registration(make_registration("debugger-1", "http://debugger-1:8002"))
+    routing_service._add_registration(make_registration("debugger-2", "http://debugger-2:8002"))
+    routing_service._add_registration(
+        make_registration("debugger-3", "http://debugger-3:8002", ServiceStatus.DOWN)
+    )
+    
+    urls = set()
+    for _ in range(20):
+        await routing_service.route_request(
+            service="self-healing-debugger",
+            endpoint="analyze",
+            method="POST",
+            headers={}
+        )
+        urls.add(mock_httpx_client.stream.call_args[1]["url"])
+    
+    # Down instances and the static default never receive traffic
+    assert urls and urls <= {
+        "http://debugger-1:8002/api/v1/debug/analyze",
+        "http://debugger-2:8002/api/v1/debug/analyze"
+    }
+    
+    instances = await routing_service.get_service_instances("self-healing-debugger")
+    assert len(instances) == 3
+    stats = routing_service.get_load_balancer_stats()["self-healing-debugger"]
+    assert sum(instance["requests"] for instance in stats) == 20
+    assert all(instance["outstanding"] == 0 for instance in stats)
+
+@pytest.mark.asyncio
+async def test_instance_circuit_breaker_ejects_instance(mock_httpx_client):
+    """
+    Test that 5xx responses open the circuit of a single instance.
+    """
+    with patch('services.resilience_service.asyncio.create_task'):
+        resilience_service = ResilienceService()
+    routing_service = RoutingService(resilience_service=resilience_service)
+    routing_service._client = mock_httpx_client
+    
+    # The statically configured instance has no registration to mark down
+    response = mock_upstream(mock_httpx_client, status_code=503)
+    
+    # Failures up to the threshold open the instance's circuit
+    for _ in range(5):
+        response = await routing_service.route_request(
+            service="self-healing-debugger",
+            endpoint="analyze",
+            method="POST",
+            headers={}
+        )
+        assert response.status_code == 503
+    
+    is_available, retry_after = routing_service.check_availability("self-healing-debugger")
+    assert is_available is False
+    assert retry_after > 0
+    assert resilience_service.get_circuit_retry_after("self-healing-debugger@default") is not None
+    
+    # A registered instance takes over
+    routing_service._add_registration(make_registration("debugger-2", "http://debugger-2:8002"))
+    is_available, _ = routing_service.check_availability("self-healing-debugger")
+    assert is_available is True
+    
+    response.status_code = 200
+    await routing_service.route_request(
+        service="self-healing-debugger",
+        endpoint="analyze",
+        method="POST",
+        headers={}
+    )
+    assert "debugger-2" in mock_httpx_client.stream.call_args[1]["url"]
+    
+    await routing_service.cleanup()
+
+@pytest.mark.asyncio
+async def test_health_checks_run_concurrently(routing_service):
+    """
+    Test that probes run concurrently, bounded by the health check semaphore.
+    """
+    routing_service._health_check_semaphore = asyncio.Semaphore(3)
+    in_flight = 0
+    peak = 0
+    
+    async def slow_health_check(url):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return "debugger-0" not in url
+    
+    routing_service._check_service_health = slow_health_check
+    for i in range(6):
+        routing_service._add_registration(make_registration(f"debugger-{i}", f"http://debugger-{i}:8002"))
+        routing_service._schedule_health_check(f"debugger-{i}", delay=0)
+    
+    # Six 50ms probes three at a time finish in two rounds
+    await asyncio.sleep(0.2)
+    
+    assert peak == 3
+    assert routing_service._services["debugger-0"].status == ServiceStatus.DOWN
+    assert routing_service._services["debugger-1"].status == ServiceStatus.HEALTHY
+    
+    # Every probed instance is rescheduled around the jittered interval
+    interval = routing_service.settings.health_check_interval
+    jitter = routing_service.settings.health_check_jitter
+    now = time.monotonic()
+    for due in routing_service._health_check_due.values():
+        assert interval * (1 - jitter) - 1 <= due - now <= interval * (1 + jitter)
+
+@pytest.mark.asyncio
+async def test_passive_health_marks_instance_down(routing_service, mock_httpx_client):
+    """
+    Test that consecutive upstream failures mark an instance down and publish the change.
+    """
+    websocket_service = MagicMock()
+    websocket_service.emit_service_status_changed = AsyncMock()
+    routing_service.websocket_service = websocket_service
+    routing_service._check_service_health = AsyncMock(return_value=False)
+    routing_service._add_registration(make_registration("debugger-1", "http://debugger-1:8002"))
+    mock_upstream(mock_httpx_client, status_code=502)
+    
+    threshold = routing_service.settings.passive_health_failure_threshold
+    for _ in range(threshold):
+        await routing_service.route_request(
+            service="self-healing-debugger",
+            endpoint="analyze",
+            method="POST",
+            headers={}
+        )
+    await asyncio.sleep(0)
+    
+    registration = routing_service._services["debugger-1"]
+    assert registration.status == ServiceStatus.DOWN
+    websocket_service.emit_service_status_changed.assert_awaited_once()
+    service_id, status_data = websocket_service.emit_service_status_changed.call_args[0]
+    assert service_id == "debugger-1"
+    assert status_data["status"] == "down"
+    assert status_data["previousStatus"] == "healthy"
+    
+    # A passing probe brings the instance back
+    routing_service._check_service_health = AsyncMock(return_value=True)
+    await routing_service._probe_instance(registration)
+    await asyncio.sleep(0)
+    
+    assert registration.status == ServiceStatus.HEALTHY
+    assert websocket_service.emit_service_status_changed.await_count == 2
+    instance = routing_service._load_balancer.get_instance("self-healing-debugger", "debugger-1")
+    assert instance.consecutive_failures == 0
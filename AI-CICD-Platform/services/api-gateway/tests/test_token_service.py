@@ -5,7 +5,7 @@ from unittest.mock import MagicMock, patch, AsyncMock
 import jwt
 import json
 
-from ..services.token_service import TokenService
+from ..services.token_service import TokenService, RevocationFilter
 from ..models.gateway_models import (
     UserInfo,
     UserRole,
@@ -215,6 +215,123 @@ async def test_verify_token_invalid_type(token_service, mock_user):
     # Verify
     assert "token type" in str(excinfo.value).lower()
 
+@pytest.mark.asyncio
+async def test_verify_token_cached(token_service, mock_user):
+    """Test that repeat verifications are answered from the verified-token cache"""
+    # Create a token
+    token = await token_service.create_access_token(mock_user)
+    
+    # Test
+    user1 = await token_service.verify_token(token.access_token)
+    with patch('jwt.decode') as mock_decode:
+        user2 = await token_service.verify_token(token.access_token)
+    
+    # Verify
+    mock_decode.assert_not_called()
+    assert user2 == user1
+    
+    # Changes made by a caller do not leak into the cache
+    user2.permissions.append("admin:all")
+    user3 = await token_service.verify_token(token.access_token)
+    assert "admin:all" not in user3.permissions
+    assert len(token_service._verified_tokens) == 1
+
+@pytest.mark.asyncio
+async def test_verify_token_cached_invalid_type(token_service, mock_user):
+    """Test that cached tokens still enforce the expected token type"""
+    # Create and verify a token
+    token = await token_service.create_access_token(mock_user)
+    await token_service.verify_token(token.access_token)
+    
+    # Test
+    with pytest.raises(Exception) as excinfo:
+        await token_service.verify_token(token.access_token, token_type="refresh")
+    
+    # Verify
+    assert "token type" in str(excinfo.value).lower()
+
+@pytest.mark.asyncio
+async def test_verify_token_cached_revoked(token_service, mock_user):
+    """Test that revoking a cached token takes effect immediately"""
+    # Create and verify a token
+    token = await token_service.create_access_token(mock_user)
+    await token_service.verify_token(token.access_token)
+    
+    # Revoke it
+    payload = jwt.decode(
+        token.access_token,
+        options={"verify_signature": False}
+    )
+    await token_service._blacklist_token(payload["jti"], 3600)
+    if token_service._redis:
+        token_service._redis.exists.return_value = 1
+    
+    # Test
+    with pytest.raises(Exception) as excinfo:
+        await token_service.verify_token(token.access_token)
+    
+    # Verify
+    assert "revoked" in str(excinfo.value).lower()
+
+@pytest.mark.asyncio
+async def test_verify_token_revocation_filter_skips_redis(token_service, mock_user):
+    """Test that tokens absent from a synced revocation filter skip the Redis check"""
+    # Setup
+    token_service._revocations_synced = True
+    token = await token_service.create_access_token(mock_user)
+    
+    # Test
+    user = await token_service.verify_token(token.access_token)
+    
+    # Verify
+    assert user.user_id == mock_user.user_id
+    token_service._redis.exists.assert_not_called()
+
+def test_revocation_filter():
+    """Test revocation filter membership and false positive rate"""
+    # Setup
+    revocation_filter = RevocationFilter(capacity=1000, error_rate=0.01)
+    revoked = [f"revoked-{i}" for i in range(1000)]
+    for token_id in revoked:
+        revocation_filter.add(token_id)
+    
+    # Verify no false negatives
+    assert all(token_id in revocation_filter for token_id in revoked)
+    
+    # Verify false positives stay near the configured rate
+    false_positives = sum(f"valid-{i}" in revocation_filter for i in range(10000))
+    assert false_positives < 300
+
+@pytest.mark.asyncio
+async def test_rebuild_revocation_filter(token_service):
+    """Test that overlapping rebuilds keep revocations received meanwhile"""
+    # Setup
+    loaded = asyncio.Event()
+    indexed = ["revoked-1"]
+    
+    async def zrangebyscore(*args):
+        snapshot = list(indexed)
+        await loaded.wait()
+        return snapshot
+    
+    token_service._redis.zrangebyscore = zrangebyscore
+    
+    # Test
+    first = asyncio.ensure_future(token_service._rebuild_revocation_filter())
+    second = asyncio.ensure_future(token_service._rebuild_revocation_filter())
+    await asyncio.sleep(0)
+    indexed.append("revoked-2")
+    token_service._add_revoked_token("revoked-2")
+    loaded.set()
+    await asyncio.gather(first, second)
+    
+    # Verify the index was read instead of scanning the keyspace
+    token_service._redis.scan_iter.assert_not_called()
+    token_service._redis.zremrangebyscore.assert_called()
+    assert token_service._revocations_synced is True
+    assert "revoked-1" in token_service._revocation_filter
+    assert "revoked-2" in token_service._revocation_filter
+
 # Test refresh token functionality
 @pytest.mark.asyncio
 async def test_refresh_access_token(token_service, mock_user, mock_request):
@@ -283,23 +400,33 @@ async def test_revoke_token(token_service, mock_user):
     # Create a token
     token = await token_service.create_access_token(mock_user)
     
-    # Test
-    await token_service.revoke_token(token.access_token)
-    
-    # Verify token is blacklisted
     payload = jwt.decode(
         token.access_token,
         options={"verify_signature": False}
     )
     token_id = payload["jti"]
     
+    # Index a refresh token for the access token
+    if token_service._redis:
+        refresh_key = f"{token_service.REFRESH_PREFIX}{mock_user.user_id}:refresh_id"
+        token_service._redis.smembers.return_value = {refresh_key}
+        token_service._redis.mget.return_value = [json.dumps({"access_token_id": token_id})]
+        token_service._redis.delete.reset_mock()
+    
+    # Test
+    await token_service.revoke_token(token.access_token)
+    
+    # Verify token is blacklisted
+    
     is_blacklisted = await token_service._is_token_blacklisted(token_id)
     assert is_blacklisted is True
     
-    # Verify refresh token is also revoked
+    # Verify refresh token is also revoked via the per-user index
     if token_service._redis:
-        token_service._redis.keys.assert_called_once()
-        token_service._redis.delete.assert_called_once()
+        token_service._redis.keys.assert_not_called()
+        token_service._redis.smembers.assert_called_once()
+        token_service._redis.delete.assert_called_once_with(refresh_key)
+        token_service._redis.srem.assert_called_once()
 
 @pytest.mark.asyncio
 async def test_revoke_all_user_tokens(token_service, mock_user):
@@ -307,6 +434,8 @@ async def test_revoke_all_user_tokens(token_service, mock_user):
     # Create multiple tokens for the user
     token1 = await token_service.create_access_token(mock_user)
     token2 = await token_service.create_access_token(mock_user)
+    if token_service._redis:
+        token_service._redis.hgetall.return_value = {}
     
     # Test
     await token_service.revoke_all_user_tokens(mock_user.user_id)
@@ -315,7 +444,10 @@ async def test_revoke_all_user_tokens(token_service, mock_user):
     if token_service._redis:
         # Check that Redis operations were called
         token_service._redis.hgetall.assert_called_once()
-        token_service._redis.keys.assert_called_once()
+        token_service._redis.keys.assert_not_called()
+        token_service._redis.smembers.assert_called_once_with(
+            f"{token_service.REFRESH_INDEX_PREFIX}{mock_user.user_id}"
+        )
         token_service._redis.delete.assert_called()
     else:
         # For in-memory fallback, check that tokens are in blacklist
@@ -331,6 +463,20 @@ async def test_revoke_all_user_tokens(token_service, mock_user):
         # Check if user's tokens are removed from user_tokens
         assert mock_user.user_id not in token_service._user_tokens
 
+@pytest.mark.asyncio
+async def test_create_refresh_token_indexed(token_service):
+    """Test that refresh tokens are added to the per-user index"""
+    # Test
+    await token_service._create_refresh_token("test_user_id", "access_id")
+    
+    # Verify
+    if token_service._redis:
+        index_key = f"{token_service.REFRESH_INDEX_PREFIX}test_user_id"
+        refresh_key = token_service._redis.set.call_args[0][0]
+        args = token_service._redis.eval.call_args[0]
+        assert args[1:4] == (1, index_key, refresh_key)
+        assert args[4] == token_service.settings.jwt_refresh_expiration_days * 86400 + 1
+
 # Test token blacklisting
 @pytest.mark.asyncio
 async def test_blacklist_token(token_service):
@@ -345,6 +491,14 @@ async def test_blacklist_token(token_service):
             "1",
             ex=3600
         )
+        token_service._redis.publish.assert_called_once_with(
+            token_service.REVOCATION_CHANNEL,
+            "test_token_id"
+        )
+        index = token_service._redis.zadd.call_args[0]
+        assert index[0] == token_service.BLACKLIST_INDEX_KEY
+        assert "test_token_id" in index[1]
+        assert "test_token_id" in token_service._revocation_filter
     else:
         assert "test_token_id" in token_service._blacklist
 
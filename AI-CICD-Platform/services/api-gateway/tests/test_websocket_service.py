@@ -0,0 +1,117 @@
+import pytest
+import sys
+import os
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# Add the parent directory to sys.path to allow imports from the main application
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.websocket_service import (
+    WebSocketService,
+    WebSocketEvent,
+    EventPriority,
+    AUTHENTICATED_ROOM
+)
+
+@pytest.fixture
+def websocket_service():
+    """Create a WebSocketService with a mocked Socket.IO server"""
+    service = WebSocketService()
+    service.sio = MagicMock()
+    service.sio.emit = AsyncMock()
+    service.sio.enter_room = AsyncMock()
+    service.settings = service.settings.model_copy(update={
+        "websocket_coalesce_interval": 0.05,
+        "websocket_send_queue_limit": 10
+    })
+    return service
+
+@pytest.mark.asyncio
+async def test_authenticate_joins_rooms(websocket_service):
+    """Test that authenticated connections join their user and role rooms"""
+    await websocket_service.handle_authenticate("sid-1", {"token": "token"})
+    
+    user_id = websocket_service.sid_to_user["sid-1"]
+    rooms = [call.args[1] for call in websocket_service.sio.enter_room.call_args_list]
+    assert rooms == [AUTHENTICATED_ROOM, f"user:{user_id}", "role:user"]
+    
+    await websocket_service.handle_disconnect("sid-1")
+    assert user_id not in websocket_service.connected_users
+    assert user_id not in websocket_service.user_roles
+    
+    await websocket_service.cleanup()
+
+@pytest.mark.asyncio
+async def test_emit_event_targets_rooms(websocket_service):
+    """Test that each event is emitted once to the matching rooms"""
+    await websocket_service.emit_event(WebSocketEvent(
+        event_type="system_alert",
+        data={"alertId": "a1"},
+        target_users=["u1", "u2"]
+    ))
+    await websocket_service.emit_event(WebSocketEvent(
+        event_type="system_alert",
+        data={"alertId": "a2"},
+        target_roles=["admin"]
+    ))
+    await websocket_service.emit_event(WebSocketEvent(
+        event_type="system_alert",
+        data={"alertId": "a3"},
+        priority=EventPriority.HIGH
+    ))
+    
+    calls = websocket_service.sio.emit.call_args_list
+    assert len(calls) == 3
+    assert calls[0].kwargs["to"] == ["user:u1", "user:u2"]
+    assert calls[1].kwargs["to"] == ["role:admin"]
+    assert calls[2].kwargs["to"] == [AUTHENTICATED_ROOM]
+    assert calls[2].args[1] == {"alertId": "a3", "priority": EventPriority.HIGH}
+
+@pytest.mark.asyncio
+async def test_progress_events_are_coalesced(websocket_service):
+    """Test that only the latest progress update per key is sent each interval"""
+    for progress in range(10):
+        await websocket_service.emit_pipeline_execution_updated(
+            "exec-1", "pipe-1", {"progress": progress}
+        )
+    await websocket_service.emit_ml_training_progress("train-1", {"epoch": 3})
+    
+    websocket_service.sio.emit.assert_not_awaited()
+    await asyncio.sleep(0.1)
+    
+    calls = websocket_service.sio.emit.call_args_list
+    assert len(calls) == 2
+    assert calls[0].args[1]["execution"] == {"progress": 9}
+    assert calls[1].args[1]["progress"] == {"epoch": 3}
+
+@pytest.mark.asyncio
+async def test_completed_event_supersedes_pending_updates(websocket_service):
+    """Test that a completion event discards pending coalesced updates"""
+    await websocket_service.emit_pipeline_execution_updated("exec-1", "pipe-1", {"progress": 50})
+    await websocket_service.emit_pipeline_execution_completed("exec-1", "pipe-1", {"status": "success"})
+    await asyncio.sleep(0.1)
+    
+    events = [call.args[0] for call in websocket_service.sio.emit.call_args_list]
+    assert events == ["pipeline_execution_completed"]
+
+@pytest.mark.asyncio
+async def test_slow_consumers_drop_low_priority_events(websocket_service):
+    """Test the drop policy for connections with a deep send backlog"""
+    websocket_service._backlogs = {"slow": 15, "stalled": 25}
+    
+    await websocket_service.emit_event(WebSocketEvent(
+        event_type="system_metrics_update", data={}, priority=EventPriority.LOW
+    ))
+    await websocket_service.emit_event(WebSocketEvent(
+        event_type="pipeline_created", data={}, priority=EventPriority.MEDIUM
+    ))
+    await websocket_service.emit_event(WebSocketEvent(
+        event_type="system_alert", data={}, priority=EventPriority.HIGH
+    ))
+    
+    calls = websocket_service.sio.emit.call_args_list
+    assert sorted(calls[0].kwargs["skip_sid"]) == ["slow", "stalled"]
+    assert calls[1].kwargs["skip_sid"] == ["stalled"]
+    assert calls[2].kwargs["skip_sid"] is None
+    assert websocket_service.dropped_events == 3